@@ -0,0 +1,178 @@
+import argparse
+import importlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+SUITES = ("ingest", "indicators", "queries", "collector")
+DEFAULT_OUTPUT_DIRECTORY = os.path.join("benchmarks", "results")
+
+# Sizes of a full run, and of a --quick run that finishes in seconds
+SIZES = {
+    "orm_rows": (20_000, 2_000),
+    "bulk_rows": (200_000, 20_000),
+    "history_days": (30, 3),
+    "indicator_candles": (1_000_000, 100_000),
+    "streaming_candles": (100_000, 10_000),
+    "query_candles": (350_000, 40_000),
+    "query_repeats": (20, 5),
+    "collector_markets": (4, 2),
+    "collector_ticks": (20, 5),
+    "repeats": (3, 1),
+}
+# Metrics where a higher value is better; for every other metric lower is better
+HIGHER_IS_BETTER = ("_per_sec",)
+COMPARED = ("_per_sec", "best_seconds", "p50_ms", "p95_ms", "peak_memory_bytes")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the ingest, indicator, query and collector hot paths.",
+    )
+    parser.add_argument(
+        "suites",
+        nargs="*",
+        metavar="SUITE",
+        help=f"Suites to run: {', '.join(SUITES)} (default: all)",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Run small sizes, e.g. in CI"
+    )
+    parser.add_argument(
+        "--output", help="JSON results file (default: benchmarks/results/<time>.json)"
+    )
+    parser.add_argument("--compare", metavar="JSON", help="Earlier results to compare")
+    parser.add_argument(
+        "--database-url",
+        help="PostgreSQL database to benchmark (default: DATABASE_URL)",
+    )
+    parser.add_argument(
+        "--provider-latency-ms",
+        type=float,
+        default=20.0,
+        help="Latency the fake provider adds to each response",
+    )
+    for name, (full, _) in SIZES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+    args.suites = args.suites or list(SUITES)
+    for name, (full, quick) in SIZES.items():
+        if getattr(args, name) is None:
+            setattr(args, name, quick if args.quick else full)
+    args.provider_latency = args.provider_latency_ms / 1000
+    return args
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _database_info(engine):
+    with engine.connect() as connection:
+        version = connection.exec_driver_sql("SHOW server_version").scalar()
+    return {"dialect": engine.dialect.name, "server_version": version}
+
+
+def _quiet_console():
+    # Per-operation INFO logs on the console would dominate the timings
+    for logger in logging.Logger.manager.loggerDict.values():
+        for handler in getattr(logger, "handlers", []):
+            if type(handler) is logging.StreamHandler:
+                handler.setLevel(logging.WARNING)
+
+
+def compare(results, baseline):
+    """
+    Return lines comparing each metric with an earlier run.
+
+    Returns:
+        list: "suite.benchmark.metric: old -> new (+x.x%)" lines, with "better" or
+        "worse" appended for changes over 5%.
+    """
+    lines = []
+    for suite, benchmarks in results["results"].items():
+        for name, metrics in benchmarks.items():
+            old_metrics = baseline.get("results", {}).get(suite, {}).get(name, {})
+            for metric, value in metrics.items():
+                old = old_metrics.get(metric)
+                if not metric.endswith(COMPARED) or not old:
+                    continue
+                change = (value - old) / old
+                note = ""
+                if abs(change) > 0.05:
+                    better = (change > 0) == metric.endswith(HIGHER_IS_BETTER)
+                    note = " better" if better else " worse"
+                lines.append(
+                    f"{suite}.{name}.{metric}: {old:.4g} -> {value:.4g} "
+                    f"({change:+.1%}){note}"
+                )
+    return lines
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.database_url:
+        # Must be set before src is imported, since the engine is built on import
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from src.models.base import engine
+
+    _quiet_console()
+    started_at = datetime.now(timezone.utc)
+    report = {
+        "started_at": started_at.isoformat(),
+        "git_commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "database": _database_info(engine),
+        "options": {
+            name: getattr(args, name)
+            for name in ("quick", *SIZES, "provider_latency_ms")
+        },
+        "results": {},
+    }
+    for suite in args.suites:
+        print(f"Running {suite} benchmarks...", flush=True)
+        module = importlib.import_module(f"benchmarks.{suite}")
+        report["results"][suite] = module.run(engine, args)
+        for name, metrics in report["results"][suite].items():
+            summary = ", ".join(
+                f"{metric}={value:.4g}"
+                for metric, value in metrics.items()
+                if metric.endswith(COMPARED)
+            )
+            print(f"  {name}: {summary}")
+
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIRECTORY, f"{started_at:%Y%m%dT%H%M%SZ}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        print(f"Compared with {args.compare}:")
+        for line in compare(report, baseline):
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import asyncio
+import tempfile
+
+from benchmarks.runner import (
+    BENCHMARK_MARKET,
+    Unlimited,
+    measure_latency,
+    rollback_session,
+)
+from src.data_collection.async_collector import (
+    AsyncCoinAPIClient,
+    AsyncCoinGeckoClient,
+    collect_tick,
+    default_sources,
+)
+from src.data_collection.backfill import CreditBudget
+from src.data_collection.coinapi_client import CoinAPIClient
+from src.data_collection.coingecko_client import CoinGeckoClient, FetchCache
+from src.data_collection.collector import (
+    collect_and_store_market_data,
+    collect_and_store_ohlcv_data,
+)
+from src.data_collection.fake_provider import FakeProviderServer
+from src.data_collection.response_cache import ResponseCache
+from src.data_collection.symbols import Market
+
+QUOTES = ("USD", "EUR", "USDT", "GBP")
+
+
+def benchmark_markets(count):
+    """Return ``count`` benchmark markets, spread over the quote currencies."""
+    return [
+        Market(
+            f"{BENCHMARK_MARKET.exchange}{index // len(QUOTES)}",
+            f"XRP_{QUOTES[index % len(QUOTES)]}",
+        )
+        for index in range(count)
+    ]
+
+
+def run(engine, options):
+    """
+    Measure per-tick collector latency against the fake provider, for the
+    sequential collector and the concurrent asyncio tick.
+
+    Every tick fetches CoinGecko markets and the latest CoinAPI candle of
+    ``collector_markets`` markets, with ``provider_latency`` seconds added to each
+    response, and stores them in a session rolled back at the end.
+
+    Returns:
+        dict: "sync_tick" and "async_tick" latency percentiles and peak memory.
+    """
+    markets = benchmark_markets(options.collector_markets)
+    results = {}
+    with FakeProviderServer(
+        latency=options.provider_latency
+    ) as server, tempfile.TemporaryDirectory() as cache_dir, rollback_session(
+        engine
+    ) as db:
+        coingecko_client = CoinGeckoClient(
+            fetch_cache=FetchCache(),
+            cache=ResponseCache(cache_dir),
+            rate_limiter=Unlimited(),
+            base_url=server.coingecko_url,
+        )
+        coinapi_client = CoinAPIClient(
+            cache=ResponseCache(cache_dir),
+            rate_limiter=Unlimited(),
+            base_url=server.coinapi_url,
+        )
+        budget = CreditBudget(None)
+
+        def sync_tick():
+            collect_and_store_market_data(db, coingecko_client, markets)
+            for market in markets:
+                collect_and_store_ohlcv_data(db, coinapi_client, market, budget)
+
+        sources = default_sources(
+            AsyncCoinGeckoClient(coingecko_client),
+            AsyncCoinAPIClient(coinapi_client),
+            markets,
+            budget,
+        )
+
+        def async_tick():
+            asyncio.run(collect_tick(db, sources))
+
+        setting = {
+            "markets": len(markets),
+            "provider_latency_ms": options.provider_latency * 1000,
+        }
+        results["sync_tick"] = measure_latency(
+            sync_tick, options.collector_ticks, **setting
+        )
+        results["async_tick"] = measure_latency(
+            async_tick, options.collector_ticks, **setting
+        )
+    return results
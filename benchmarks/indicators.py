@@ -0,0 +1,35 @@
+from benchmarks.runner import START, measure, throughput
+from src.data_collection.synthetic import SyntheticSeries
+from src.data_processing.indicators import compute_indicators
+from src.data_processing.streaming_indicators import StreamingIndicators
+
+
+def run(engine, options):
+    """
+    Measure indicator throughput: the vectorized engine over a full history and
+    the streaming state over candles arriving one at a time.
+
+    Returns:
+        dict: "vectorized" and "streaming" entries in candles/sec.
+    """
+    ohlcv, _ = SyntheticSeries(START).next_chunk(options.indicator_candles)
+    close = ohlcv["close"]
+    compute_indicators(close[:1000])  # Warm up imports and allocator
+
+    streamed = close[: options.streaming_candles].tolist()
+
+    def stream():
+        state = StreamingIndicators()
+        for value in streamed:
+            state.push(value)
+
+    return {
+        "vectorized": throughput(
+            len(close),
+            measure(lambda: compute_indicators(close), options.repeats),
+            "candles",
+        ),
+        "streaming": throughput(
+            len(streamed), measure(stream, options.repeats), "candles"
+        ),
+    }
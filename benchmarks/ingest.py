@@ -0,0 +1,119 @@
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+
+from benchmarks.runner import (
+    BENCHMARK_MARKET,
+    START,
+    Unlimited,
+    measure,
+    rollback_session,
+    throughput,
+)
+from src.data_collection.coinapi_client import CoinAPIClient
+from src.data_collection.collector import collect_historical_data
+from src.data_collection.fake_provider import FakeProviderServer
+from src.data_collection.symbols import DEFAULT_MARKET
+from src.data_collection.synthetic import SyntheticSeries, plain_columns
+from src.data_collection.response_cache import ResponseCache
+from src.models.bulk import bulk_insert, upsert_rows
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+
+
+def synthetic_candles(count, market=BENCHMARK_MARKET):
+    """Return a columnar OHLCV batch of plain Python values."""
+    ohlcv, _ = SyntheticSeries(START, market).next_chunk(count)
+    return plain_columns(ohlcv)
+
+
+def _orm_insert(db, columns):
+    names = list(columns)
+    db.add_all(
+        OHLCVData15Min(**dict(zip(names, values))) for values in zip(*columns.values())
+    )
+
+
+def _clear(db, market, start=None, end=None):
+    statement = delete(OHLCVData15Min).where(
+        OHLCVData15Min.exchange == market.exchange,
+        OHLCVData15Min.symbol == market.symbol,
+    )
+    if start is not None:
+        statement = statement.where(OHLCVData15Min.timestamp.between(start, end))
+    db.execute(statement)
+    db.commit()
+
+
+def run(engine, options):
+    """
+    Measure rows/sec of the ORM, bulk insert and upsert write paths, and of
+    collect_historical_data paging through the fake provider.
+
+    Every write happens in a session that is rolled back at the end, so neither the
+    benchmark series nor the default series is left changed.
+
+    Returns:
+        dict: One entry per write path.
+    """
+    results = {}
+    paths = {
+        "orm": (options.orm_rows, _orm_insert),
+        "bulk_copy": (
+            options.bulk_rows,
+            lambda db, columns: bulk_insert(db, OHLCVData15Min, columns, "copy"),
+        ),
+        "bulk_values": (
+            options.bulk_rows,
+            lambda db, columns: bulk_insert(db, OHLCVData15Min, columns, "values"),
+        ),
+        "upsert_copy": (
+            options.bulk_rows,
+            lambda db, columns: upsert_rows(db, OHLCVData15Min, columns, "copy"),
+        ),
+    }
+    with rollback_session(engine) as db:
+        for name, (rows, write) in paths.items():
+            columns = synthetic_candles(rows)
+
+            def setup():
+                _clear(db, BENCHMARK_MARKET)
+                return columns
+
+            def insert(batch):
+                write(db, batch)
+                db.commit()
+
+            results[name] = throughput(rows, measure(insert, options.repeats, setup))
+
+        # One day per page, each written and committed on its own like a backfill
+        end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        start = end - timedelta(days=options.history_days)
+        with FakeProviderServer(
+            latency=options.provider_latency
+        ) as server, tempfile.TemporaryDirectory() as cache_dir:
+            for name, bulk in (
+                ("collect_historical_bulk", True),
+                ("collect_historical_orm", False),
+            ):
+
+                def setup():
+                    _clear(db, DEFAULT_MARKET, start, end + timedelta(minutes=15))
+                    # A cold cache, so every page comes from the provider
+                    return CoinAPIClient(
+                        cache=ResponseCache(tempfile.mkdtemp(dir=cache_dir)),
+                        rate_limiter=Unlimited(),
+                        base_url=server.coinapi_url,
+                    )
+
+                stats = measure(
+                    lambda client: collect_historical_data(
+                        db, start, end, client, bulk
+                    ),
+                    options.repeats,
+                    setup,
+                )
+                results[name] = throughput(
+                    stats["result"]["rows"], stats, pages=stats["result"]["pages"]
+                )
+    return results
@@ -0,0 +1,82 @@
+import functools
+from datetime import timedelta
+
+from sqlalchemy import select
+
+from benchmarks.runner import (
+    BENCHMARK_MARKET,
+    START,
+    measure_latency,
+    rollback_session,
+)
+from src.data_collection.synthetic import SyntheticSeries, plain_columns
+from src.data_processing.reader import read_arrays
+from src.models.bulk import bulk_insert
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+
+
+def _read_arrays(db, start, end):
+    return read_arrays(
+        db,
+        OHLCVData15Min,
+        start,
+        end,
+        exchange=BENCHMARK_MARKET.exchange,
+        symbol=BENCHMARK_MARKET.symbol,
+    )
+
+
+def _read_orm(db, start, end):
+    return (
+        db.execute(
+            select(OHLCVData15Min)
+            .where(
+                OHLCVData15Min.exchange == BENCHMARK_MARKET.exchange,
+                OHLCVData15Min.symbol == BENCHMARK_MARKET.symbol,
+                OHLCVData15Min.timestamp >= start,
+                OHLCVData15Min.timestamp < end,
+            )
+            .order_by(OHLCVData15Min.timestamp)
+        )
+        .scalars()
+        .all()
+    )
+
+
+def run(engine, options):
+    """
+    Measure range-read latency over a synthetic history of ``query_candles``
+    candles: the columnar reader for the last day, month, year and the full
+    history, and ORM objects for the last day and month.
+
+    Returns:
+        dict: Latency percentiles and peak memory per reader and window.
+    """
+    results = {}
+    with rollback_session(engine) as db:
+        series = SyntheticSeries(START, BENCHMARK_MARKET)
+        while series.generated < options.query_candles:
+            ohlcv, _ = series.next_chunk(
+                min(100_000, options.query_candles - series.generated)
+            )
+            bulk_insert(db, OHLCVData15Min, plain_columns(ohlcv))
+        db.commit()
+        end = series.timestamp + timedelta(minutes=15)
+
+        windows = {
+            "1d": timedelta(days=1),
+            "30d": timedelta(days=30),
+            "365d": timedelta(days=365),
+            "all": end - START,
+        }
+        for name, length in windows.items():
+            results[f"read_arrays_{name}"] = measure_latency(
+                functools.partial(_read_arrays, db, end - length, end),
+                options.query_repeats,
+            )
+        for name in ("1d", "30d"):
+            results[f"orm_{name}"] = measure_latency(
+                functools.partial(_read_orm, db, end - windows[name], end),
+                options.query_repeats,
+            )
+    return results
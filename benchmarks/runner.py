@@ -0,0 +1,133 @@
+import gc
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from src.data_collection.symbols import Market
+
+# Series the benchmarks write to, apart from every collected market
+BENCHMARK_MARKET = Market("BENCHMARK", "XRP_USD")
+START = datetime(2010, 1, 1, tzinfo=timezone.utc)
+
+
+class Unlimited:
+    """A rate limiter that never waits, for clients of the fake provider."""
+
+    def acquire(self, tokens=1):
+        return 0.0
+
+
+def measure(fn, repeats=3, setup=None):
+    """
+    Time a function and measure its peak memory.
+
+    The function is timed ``repeats`` times, then run once more under tracemalloc
+    for its peak Python and NumPy allocation, so tracing never slows the timed runs.
+
+    Args:
+        fn (callable): Called with the value returned by ``setup``, if any.
+        repeats (int, optional): Timed runs. Defaults to 3.
+        setup (callable, optional): Called before every run, untimed.
+
+    Returns:
+        dict: "best_seconds", "median_seconds", "runs" and "peak_memory_bytes",
+        plus "result", the value returned by the last timed run.
+    """
+    timings = []
+    result = None
+    for _ in range(repeats):
+        argument = setup() if setup else None
+        gc.collect()
+        started = time.perf_counter()
+        result = fn(argument) if setup else fn()
+        timings.append(time.perf_counter() - started)
+
+    argument = setup() if setup else None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(argument) if setup else fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "runs": repeats,
+        "peak_memory_bytes": peak,
+        "result": result,
+    }
+
+
+def throughput(count, stats, unit="rows", **extra):
+    """Return a benchmark entry for ``count`` items processed per timed run."""
+    return {
+        unit: count,
+        **extra,
+        "best_seconds": stats["best_seconds"],
+        "median_seconds": stats["median_seconds"],
+        f"{unit}_per_sec": count / stats["best_seconds"],
+        "peak_memory_bytes": stats["peak_memory_bytes"],
+    }
+
+
+def measure_latency(fn, repeats=20, **extra):
+    """
+    Measure the latency distribution and peak memory of a repeated operation.
+
+    One untimed call warms up connections and caches first; the peak memory is
+    taken from one more call under tracemalloc after the timed calls.
+
+    Returns:
+        dict: "mean_ms", "p50_ms", "p95_ms", "max_ms", "runs" and
+        "peak_memory_bytes", plus any ``extra`` keys.
+    """
+    fn()
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+        "max_ms": timings[-1] * 1000,
+        **extra,
+        "runs": repeats,
+        "peak_memory_bytes": peak,
+    }
+
+
+@contextmanager
+def rollback_session(engine):
+    """
+    Yield a session whose work is rolled back when the block exits.
+
+    The session runs inside an outer transaction and turns its own commits into
+    savepoint releases, so code that commits, like the collectors, can be
+    benchmarked against the real tables without leaving rows behind.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
@@ -1,24 +1,45 @@
 from datetime import datetime, timedelta, timezone
+import argparse
 import math
 
 import path_setup  # Needed to access src folder
-from src.data_collection.collector import collect_historical_data
+from src.data_collection.backfill import (
+    job_id_for_range,
+    job_range,
+    latest_incomplete_job,
+    repair_gaps,
+    resume_backfill,
+    run_backfill,
+)
+from src.data_collection.market_backfill import (
+    repair_market_gaps,
+    run_market_backfill,
+)
+from src.data_collection.rate_limits import CreditLedger
+from src.data_processing.gaps import (
+    count_missing_buckets,
+    find_missing_ranges,
+    gaps_to_windows,
+)
 from src.models.base import SessionLocal
+from src.models.rollups import refresh_rollups
 from src.utils.logger import scripts_logger as logger
-from src.utils.config import config
 from sqlalchemy import func
 from src.models import get_models
 
 # Get the models
 models = get_models()
 OHLCVData15Min = models["OHLCVData15Min"]
+MarketData15Min = models["MarketData15Min"]
 
 # Constants
 API_CALLS_PER_DAY = 96  # 15-minute intervals for 24 hours
 ROWS_PER_API_CALL = 100
-DAILY_LIMIT = config["api_limits"]["coinapi_daily"]
 MAX_BACKFILL_DAYS = 90
 
+# The daily CoinAPI budget, shared with the live collector and other back-fills
+credit_budget = CreditLedger.from_config()
+
 
 def round_to_15_minutes(dt):
     minutes_to_subtract = dt.minute % 15
@@ -29,36 +50,119 @@ def calculate_api_calls(intervals):
     return math.ceil(intervals / ROWS_PER_API_CALL)
 
 
-def update_daily_limit(api_calls_used):
-    global DAILY_LIMIT
-    DAILY_LIMIT -= api_calls_used
+def log_backfill_stats(stats):
+    logger.info(
+        f"Bulk ingest wrote {stats['rows']} rows in {stats['seconds']:.2f}s "
+        f"({stats['rows_per_sec']:.0f} rows/sec)"
+    )
+    forecast = credit_budget.forecast()
+    if forecast["exhausted_at"] is not None:
+        logger.warning(
+            f"At {forecast['credits_per_hour']:.1f} credits/hour the CoinAPI budget "
+            f"runs out at {forecast['exhausted_at']:%H:%M} UTC"
+        )
+    if stats["skipped_windows"]:
+        logger.warning(
+            f"{stats['skipped_windows']} windows were skipped because the credit "
+            "budget ran out. Re-run with --resume once credits reset."
+        )
 
 
 def bf_data(start_date, end_date):
     db = SessionLocal()
     try:
-        collect_historical_data(db, start_date, end_date)
+        job_id = job_id_for_range(start_date, end_date)
+        logger.info(f"Back-fill job id: {job_id}")
+        stats = run_backfill(
+            db, start_date, end_date, budget=credit_budget, job_id=job_id
+        )
+        log_backfill_stats(stats)
+        # Back-filled candles are older than the rollups' incremental window
+        refresh_rollups(db, start_date, end_date)
+        return stats
+    finally:
+        db.close()
+
+
+def resume(job_id=None):
+    db = SessionLocal()
+    try:
+        # Resolved here, since the job is no longer incomplete once resumed
+        job_id = job_id or latest_incomplete_job(db)
+        stats = resume_backfill(db, job_id, budget=credit_budget)
+        if stats is not None:
+            log_backfill_stats(stats)
+            # Resumed candles are older than the rollups' incremental window; the
+            # journal holds the range the job covers
+            refresh_rollups(db, *job_range(db, job_id))
+        return stats
     finally:
         db.close()
 
 
-def get_last_data_timestamp():
+def repair(start_date, end_date):
     db = SessionLocal()
     try:
-        last_timestamp = db.query(func.max(OHLCVData15Min.timestamp)).scalar()
-        if last_timestamp is not None:
-            return last_timestamp.astimezone(timezone.utc)
+        stats = repair_gaps(db, start_date, end_date, budget=credit_budget)
+        if stats is not None:
+            log_backfill_stats(stats)
+            # Repaired candles are older than the rollups' incremental window
+            refresh_rollups(db, start_date, end_date)
+        return stats
+    finally:
+        db.close()
+
+
+def log_market_backfill_stats(stats):
+    logger.info(
+        f"Market data back-fill wrote {stats['rows']} rows from {stats['pages']} "
+        f"CoinGecko pages in {stats['seconds']:.2f}s; "
+        f"{stats['empty_buckets']} intervals had no data"
+    )
+
+
+def bf_market_data(start_date, end_date):
+    db = SessionLocal()
+    try:
+        stats = run_market_backfill(db, start_date, end_date)
+        log_market_backfill_stats(stats)
+        return stats
+    finally:
+        db.close()
+
+
+def repair_market(start_date, end_date):
+    db = SessionLocal()
+    try:
+        stats = repair_market_gaps(db, start_date, end_date)
+        if stats is not None:
+            log_market_backfill_stats(stats)
+        return stats
+    finally:
+        db.close()
+
+
+def get_first_data_timestamp():
+    db = SessionLocal()
+    try:
+        first_timestamp = db.query(func.min(OHLCVData15Min.timestamp)).scalar()
+        if first_timestamp is not None:
+            return first_timestamp.astimezone(timezone.utc)
         else:
             return None
     finally:
         db.close()
 
 
-def calculate_missing_intervals(last_timestamp, current_time):
-    if last_timestamp is None:
-        return None
-    time_difference = current_time - last_timestamp
-    return int(time_difference.total_seconds() / (15 * 60))  # 15 minutes in seconds
+def find_data_gaps(start_date, end_date):
+    """
+    Return the gaps of every 15-minute table between two dates, keyed by table.
+    """
+    db = SessionLocal()
+    try:
+        return find_missing_ranges(db, start_date, end_date)
+    finally:
+        db.close()
 
 
 def prompt_user_for_days():
@@ -76,9 +180,9 @@ def prompt_user_for_days():
                 f"Retrieving {days} days of data will require approximately {api_calls} API calls."
             )
 
-            if api_calls > DAILY_LIMIT:
+            if credit_budget.limit is not None and api_calls > credit_budget.remaining:
                 print(
-                    f"Warning: This exceeds the daily limit of {DAILY_LIMIT} API calls."
+                    f"Warning: This exceeds the {credit_budget.remaining} remaining API calls."
                 )
 
             confirm = input("Do you want to proceed? (yes/no): ").lower()
@@ -93,13 +197,16 @@ def prompt_user_for_days():
             print("Invalid input. Please enter a number.")
 
 
-def prompt_user_for_backfill(missing_intervals):
-    api_calls = calculate_api_calls(missing_intervals)
-    print(f"There are {missing_intervals} missing 15-minute intervals, totalling {missing_intervals / 4} hours.")
+def prompt_user_for_backfill(missing_intervals, gap_count, api_calls):
+    print(
+        f"There are {missing_intervals} missing 15-minute intervals in {gap_count} gaps, totalling {missing_intervals / 4} hours."
+    )
     print(f"This will require approximately {api_calls} API calls.")
 
-    if api_calls > DAILY_LIMIT:
-        print(f"Warning: This exceeds the daily limit of {DAILY_LIMIT} API calls.")
+    if credit_budget.limit is not None and api_calls > credit_budget.remaining:
+        print(
+            f"Warning: This exceeds the {credit_budget.remaining} remaining API calls."
+        )
 
     while True:
         confirm = input("Do you want to proceed with the back-fill? (yes/no): ").lower()
@@ -111,11 +218,28 @@ def prompt_user_for_backfill(missing_intervals):
             print("Invalid input. Please enter 'yes' or 'no'.")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Back-fill historical OHLCV data.")
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="latest",
+        metavar="JOB_ID",
+        help="Refetch only the incomplete windows of a journaled back-fill job "
+        "(defaults to the most recent incomplete job).",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
     current_time = round_to_15_minutes(datetime.now(timezone.utc))
-    last_timestamp = get_last_data_timestamp()
+    first_timestamp = get_first_data_timestamp()
 
-    if last_timestamp is None:
+    if args.resume:
+        logger.info("Resuming journaled back-fill.")
+        resume(None if args.resume == "latest" else args.resume)
+    elif first_timestamp is None:
         logger.info("No existing data found. Prompting for initial back-fill.")
         days = prompt_user_for_days()
         if days is not None:
@@ -125,46 +249,51 @@ if __name__ == "__main__":
             logger.info(
                 f"Starting historical data back-fill from {start_date} to {end_date}"
             )
-            bf_data(start_date, end_date)
-
-            api_calls_used = calculate_api_calls(days * API_CALLS_PER_DAY)
-            update_daily_limit(api_calls_used)
+            stats = bf_data(start_date, end_date)
+            bf_market_data(start_date, end_date)
 
             logger.info(
-                f"Historical data back-fill completed. {api_calls_used} API calls used."
+                f"Historical data back-fill completed. {stats['credits_used']} API calls used."
             )
-            logger.info(f"Remaining daily API calls: {DAILY_LIMIT}")
+            logger.info(f"Remaining daily API calls: {credit_budget.remaining}")
         else:
             logger.info("Historical data back-fill cancelled by user.")
     else:
-        missing_intervals = calculate_missing_intervals(last_timestamp, current_time)
+        # Only look back as far as the configured limit, and never before the
+        # first stored candle
+        start_date = max(
+            first_timestamp,
+            round_to_15_minutes(current_time - timedelta(days=MAX_BACKFILL_DAYS)),
+        )
+        gaps_by_table = find_data_gaps(start_date, current_time)
+        ohlcv_gaps = gaps_by_table[OHLCVData15Min.__tablename__]
+        market_gaps = gaps_by_table[MarketData15Min.__tablename__]
+        if market_gaps:
+            # CoinGecko pages cost no CoinAPI credits, so these are repaired directly
+            logger.info(
+                f"{MarketData15Min.__tablename__} is missing "
+                f"{count_missing_buckets(market_gaps)} intervals in "
+                f"{len(market_gaps)} gaps; back-filling them from CoinGecko."
+            )
+            repair_market(start_date, current_time)
 
+        missing_intervals = count_missing_buckets(ohlcv_gaps)
         if missing_intervals == 0:
             logger.info("Database is up to date. No back-fill needed.")
+        elif prompt_user_for_backfill(
+            missing_intervals, len(ohlcv_gaps), len(gaps_to_windows(ohlcv_gaps))
+        ):
+            logger.info(
+                f"Starting gap repair back-fill from {start_date} to {current_time}"
+            )
+            stats = repair(start_date, current_time)
 
-        elif missing_intervals > MAX_BACKFILL_DAYS * API_CALLS_PER_DAY:
             logger.info(
-                f"The data gap is more than {MAX_BACKFILL_DAYS} days. Please run init_db.py to reset all tables."
+                f"Historical data back-fill completed. {stats['credits_used']} API calls used."
             )
+            logger.info(f"Remaining daily API calls: {credit_budget.remaining}")
         else:
-            if prompt_user_for_backfill(missing_intervals):
-                start_date = last_timestamp
-                end_date = round_to_15_minutes(current_time)
-
-                logger.info(
-                    f"Starting historical data back-fill from {start_date} to {end_date}"
-                )
-                bf_data(start_date, end_date)
-
-                api_calls_used = calculate_api_calls(missing_intervals)
-                update_daily_limit(api_calls_used)
-
-                logger.info(
-                    f"Historical data back-fill completed. {api_calls_used} API calls used."
-                )
-                logger.info(f"Remaining daily API calls: {DAILY_LIMIT}")
-            else:
-                logger.info("Historical data back-fill cancelled by user.")
+            logger.info("Historical data back-fill cancelled by user.")
 
     # Next interval's data collection
     next_interval_start = round_to_15_minutes(current_time + timedelta(minutes=15))
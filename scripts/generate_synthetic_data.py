@@ -0,0 +1,82 @@
+import argparse
+from datetime import datetime, timezone
+
+import path_setup  # Needed to access src folder
+from src.data_collection.symbols import Market
+from src.data_collection.synthetic import (
+    DEFAULT_CHUNK_SIZE,
+    MODELS,
+    SYNTHETIC_MARKET,
+    load_synthetic_data,
+    write_synthetic_parquet,
+)
+from src.models.base import SessionLocal
+from src.utils.logger import scripts_logger as logger
+
+
+def parse_market(value):
+    exchange, symbol = value.split(":")
+    return Market(exchange.upper(), symbol.upper())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic 15-minute candles and market snapshots."
+    )
+    parser.add_argument(
+        "--start",
+        type=lambda value: datetime.fromisoformat(value).replace(tzinfo=timezone.utc),
+        default=datetime(2015, 1, 1, tzinfo=timezone.utc),
+        help="Start of the first candle, UTC (default: 2015-01-01)",
+    )
+    parser.add_argument("--candles", type=int, required=True, help="Candles per market")
+    parser.add_argument(
+        "--market",
+        dest="markets",
+        type=parse_market,
+        action="append",
+        help=f"EXCHANGE:SYMBOL, repeatable (default: "
+        f"{SYNTHETIC_MARKET.exchange}:{SYNTHETIC_MARKET.symbol})",
+    )
+    parser.add_argument("--model", choices=MODELS, default="gbm")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument(
+        "--parquet",
+        metavar="DIRECTORY",
+        help="Write Parquet files here instead of loading the database",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    options = {
+        "markets": args.markets,
+        "chunk_size": args.chunk_size,
+        "model": args.model,
+        "seed": args.seed,
+    }
+    if args.parquet:
+        paths = write_synthetic_parquet(
+            args.parquet, args.start, args.candles, **options
+        )
+        logger.info(f"Wrote {len(paths)} Parquet files to {args.parquet}")
+        return
+
+    db = SessionLocal()
+    try:
+        stats = load_synthetic_data(db, args.start, args.candles, **options)
+    except Exception as e:
+        logger.error(f"Synthetic data load failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+    logger.info(
+        f"Loaded {stats['candles']} synthetic candles in {stats['seconds']:.1f}s "
+        f"({stats['candles_per_sec']:.0f} candles/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
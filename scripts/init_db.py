@@ -1,5 +1,6 @@
-from sqlalchemy import create_engine, text, inspect, func
+from sqlalchemy import create_engine, text, inspect, func, UniqueConstraint
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
 import psycopg2
 from psycopg2 import sql
 
@@ -10,6 +11,9 @@ import path_setup  # Needed to access src folder
 from src.utils.logger import scripts_logger
 from src.utils.config import config
 from src.models import get_models
+from src.models.series import SERIES_COLUMNS, has_series
+from src.models.timescale import provision_hypertables
+from src.models.rollups import drop_rollups, provision_rollups, refresh_rollups
 
 # Setup model instances
 models = get_models()
@@ -17,12 +21,22 @@ Base = models["Base"]
 MarketData15Min = models["MarketData15Min"]
 OHLCVData15Min = models["OHLCVData15Min"]
 TechnicalIndicators15Min = models["TechnicalIndicators15Min"]
+BackfillJournal = models["BackfillJournal"]
+IndicatorState = models["IndicatorState"]
+XRPLLedgerMetrics = models["XRPLLedgerMetrics"]
+APICreditLedger = models["APICreditLedger"]
+APIRateBucket = models["APIRateBucket"]
 
 # Define global table information
 TABLES = [
     {"name": "market_data_15_min", "model": MarketData15Min},
     {"name": "ohlcv_data_15_min", "model": OHLCVData15Min},
     {"name": "technical_indicators_15_min", "model": TechnicalIndicators15Min},
+    {"name": "backfill_journal", "model": BackfillJournal},
+    {"name": "indicator_state", "model": IndicatorState},
+    {"name": "xrpl_ledger_metrics", "model": XRPLLedgerMetrics},
+    {"name": "api_credit_ledger", "model": APICreditLedger},
+    {"name": "api_rate_buckets", "model": APIRateBucket},
 ]
 
 
@@ -55,6 +69,107 @@ def check_tables_exist(inspector):
     return required_tables.issubset(existing_tables)
 
 
+def add_missing_series_columns(engine):
+    """
+    Add the exchange and symbol columns to tables created before they existed.
+
+    Existing rows are assigned to the model's default series, and the primary key
+    is extended to match the model.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in TABLES:
+            model_table = table["model"].__table__
+            if not has_series(model_table):
+                continue
+            existing = {
+                column["name"] for column in inspector.get_columns(table["name"])
+            }
+            for name in SERIES_COLUMNS:
+                if name in existing:
+                    continue
+                column = model_table.c[name]
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table['name']} ADD COLUMN {name} "
+                        f"VARCHAR({column.type.length}) NOT NULL "
+                        f"DEFAULT '{column.server_default.arg}'"
+                    )
+                )
+                scripts_logger.info(f"Added column {name} to {table['name']}")
+
+            primary_key = [column.name for column in model_table.primary_key]
+            existing_key = inspector.get_pk_constraint(table["name"])
+            if set(existing_key["constrained_columns"]) != set(primary_key):
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table['name']} "
+                        f"DROP CONSTRAINT {existing_key['name']}, "
+                        f"ADD PRIMARY KEY ({', '.join(primary_key)})"
+                    )
+                )
+                scripts_logger.info(
+                    f"Primary key of {table['name']} is now ({', '.join(primary_key)})"
+                )
+
+
+def add_missing_unique_constraints(engine):
+    """
+    Bring existing tables up to the models' unique constraints.
+
+    Unique constraints the model no longer declares (e.g. the per-timestamp keys
+    that predate the series columns) are dropped. Duplicate rows left behind by
+    earlier non-idempotent runs are removed first, keeping the most recently
+    inserted row (highest id) for each key.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in TABLES:
+            model_table = table["model"].__table__
+            declared = {
+                constraint.name
+                for constraint in model_table.constraints
+                if isinstance(constraint, UniqueConstraint)
+            }
+            existing = {
+                constraint["name"]
+                for constraint in inspector.get_unique_constraints(table["name"])
+            }
+            for name in existing - declared:
+                conn.execute(
+                    text(f"ALTER TABLE {table['name']} DROP CONSTRAINT {name}")
+                )
+                scripts_logger.info(f"Dropped constraint {name} from {table['name']}")
+            for constraint in model_table.constraints:
+                if (
+                    not isinstance(constraint, UniqueConstraint)
+                    or constraint.name in existing
+                ):
+                    continue
+                key_columns = [column.name for column in constraint.columns]
+                join_condition = " AND ".join(
+                    f"a.{column} = b.{column}" for column in key_columns
+                )
+                deleted = conn.execute(
+                    text(
+                        f"DELETE FROM {table['name']} a USING {table['name']} b "
+                        f"WHERE {join_condition} AND a.id < b.id"
+                    )
+                ).rowcount
+                scripts_logger.info(
+                    f"Removed {deleted} duplicate rows from {table['name']}"
+                )
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table['name']} ADD CONSTRAINT {constraint.name} "
+                        f"UNIQUE ({', '.join(key_columns)})"
+                    )
+                )
+                scripts_logger.info(
+                    f"Added constraint {constraint.name} to {table['name']}"
+                )
+
+
 def drop_and_recreate_all_tables(engine):
     scripts_logger.info("Starting drop_and_recreate_all_tables function")
     try:
@@ -63,6 +178,9 @@ def drop_and_recreate_all_tables(engine):
                 # Set a timeout to prevent hanging
                 conn.execute(text("SET statement_timeout = '30000';"))
 
+                # Drop the rollups first; their tables don't depend on the models
+                drop_rollups(conn)
+
                 # Drop all tables
                 scripts_logger.info("Dropping all tables...")
                 for table in TABLES:
@@ -235,11 +353,26 @@ def init_db():
             should_recreate = prompt_user_for_action(engine)
             if should_recreate:
                 drop_and_recreate_all_tables(engine)
+            else:
+                add_missing_series_columns(engine)
+                add_missing_unique_constraints(engine)
         else:
             scripts_logger.info("Initializing the database...")
             Base.metadata.create_all(engine)
+            add_missing_unique_constraints(engine)
             scripts_logger.info("All required tables created successfully.")
 
+        if provision_hypertables(engine, Base.metadata):
+            scripts_logger.info(
+                "Hypertables, compression and retention policies are in place."
+            )
+
+        if not provision_rollups(engine):
+            # Table rollups are built from the existing history on their first refresh
+            with Session(engine) as db:
+                refresh_rollups(db)
+        scripts_logger.info("OHLCV rollups (1h, 4h, 1d, 1w) are in place.")
+
     except OperationalError as e:
         scripts_logger.error(f"Database connection error: {str(e)}")
         raise
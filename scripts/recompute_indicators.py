@@ -0,0 +1,69 @@
+import argparse
+
+import path_setup  # Needed to access src folder
+from src.data_processing.parallel_indicators import (
+    CHUNKS_PER_WORKER,
+    recompute_indicators_parallel,
+)
+from src.models.base import SessionLocal
+from src.utils.logger import scripts_logger as logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Rebuild technical_indicators_15_min from the full OHLCV history."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help=f"Candles written per chunk (default: about {CHUNKS_PER_WORKER} chunks "
+        "per worker)",
+    )
+    parser.add_argument(
+        "--exchange",
+        type=str.upper,
+        default=None,
+        help="Exchange of the series to rebuild (default: the default series)",
+    )
+    parser.add_argument(
+        "--symbol",
+        type=str.upper,
+        default=None,
+        help="Symbol of the series to rebuild, e.g. XRP_EUR (default: the default "
+        "series)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logger.info("Starting full-history indicator recompute")
+    db = SessionLocal()
+    try:
+        stats = recompute_indicators_parallel(
+            db,
+            args.workers,
+            args.chunk_size,
+            exchange=args.exchange,
+            symbol=args.symbol,
+        )
+    except Exception as e:
+        logger.error(f"Indicator recompute failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+    logger.info(
+        f"Recomputed {stats['rows']} indicator rows from {stats['candles']} candles "
+        f"on {stats['workers']} workers"
+    )
+
+
+if __name__ == "__main__":
+    main()
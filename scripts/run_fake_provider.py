@@ -0,0 +1,76 @@
+import argparse
+import time
+
+import path_setup  # Needed to access src folder
+from src.data_collection.fake_provider import FakeProviderServer
+from src.utils.config import config
+from src.utils.logger import scripts_logger as logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Serve a local stand-in for the CoinAPI and CoinGecko APIs. "
+        "Options left out are read from the fake_provider section of the "
+        "configuration."
+    )
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument(
+        "--latency-ms", type=float, help="Milliseconds added to every response"
+    )
+    parser.add_argument(
+        "--jitter-ms",
+        type=float,
+        help="Up to this many random extra milliseconds per response",
+    )
+    parser.add_argument(
+        "--error-rate", type=float, help="Fraction of requests answered with a 5xx"
+    )
+    parser.add_argument(
+        "--rate-limit-rate",
+        type=float,
+        help="Fraction of requests answered with a 429",
+    )
+    parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        help="Answer requests above this sustained rate with a 429",
+    )
+    parser.add_argument(
+        "--retry-after-seconds",
+        type=float,
+        help="Retry-After sent with every 429",
+    )
+    parser.add_argument(
+        "--recorded",
+        dest="recorded_directory",
+        help="Response cache directory to replay before generating data",
+    )
+    parser.add_argument("--seed", type=int)
+    return parser.parse_args()
+
+
+def server_settings(args):
+    """Return the fake_provider configuration with the given options applied."""
+    settings = dict(config.get("fake_provider") or {})
+    settings.update(
+        {name: value for name, value in vars(args).items() if value is not None}
+    )
+    return settings
+
+
+def main():
+    server = FakeProviderServer.from_config(server_settings(parse_args()))
+    with server:
+        logger.info(f"COINAPI_BASE_URL={server.coinapi_url}")
+        logger.info(f"COINGECKO_BASE_URL={server.coingecko_url}")
+        try:
+            while True:
+                time.sleep(60)
+                logger.info(f"Fake provider responses by status: {server.counts}")
+        except KeyboardInterrupt:
+            logger.info("Stopping fake provider")
+
+
+if __name__ == "__main__":
+    main()
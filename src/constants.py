@@ -3,4 +3,11 @@ XRP_ID = "ripple"  # Coingecko ID for XRP
 MAX_TWEET_LENGTH = 280
 MAX_TOKENS = 100  # Maximum number of tokens for OpenAI API response.
 
+# Markets. A series is identified by (exchange, symbol); symbols are BASE_QUOTE in
+# CoinAPI's notation. Rows written before symbols were added belong to the default.
+DEFAULT_EXCHANGE = "BITSTAMP"
+DEFAULT_SYMBOL = "XRP_USD"
+COINGECKO_EXCHANGE = "COINGECKO"  # CoinGecko market data is aggregated across venues
+COINGECKO_IDS = {"XRP": XRP_ID}  # Base asset to Coingecko ID
+
 # Default values (Can be overridden in configuration.yaml).
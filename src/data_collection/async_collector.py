@@ -0,0 +1,306 @@
+import asyncio
+import functools
+import time
+
+from sqlalchemy.orm import Session
+
+from src.data_collection.coingecko_client import CoinGeckoClient
+from src.data_collection.coinapi_client import CoinAPIClient
+from src.data_collection.rate_limits import CreditLedger, CreditsExhaustedError
+from src.data_collection.collector import (
+    parse_market_data,
+    parse_markets,
+    parse_ohlcv_candles,
+)
+from src.data_collection.symbols import (
+    DEFAULT_MARKET,
+    configured_markets,
+    markets_by_quote,
+)
+from src.data_processing.streaming_indicators import update_streaming_indicators
+from src.models.bulk import upsert_rows
+from src.models.market_data_15_min import MarketData15Min
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.rollups import refresh_rollups
+from ..utils.config import config
+from ..utils.logger import data_collection_logger
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+class AsyncCoinGeckoClient:
+    """
+    An asyncio variant of CoinGeckoClient.
+
+    Each request runs in a worker thread on top of the shared pooled transport, so
+    it can be awaited alongside requests to other providers without blocking the
+    event loop.
+
+    Attributes:
+        client (CoinGeckoClient): The synchronous client doing the actual requests.
+    """
+
+    def __init__(self, client: CoinGeckoClient = None):
+        self.client = client or CoinGeckoClient()
+
+    async def get_market_data(self):
+        return await asyncio.to_thread(self.client.get_market_data)
+
+    async def get_markets(self, ids, vs_currency="usd"):
+        return await asyncio.to_thread(self.client.get_markets, ids, vs_currency)
+
+    async def get_changed_markets(self, ids, vs_currency="usd"):
+        return await asyncio.to_thread(
+            self.client.get_changed_markets, ids, vs_currency
+        )
+
+    async def get_historical_market_data(self, days=1, interval="15m"):
+        return await asyncio.to_thread(
+            self.client.get_historical_market_data, days, interval
+        )
+
+
+class AsyncCoinAPIClient:
+    """
+    An asyncio variant of CoinAPIClient.
+
+    Attributes:
+        client (CoinAPIClient): The synchronous client doing the actual requests.
+    """
+
+    def __init__(self, client: CoinAPIClient = None):
+        self.client = client or CoinAPIClient()
+
+    async def get_ohlcv_data(self, *args):
+        return await asyncio.to_thread(self.client.get_ohlcv_data, *args)
+
+    async def get_historical_ohlcv_data(self, start_time, end_time=None):
+        return await asyncio.to_thread(
+            self.client.get_historical_ohlcv_data, start_time, end_time
+        )
+
+
+class CollectionSource:
+    """
+    One provider feeding a collection tick.
+
+    Attributes:
+        name (str): Label used in logs and timing reports.
+        fetch (callable): Coroutine function returning the provider's raw payload.
+        store (callable): Function ``store(db, payload)`` writing the payload
+            without committing.
+        discard (callable): Optional function ``discard(payload)`` called when a
+            fetched payload was rolled back instead of committed.
+    """
+
+    def __init__(self, name, fetch, store, discard=None):
+        self.name = name
+        self.fetch = fetch
+        self.store = store
+        self.discard = discard
+
+
+def store_market_data(db: Session, market_data):
+    upsert_rows(db, MarketData15Min, parse_market_data(market_data))
+
+
+def store_markets(db: Session, markets, quote):
+    # An empty payload means CoinGecko had nothing new since the last poll
+    if markets:
+        upsert_rows(db, MarketData15Min, parse_markets(markets, quote))
+
+
+def store_ohlcv_data(db: Session, ohlcv_data, market=DEFAULT_MARKET):
+    columns = parse_ohlcv_candles(ohlcv_data, market)
+    upsert_rows(db, OHLCVData15Min, columns)
+    update_streaming_indicators(db, columns["timestamp"], columns["close"], *market)
+
+
+async def _reserve_and_fetch(budget, fetch, credits=1):
+    if not await asyncio.to_thread(budget.try_reserve, credits):
+        raise CreditsExhaustedError("CoinAPI credit budget exhausted")
+    return await fetch()
+
+
+def default_sources(
+    coingecko_client: AsyncCoinGeckoClient = None,
+    coinapi_client: AsyncCoinAPIClient = None,
+    markets=None,
+    budget: CreditLedger = None,
+):
+    """
+    Return the CoinGecko market data and CoinAPI OHLCV sources for a set of markets.
+
+    Market data is fetched with one conditional CoinGecko ``coins/markets`` request
+    per quote currency, covering every base asset quoted in it; only snapshots with
+    a new ``last_updated`` are stored. OHLCV needs one CoinAPI request per market,
+    each reserving its credit on the shared credit ledger before it is sent.
+
+    Args:
+        coingecko_client (AsyncCoinGeckoClient, optional): CoinGecko client.
+        coinapi_client (AsyncCoinAPIClient, optional): CoinAPI client.
+        markets (list, optional): Market tuples. Defaults to the configured markets.
+        budget (CreditLedger, optional): Credit budget for the CoinAPI requests.
+            Defaults to the persistent CoinAPI credit ledger.
+
+    Returns:
+        list: CollectionSource objects.
+    """
+    coingecko_client = coingecko_client or AsyncCoinGeckoClient()
+    coinapi_client = coinapi_client or AsyncCoinAPIClient()
+    markets = markets or configured_markets()
+    budget = budget or CreditLedger.from_config()
+    sources = [
+        CollectionSource(
+            f"coingecko_markets_{quote.lower()}",
+            functools.partial(coingecko_client.get_changed_markets, ids, quote.lower()),
+            functools.partial(store_markets, quote=quote),
+            functools.partial(
+                coingecko_client.client.fetch_cache.forget, quote.lower()
+            ),
+        )
+        for quote, ids in markets_by_quote(markets).items()
+    ]
+    sources.extend(
+        CollectionSource(
+            f"coinapi_ohlcv_{market.exchange.lower()}_{market.symbol.lower()}",
+            functools.partial(
+                _reserve_and_fetch,
+                budget,
+                functools.partial(
+                    coinapi_client.get_ohlcv_data, market.coinapi_symbol_id
+                ),
+            ),
+            functools.partial(store_ohlcv_data, market=market),
+        )
+        for market in markets
+    )
+    return sources
+
+
+async def _timed_fetch(source, semaphore):
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            return await source.fetch(), time.perf_counter() - started
+        except Exception as e:
+            data_collection_logger.error(f"Error fetching {source.name}: {str(e)}")
+            return e, time.perf_counter() - started
+
+
+def _store_all(db: Session, sources, payloads):
+    try:
+        for source, payload in zip(sources, payloads):
+            source.store(db, payload)
+        db.commit()
+    except Exception:
+        db.rollback()
+        for source, payload in zip(sources, payloads):
+            if source.discard is not None:
+                source.discard(payload)
+        raise
+
+
+async def collect_tick(db: Session, sources=None, max_concurrency=None):
+    """
+    Fetch every source concurrently and store the results in one transaction.
+
+    The tick takes roughly as long as the slowest source plus one database commit,
+    instead of the sum of every source's round trip. At most ``max_concurrency``
+    requests are in flight at once, so fanning out over many markets doesn't open
+    a connection per market. A source that fails to fetch is logged and skipped;
+    the others are still stored.
+
+    Args:
+        db: A database session object shared by every source's write.
+        sources (list, optional): CollectionSource objects. Defaults to the
+            CoinGecko market data and CoinAPI OHLCV sources of the configured
+            markets.
+        max_concurrency (int, optional): Concurrent fetches. Defaults to
+            ``data_collection.max_concurrency`` (4).
+
+    Returns:
+        dict: Timings in seconds with keys "fetch" (per source), "store" and "total",
+        plus "failed", the names of sources that could not be fetched.
+
+    Raises:
+        Any exception raised while storing the fetched payloads.
+    """
+    sources = sources if sources is not None else default_sources()
+    if max_concurrency is None:
+        max_concurrency = (config.get("data_collection") or {}).get(
+            "max_concurrency", DEFAULT_MAX_CONCURRENCY
+        )
+    semaphore = asyncio.Semaphore(max_concurrency)
+    started = time.perf_counter()
+
+    results = await asyncio.gather(
+        *(_timed_fetch(source, semaphore) for source in sources)
+    )
+
+    fetched, payloads, failed = [], [], []
+    timings = {"fetch": {}, "store": 0.0, "total": 0.0, "failed": failed}
+    for source, (payload, elapsed) in zip(sources, results):
+        timings["fetch"][source.name] = elapsed
+        if isinstance(payload, Exception):
+            failed.append(source.name)
+        else:
+            fetched.append(source)
+            payloads.append(payload)
+
+    store_started = time.perf_counter()
+    await asyncio.to_thread(_store_all, db, fetched, payloads)
+    timings["store"] = time.perf_counter() - store_started
+    timings["total"] = time.perf_counter() - started
+
+    data_collection_logger.info(
+        f"Collection tick stored {len(fetched)}/{len(sources)} sources in "
+        f"{timings['total']:.3f}s (fetch: "
+        + ", ".join(f"{name}={t:.3f}s" for name, t in timings["fetch"].items())
+        + f"; store: {timings['store']:.3f}s)"
+    )
+    return timings
+
+
+def run_async_data_collection(
+    db: Session,
+    coingecko_client: AsyncCoinGeckoClient = None,
+    coinapi_client: AsyncCoinAPIClient = None,
+    budget: CreditLedger = None,
+):
+    """
+    Run one concurrent collection tick from synchronous code.
+
+    Returns:
+        dict: The tick timings reported by collect_tick.
+
+    Raises:
+        Any exception raised while storing the tick or refreshing the rollups,
+        after it has been logged.
+    """
+    try:
+        data_collection_logger.info("Starting async data collection process...")
+        timings = asyncio.run(
+            collect_tick(
+                db, default_sources(coingecko_client, coinapi_client, budget=budget)
+            )
+        )
+        refresh_rollups(db)
+        data_collection_logger.info("Async data collection completed successfully.")
+        return timings
+    except Exception as e:
+        data_collection_logger.error(
+            f"Error in async data collection process: {str(e)}"
+        )
+        raise
+
+
+if __name__ == "__main__":
+    from src.models.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        run_async_data_collection(db)
+    finally:
+        db.close()
+        data_collection_logger.info("Database connection closed.")
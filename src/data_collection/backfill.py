@@ -0,0 +1,447 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.data_collection.coinapi_client import CoinAPIClient
+from src.data_collection.collector import parse_ohlcv_candles
+from src.data_collection.rate_limits import CreditLedger, CreditsExhaustedError
+from src.data_collection.symbols import DEFAULT_MARKET
+from src.data_processing.gaps import find_gaps, gaps_to_windows
+from src.models.backfill_journal import BackfillJournal
+from src.models.bulk import upsert_rows
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from ..utils.config import config
+from ..utils.logger import data_collection_logger
+
+CANDLE_INTERVAL = timedelta(minutes=15)
+CANDLES_PER_CREDIT = 100  # CoinAPI charges one credit per 100 candles returned
+DEFAULT_MAX_WORKERS = 4
+
+
+class CreditBudget:
+    """
+    A thread-safe API credit budget shared by every backfill worker.
+
+    Credits are reserved before a request is sent, so concurrent workers can never
+    overrun the limit between them. The budget only lives as long as the process;
+    CreditLedger shares the daily budget with every other process.
+
+    Attributes:
+        limit (int): Total credits available, or None for no limit.
+        used (int): Credits reserved so far.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls):
+        return cls(config["api_limits"]["coinapi_daily"])
+
+    @property
+    def remaining(self):
+        with self._lock:
+            if self.limit is None:
+                return None
+            return max(0, self.limit - self.used)
+
+    def try_reserve(self, credits=1):
+        """Reserve credits if enough remain. Returns True on success."""
+        with self._lock:
+            if self.limit is not None and self.used + credits > self.limit:
+                return False
+            self.used += credits
+            return True
+
+
+def plan_windows(
+    start_date: datetime, end_date: datetime, candles_per_window=CANDLES_PER_CREDIT
+):
+    """
+    Split a date range into request windows sized to CoinAPI's credit pricing.
+
+    Each window spans ``candles_per_window`` 15-minute candles, so a full window
+    costs exactly one credit. The final window is truncated at ``end_date``.
+
+    Args:
+        start_date (datetime): Start of the range (inclusive).
+        end_date (datetime): End of the range (exclusive).
+        candles_per_window (int, optional): Candles per window. Defaults to 100.
+
+    Returns:
+        list: (window_start, window_end) tuples in chronological order.
+    """
+    window_length = CANDLE_INTERVAL * candles_per_window
+    windows = []
+    window_start = start_date
+    while window_start < end_date:
+        window_end = min(window_start + window_length, end_date)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+
+def credits_for_windows(windows):
+    """Return the number of credits needed to fetch the given windows."""
+    return sum(
+        max(1, math.ceil((end - start) / CANDLE_INTERVAL / CANDLES_PER_CREDIT))
+        for start, end in windows
+    )
+
+
+def job_id_for_range(start_date: datetime, end_date: datetime):
+    """
+    Return a deterministic journal job id for a date range.
+
+    Re-running a backfill over the same range therefore picks up the same journal
+    and skips windows that were already committed.
+    """
+    return f"{start_date:%Y%m%dT%H%M}-{end_date:%Y%m%dT%H%M}"
+
+
+def register_windows(db: Session, job_id, windows):
+    """
+    Record every window of a job as pending, leaving existing entries untouched.
+    """
+    upsert_rows(
+        db,
+        BackfillJournal,
+        {
+            "job_id": [job_id] * len(windows),
+            "window_start": [start for start, _ in windows],
+            "window_end": [end for _, end in windows],
+            "status": ["pending"] * len(windows),
+        },
+        update_columns=[],
+    )
+    db.commit()
+
+
+def incomplete_windows(db: Session, job_id):
+    """
+    Return the (start, end) windows of a job that have not been committed yet.
+    """
+    entries = (
+        db.query(BackfillJournal.window_start, BackfillJournal.window_end)
+        .filter(BackfillJournal.job_id == job_id, BackfillJournal.status != "committed")
+        .order_by(BackfillJournal.window_start)
+        .all()
+    )
+    return [(start, end) for start, end in entries]
+
+
+def latest_incomplete_job(db: Session):
+    """
+    Return the id of the most recently updated job with uncommitted windows.
+    """
+    return (
+        db.query(BackfillJournal.job_id)
+        .filter(BackfillJournal.status != "committed")
+        .order_by(BackfillJournal.updated_at.desc())
+        .limit(1)
+        .scalar()
+    )
+
+
+def job_range(db: Session, job_id):
+    """
+    Return the (start, end) range covered by a job's windows, or None if the job
+    has no windows.
+    """
+    start, end = (
+        db.query(
+            func.min(BackfillJournal.window_start), func.max(BackfillJournal.window_end)
+        )
+        .filter(BackfillJournal.job_id == job_id)
+        .one()
+    )
+    return None if start is None else (start, end)
+
+
+def _mark_window(db: Session, job_id, window, status, rows=0, error=None):
+    db.query(BackfillJournal).filter(
+        BackfillJournal.job_id == job_id,
+        BackfillJournal.window_start == window[0],
+    ).update(
+        {
+            BackfillJournal.status: status,
+            BackfillJournal.rows: rows,
+            BackfillJournal.error: error,
+            BackfillJournal.attempts: BackfillJournal.attempts + 1,
+        },
+        synchronize_session=False,
+    )
+
+
+def run_backfill(
+    db: Session,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    coinapi_client: CoinAPIClient = None,
+    budget: CreditBudget = None,
+    max_workers=None,
+    candles_per_window=CANDLES_PER_CREDIT,
+    windows=None,
+    job_id=None,
+    market=DEFAULT_MARKET,
+):
+    """
+    Backfill OHLCV history with bounded concurrency under a shared credit budget.
+
+    The range is split into credit-sized windows which are fetched by a pool of
+    ``max_workers`` threads. Results are upserted and committed one window at a time
+    as they arrive, in whatever order they complete. A window's credits are only
+    reserved when its request is actually sent, so windows served from the response
+    cache cost nothing. Once the budget cannot cover another window no further
+    requests are sent; windows already in flight finish.
+
+    When a ``job_id`` is given every window is tracked in the backfill journal.
+    A window is marked committed in the same transaction as its candles, so after
+    a crash ``resume_backfill`` refetches only the windows that never landed.
+
+    Args:
+        db: A database session object used (from this thread only) for all writes.
+        start_date (datetime, optional): Start of the range to backfill.
+        end_date (datetime, optional): End of the range to backfill.
+        coinapi_client (CoinAPIClient, optional): Client used for the requests.
+        budget (CreditBudget, optional): Shared budget. Defaults to the persistent
+            CoinAPI credit ledger, limited to the configured daily credits.
+        max_workers (int, optional): Maximum concurrent requests. Defaults to
+            ``backfill.max_workers`` from the configuration.
+        candles_per_window (int, optional): Candles requested per window.
+        windows (list, optional): Explicit (start, end) windows to fetch instead of
+            planning them from start_date and end_date.
+        job_id (str, optional): Journal job id. Windows already committed under
+            this id are skipped. Journaling is off when omitted.
+        market (Market, optional): The market to backfill. Defaults to the default
+            market.
+
+    Returns:
+        dict: Statistics with keys "rows", "windows", "skipped_windows",
+        "failed_windows", "credits_used", "seconds" and "rows_per_sec".
+
+    Raises:
+        Any exceptions raised by the CoinAPI or database operations. After a fetch
+        error no new windows are requested, but windows already in flight are
+        still stored before the error is raised.
+    """
+    if coinapi_client is None:
+        coinapi_client = CoinAPIClient()
+    if budget is None:
+        budget = CreditLedger.from_config()
+    if max_workers is None:
+        max_workers = (config.get("backfill") or {}).get(
+            "max_workers", DEFAULT_MAX_WORKERS
+        )
+    if windows is None:
+        windows = plan_windows(start_date, end_date, candles_per_window)
+    if job_id is not None:
+        register_windows(db, job_id, windows)
+        windows = incomplete_windows(db, job_id)
+
+    stats = {
+        "rows": 0,
+        "windows": 0,
+        "skipped_windows": 0,
+        "failed_windows": 0,
+        "credits_used": 0,
+        "seconds": 0.0,
+        "rows_per_sec": 0.0,
+    }
+    started = time.perf_counter()
+    pending_windows = list(windows)
+    data_collection_logger.info(
+        f"Backfilling {len(pending_windows)} {market.exchange} {market.symbol} "
+        f"windows with {max_workers} workers (credits remaining: {budget.remaining})"
+    )
+
+    credits_lock = threading.Lock()
+
+    def fetch(window):
+        window_start, window_end = window
+        credits = credits_for_windows([window])
+
+        def reserve():
+            # Called by the client only after the response cache has missed
+            if not budget.try_reserve(credits):
+                return False
+            with credits_lock:
+                stats["credits_used"] += credits
+            return True
+
+        return coinapi_client.get_historical_ohlcv_data(
+            window_start,
+            window_end,
+            limit=candles_per_window,
+            symbol_id=market.coinapi_symbol_id,
+            reserve=reserve,
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {}
+
+        def submit_next():
+            while pending_windows and len(in_flight) < max_workers:
+                window = pending_windows.pop(0)
+                in_flight[executor.submit(fetch, window)] = window
+
+        fetch_error = None
+        try:
+            submit_next()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window = in_flight.pop(future)
+                    try:
+                        candles = future.result()
+                    except CreditsExhaustedError:
+                        # The window stays pending in the journal for a later run
+                        skipped = 1 + len(pending_windows)
+                        data_collection_logger.warning(
+                            f"Credit budget exhausted, skipping {skipped} windows"
+                        )
+                        stats["skipped_windows"] += skipped
+                        pending_windows.clear()
+                        continue
+                    except Exception as e:
+                        # Stop sending requests but still store windows already in
+                        # flight, since their credits have been spent
+                        data_collection_logger.error(
+                            f"Error fetching window {window[0]} - {window[1]}: {str(e)}"
+                        )
+                        stats["failed_windows"] += 1
+                        fetch_error = fetch_error or e
+                        pending_windows.clear()
+                        if job_id is not None:
+                            _mark_window(db, job_id, window, "failed", error=str(e))
+                            db.commit()
+                        continue
+                    try:
+                        rows = upsert_rows(
+                            db, OHLCVData15Min, parse_ohlcv_candles(candles, market)
+                        )
+                        if job_id is not None:
+                            _mark_window(db, job_id, window, "committed", rows)
+                        db.commit()
+                    except Exception:
+                        db.rollback()
+                        raise
+                    stats["rows"] += rows
+                    stats["windows"] += 1
+                    data_collection_logger.info(
+                        f"Stored {len(candles)} candles for window "
+                        f"{window[0]} - {window[1]}"
+                    )
+                submit_next()
+        except Exception as e:
+            pending_windows.clear()
+            for future in in_flight:
+                future.cancel()
+            data_collection_logger.error(f"Error during backfill: {str(e)}")
+            raise
+
+    if fetch_error is not None:
+        data_collection_logger.error(
+            f"Backfill stopped after {stats['failed_windows']} failed windows; "
+            f"{stats['windows']} windows were stored"
+        )
+        raise fetch_error
+
+    stats["seconds"] = time.perf_counter() - started
+    if stats["seconds"] > 0:
+        stats["rows_per_sec"] = stats["rows"] / stats["seconds"]
+    data_collection_logger.info(
+        f"Backfill stored {stats['rows']} rows from {stats['windows']} windows in "
+        f"{stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/sec), "
+        f"{stats['credits_used']} credits used, {budget.remaining} remaining"
+    )
+    return stats
+
+
+def resume_backfill(db: Session, job_id=None, **kwargs):
+    """
+    Refetch only the windows of a journaled backfill that were never committed.
+
+    Args:
+        db: A database session object used for all writes.
+        job_id (str, optional): The job to resume. Defaults to the most recently
+            updated job with incomplete windows.
+        **kwargs: Passed through to run_backfill (client, budget, max_workers...).
+
+    Returns:
+        dict: The run_backfill statistics, or None if there is nothing to resume.
+    """
+    if job_id is None:
+        job_id = latest_incomplete_job(db)
+    if job_id is None:
+        data_collection_logger.info("No incomplete backfill jobs to resume")
+        return None
+
+    windows = incomplete_windows(db, job_id)
+    data_collection_logger.info(
+        f"Resuming backfill job {job_id} with {len(windows)} incomplete windows"
+    )
+    return run_backfill(db, windows=windows, job_id=job_id, **kwargs)
+
+
+def repair_gaps(
+    db: Session,
+    start_date: datetime,
+    end_date: datetime,
+    market=DEFAULT_MARKET,
+    **kwargs,
+):
+    """
+    Backfill every missing OHLCV interval in a range, not just the tail.
+
+    The gap index finds interior holes as well as missing edges, and they are
+    merged into the fewest credit-sized windows before being fetched. The job is
+    journaled, so an interrupted repair can be finished with resume_backfill,
+    given the same market.
+
+    Args:
+        db: A database session object used for all reads and writes.
+        start_date (datetime): First expected candle (inclusive, on the 15-minute
+            grid).
+        end_date (datetime): Last expected candle (inclusive, on the 15-minute
+            grid).
+        market (Market, optional): The market to repair. Defaults to the default
+            market.
+        **kwargs: Passed through to run_backfill (client, budget, max_workers...).
+
+    Returns:
+        dict: The run_backfill statistics, or None if there are no gaps.
+    """
+    gaps = find_gaps(
+        db,
+        OHLCVData15Min,
+        start_date,
+        end_date,
+        exchange=market.exchange,
+        symbol=market.symbol,
+    )
+    if not gaps:
+        data_collection_logger.info(
+            f"No {market.exchange} {market.symbol} OHLCV gaps between {start_date} "
+            f"and {end_date}"
+        )
+        return None
+
+    windows = gaps_to_windows(gaps)
+    # Other markets' repairs of the same range get journals of their own
+    prefix = "gaps"
+    if market != DEFAULT_MARKET:
+        prefix = f"gaps-{market.exchange}-{market.symbol}"
+    job_id = f"{prefix}-{job_id_for_range(start_date, end_date)}"
+    data_collection_logger.info(
+        f"Repairing {len(gaps)} {market.exchange} {market.symbol} OHLCV gaps with "
+        f"{len(windows)} windows (job {job_id})"
+    )
+    return run_backfill(db, windows=windows, job_id=job_id, market=market, **kwargs)
@@ -1,7 +1,14 @@
 import requests
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from ..utils.config import config
 from ..utils.logger import data_collection_logger
+from .http_transport import get_transport
+from .rate_limits import COINAPI, CreditsExhaustedError, get_rate_limiter
+from .response_cache import get_response_cache
+
+# CoinAPI symbol ID of the default series
+DEFAULT_SYMBOL_ID = "BITSTAMP_SPOT_XRP_USD"
+CANDLE_INTERVAL = timedelta(minutes=15)
 
 
 class CoinAPIClient:
@@ -9,30 +16,59 @@ class CoinAPIClient:
     A client for interacting with the CoinAPI service.
 
     This class provides methods to fetch OHLCV (Open, High, Low, Close, Volume) data
-    for XRP/USD from the Bitstamp exchange via CoinAPI.
+    for a market via CoinAPI, XRP/USD on Bitstamp by default.
 
     Attributes:
         base_url (str): The base URL for the CoinAPI service.
         api_key (str): The API key for authenticating with CoinAPI.
         daily_limit (int): The daily limit for API calls.
+        transport (HTTPTransport): Pooled HTTP transport with retries and backoff.
+        cache (ResponseCache): Disk cache of historical pages, or None.
+        rate_limiter (TokenBucket): Limiter consulted before each request, or None.
         logger (Logger): Logger for recording operations and errors.
     """
 
-    def __init__(self):
+    def __init__(self, transport=None, cache=None, rate_limiter=None, base_url=None):
         """
         Initialize the CoinAPIClient with configuration settings.
+
+        Args:
+            transport (HTTPTransport, optional): Transport used for requests.
+            Defaults to the shared process-wide transport.
+            cache (ResponseCache, optional): Cache for historical pages. Defaults to
+            the process-wide cache configured under ``http_cache``.
+            rate_limiter (TokenBucket, optional): Request rate limiter. Defaults to
+            the one configured under ``rate_limits.coinapi``, or none when
+            ``base_url`` points elsewhere.
+            base_url (str, optional): Base URL of the API, e.g. a local fake
+            provider. Defaults to ``api_endpoints.coinapi``.
         """
-        self.base_url = config["api_endpoints"]["coinapi"]
+        if rate_limiter is None and base_url in (
+            None,
+            config["api_endpoints"]["coinapi"],
+        ):
+            rate_limiter = get_rate_limiter(COINAPI)
+        self.base_url = base_url or config["api_endpoints"]["coinapi"]
         self.api_key = config["api_keys"]["coinapi"]
         self.daily_limit = config["api_limits"]["coinapi_daily"]
+        self.transport = transport or get_transport()
+        self.cache = cache if cache is not None else get_response_cache()
+        self.rate_limiter = rate_limiter
         self.logger = data_collection_logger
 
-    def get_ohlcv_data(self):
+    def _wait_for_rate_limit(self):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+    def get_ohlcv_data(self, symbol_id=DEFAULT_SYMBOL_ID):
         """
-        Fetch the latest OHLCV data for XRP/USD.
+        Fetch the latest OHLCV data for a market.
 
         This method retrieves the most recent 15-minute OHLCV data point
-        for the XRP/USD pair from the Bitstamp exchange.
+        for the market, XRP/USD on Bitstamp by default.
+
+        Args:
+            symbol_id (str, optional): CoinAPI symbol ID, e.g. "KRAKEN_SPOT_XRP_EUR".
 
         Returns:
             list: A list containing a single dictionary with the latest OHLCV data.
@@ -40,14 +76,15 @@ class CoinAPIClient:
         Raises:
             requests.exceptions.RequestException: If there's an error in the API request.
         """
-        endpoint = f"{self.base_url}/ohlcv/BITSTAMP_SPOT_XRP_USD/latest"
+        endpoint = f"{self.base_url}/ohlcv/{symbol_id}/latest"
         params = {"period_id": "15MIN", "limit": 1}
         headers = {"X-CoinAPI-Key": self.api_key}
 
         self.logger.info(f"Requesting OHLCV data from endpoint: {endpoint}")
 
         try:
-            response = requests.get(endpoint, params=params, headers=headers)
+            self._wait_for_rate_limit()
+            response = self.transport.get(endpoint, params=params, headers=headers)
             response.raise_for_status()
             data = response.json()
             return data
@@ -56,29 +93,45 @@ class CoinAPIClient:
             raise
 
     def get_historical_ohlcv_data(
-        self, start_time, end_time=None, limit=config["api_limits"]["coinapi_daily"]
+        self,
+        start_time,
+        end_time=None,
+        limit=config["api_limits"]["coinapi_daily"],
+        symbol_id=DEFAULT_SYMBOL_ID,
+        reserve=None,
     ):
         """
-        Fetch historical OHLCV data for XRP/USD within a specified time range.
+        Fetch historical OHLCV data for a market within a specified time range.
 
-        This method retrieves 15-minute interval OHLCV data for the XRP/USD pair
-        from the Bitstamp exchange, starting from the specified start time up to
+        This method retrieves 15-minute interval OHLCV data for the market
+        (XRP/USD on Bitstamp by default), starting from the specified start time up to
         either the specified end time or the API call limit.
 
+        Windows whose last candle has closed never change, so with a response cache
+        they are served from disk forever once fetched; windows still open are only
+        cached for a short TTL. Credits are only reserved when a request is actually
+        sent, so pages served from the cache are free.
+
         Args:
             start_time (datetime): The start time for the historical data.
             end_time (datetime, optional): The end time for the historical data.
             If not provided, data up to the latest available point will be fetched.
             limit (int, optional): The maximum number of data points to retrieve.
             Defaults to the daily API call limit.
+            symbol_id (str, optional): CoinAPI symbol ID, e.g. "KRAKEN_SPOT_XRP_EUR".
+            reserve (callable, optional): Called with no arguments just before the
+            request is sent, after the cache has missed; returning False refuses
+            the request.
 
         Returns:
             list: A list of dictionaries, each containing OHLCV data for a 15-minute interval.
 
         Raises:
             requests.exceptions.RequestException: If there's an error in the API request.
+            CacheMissError: If the cache is offline and has no fresh response.
+            CreditsExhaustedError: If ``reserve`` refused the request.
         """
-        endpoint = f"{self.base_url}/ohlcv/BITSTAMP_SPOT_XRP_USD/history"
+        endpoint = f"{self.base_url}/ohlcv/{symbol_id}/history"
 
         params = {"period_id": "15MIN", "time_start": start_time.isoformat()}
 
@@ -93,11 +146,25 @@ class CoinAPIClient:
         self.logger.info(f"Requesting historical OHLCV data from endpoint: {endpoint}")
         self.logger.info(f"Parameters: {params}")
         self.logger.info(f"Headers: {headers}")
-        try:
-            response = requests.get(endpoint, params=params, headers=headers)
+
+        def request():
+            if reserve is not None and not reserve():
+                raise CreditsExhaustedError("CoinAPI credit budget exhausted")
+            self._wait_for_rate_limit()
+            response = self.transport.get(endpoint, params=params, headers=headers)
             response.raise_for_status()
             self.logger.info("Successfully retrieved historical OHLCV data")
             return response.json()
+
+        try:
+            if self.cache is None:
+                return request()
+            closed = (
+                end_time is not None
+                and end_time + CANDLE_INTERVAL <= datetime.now(timezone.utc)
+            )
+            ttl = None if closed else self.cache.open_ttl
+            return self.cache.fetch(endpoint, params, request, ttl)
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Error retrieving historical OHLCV data: {str(e)}")
             if hasattr(e.response, "text"):
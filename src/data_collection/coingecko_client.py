@@ -1,14 +1,158 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
 import requests
+from ..constants import XRP_ID
 from ..utils.config import config
 from ..utils.logger import data_collection_logger
+from .http_transport import get_transport
+from .rate_limits import COINGECKO, get_rate_limiter
+from .response_cache import get_response_cache
 
+# market_chart/range points are hourly, so a range is final an hour after it ends
+CHART_SETTLE_TIME = timedelta(hours=1)
+
+
+class FetchCache:
+    """
+    A thread-safe record of what CoinGecko last returned, for conditional polling.
+
+    CoinGecko refreshes a coin's market data about every 30 minutes, more slowly
+    than we poll. The cache keeps each request's ``ETag`` and ``Last-Modified``
+    validators so it can be repeated conditionally, and each coin's
+    ``last_updated`` so snapshots already stored are skipped.
+
+    Attributes:
+        requests (int): Conditional requests sent.
+        not_modified (int): Requests answered with 304 Not Modified.
+        snapshots (int): Coin snapshots polled, including those a 304 covered.
+        skipped (int): Snapshots skipped because they were already seen.
+    """
 
-class CoinGeckoClient:
     def __init__(self):
-        self.base_url = config["api_endpoints"]["coingecko"]
+        self.requests = 0
+        self.not_modified = 0
+        self.snapshots = 0
+        self.skipped = 0
+        self._validators = {}
+        self._last_updated = {}
+        self._lock = threading.Lock()
+
+    def conditional_headers(self, key):
+        """Return the ``If-None-Match``/``If-Modified-Since`` headers for a request."""
+        with self._lock:
+            etag, last_modified = self._validators.get(key, (None, None))
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def record_response(self, key, response, snapshot_count):
+        """
+        Record a conditional response's validators and count it.
+
+        Args:
+            key (tuple): The request the response belongs to.
+            response (requests.Response): The response received.
+            snapshot_count (int): Coin snapshots the request covers.
+
+        Returns:
+            bool: True if the response was 304 Not Modified.
+        """
+        not_modified = response.status_code == 304
+        with self._lock:
+            self.requests += 1
+            if not_modified:
+                self.not_modified += 1
+                self.snapshots += snapshot_count
+                self.skipped += snapshot_count
+            else:
+                self._validators[key] = (
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                )
+        return not_modified
+
+    def filter_changed(self, vs_currency, markets):
+        """
+        Return the markets whose ``last_updated`` differs from the last one seen.
+
+        Args:
+            vs_currency (str): Quote currency the markets were requested in.
+            markets (list): Market dictionaries from ``coins/markets``.
+
+        Returns:
+            list: The markets with a new snapshot, in their original order.
+        """
+        changed = []
+        with self._lock:
+            for market in markets:
+                key = (market["id"], vs_currency)
+                self.snapshots += 1
+                if self._last_updated.get(key) == market["last_updated"]:
+                    self.skipped += 1
+                    continue
+                self._last_updated[key] = market["last_updated"]
+                changed.append(market)
+        return changed
+
+    def forget(self, vs_currency, markets):
+        """
+        Drop the recorded ``last_updated`` of markets that were not stored.
+
+        Called when a write fails, so the same snapshots are stored on the next poll
+        instead of being skipped. The request validators are dropped too, so that
+        poll gets a full response rather than a 304.
+        """
+        with self._lock:
+            for market in markets:
+                self._last_updated.pop((market["id"], vs_currency), None)
+            self._validators.clear()
+
+    def stats(self):
+        """Return the cache counters plus hit and skip rates, for logging."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "not_modified": self.not_modified,
+                "snapshots": self.snapshots,
+                "skipped": self.skipped,
+                "hit_rate": (
+                    self.not_modified / self.requests if self.requests else None
+                ),
+                "skip_rate": self.skipped / self.snapshots if self.snapshots else None,
+            }
+
+
+class CoinGeckoClient:
+    def __init__(
+        self,
+        transport=None,
+        fetch_cache=None,
+        cache=None,
+        rate_limiter=None,
+        base_url=None,
+    ):
+        # A client pointed elsewhere, e.g. at the fake provider, is not rate limited
+        if rate_limiter is None and base_url in (
+            None,
+            config["api_endpoints"]["coingecko"],
+        ):
+            rate_limiter = get_rate_limiter(COINGECKO)
+        self.base_url = base_url or config["api_endpoints"]["coingecko"]
         self.api_key = config["api_keys"]["coingecko"]
+        self.transport = transport or get_transport()
+        self.fetch_cache = fetch_cache or get_fetch_cache()
+        self.cache = cache if cache is not None else get_response_cache()
+        self.rate_limiter = rate_limiter
         self.logger = data_collection_logger
 
+    def _wait_for_rate_limit(self):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
     def get_market_data(self):
         endpoint = f"{self.base_url}/coins/ripple"
         params = {
@@ -25,7 +169,8 @@ class CoinGeckoClient:
         self.logger.info(f"Requesting XRP data from CoinGecko endpoint: {endpoint}")
 
         try:
-            response = requests.get(endpoint, params=params, headers=headers)
+            self._wait_for_rate_limit()
+            response = self.transport.get(endpoint, params=params, headers=headers)
             response.raise_for_status()
             self.logger.info("Successfully retrieved XRP data from CoinGecko")
             return response.json()
@@ -33,9 +178,136 @@ class CoinGeckoClient:
             self.logger.error(f"Error retrieving XRP data from CoinGecko: {str(e)}")
             raise
 
-    def get_historical_market_data(self, days=1, interval="15m"):
-        endpoint = f"{self.base_url}/coins/ripple/market_chart"
-        params = {"vs_currency": "usd", "days": days, "interval": interval}
+    def get_markets(self, ids, vs_currency="usd"):
+        """
+        Fetch current market data for several coins in one request.
+
+        Args:
+            ids (list): CoinGecko coin IDs, e.g. ["ripple"].
+            vs_currency (str, optional): Quote currency of the prices, market caps
+                and volumes. Defaults to "usd".
+
+        Returns:
+            list: One market dictionary per coin, as returned by ``coins/markets``.
+
+        Raises:
+            requests.exceptions.RequestException: If there's an error in the API request.
+        """
+        endpoint = f"{self.base_url}/coins/markets"
+        params = {"vs_currency": vs_currency, "ids": ",".join(ids)}
+        headers = {"X-Cg-Pro-Api-Key": self.api_key}
+
+        self.logger.info(
+            f"Requesting {len(ids)} markets in {vs_currency} from CoinGecko "
+            f"endpoint: {endpoint}"
+        )
+
+        try:
+            self._wait_for_rate_limit()
+            response = self.transport.get(endpoint, params=params, headers=headers)
+            response.raise_for_status()
+            self.logger.info("Successfully retrieved markets from CoinGecko")
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error retrieving markets from CoinGecko: {str(e)}")
+            raise
+
+    def get_changed_markets(self, ids, vs_currency="usd"):
+        """
+        Fetch current market data, returning only snapshots not seen before.
+
+        The request is sent conditionally with the validators of the previous
+        response. A 304 Not Modified, or a coin whose ``last_updated`` matches the
+        snapshot already returned, is skipped, so unchanged data is neither parsed
+        nor written again. The hit and skip counts are kept on ``fetch_cache``.
+
+        Args:
+            ids (list): CoinGecko coin IDs, e.g. ["ripple"].
+            vs_currency (str, optional): Quote currency. Defaults to "usd".
+
+        Returns:
+            list: Market dictionaries with a new ``last_updated``; empty if nothing
+            changed.
+
+        Raises:
+            requests.exceptions.RequestException: If there's an error in the API request.
+        """
+        endpoint = f"{self.base_url}/coins/markets"
+        params = {"vs_currency": vs_currency, "ids": ",".join(ids)}
+        key = (endpoint, vs_currency, params["ids"])
+        headers = {"X-Cg-Pro-Api-Key": self.api_key}
+        headers.update(self.fetch_cache.conditional_headers(key))
+
+        self.logger.info(
+            f"Conditionally requesting {len(ids)} markets in {vs_currency} from "
+            f"CoinGecko endpoint: {endpoint}"
+        )
+
+        try:
+            self._wait_for_rate_limit()
+            response = self.transport.get(endpoint, params=params, headers=headers)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error retrieving markets from CoinGecko: {str(e)}")
+            raise
+
+        if self.fetch_cache.record_response(key, response, len(ids)):
+            self.logger.info(f"CoinGecko markets in {vs_currency} not modified")
+            return []
+        changed = self.fetch_cache.filter_changed(vs_currency, response.json())
+        self.logger.info(
+            f"Retrieved {len(changed)} changed markets in {vs_currency} from CoinGecko"
+        )
+        return changed
+
+    def get_historical_market_data(
+        self,
+        days=1,
+        interval="15m",
+        start_time=None,
+        end_time=None,
+        coin_id=XRP_ID,
+        vs_currency="usd",
+    ):
+        """
+        Fetch price, market cap and volume history from ``market_chart``.
+
+        Without a range the last ``days`` days are returned. With ``start_time`` and
+        ``end_time`` the ``market_chart/range`` endpoint is used instead; CoinGecko
+        picks the granularity from the length of the range (hourly for 2 to 90
+        days), so ``interval`` is not sent.
+
+        With a response cache, ranges that ended over an hour ago are served from
+        disk forever once fetched; ranges up to now are only cached for a short TTL.
+
+        Args:
+            days (int, optional): Days of history up to now. Defaults to 1.
+            interval (str, optional): Data interval for the ``days`` form.
+            start_time (datetime, optional): Start of the range.
+            end_time (datetime, optional): End of the range.
+            coin_id (str, optional): CoinGecko coin ID. Defaults to XRP.
+            vs_currency (str, optional): Quote currency. Defaults to "usd".
+
+        Returns:
+            dict: "prices", "market_caps" and "total_volumes", each a list of
+            [unix milliseconds, value] pairs.
+
+        Raises:
+            requests.exceptions.RequestException: If there's an error in the API request.
+            CacheMissError: If the cache is offline and has no fresh response.
+        """
+        closed = False
+        if start_time is not None and end_time is not None:
+            endpoint = f"{self.base_url}/coins/{coin_id}/market_chart/range"
+            params = {
+                "vs_currency": vs_currency,
+                "from": int(start_time.timestamp()),
+                "to": int(end_time.timestamp()),
+            }
+            closed = end_time + CHART_SETTLE_TIME <= datetime.now(timezone.utc)
+        else:
+            endpoint = f"{self.base_url}/coins/{coin_id}/market_chart"
+            params = {"vs_currency": vs_currency, "days": days, "interval": interval}
         headers = {"X-Cg-Pro-Api-Key": self.api_key}
 
         # Log the request
@@ -44,15 +316,35 @@ class CoinGeckoClient:
         )
         self.logger.info(f"Parameters: {params}")
 
-        try:
-            response = requests.get(endpoint, params=params, headers=headers)
+        def request():
+            self._wait_for_rate_limit()
+            response = self.transport.get(endpoint, params=params, headers=headers)
             response.raise_for_status()
             self.logger.info(
                 "Successfully retrieved XRP historical data from CoinGecko"
             )
             return response.json()
+
+        try:
+            if self.cache is None:
+                return request()
+            ttl = None if closed else self.cache.open_ttl
+            return self.cache.fetch(endpoint, params, request, ttl)
         except requests.exceptions.RequestException as e:
             self.logger.error(
                 f"Error retrieving XRP historical data from CoinGecko: {str(e)}"
             )
             raise
+
+
+_default_fetch_cache = None
+_default_fetch_cache_lock = threading.Lock()
+
+
+def get_fetch_cache():
+    """Return the process-wide fetch cache, so it outlives each tick's client."""
+    global _default_fetch_cache
+    with _default_fetch_cache_lock:
+        if _default_fetch_cache is None:
+            _default_fetch_cache = FetchCache()
+        return _default_fetch_cache
@@ -1,3 +1,5 @@
+import time
+
 import requests
 from sqlalchemy.orm import Session
 
@@ -5,70 +7,228 @@ from datetime import datetime, timezone, timedelta
 
 from src.data_collection.coingecko_client import CoinGeckoClient
 from src.data_collection.coinapi_client import CoinAPIClient
+from src.data_collection.rate_limits import CreditLedger
+from src.data_collection.symbols import (
+    DEFAULT_MARKET,
+    configured_markets,
+    markets_by_quote,
+)
+from src.constants import COINGECKO_EXCHANGE, COINGECKO_IDS
+from src.data_processing.streaming_indicators import update_streaming_indicators
 from src.models.market_data_15_min import MarketData15Min
 from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.bulk import upsert_rows
+from src.models.rollups import refresh_rollups
 from ..utils.logger import data_collection_logger
 
+OHLCV_COLUMNS = (
+    "timestamp",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "trades_count",
+    "price_change",
+)
+
+
+def parse_coinapi_timestamp(timestamp_str):
+    """
+    Parse a CoinAPI ``time_period_end`` string into a UTC datetime.
+
+    Fractional seconds are dropped so that candles align on whole seconds.
+    """
+    timestamp_str = timestamp_str.rstrip("Z")
+    if "." in timestamp_str:
+        timestamp_str = timestamp_str[: timestamp_str.index(".")]  # Keep 0 decimals
+    return datetime.fromisoformat(timestamp_str).replace(tzinfo=timezone.utc)
+
+
+def parse_ohlcv_candles(candles, market=DEFAULT_MARKET):
+    """
+    Convert a page of CoinAPI candles into a columnar batch for bulk loading.
+
+    Args:
+        candles (list): Candle dictionaries as returned by CoinAPIClient.
+        market (Market, optional): The market the candles belong to. Defaults to
+            the default market.
+
+    Returns:
+        dict: Mapping of OHLCVData15Min column name to a list of values.
+    """
+    columns = {
+        "exchange": [market.exchange] * len(candles),
+        "symbol": [market.symbol] * len(candles),
+    }
+    columns.update({name: [] for name in OHLCV_COLUMNS})
+    for candle in candles:
+        columns["timestamp"].append(parse_coinapi_timestamp(candle["time_period_end"]))
+        columns["open"].append(candle["price_open"])
+        columns["high"].append(candle["price_high"])
+        columns["low"].append(candle["price_low"])
+        columns["close"].append(candle["price_close"])
+        columns["volume"].append(candle["volume_traded"])
+        columns["trades_count"].append(candle["trades_count"])
+        columns["price_change"].append(candle["price_close"] - candle["price_open"])
+    return columns
+
+
+def parse_market_data(market_data):
+    """
+    Convert a CoinGecko ``coins/ripple`` response into a one-row columnar batch.
+
+    Args:
+        market_data (dict): The response returned by CoinGeckoClient.get_market_data.
+
+    Returns:
+        dict: Mapping of MarketData15Min column name to a single-item list.
+    """
+    timestamp = datetime.fromisoformat(market_data["last_updated"].rstrip("Z")).replace(
+        tzinfo=timezone.utc
+    )
+    return {
+        "timestamp": [timestamp],
+        "price_usd": [market_data["market_data"]["current_price"]["usd"]],
+        "market_cap": [market_data["market_data"]["market_cap"]["usd"]],
+        "total_volume": [market_data["market_data"]["total_volume"]["usd"]],
+        "circulating_supply": [market_data["market_data"]["circulating_supply"]],
+        "total_supply": [market_data["market_data"]["total_supply"]],
+        "max_supply": [market_data["market_data"]["max_supply"]],
+    }
+
+
+def parse_markets(markets, quote):
+    """
+    Convert a CoinGecko ``coins/markets`` response into a columnar batch.
+
+    Rows are stored under the COINGECKO exchange with a BASE_QUOTE symbol. Prices,
+    market caps and volumes are in the quote currency the markets were requested in.
+
+    Args:
+        markets (list): The response returned by CoinGeckoClient.get_markets.
+        quote (str): The quote currency of the request, e.g. "USD".
+
+    Returns:
+        dict: Mapping of MarketData15Min column name to a list of values.
+    """
+    bases = {coingecko_id: base for base, coingecko_id in COINGECKO_IDS.items()}
+    columns = {
+        name: []
+        for name in (
+            "exchange",
+            "symbol",
+            "timestamp",
+            "price_usd",
+            "market_cap",
+            "total_volume",
+            "circulating_supply",
+            "total_supply",
+            "max_supply",
+        )
+    }
+    for market in markets:
+        columns["exchange"].append(COINGECKO_EXCHANGE)
+        columns["symbol"].append(f"{bases[market['id']]}_{quote.upper()}")
+        columns["timestamp"].append(
+            datetime.fromisoformat(market["last_updated"].rstrip("Z")).replace(
+                tzinfo=timezone.utc
+            )
+        )
+        columns["price_usd"].append(market["current_price"])
+        columns["market_cap"].append(market["market_cap"])
+        columns["total_volume"].append(market["total_volume"])
+        columns["circulating_supply"].append(market["circulating_supply"])
+        columns["total_supply"].append(market["total_supply"])
+        columns["max_supply"].append(market["max_supply"])
+    return columns
+
 
 def collect_and_store_market_data(
-    db: Session, coingecko_client: CoinGeckoClient = None
+    db: Session, coingecko_client: CoinGeckoClient = None, markets=None
 ):
     """
-    Collect current market data for XRP from CoinGecko and store it in the database.
+    Collect current market data from CoinGecko and store it in the database.
 
-    This function retrieves the latest market data for XRP cryptocurrency from the
-    CoinGecko API, including current price, market cap, volume, and supply information.
-    It then stores this data in the provided database.
+    This function retrieves the latest market data for the base assets of the
+    configured markets from the CoinGecko API, including current price, market cap,
+    volume, and supply information. One conditional ``coins/markets`` request covers
+    every asset quoted in the same currency, and only snapshots with a new
+    ``last_updated`` are parsed and stored in the provided database.
 
     Args:
         db: A database session object for storing the collected data.
+        coingecko_client (CoinGeckoClient, optional): Client used for the requests.
+        markets (list, optional): Market tuples. Defaults to the configured markets.
 
     Returns:
-        None
+        dict: The client's fetch cache statistics (see FetchCache.stats).
 
     Raises:
         Any exceptions raised by the CoinGecko API or database operations.
     """
     if coingecko_client is None:
         coingecko_client = CoinGeckoClient()
+    markets = markets or configured_markets()
+    fetched = []
     try:
-        data_collection_logger.info("Collecting XRP market data from CoinGecko...")
-        market_data = coingecko_client.get_market_data()
-        timestamp_str = market_data["last_updated"]
-        timestamp = datetime.fromisoformat(timestamp_str.rstrip("Z")).replace(
-            tzinfo=timezone.utc
-        )
-
-        new_market_data = MarketData15Min(
-            timestamp=timestamp,
-            price_usd=market_data["market_data"]["current_price"]["usd"],
-            market_cap=market_data["market_data"]["market_cap"]["usd"],
-            total_volume=market_data["market_data"]["total_volume"]["usd"],
-            circulating_supply=market_data["market_data"]["circulating_supply"],
-            total_supply=market_data["market_data"]["total_supply"],
-            max_supply=market_data["market_data"]["max_supply"],
-        )
+        data_collection_logger.info("Collecting market data from CoinGecko...")
+        for quote, ids in markets_by_quote(markets).items():
+            changed = coingecko_client.get_changed_markets(ids, quote.lower())
+            if not changed:
+                data_collection_logger.info(
+                    f"Market data in {quote} unchanged since the last poll"
+                )
+                continue
+            fetched.append((quote.lower(), changed))
+            columns = parse_markets(changed, quote)
 
-        db.add(new_market_data)
+            # Upsert so a snapshot collected twice overwrites rather than duplicates
+            upsert_rows(db, MarketData15Min, columns)
+            data_collection_logger.info(
+                f"Stored market data for {', '.join(columns['symbol'])}"
+            )
         db.commit()
-        data_collection_logger.info(
-            f"Stored market data for timestamp: {new_market_data.timestamp}"
-        )
     except Exception as e:
         db.rollback()
+        for vs_currency, changed in fetched:
+            coingecko_client.fetch_cache.forget(vs_currency, changed)
         data_collection_logger.error(f"Error collecting market data: {str(e)}")
         raise
 
+    stats = coingecko_client.fetch_cache.stats()
+    data_collection_logger.info(
+        f"CoinGecko fetch cache: {stats['not_modified']}/{stats['requests']} requests "
+        f"not modified, {stats['skipped']}/{stats['snapshots']} snapshots skipped"
+    )
+    return stats
 
-def collect_and_store_ohlcv_data(db: Session, coinapi_client: CoinAPIClient = None):
+
+def collect_and_store_ohlcv_data(
+    db: Session,
+    coinapi_client: CoinAPIClient = None,
+    market=DEFAULT_MARKET,
+    budget: CreditLedger = None,
+):
     """
-    Collect and store the latest OHLCV (Open, High, Low, Close, Volume) data for XRP.
+    Collect and store the latest OHLCV (Open, High, Low, Close, Volume) data for a
+    market.
+
+    This function retrieves the most recent OHLCV data for the market from
+    the CoinAPI. It then stores this data in the provided database, together with
+    the technical indicators for the new candles, computed incrementally.
 
-    This function retrieves the most recent OHLCV data for XRP cryptocurrency from
-    the CoinAPI. It then stores this data in the provided database.
+    The request's credit is reserved on the shared credit ledger first, so the
+    live collector and any backfill running at the same time share the daily
+    budget. When it is exhausted the market is skipped with a warning.
 
     Args:
         db: A database session object for storing the collected data.
+        coinapi_client (CoinAPIClient, optional): Client used for the request.
+        market (Market, optional): The market to collect. Defaults to the default
+            market.
+        budget (CreditLedger, optional): Credit budget to reserve the request on.
+            Defaults to the persistent CoinAPI credit ledger.
 
     Returns:
         None
@@ -78,36 +238,28 @@ def collect_and_store_ohlcv_data(db: Session, coinapi_client: CoinAPIClient = No
     """
     if coinapi_client is None:
         coinapi_client = CoinAPIClient()
+    if budget is None:
+        budget = CreditLedger.from_config()
+    if not budget.try_reserve(1):
+        data_collection_logger.warning(
+            f"CoinAPI credits exhausted, skipping {market.exchange} {market.symbol} "
+            f"OHLCV collection"
+        )
+        return
     try:
-        data_collection_logger.info("Collecting XRP OHLCV data from CoinAPI...")
-        ohlcv_data = coinapi_client.get_ohlcv_data()
-
-        for candle in ohlcv_data:
-            timestamp_str = candle["time_period_end"].rstrip("Z")
-            if "." in timestamp_str:
-                timestamp_str = timestamp_str[
-                    : timestamp_str.index(".")
-                ]  # Keep 0 decimals
-            timestamp = datetime.fromisoformat(timestamp_str).replace(
-                tzinfo=timezone.utc
-            )
-
-            new_ohlcv = OHLCVData15Min(
-                timestamp=timestamp,
-                open=candle["price_open"],
-                high=candle["price_high"],
-                low=candle["price_low"],
-                close=candle["price_close"],
-                volume=candle["volume_traded"],
-                trades_count=candle["trades_count"],
-                price_change=candle["price_close"] - candle["price_open"],
-            )
-
-            db.add(new_ohlcv)
+        data_collection_logger.info(
+            f"Collecting {market.exchange} {market.symbol} OHLCV data from CoinAPI..."
+        )
+        ohlcv_data = coinapi_client.get_ohlcv_data(market.coinapi_symbol_id)
 
+        # A re-collected partial candle overwrites the row stored earlier
+        columns = parse_ohlcv_candles(ohlcv_data, market)
+        upsert_rows(db, OHLCVData15Min, columns)
+        update_streaming_indicators(db, columns["timestamp"], columns["close"], *market)
         db.commit()
         data_collection_logger.info(
-            f"Stored OHLCV data for {len(ohlcv_data)} intervals"
+            f"Stored {market.exchange} {market.symbol} OHLCV data for "
+            f"{len(ohlcv_data)} intervals"
         )
     except Exception as e:
         db.rollback()
@@ -120,6 +272,7 @@ def collect_historical_data(
     start_date: datetime,
     end_date: datetime,
     coinapi_client: CoinAPIClient = None,
+    bulk: bool = True,
 ):
     """
     Collect and store historical OHLCV data for XRP within a specified date range.
@@ -128,19 +281,28 @@ def collect_historical_data(
     for the period between start_date and end_date. It then stores this data in the
     provided database.
 
+    In bulk mode (the default) each CoinAPI page is converted into a columnar batch
+    and upserted with a single COPY-and-merge, committed as one transaction per page,
+    so re-running a range overwrites rather than duplicates. Setting ``bulk=False``
+    falls back to one ORM object per candle.
+
     Args:
         db: A database session object for storing the collected data.
         start_date (datetime): The start date for the historical data collection.
         end_date (datetime): The end date for the historical data collection.
+        coinapi_client (CoinAPIClient, optional): Client used to fetch the pages.
+        bulk (bool, optional): Use the bulk ingest path. Defaults to True.
 
     Returns:
-        None
+        dict: Ingest statistics with keys "rows", "pages", "seconds" and "rows_per_sec".
 
     Raises:
         Any exceptions raised by the CoinAPI or database operations.
     """
     if coinapi_client is None:
         coinapi_client = CoinAPIClient()
+    stats = {"rows": 0, "pages": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+    started = time.perf_counter()
     try:
         current_date = start_date
         data_collection_logger.info(
@@ -157,30 +319,30 @@ def collect_historical_data(
                 f"Retrieved {len(ohlcv_data)} data points for {current_date.date()}"
             )
 
-            for candle in ohlcv_data:
-                timestamp_str = candle["time_period_end"].rstrip("Z")
-                if "." in timestamp_str:
-                    timestamp_str = timestamp_str[
-                        : timestamp_str.index(".")
-                    ]  # Keep 0 decimal places
-                timestamp = datetime.fromisoformat(timestamp_str).replace(
-                    tzinfo=timezone.utc
-                )
-
-                new_ohlcv = OHLCVData15Min(
-                    timestamp=timestamp,
-                    open=candle["price_open"],
-                    high=candle["price_high"],
-                    low=candle["price_low"],
-                    close=candle["price_close"],
-                    volume=candle["volume_traded"],
-                    trades_count=candle["trades_count"],
-                    price_change=candle["price_close"] - candle["price_open"],
+            if bulk:
+                stats["rows"] += upsert_rows(
+                    db, OHLCVData15Min, parse_ohlcv_candles(ohlcv_data)
                 )
-
-                db.add(new_ohlcv)
+            else:
+                for candle in ohlcv_data:
+                    db.add(
+                        OHLCVData15Min(
+                            timestamp=parse_coinapi_timestamp(
+                                candle["time_period_end"]
+                            ),
+                            open=candle["price_open"],
+                            high=candle["price_high"],
+                            low=candle["price_low"],
+                            close=candle["price_close"],
+                            volume=candle["volume_traded"],
+                            trades_count=candle["trades_count"],
+                            price_change=candle["price_close"] - candle["price_open"],
+                        )
+                    )
+                stats["rows"] += len(ohlcv_data)
 
             db.commit()
+            stats["pages"] += 1
             data_collection_logger.info(
                 f"Stored historical OHLCV data for {current_date.date()}"
             )
@@ -194,6 +356,15 @@ def collect_historical_data(
         data_collection_logger.error(f"Error collecting historical data: {str(e)}")
         raise
 
+    stats["seconds"] = time.perf_counter() - started
+    if stats["seconds"] > 0:
+        stats["rows_per_sec"] = stats["rows"] / stats["seconds"]
+    data_collection_logger.info(
+        f"Historical ingest stored {stats['rows']} rows over {stats['pages']} pages "
+        f"in {stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/sec)"
+    )
+    return stats
+
 
 def run_data_collection(
     db: Session,
@@ -201,27 +372,36 @@ def run_data_collection(
     coinapi_client: CoinAPIClient = None,
 ):
     """
-    Run both market data and ohlcv collect and store functions.
+    Run both market data and ohlcv collect and store functions for every
+    configured market.
     :param db:
     :param coingecko_client: Get market data, get historical data
     :param coinapi_client: Get ohlcv data, get historical ohlcv data
     :return: Nothing - Stores data in db
+    :raises: Any exception raised while collecting, after it has been logged
     """
     try:
         data_collection_logger.info("Starting data collection process...")
-        collect_and_store_market_data(db, coingecko_client)
-        collect_and_store_ohlcv_data(db, coinapi_client)
+        markets = configured_markets()
+        budget = CreditLedger.from_config()
+        collect_and_store_market_data(db, coingecko_client, markets)
+        for market in markets:
+            collect_and_store_ohlcv_data(db, coinapi_client, market, budget=budget)
+        refresh_rollups(db)
         data_collection_logger.info("Data collection completed successfully.")
     except Exception as e:
         data_collection_logger.error(f"Error in data collection process: {str(e)}")
+        raise
 
 
 if __name__ == "__main__":
+    from src.data_collection.async_collector import run_async_data_collection
     from src.models.base import SessionLocal
 
     db = SessionLocal()
     try:
-        run_data_collection(db)
+        # The markets are fetched concurrently, up to data_collection.max_concurrency
+        run_async_data_collection(db)
     finally:
         db.close()
         logger.info("Database connection closed.")
@@ -0,0 +1,521 @@
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from ..utils.config import config
+from ..utils.logger import data_collection_logger
+
+COINAPI_PREFIX = "/coinapi/v1"
+COINGECKO_PREFIX = "/coingecko/api/v3"
+PERIOD_SECONDS = {
+    "1MIN": 60,
+    "5MIN": 300,
+    "15MIN": 900,
+    "30MIN": 1800,
+    "1HRS": 3600,
+    "4HRS": 14400,
+    "1DAY": 86400,
+}
+DEFAULT_HISTORY_LIMIT = 100
+# Quote currency prices relative to USD
+FX_RATES = {"usd": 1.0, "usdt": 1.0, "eur": 0.92, "gbp": 0.79}
+CIRCULATING_SUPPLY = 55_000_000_000
+TOTAL_SUPPLY = 99_987_000_000
+MAX_SUPPLY = 100_000_000_000
+
+
+def _unit(*parts):
+    """Return a deterministic pseudo-random number in [0, 1) for the given parts."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64
+
+
+def _coinapi_time(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%S.0000000Z"
+    )
+
+
+def _iso_time(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%S.000Z"
+    )
+
+
+def _parse_time(value):
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class SyntheticDataset:
+    """
+    Deterministic market data generated on demand for any symbol and time.
+
+    Prices are a smooth function of time plus hashed noise, so the same candle or
+    snapshot is returned however often, and in whatever window, it is requested.
+    Nothing later than the clock's "now" is ever returned.
+
+    Attributes:
+        seed (int): Varies every generated series.
+        snapshot_interval (float): Seconds between CoinGecko ``last_updated``
+            changes.
+    """
+
+    def __init__(self, seed=0, snapshot_interval=60.0, clock=time.time):
+        self.seed = seed
+        self.snapshot_interval = snapshot_interval
+        self._clock = clock
+
+    def now(self):
+        return self._clock()
+
+    def price(self, series, seconds):
+        """Return the USD price of a series at a unix time."""
+        base = 0.3 + 0.4 * _unit(self.seed, series)
+        phase = 2 * math.pi * _unit(self.seed, series, "phase")
+        trend = 0.15 * math.sin(2 * math.pi * seconds / (30 * 86400) + phase)
+        daily = 0.04 * math.sin(2 * math.pi * seconds / 86400 + phase)
+        noise = 0.01 * (_unit(self.seed, series, int(seconds)) - 0.5)
+        return base * math.exp(trend + daily + noise)
+
+    def candle(self, symbol_id, start, period):
+        """Return the CoinAPI candle of the period starting at ``start``."""
+        end = start + period
+        price_open = self.price(symbol_id, start)
+        price_close = self.price(symbol_id, end)
+        spread = 0.005 * _unit(self.seed, symbol_id, start, "range")
+        return {
+            "time_period_start": _coinapi_time(start),
+            "time_period_end": _coinapi_time(end),
+            "time_open": _coinapi_time(start),
+            "time_close": _coinapi_time(end - 1),
+            "price_open": price_open,
+            "price_high": max(price_open, price_close) * (1 + spread),
+            "price_low": min(price_open, price_close) * (1 - spread),
+            "price_close": price_close,
+            "volume_traded": 1e5 * (1 + 4 * _unit(self.seed, symbol_id, start, "v")),
+            "trades_count": 50 + int(200 * _unit(self.seed, symbol_id, start, "n")),
+        }
+
+    def ohlcv_history(self, symbol_id, period, start, end=None, limit=None):
+        """
+        Return closed candles starting at or after ``start``, oldest first.
+
+        Args:
+            symbol_id (str): CoinAPI symbol ID.
+            period (int): Candle length in seconds.
+            start (float): Unix time of the window start.
+            end (float, optional): Unix time of the window end. Defaults to now.
+            limit (int, optional): Largest number of candles returned.
+
+        Returns:
+            list: Candle dictionaries shaped like CoinAPI's.
+        """
+        now = self._clock()
+        end = now if end is None else min(end, now)
+        limit = DEFAULT_HISTORY_LIMIT if limit is None else limit
+        first = math.ceil(start / period) * period
+        candles = []
+        candle_start = first
+        while candle_start + period <= end and len(candles) < limit:
+            candles.append(self.candle(symbol_id, candle_start, period))
+            candle_start += period
+        return candles
+
+    def ohlcv_latest(self, symbol_id, period, limit=1):
+        """Return the last ``limit`` closed candles, newest first."""
+        last_start = math.floor(self._clock() / period) * period - period
+        return [
+            self.candle(symbol_id, last_start - i * period, period)
+            for i in range(limit)
+        ]
+
+    def _snapshot_time(self):
+        return math.floor(self._clock() / self.snapshot_interval) * (
+            self.snapshot_interval
+        )
+
+    def _volume(self, coin_id, seconds):
+        return 1e9 * (1 + _unit(self.seed, coin_id, int(seconds), "volume"))
+
+    def coin(self, coin_id):
+        """Return a ``coins/{id}`` response with market data in every quote."""
+        updated = self._snapshot_time()
+        price = self.price(coin_id, updated)
+        volume = self._volume(coin_id, updated)
+        return {
+            "id": coin_id,
+            "symbol": coin_id[:3],
+            "name": coin_id.title(),
+            "last_updated": _iso_time(updated),
+            "market_data": {
+                "current_price": {q: price * r for q, r in FX_RATES.items()},
+                "market_cap": {
+                    q: price * r * CIRCULATING_SUPPLY for q, r in FX_RATES.items()
+                },
+                "total_volume": {q: volume * r for q, r in FX_RATES.items()},
+                "circulating_supply": CIRCULATING_SUPPLY,
+                "total_supply": TOTAL_SUPPLY,
+                "max_supply": MAX_SUPPLY,
+                "last_updated": _iso_time(updated),
+            },
+        }
+
+    def markets(self, ids, vs_currency="usd"):
+        """Return a ``coins/markets`` response for the given coin IDs."""
+        updated = self._snapshot_time()
+        rate = FX_RATES.get(vs_currency, 1.0)
+        markets = []
+        for coin_id in ids:
+            price = self.price(coin_id, updated) * rate
+            markets.append(
+                {
+                    "id": coin_id,
+                    "symbol": coin_id[:3],
+                    "name": coin_id.title(),
+                    "current_price": price,
+                    "market_cap": price * CIRCULATING_SUPPLY,
+                    "total_volume": self._volume(coin_id, updated) * rate,
+                    "circulating_supply": CIRCULATING_SUPPLY,
+                    "total_supply": TOTAL_SUPPLY,
+                    "max_supply": MAX_SUPPLY,
+                    "last_updated": _iso_time(updated),
+                }
+            )
+        return markets
+
+    def market_chart(self, coin_id, vs_currency, start, end):
+        """
+        Return a ``market_chart`` response between two unix times.
+
+        The granularity follows CoinGecko's: 5-minutely up to a day, hourly up to
+        90 days and daily beyond.
+        """
+        end = min(end, self._clock())
+        span = end - start
+        step = 300 if span <= 86400 else 3600 if span <= 90 * 86400 else 86400
+        rate = FX_RATES.get(vs_currency, 1.0)
+        chart = {"prices": [], "market_caps": [], "total_volumes": []}
+        seconds = math.ceil(start / step) * step
+        while seconds <= end:
+            price = self.price(coin_id, seconds) * rate
+            milliseconds = int(seconds * 1000)
+            chart["prices"].append([milliseconds, price])
+            chart["market_caps"].append([milliseconds, price * CIRCULATING_SUPPLY])
+            chart["total_volumes"].append(
+                [milliseconds, self._volume(coin_id, seconds) * rate]
+            )
+            seconds += step
+        return chart
+
+
+class RecordedDataset:
+    """
+    Responses replayed from a ResponseCache directory.
+
+    Entries are matched on the endpoint path from ``ohlcv/`` or ``coins/`` onwards
+    and on the query parameters as strings, so pages recorded against the real
+    providers are served whatever host the clients are pointed at.
+
+    Attributes:
+        directory (str): The cache directory the entries were loaded from.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._responses = {}
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(root, name)) as entry_file:
+                        entry = json.load(entry_file)
+                    route = route_of(urlsplit(entry["endpoint"]).path)
+                except (OSError, ValueError, KeyError):
+                    continue
+                if route is not None:
+                    self._responses[self._key(route, entry["params"])] = entry["body"]
+        data_collection_logger.info(
+            f"Loaded {len(self._responses)} recorded responses from {directory}"
+        )
+
+    def __len__(self):
+        return len(self._responses)
+
+    @staticmethod
+    def _key(route, params):
+        return route, tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+
+    def lookup(self, route, params):
+        """Return the recorded body of a request, or None if it wasn't recorded."""
+        return self._responses.get(self._key(route, params))
+
+
+def route_of(path):
+    """Return the provider route of a URL path, e.g. "ohlcv/X/latest", or None."""
+    for marker in ("/ohlcv/", "/coins/"):
+        index = path.find(marker)
+        if index >= 0:
+            return path[index + 1 :].rstrip("/")
+    return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        status, body, headers = self.server.provider.handle(
+            url.path, params, self.headers
+        )
+        payload = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        data_collection_logger.debug("Fake provider: " + format % args)
+
+
+class FakeProviderServer:
+    """
+    A local stand-in for the CoinAPI and CoinGecko REST APIs.
+
+    Serves the endpoints the clients use, ``ohlcv/{symbol}/history``,
+    ``ohlcv/{symbol}/latest``, ``coins/{id}``, ``coins/markets`` and
+    ``coins/{id}/market_chart[/range]``, from recorded responses or a synthetic
+    dataset, with injectable latency, server errors and 429s. CoinAPI is served
+    under ``/coinapi/v1`` and CoinGecko under ``/coingecko/api/v3``; point the
+    clients at ``coinapi_url`` and ``coingecko_url``.
+
+    Attributes:
+        dataset (SyntheticDataset): Generates responses that weren't recorded.
+        recorded (RecordedDataset): Recorded responses served first, or None.
+        latency (float): Seconds added to every response.
+        jitter (float): Up to this many extra seconds, drawn per request.
+        error_rate (float): Fraction of requests answered with a 5xx.
+        rate_limit_rate (float): Fraction of requests answered with a 429.
+        requests_per_second (float): Sustained rate above which requests get a
+            429, or None for no limit.
+        retry_after (int): Seconds sent in the ``Retry-After`` header of a 429.
+        counts (dict): Responses sent per status code.
+    """
+
+    def __init__(
+        self,
+        dataset=None,
+        recorded=None,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        rate_limit_rate=0.0,
+        requests_per_second=None,
+        retry_after=1,
+        seed=0,
+        clock=time.time,
+        sleep=time.sleep,
+    ):
+        self.dataset = dataset or SyntheticDataset(seed=seed, clock=clock)
+        self.recorded = recorded
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests_per_second = requests_per_second
+        self.retry_after = retry_after
+        self.counts = {}
+        self._random = random.Random(seed)
+        self._sleep = sleep
+        self._tokens = requests_per_second
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.provider = self
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, settings=None):
+        """Build a server from the ``fake_provider`` section of the configuration."""
+        settings = (
+            settings if settings is not None else config.get("fake_provider") or {}
+        )
+        recorded = settings.get("recorded_directory")
+        return cls(
+            recorded=RecordedDataset(recorded) if recorded else None,
+            host=settings.get("host", "127.0.0.1"),
+            port=settings.get("port", 8765),
+            latency=settings.get("latency_ms", 0) / 1000,
+            jitter=settings.get("jitter_ms", 0) / 1000,
+            error_rate=settings.get("error_rate", 0.0),
+            rate_limit_rate=settings.get("rate_limit_rate", 0.0),
+            requests_per_second=settings.get("requests_per_second"),
+            retry_after=settings.get("retry_after_seconds", 1),
+            seed=settings.get("seed", 0),
+        )
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def coinapi_url(self):
+        return self.url + COINAPI_PREFIX
+
+    @property
+    def coingecko_url(self):
+        return self.url + COINGECKO_PREFIX
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="fake-provider",
+            daemon=True,
+        )
+        self._thread.start()
+        data_collection_logger.info(f"Fake provider listening on {self.url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _throttled(self):
+        if self.requests_per_second is None:
+            return False
+        now = time.monotonic()
+        self._tokens = min(
+            self.requests_per_second,
+            self._tokens + (now - self._refilled_at) * self.requests_per_second,
+        )
+        self._refilled_at = now
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+
+    def _fault(self):
+        """Decide whether a request is answered with an injected 429 or 5xx."""
+        with self._lock:
+            delay = self.latency + self.jitter * self._random.random()
+            if self._throttled() or self._random.random() < self.rate_limit_rate:
+                return delay, 429
+            if self._random.random() < self.error_rate:
+                return delay, self._random.choice((500, 502, 503))
+            return delay, None
+
+    def _count(self, status):
+        with self._lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+
+    def handle(self, path, params, headers):
+        """
+        Answer one request.
+
+        Returns:
+            tuple: (status code, JSON body or None, response headers).
+        """
+        delay, fault = self._fault()
+        if delay:
+            self._sleep(delay)
+        if fault == 429:
+            status, body, response_headers = (
+                429,
+                {"error": "Too many requests"},
+                {"Retry-After": str(self.retry_after)},
+            )
+        elif fault is not None:
+            status, body, response_headers = fault, {"error": "Injected error"}, {}
+        else:
+            status, body, response_headers = self._respond(path, params, headers)
+        self._count(status)
+        return status, body, response_headers
+
+    def _respond(self, path, params, headers):
+        route = route_of(path)
+        if route is None:
+            return 404, {"error": f"Unknown endpoint {path}"}, {}
+        if self.recorded is not None:
+            body = self.recorded.lookup(route, params)
+            if body is not None:
+                return 200, body, {}
+        try:
+            body = self._generate(route.split("/"), params)
+        except (KeyError, ValueError) as e:
+            return 400, {"error": f"Bad request: {str(e)}"}, {}
+        if body is None:
+            return 404, {"error": f"Unknown endpoint {path}"}, {}
+
+        # coins/markets supports conditional polling like CoinGecko
+        if route == "coins/markets":
+            etag = '"' + hashlib.sha1(json.dumps(body).encode()).hexdigest() + '"'
+            if headers.get("If-None-Match") == etag:
+                return 304, None, {"ETag": etag}
+            return 200, body, {"ETag": etag}
+        return 200, body, {}
+
+    def _generate(self, parts, params):
+        dataset = self.dataset
+        if parts[0] == "ohlcv" and len(parts) == 3:
+            symbol_id, kind = parts[1], parts[2]
+            period = PERIOD_SECONDS[params.get("period_id", "15MIN")]
+            if kind == "history":
+                return dataset.ohlcv_history(
+                    symbol_id,
+                    period,
+                    _parse_time(params["time_start"]),
+                    _parse_time(params["time_end"]) if "time_end" in params else None,
+                    int(params.get("limit", DEFAULT_HISTORY_LIMIT)),
+                )
+            if kind == "latest":
+                return dataset.ohlcv_latest(
+                    symbol_id, period, int(params.get("limit", 1))
+                )
+            return None
+
+        if parts[0] != "coins" or len(parts) < 2:
+            return None
+        vs_currency = params.get("vs_currency", "usd")
+        if parts[1:] == ["markets"]:
+            return dataset.markets(params["ids"].split(","), vs_currency)
+        if len(parts) == 2:
+            return dataset.coin(parts[1])
+        if parts[2:] == ["market_chart"]:
+            end = dataset.now()
+            return dataset.market_chart(
+                parts[1], vs_currency, end - float(params["days"]) * 86400, end
+            )
+        if parts[2:] == ["market_chart", "range"]:
+            return dataset.market_chart(
+                parts[1], vs_currency, float(params["from"]), float(params["to"])
+            )
+        return None
@@ -0,0 +1,350 @@
+import bisect
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..utils.config import config
+from ..utils.logger import data_collection_logger
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised when a request is refused because the host's circuit is open."""
+
+
+class LatencyHistogram:
+    """
+    A thread-safe, fixed-bucket histogram of request latencies.
+
+    Attributes:
+        buckets (tuple): Upper bounds of the buckets in milliseconds. A final
+            overflow bucket catches anything slower.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Record one request that took ``seconds`` to complete."""
+        milliseconds = seconds * 1000
+        index = bisect.bisect_left(self.buckets, milliseconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._total_ms += milliseconds
+            self._max_ms = max(self._max_ms, milliseconds)
+
+    def quantile(self, q):
+        """
+        Estimate a latency quantile from the bucket counts.
+
+        Returns:
+            float: The upper bound (ms) of the bucket containing the quantile, the
+            observed maximum for the overflow bucket, or None if nothing was recorded.
+        """
+        with self._lock:
+            if self._count == 0:
+                return None
+            target = q * self._count
+            running = 0
+            for index, count in enumerate(self._counts):
+                running += count
+                if running >= target and count:
+                    if index < len(self.buckets):
+                        return float(self.buckets[index])
+                    return self._max_ms
+            return self._max_ms
+
+    def snapshot(self):
+        """Return the histogram as a plain dictionary suitable for logging or JSON."""
+        with self._lock:
+            labels = [f"le_{bound}ms" for bound in self.buckets] + ["overflow"]
+            snapshot = {
+                "buckets": dict(zip(labels, self._counts)),
+                "count": self._count,
+                "mean_ms": self._total_ms / self._count if self._count else None,
+                "max_ms": self._max_ms,
+            }
+        snapshot["p50_ms"] = self.quantile(0.5)
+        snapshot["p95_ms"] = self.quantile(0.95)
+        return snapshot
+
+
+class CircuitBreaker:
+    """
+    A per-host circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and requests
+    are refused for ``reset_timeout`` seconds. The first request after that is let
+    through as a trial (half-open) and every other request is refused until the
+    trial's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self):
+        """
+        Return True if a request may be sent to the host right now.
+
+        In the half-open state only one caller is admitted, as the trial; the
+        caller must then report its outcome with record_success, record_failure or
+        release.
+        """
+        with self._lock:
+            state = self._state()
+            if state == "half_open":
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return state != "open"
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state() == "half_open" or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def release(self):
+        """Let another trial through after one ended without a verdict, e.g. a 429."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+def parse_retry_after(value):
+    """
+    Convert a ``Retry-After`` header into a number of seconds.
+
+    The header may hold either a delay in seconds or an HTTP date.
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class HTTPTransport:
+    """
+    A shared HTTP transport for the data collection clients.
+
+    Requests go through one pooled, keep-alive ``requests.Session`` so repeated
+    calls to the same host reuse their TCP/TLS connection. Every request has a
+    timeout, transient failures (connection errors, timeouts, 429 and 5xx) are
+    retried with exponential backoff and full jitter, ``Retry-After`` is honoured,
+    and a circuit breaker per host stops hammering a provider that is down.
+
+    Attributes:
+        session (requests.Session): The pooled session used for all requests.
+        timeout (tuple): The (connect, read) timeout in seconds.
+        max_retries (int): Retries after the first attempt.
+        backoff_base (float): Base delay in seconds for exponential backoff.
+        backoff_max (float): Upper bound on any single wait, including Retry-After.
+        logger (Logger): Logger for recording operations and errors.
+    """
+
+    def __init__(
+        self,
+        connect_timeout=5.0,
+        read_timeout=30.0,
+        max_retries=3,
+        backoff_base=0.5,
+        backoff_max=30.0,
+        pool_maxsize=10,
+        failure_threshold=5,
+        reset_timeout=60.0,
+        session=None,
+        sleep=time.sleep,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.logger = data_collection_logger
+        self._sleep = sleep
+        self._breakers = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+    @classmethod
+    def from_config(cls, settings=None):
+        """Build a transport from the ``http`` section of the configuration."""
+        settings = settings if settings is not None else config.get("http") or {}
+        return cls(
+            connect_timeout=settings.get("connect_timeout", 5.0),
+            read_timeout=settings.get("read_timeout", 30.0),
+            max_retries=settings.get("max_retries", 3),
+            backoff_base=settings.get("backoff_base_seconds", 0.5),
+            backoff_max=settings.get("backoff_max_seconds", 30.0),
+            pool_maxsize=settings.get("pool_maxsize", 10),
+            failure_threshold=settings.get("circuit_failure_threshold", 5),
+            reset_timeout=settings.get("circuit_reset_seconds", 60.0),
+        )
+
+    def _host_state(self, host):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout
+                )
+                self._histograms[host] = LatencyHistogram()
+            return self._breakers[host], self._histograms[host]
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def get(self, url, params=None, headers=None):
+        """
+        Send a GET request with retries.
+
+        Args:
+            url (str): The URL to request.
+            params (dict, optional): Query string parameters.
+            headers (dict, optional): Request headers.
+
+        Returns:
+            requests.Response: The final response. Non-retryable error statuses and
+            retryable ones that exhausted their retries are returned as-is so the
+            caller's ``raise_for_status`` decides how to surface them.
+
+        Raises:
+            CircuitOpenError: If the host's circuit breaker is open.
+            requests.exceptions.RequestException: If the last attempt failed to connect
+                or timed out.
+        """
+        host = urlparse(url).netloc
+        breaker, histogram = self._host_state(host)
+
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow_request():
+                raise CircuitOpenError(f"Circuit open for {host}, refusing request")
+
+            started = time.perf_counter()
+            try:
+                response = self.session.get(
+                    url, params=params, headers=headers, timeout=self.timeout
+                )
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                histogram.observe(time.perf_counter() - started)
+                breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                self.logger.warning(
+                    f"Request to {host} failed ({e}), retrying in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{self.max_retries})"
+                )
+                self._sleep(delay)
+                continue
+            except Exception:
+                breaker.release()
+                raise
+
+            histogram.observe(time.perf_counter() - started)
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                breaker.record_success()
+                return response
+
+            # 429s mean we are going too fast, not that the host is unhealthy
+            if response.status_code != 429:
+                breaker.record_failure()
+            else:
+                breaker.release()
+            if attempt == self.max_retries:
+                return response
+
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = self._backoff(attempt)
+            delay = min(delay, self.backoff_max)
+            self.logger.warning(
+                f"Request to {host} returned {response.status_code}, retrying in "
+                f"{delay:.2f}s (attempt {attempt + 1}/{self.max_retries})"
+            )
+            self._sleep(delay)
+
+    def latency_histograms(self):
+        """Return a latency histogram snapshot for every host contacted so far."""
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {host: histogram.snapshot() for host, histogram in histograms.items()}
+
+    def circuit_states(self):
+        """Return the circuit breaker state for every host contacted so far."""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.state for host, breaker in breakers.items()}
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Return the process-wide transport shared by all data collection clients."""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = HTTPTransport.from_config()
+        return _default_transport
@@ -0,0 +1,271 @@
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from src.constants import COINGECKO_EXCHANGE
+from src.data_collection.backfill import plan_windows
+from src.data_collection.coingecko_client import CoinGeckoClient
+from src.data_collection.symbols import DEFAULT_MARKET
+from src.data_processing.gaps import find_gaps, gaps_to_windows
+from src.models.bulk import upsert_rows
+from src.models.market_data_15_min import MarketData15Min
+from ..utils.logger import data_collection_logger
+
+BUCKET_INTERVAL = timedelta(minutes=15)
+# market_chart/range returns hourly points for ranges of 2 to 90 days, so a page of
+# 30 days (2,880 buckets) keeps hourly data across the whole history
+BUCKETS_PER_PAGE = 96 * 30
+# Each page is requested from slightly before its first bucket, so that bucket has
+# an observation to align to
+PAGE_OVERLAP = timedelta(hours=1)
+CHART_SERIES = {
+    "price_usd": "prices",
+    "market_cap": "market_caps",
+    "total_volume": "total_volumes",
+}
+
+
+def bucket_grid(window_start, window_end, interval=BUCKET_INTERVAL):
+    """
+    Return the bucket timestamps in (window_start, window_end] as datetime64[ms].
+
+    Buckets are period ends, like the OHLCV candles they are joined to.
+    """
+    first = pd.Timestamp(window_start).tz_convert("UTC").tz_localize(None) + interval
+    last = pd.Timestamp(window_end).tz_convert("UTC").tz_localize(None)
+    return pd.date_range(first, last, freq=interval).values.astype("datetime64[ms]")
+
+
+def align_asof(times, values, grid, tolerance=None):
+    """
+    Take the latest observation at or before each grid timestamp.
+
+    Args:
+        times (np.ndarray): Observation times as unix milliseconds, ascending.
+        values (np.ndarray): Observation values.
+        grid (np.ndarray): datetime64[ms] bucket timestamps, ascending.
+        tolerance (timedelta, optional): Oldest observation a bucket may take.
+            Defaults to the median spacing of the observations, and at least one
+            bucket, so hourly data fills each hour's four buckets.
+
+    Returns:
+        np.ndarray: float64 values aligned to the grid, NaN where no observation is
+        recent enough.
+    """
+    times = np.asarray(times, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    grid = grid.astype(np.int64)
+    aligned = np.full(len(grid), np.nan)
+    if len(times) == 0:
+        return aligned
+
+    if tolerance is None:
+        spacing = np.median(np.diff(times)) if len(times) > 1 else 0
+        tolerance_ms = max(spacing, BUCKET_INTERVAL.total_seconds() * 1000)
+    else:
+        tolerance_ms = tolerance.total_seconds() * 1000
+
+    index = np.searchsorted(times, grid, side="right") - 1
+    found = index >= 0
+    index = np.where(found, index, 0)
+    fresh = found & (grid - times[index] < tolerance_ms)
+    aligned[fresh] = values[index[fresh]]
+    return aligned
+
+
+def parse_market_chart(
+    chart, window_start, window_end, supply=None, market=DEFAULT_MARKET
+):
+    """
+    Align a ``market_chart`` response onto the 15-minute grid as a columnar batch.
+
+    CoinGecko's history has no supply series, so the circulating supply is derived
+    from market cap and price, and the total and max supply are taken from the
+    current snapshot in ``supply``. Buckets missing any of the three series are
+    left out, so they still show up as gaps.
+
+    Args:
+        chart (dict): The response returned by get_historical_market_data.
+        window_start (datetime): The page covers buckets after this time...
+        window_end (datetime): ...up to and including this one.
+        supply (dict, optional): "total_supply" and "max_supply" to store.
+        market (Market, optional): The market whose symbol the rows are stored
+            under. Defaults to the default market.
+
+    Returns:
+        dict: Mapping of MarketData15Min column name to a list of values.
+    """
+    supply = supply or {}
+    grid = bucket_grid(window_start, window_end)
+    aligned = {}
+    for column, series in CHART_SERIES.items():
+        points = np.asarray(chart.get(series) or [], dtype=np.float64).reshape(-1, 2)
+        aligned[column] = align_asof(points[:, 0], points[:, 1], grid)
+
+    keep = ~np.isnan(aligned["price_usd"])
+    keep &= ~np.isnan(aligned["market_cap"]) & ~np.isnan(aligned["total_volume"])
+    keep &= aligned["price_usd"] > 0
+    count = int(keep.sum())
+    price = aligned["price_usd"][keep]
+    market_cap = aligned["market_cap"][keep]
+    circulating_supply = market_cap / price
+    # total_supply is required; without a snapshot the circulating supply stands in
+    if supply.get("total_supply") is not None:
+        total_supply = [supply["total_supply"]] * count
+    else:
+        total_supply = circulating_supply.tolist()
+    return {
+        "exchange": [COINGECKO_EXCHANGE] * count,
+        "symbol": [market.symbol] * count,
+        "timestamp": list(
+            pd.DatetimeIndex(grid[keep]).tz_localize("UTC").to_pydatetime()
+        ),
+        "price_usd": price.tolist(),
+        "market_cap": market_cap.tolist(),
+        "total_volume": aligned["total_volume"][keep].tolist(),
+        "circulating_supply": circulating_supply.tolist(),
+        "total_supply": total_supply,
+        "max_supply": [supply.get("max_supply")] * count,
+    }
+
+
+def current_supply(coingecko_client: CoinGeckoClient, market=DEFAULT_MARKET):
+    """Return the current total and max supply of a market's base asset."""
+    (snapshot,) = coingecko_client.get_markets(
+        [market.coingecko_id], market.quote.lower()
+    )
+    return {
+        "total_supply": snapshot.get("total_supply"),
+        "max_supply": snapshot.get("max_supply"),
+    }
+
+
+def run_market_backfill(
+    db: Session,
+    start_date=None,
+    end_date=None,
+    coingecko_client: CoinGeckoClient = None,
+    market=DEFAULT_MARKET,
+    windows=None,
+    buckets_per_page=BUCKETS_PER_PAGE,
+):
+    """
+    Backfill market_data_15_min from CoinGecko's ``market_chart`` history.
+
+    The range is split into pages of ``buckets_per_page`` buckets. Each page is one
+    ``market_chart/range`` request whose price, market cap and volume arrays are
+    aligned onto the 15-minute grid and upserted with a single statement, committed
+    per page, so re-running a range overwrites rather than duplicates.
+
+    Args:
+        db: A database session object used for all writes.
+        start_date (datetime, optional): The first page starts after this time.
+        end_date (datetime, optional): The last bucket to backfill.
+        coingecko_client (CoinGeckoClient, optional): Client used for the requests.
+        market (Market, optional): Market whose base and quote are fetched.
+            Defaults to the default market (XRP in USD).
+        windows (list, optional): Explicit (start, end) pages to fetch instead of
+            planning them from start_date and end_date.
+        buckets_per_page (int, optional): Buckets per request.
+
+    Returns:
+        dict: Statistics with keys "rows", "pages", "empty_buckets", "seconds" and
+        "rows_per_sec".
+
+    Raises:
+        Any exceptions raised by the CoinGecko API or database operations.
+    """
+    if coingecko_client is None:
+        coingecko_client = CoinGeckoClient()
+    if windows is None:
+        windows = plan_windows(start_date, end_date, buckets_per_page)
+
+    stats = {
+        "rows": 0,
+        "pages": 0,
+        "empty_buckets": 0,
+        "seconds": 0.0,
+        "rows_per_sec": 0.0,
+    }
+    started = time.perf_counter()
+    try:
+        supply = current_supply(coingecko_client, market)
+        for window_start, window_end in windows:
+            chart = coingecko_client.get_historical_market_data(
+                start_time=window_start - PAGE_OVERLAP,
+                end_time=window_end,
+                coin_id=market.coingecko_id,
+                vs_currency=market.quote.lower(),
+            )
+            columns = parse_market_chart(
+                chart, window_start, window_end, supply, market
+            )
+            rows = upsert_rows(db, MarketData15Min, columns)
+            db.commit()
+
+            buckets = int((window_end - window_start) / BUCKET_INTERVAL)
+            stats["rows"] += rows
+            stats["pages"] += 1
+            stats["empty_buckets"] += buckets - rows
+            data_collection_logger.info(
+                f"Stored {rows}/{buckets} market data buckets for "
+                f"{window_start} - {window_end}"
+            )
+    except Exception as e:
+        db.rollback()
+        data_collection_logger.error(f"Error backfilling market data: {str(e)}")
+        raise
+
+    stats["seconds"] = time.perf_counter() - started
+    if stats["seconds"] > 0:
+        stats["rows_per_sec"] = stats["rows"] / stats["seconds"]
+    data_collection_logger.info(
+        f"Market data backfill stored {stats['rows']} rows from {stats['pages']} "
+        f"pages in {stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/sec), "
+        f"{stats['empty_buckets']} buckets had no data"
+    )
+    return stats
+
+
+def repair_market_gaps(
+    db: Session, start_date, end_date, market=DEFAULT_MARKET, **kwargs
+):
+    """
+    Backfill every missing market data bucket in a range.
+
+    Gaps are merged into the fewest pages before being fetched, as repair_gaps
+    does for OHLCV.
+
+    Args:
+        db: A database session object used for all reads and writes.
+        start_date (datetime): First expected bucket (inclusive, on the grid).
+        end_date (datetime): Last expected bucket (inclusive, on the grid).
+        market (Market, optional): Market to repair. Defaults to the default
+            market.
+        **kwargs: Passed through to run_market_backfill.
+
+    Returns:
+        dict: The run_market_backfill statistics, or None if there are no gaps.
+    """
+    gaps = find_gaps(
+        db,
+        MarketData15Min,
+        start_date,
+        end_date,
+        exchange=COINGECKO_EXCHANGE,
+        symbol=market.symbol,
+    )
+    if not gaps:
+        data_collection_logger.info(
+            f"No market data gaps between {start_date} and {end_date}"
+        )
+        return None
+
+    windows = gaps_to_windows(gaps, kwargs.get("buckets_per_page", BUCKETS_PER_PAGE))
+    data_collection_logger.info(
+        f"Repairing {len(gaps)} market data gaps with {len(windows)} pages"
+    )
+    return run_market_backfill(db, market=market, windows=windows, **kwargs)
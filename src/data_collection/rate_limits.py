@@ -0,0 +1,277 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from src.models.api_credit_ledger import APICreditLedger
+from src.models.api_rate_bucket import APIRateBucket
+from src.models.base import engine as default_engine
+from ..utils.config import config
+from ..utils.logger import data_collection_logger
+
+COINAPI = "coinapi"
+COINGECKO = "coingecko"
+
+
+class CreditsExhaustedError(Exception):
+    """Raised when a request is refused because the credit budget is spent."""
+
+
+def quota_enabled(provider):
+    """
+    Return whether a provider's production rate limit and credit limit apply.
+
+    They are skipped when ``rate_limits.enabled`` is false, and for a provider
+    whose base URL is overridden (``COINAPI_BASE_URL``, ``COINGECKO_BASE_URL``),
+    e.g. to point it at the fake provider, so test traffic never spends them.
+    """
+    if not (config.get("rate_limits") or {}).get("enabled", True):
+        return False
+    return provider not in (config.get("api_endpoint_overrides") or {})
+
+
+class CreditLedger:
+    """
+    A daily API credit budget stored in Postgres and shared by every process.
+
+    Each (provider, UTC day) has one row in ``api_credit_ledger``. Reservations are
+    a single conditional upsert, so the live collector and any number of backfill
+    workers, in any process, can never overrun the limit between them. It has the
+    same interface as CreditBudget and can be passed to run_backfill in its place.
+
+    Attributes:
+        provider (str): The provider the credits belong to, e.g. "coinapi".
+        limit (int): Credits available per UTC day, or None for no limit.
+    """
+
+    def __init__(self, provider, limit, engine=None, clock=None):
+        self.provider = provider
+        self.limit = limit
+        self._engine = engine or default_engine
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+
+    @classmethod
+    def from_config(cls, provider=COINAPI):
+        """
+        Build a ledger limited by ``api_limits.<provider>_daily``.
+
+        With quotas disabled the ledger is unlimited. With the provider's base URL
+        overridden its credits are also kept under a key of their own, e.g.
+        ``coinapi@127.0.0.1:8765``, apart from the production budget.
+        """
+        limit = config["api_limits"].get(f"{provider}_daily")
+        if not quota_enabled(provider):
+            limit = None
+        key = provider
+        base_url = (config.get("api_endpoint_overrides") or {}).get(provider)
+        if base_url:
+            key = f"{provider}@{urlsplit(base_url).netloc}"[:32]
+        return cls(key, limit)
+
+    def try_reserve(self, credits=1):
+        """
+        Atomically reserve credits for today if enough remain.
+
+        Returns:
+            bool: True if the credits were reserved.
+        """
+        if self.limit is not None and credits > self.limit:
+            return False
+        table = APICreditLedger.__table__
+        statement = insert(table).values(
+            provider=self.provider,
+            day=self._clock().date(),
+            credits_used=credits,
+            credit_limit=self.limit,
+        )
+        total = table.c.credits_used + statement.excluded.credits_used
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.provider, table.c.day],
+            set_={
+                "credits_used": total,
+                "credit_limit": statement.excluded.credit_limit,
+                "updated_at": statement.excluded.updated_at,
+            },
+            where=(total <= self.limit) if self.limit is not None else None,
+        ).returning(table.c.credits_used)
+
+        with self._engine.begin() as connection:
+            reserved = connection.execute(statement).first() is not None
+        if not reserved:
+            data_collection_logger.warning(
+                f"{self.provider} credit budget exhausted: {credits} credits refused"
+            )
+        return reserved
+
+    @property
+    def used(self):
+        """Credits reserved so far today, across every process."""
+        table = APICreditLedger.__table__
+        with self._engine.connect() as connection:
+            used = connection.execute(
+                table.select()
+                .with_only_columns(table.c.credits_used)
+                .where(table.c.provider == self.provider)
+                .where(table.c.day == self._clock().date())
+            ).scalar()
+        return used or 0
+
+    @property
+    def remaining(self):
+        if self.limit is None:
+            return None
+        return max(0, self.limit - self.used)
+
+    def forecast(self):
+        """
+        Forecast when today's budget runs out at the rate it has been used so far.
+
+        Returns:
+            dict: "used", "remaining", "credits_per_hour" and "exhausted_at", the
+            time the budget runs out, or None if it lasts until the daily reset.
+        """
+        now = self._clock()
+        day_start = datetime.combine(now.date(), datetime.min.time(), timezone.utc)
+        used = self.used
+        remaining = None if self.limit is None else max(0, self.limit - used)
+        hours = max((now - day_start) / timedelta(hours=1), 1 / 60)
+        rate = used / hours
+
+        exhausted_at = None
+        if remaining is not None and rate > 0:
+            exhausted_at = now + timedelta(hours=remaining / rate)
+            if exhausted_at >= day_start + timedelta(days=1):
+                exhausted_at = None
+        return {
+            "used": used,
+            "remaining": remaining,
+            "credits_per_hour": rate,
+            "exhausted_at": exhausted_at,
+        }
+
+
+class TokenBucket:
+    """
+    A token-bucket request rate limiter stored in Postgres and shared by every
+    process.
+
+    The bucket holds up to ``capacity`` tokens and refills at ``rate`` tokens per
+    second. Each request takes a token; refilling and taking happen in one
+    ``UPDATE`` on the provider's ``api_rate_buckets`` row, so concurrent processes
+    can't both spend the last token. Callers that find the bucket empty sleep until
+    the next token is due instead of sending a request that would be answered
+    with a 429.
+
+    Attributes:
+        provider (str): The provider the bucket limits, e.g. "coingecko".
+        rate (float): Tokens added per second.
+        capacity (float): Largest burst of requests allowed.
+    """
+
+    _TAKE = text(
+        "UPDATE api_rate_buckets SET "
+        "tokens = LEAST(:capacity, tokens + :rate * "
+        "EXTRACT(EPOCH FROM now() - updated_at)) - :tokens, updated_at = now() "
+        "WHERE provider = :provider AND LEAST(:capacity, tokens + :rate * "
+        "EXTRACT(EPOCH FROM now() - updated_at)) >= :tokens "
+        "RETURNING tokens"
+    )
+    _AVAILABLE = text(
+        "SELECT LEAST(:capacity, tokens + :rate * "
+        "EXTRACT(EPOCH FROM now() - updated_at)) "
+        "FROM api_rate_buckets WHERE provider = :provider"
+    )
+
+    def __init__(self, provider, rate, capacity, engine=None, sleep=time.sleep):
+        self.provider = provider
+        self.rate = rate
+        self.capacity = capacity
+        self._engine = engine or default_engine
+        self._sleep = sleep
+        self._created = False
+
+    @classmethod
+    def from_config(cls, provider, settings=None):
+        """
+        Build a bucket from ``rate_limits.<provider>`` in the configuration.
+
+        Returns:
+            TokenBucket: The bucket, or None if the provider has no rate limit or
+            its quotas are disabled (see quota_enabled).
+        """
+        if settings is None:
+            if not quota_enabled(provider):
+                return None
+            settings = (config.get("rate_limits") or {}).get(provider)
+        if not settings:
+            return None
+        return cls(
+            provider,
+            rate=settings["requests_per_minute"] / 60,
+            capacity=settings.get("burst", 1),
+        )
+
+    def _ensure_bucket(self, connection):
+        if self._created:
+            return
+        connection.execute(
+            insert(APIRateBucket.__table__)
+            .values(provider=self.provider, tokens=self.capacity)
+            .on_conflict_do_nothing()
+        )
+        self._created = True
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens if the bucket holds enough.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds until enough
+            tokens will have been added.
+        """
+        params = {
+            "provider": self.provider,
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "tokens": tokens,
+        }
+        with self._engine.begin() as connection:
+            self._ensure_bucket(connection)
+            if connection.execute(self._TAKE, params).first() is not None:
+                return 0.0
+            available = connection.execute(self._AVAILABLE, params).scalar() or 0.0
+        return max(tokens - available, 0.0) / self.rate
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens, sleeping until the bucket has refilled enough.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(tokens)
+            if delay == 0:
+                if waited:
+                    data_collection_logger.info(
+                        f"Waited {waited:.2f}s for the {self.provider} rate limit"
+                    )
+                return waited
+            self._sleep(delay)
+            waited += delay
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider):
+    """Return the process-wide rate limiter of a provider, or None if unlimited."""
+    with _rate_limiters_lock:
+        if provider not in _rate_limiters:
+            _rate_limiters[provider] = TokenBucket.from_config(provider)
+        return _rate_limiters[provider]
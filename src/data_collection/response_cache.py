@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+from ..utils.config import config
+from ..utils.logger import data_collection_logger
+
+DEFAULT_DIRECTORY = ".cache/http"
+DEFAULT_MAX_MEGABYTES = 512
+DEFAULT_OPEN_TTL_SECONDS = 60
+
+
+class CacheMissError(requests.exceptions.RequestException):
+    """Raised in offline mode when a request has no usable cached response."""
+
+
+class ResponseCache:
+    """
+    A content-addressed, size-bounded disk cache of JSON API responses.
+
+    Responses are stored under the SHA-256 of their endpoint and parameters, so the
+    same request always maps to the same file and credentials in the headers never
+    reach the disk. Entries for closed history never expire; entries for windows
+    that are still open get a short TTL. When the cache grows past ``max_bytes``
+    the least recently used entries are evicted.
+
+    Attributes:
+        directory (str): Root directory of the cache files.
+        max_bytes (int): Size the cache is trimmed back to after each write.
+        open_ttl (float): Seconds an open-window response stays fresh.
+        offline (bool): Serve only from the cache and never send requests.
+        hits (int): Requests served from the cache.
+        misses (int): Requests with no fresh cached response.
+        logger (Logger): Logger for recording operations and errors.
+    """
+
+    def __init__(
+        self,
+        directory=DEFAULT_DIRECTORY,
+        max_bytes=DEFAULT_MAX_MEGABYTES * 1024 * 1024,
+        open_ttl=DEFAULT_OPEN_TTL_SECONDS,
+        offline=False,
+        clock=time.time,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.open_ttl = open_ttl
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.logger = data_collection_logger
+        self._clock = clock
+        self._size = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings=None):
+        """
+        Build a cache from the ``http_cache`` section of the configuration.
+
+        Returns:
+            ResponseCache: The cache, or None if it is disabled.
+        """
+        settings = settings if settings is not None else config.get("http_cache") or {}
+        if not settings.get("enabled", True):
+            return None
+        return cls(
+            directory=settings.get("directory", DEFAULT_DIRECTORY),
+            max_bytes=settings.get("max_megabytes", DEFAULT_MAX_MEGABYTES)
+            * 1024
+            * 1024,
+            open_ttl=settings.get("open_ttl_seconds", DEFAULT_OPEN_TTL_SECONDS),
+            offline=bool(settings.get("offline", False)),
+        )
+
+    @staticmethod
+    def key(endpoint, params=None):
+        """Return the content address of a request."""
+        request = json.dumps(
+            {"endpoint": endpoint, "params": params or {}}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(request.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def _current_size(self):
+        if self._size is None:
+            self._size = sum(os.path.getsize(path) for path in self._entries())
+        return self._size
+
+    def get(self, endpoint, params=None):
+        """
+        Return the cached body of a request, or None if there is no fresh entry.
+
+        A hit marks the entry as recently used.
+        """
+        path = self._path(self.key(endpoint, params))
+        with self._lock:
+            try:
+                with open(path) as cache_file:
+                    entry = json.load(cache_file)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+
+            expires_at = entry.get("expires_at")
+            if expires_at is not None and self._clock() >= expires_at:
+                self._remove(path)
+                self.misses += 1
+                return None
+
+            now = self._clock()
+            os.utime(path, (now, now))
+            self.hits += 1
+            return entry["body"]
+
+    def put(self, endpoint, params, body, ttl=None):
+        """
+        Store the body of a response.
+
+        Args:
+            endpoint (str): The requested URL.
+            params (dict): The query string parameters.
+            body: The decoded JSON body.
+            ttl (float, optional): Seconds until the entry expires. None keeps it
+                until it is evicted.
+        """
+        path = self._path(self.key(endpoint, params))
+        now = self._clock()
+        entry = {
+            "endpoint": endpoint,
+            "params": params,
+            "stored_at": now,
+            "expires_at": now + ttl if ttl is not None else None,
+            "body": body,
+        }
+        with self._lock:
+            size = self._current_size()
+            if os.path.exists(path):
+                size -= os.path.getsize(path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so a concurrent reader never sees half an entry
+            temporary_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temporary_path, "w") as cache_file:
+                json.dump(entry, cache_file, default=str)
+            os.replace(temporary_path, path)
+            os.utime(path, (now, now))
+            self._size = size + os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def fetch(self, endpoint, params, request, ttl=None):
+        """
+        Return a response body from the cache, requesting and storing it on a miss.
+
+        Args:
+            endpoint (str): The requested URL.
+            params (dict): The query string parameters.
+            request (callable): Sends the request and returns the decoded body.
+            ttl (float, optional): Seconds the stored entry stays fresh, or None for
+                closed history that never changes.
+
+        Returns:
+            The cached or freshly requested body.
+
+        Raises:
+            CacheMissError: If the cache is offline and has no fresh entry.
+        """
+        body = self.get(endpoint, params)
+        if body is not None:
+            self.logger.info(f"Serving {endpoint} from the response cache")
+            return body
+        if self.offline:
+            raise CacheMissError(
+                f"Offline mode: no cached response for {endpoint} {params}"
+            )
+        body = request()
+        self.put(endpoint, params, body, ttl)
+        return body
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        if self._size is not None:
+            self._size -= size
+
+    def _evict(self):
+        # Least recently used first; hits refresh an entry's modification time
+        entries = sorted(self._entries(), key=os.path.getmtime)
+        evicted = 0
+        for path in entries:
+            if self._size <= self.max_bytes:
+                break
+            self._remove(path)
+            evicted += 1
+        self.logger.info(
+            f"Evicted {evicted} entries from the response cache "
+            f"({self._size / 1024 / 1024:.1f} MB remaining)"
+        )
+
+    def stats(self):
+        """Return the hit and miss counts and the cache size, for logging."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "bytes": self._current_size(),
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache, or None if it is disabled."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache.from_config() or False
+        return _default_cache or None
@@ -0,0 +1,81 @@
+from collections import namedtuple
+
+from src.constants import COINGECKO_IDS, DEFAULT_EXCHANGE, DEFAULT_SYMBOL
+from ..utils.config import config
+
+
+class Market(namedtuple("Market", ["exchange", "symbol"])):
+    """
+    A traded pair on one exchange, the (exchange, symbol) key of a series.
+
+    Attributes:
+        exchange (str): CoinAPI exchange ID, e.g. "BITSTAMP".
+        symbol (str): Pair as BASE_QUOTE, e.g. "XRP_USD".
+    """
+
+    __slots__ = ()
+
+    @property
+    def base(self):
+        return self.symbol.split("_")[0]
+
+    @property
+    def quote(self):
+        return self.symbol.split("_")[1]
+
+    @property
+    def coinapi_symbol_id(self):
+        """The CoinAPI symbol ID of the spot market, e.g. "BITSTAMP_SPOT_XRP_USD"."""
+        return f"{self.exchange}_SPOT_{self.symbol}"
+
+    @property
+    def coingecko_id(self):
+        """The CoinGecko coin ID of the base asset."""
+        return COINGECKO_IDS[self.base]
+
+
+DEFAULT_MARKET = Market(DEFAULT_EXCHANGE, DEFAULT_SYMBOL)
+
+
+def configured_markets(settings=None):
+    """
+    Return the markets listed under ``data_collection.symbols``.
+
+    Args:
+        settings (list, optional): Entries with "exchange" and "symbol" keys.
+            Defaults to the configuration.
+
+    Returns:
+        list: Market tuples in configuration order without duplicates, or the
+        default market if none are configured.
+
+    Raises:
+        ValueError: If a symbol is not BASE_QUOTE or its base has no CoinGecko ID.
+    """
+    if settings is None:
+        settings = (config.get("data_collection") or {}).get("symbols") or []
+    markets = []
+    for entry in settings:
+        market = Market(entry["exchange"].upper(), entry["symbol"].upper())
+        if market.symbol.count("_") != 1:
+            raise ValueError(f"Symbol {market.symbol} is not BASE_QUOTE")
+        if market.base not in COINGECKO_IDS:
+            raise ValueError(f"No CoinGecko ID for {market.base}")
+        if market not in markets:
+            markets.append(market)
+    return markets or [DEFAULT_MARKET]
+
+
+def markets_by_quote(markets):
+    """
+    Group markets by quote currency, the unit one CoinGecko markets request covers.
+
+    Returns:
+        dict: Quote currency to the CoinGecko IDs of its base assets, in order.
+    """
+    groups = {}
+    for market in markets:
+        ids = groups.setdefault(market.quote, [])
+        if market.coingecko_id not in ids:
+            ids.append(market.coingecko_id)
+    return groups
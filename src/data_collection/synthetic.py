@@ -0,0 +1,368 @@
+import os
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from src.data_collection.symbols import Market
+from src.models.bulk import bulk_insert
+from src.models.market_data_15_min import MarketData15Min
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from ..utils.logger import data_collection_logger
+
+CANDLE_INTERVAL = timedelta(minutes=15)
+CANDLES_PER_DAY = 96
+CANDLES_PER_YEAR = 365 * CANDLES_PER_DAY
+DEFAULT_CHUNK_SIZE = 100_000
+MODELS = ("gbm", "regime")
+# Kept apart from real exchanges, so generated rows never mix with collected ones
+SYNTHETIC_MARKET = Market("SYNTHETIC", "XRP_USD")
+
+
+class SyntheticSeries:
+    """
+    Generates one market's 15-minute candles and market snapshots, chunk by chunk.
+
+    Log returns follow a geometric Brownian motion; the log price has no drift by
+    default, so the series neither decays nor explodes over decades. With
+    ``model="regime"`` the volatility switches between a calm and a volatile
+    regime, each lasting a geometrically distributed number of candles. Every
+    candle opens at the previous close and has ``low <= open, close <= high``;
+    volume rises with the size of the move and the regime's volatility, and trade
+    counts follow the volume. Each candle has a matching snapshot whose market cap
+    is the close times a slowly growing circulating supply, and whose total volume
+    is the trailing 24 hours of quote volume.
+
+    State carries over between chunks, so consecutive chunks form one continuous
+    series and memory only depends on the chunk size.
+
+    Attributes:
+        market (Market): The (exchange, symbol) the rows are stored under.
+        model (str): "gbm" or "regime".
+        timestamp (datetime): Start of the next candle to generate.
+        close (float): Close of the last candle generated.
+        generated (int): Candles generated so far.
+    """
+
+    def __init__(
+        self,
+        start,
+        market=SYNTHETIC_MARKET,
+        model="gbm",
+        seed=0,
+        start_price=0.5,
+        drift=0.0,
+        volatility=0.8,
+        volatile_volatility=1.8,
+        mean_regime_candles=(20 * CANDLES_PER_DAY, 3 * CANDLES_PER_DAY),
+        base_volume=150_000.0,
+        trade_size=2_500.0,
+        circulating_supply=55e9,
+        supply_growth_per_year=1e9,
+        total_supply=99.99e9,
+        max_supply=100e9,
+    ):
+        """
+        Args:
+            start (datetime): Start of the first candle, aligned to 15 minutes.
+            market (Market, optional): Series key. Defaults to SYNTHETIC XRP_USD.
+            model (str, optional): "gbm" or "regime". Defaults to "gbm".
+            seed (int or SeedSequence, optional): Random seed.
+            start_price (float, optional): Price the series starts from.
+            drift (float, optional): Annualised drift of the log price.
+            volatility (float, optional): Annualised volatility, of the calm regime
+                with ``model="regime"``.
+            volatile_volatility (float, optional): Annualised volatility of the
+                volatile regime.
+            mean_regime_candles (tuple, optional): Mean candles spent in the calm
+                and the volatile regime.
+            base_volume (float, optional): Typical base-asset volume per candle.
+            trade_size (float, optional): Mean base-asset volume per trade.
+            circulating_supply (float, optional): Circulating supply at ``start``.
+            supply_growth_per_year (float, optional): Circulating supply released
+                per year.
+            total_supply (float, optional): Total supply snapshot value.
+            max_supply (float, optional): Max supply snapshot value.
+
+        Raises:
+            ValueError: If the model is unknown or ``start`` isn't aligned.
+        """
+        if model not in MODELS:
+            raise ValueError(f"Unknown synthetic model: {model}")
+        if start.timestamp() % CANDLE_INTERVAL.total_seconds():
+            raise ValueError(f"Start {start} is not aligned to 15 minutes")
+        self.market = market
+        self.model = model
+        self.timestamp = start
+        self.close = start_price
+        self.generated = 0
+        self.drift = drift
+        self.volatilities = (volatility, volatile_volatility)
+        self.mean_regime_candles = mean_regime_candles
+        self.base_volume = base_volume
+        self.trade_size = trade_size
+        self.circulating_supply = circulating_supply
+        self.supply_growth = supply_growth_per_year / CANDLES_PER_YEAR
+        self.total_supply = total_supply
+        self.max_supply = max_supply
+        self._rng = np.random.default_rng(seed)
+        self._regime = 0
+        self._regime_left = self._regime_length(0)
+        # Quote volume of the last day's candles, for the rolling 24h total
+        self._volume_tail = np.zeros(0)
+
+    def _regime_length(self, regime):
+        return int(self._rng.geometric(1 / self.mean_regime_candles[regime]))
+
+    def _step_volatility(self, count):
+        """Return the annualised volatility of each of the next candles."""
+        if self.model == "gbm":
+            return np.full(count, self.volatilities[0])
+        volatility = np.empty(count)
+        filled = 0
+        while filled < count:
+            if self._regime_left == 0:
+                self._regime = 1 - self._regime
+                self._regime_left = self._regime_length(self._regime)
+            run = min(self._regime_left, count - filled)
+            volatility[filled : filled + run] = self.volatilities[self._regime]
+            filled += run
+            self._regime_left -= run
+        return volatility
+
+    def _timestamps(self, count):
+        first = pd.Timestamp(self.timestamp + CANDLE_INTERVAL)
+        return pd.date_range(first, periods=count, freq=CANDLE_INTERVAL, unit="s")
+
+    def next_chunk(self, count):
+        """
+        Generate the next ``count`` candles.
+
+        Returns:
+            tuple: (ohlcv, snapshots), columnar batches for OHLCVData15Min and
+            MarketData15Min. Timestamps are a UTC DatetimeIndex of candle ends,
+            like CoinAPI's ``time_period_end``; other columns are numpy arrays.
+        """
+        rng = self._rng
+        dt = 1 / CANDLES_PER_YEAR
+        volatility = self._step_volatility(count)
+        step_volatility = volatility * np.sqrt(dt)
+
+        shocks = rng.standard_normal(count)
+        log_returns = self.drift * dt + step_volatility * shocks
+        close = self.close * np.exp(np.cumsum(log_returns))
+        open_ = np.empty(count)
+        open_[0] = self.close
+        open_[1:] = close[:-1]
+
+        # Extremes beyond the body scale with the candle's volatility
+        high = np.maximum(open_, close) * np.exp(
+            0.5 * step_volatility * np.abs(rng.standard_normal(count))
+        )
+        low = np.minimum(open_, close) * np.exp(
+            -0.5 * step_volatility * np.abs(rng.standard_normal(count))
+        )
+
+        # Volume grows with the size of the move and the regime's volatility
+        log_volume = (
+            np.log(self.base_volume)
+            + 0.6 * (np.abs(shocks) - np.sqrt(2 / np.pi))
+            + np.log(volatility / self.volatilities[0])
+            + 0.25 * rng.standard_normal(count)
+        )
+        volume = np.exp(log_volume)
+        trades_count = rng.poisson(volume / self.trade_size) + 1
+
+        quote_volume = volume * (open_ + close) / 2
+        history = np.concatenate([self._volume_tail, quote_volume])
+        cumulative = np.concatenate([[0.0], np.cumsum(history)])
+        ends = np.arange(len(self._volume_tail) + 1, len(history) + 1)
+        total_volume = (
+            cumulative[ends] - cumulative[np.maximum(ends - CANDLES_PER_DAY, 0)]
+        )
+        self._volume_tail = history[-(CANDLES_PER_DAY - 1) :]
+
+        index = np.arange(self.generated + 1, self.generated + count + 1)
+        circulating_supply = self.circulating_supply + self.supply_growth * index
+        timestamps = self._timestamps(count)
+
+        exchange = [self.market.exchange] * count
+        symbol = [self.market.symbol] * count
+        ohlcv = {
+            "exchange": exchange,
+            "symbol": symbol,
+            "timestamp": timestamps,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+            "trades_count": trades_count,
+            "price_change": close - open_,
+        }
+        snapshots = {
+            "exchange": exchange,
+            "symbol": symbol,
+            "timestamp": timestamps,
+            "price_usd": close,
+            "market_cap": close * circulating_supply,
+            "total_volume": total_volume,
+            "circulating_supply": circulating_supply,
+            "total_supply": np.full(count, self.total_supply),
+            "max_supply": np.full(count, self.max_supply),
+        }
+
+        self.close = float(close[-1])
+        self.generated += count
+        self.timestamp += CANDLE_INTERVAL * count
+        return ohlcv, snapshots
+
+
+def generate_synthetic_data(
+    start,
+    candles,
+    markets=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    model="gbm",
+    seed=0,
+    **params,
+):
+    """
+    Yield synthetic candles and snapshots for several markets, one chunk at a time.
+
+    Each market gets an independent series seeded from ``seed``, so the same
+    arguments always produce the same data.
+
+    Args:
+        start (datetime): Start of the first candle, aligned to 15 minutes.
+        candles (int): Candles per market.
+        markets (list, optional): Market tuples. Defaults to [SYNTHETIC_MARKET].
+        chunk_size (int, optional): Candles per chunk. Defaults to 100,000.
+        model (str, optional): "gbm" or "regime". Defaults to "gbm".
+        seed (int, optional): Random seed. Defaults to 0.
+        **params: Further SyntheticSeries arguments, e.g. ``volatility``.
+
+    Yields:
+        tuple: (market, ohlcv, snapshots) as returned by SyntheticSeries.next_chunk.
+    """
+    markets = markets or [SYNTHETIC_MARKET]
+    seeds = np.random.SeedSequence(seed).spawn(len(markets))
+    for market, market_seed in zip(markets, seeds):
+        series = SyntheticSeries(start, market, model, market_seed, **params)
+        while series.generated < candles:
+            count = min(chunk_size, candles - series.generated)
+            yield (market, *series.next_chunk(count))
+
+
+def plain_columns(columns):
+    """Convert a generated batch into plain Python values for the bulk loader."""
+    rows = {}
+    for name, values in columns.items():
+        if isinstance(values, pd.DatetimeIndex):
+            rows[name] = values.to_pydatetime().tolist()
+        elif isinstance(values, np.ndarray):
+            rows[name] = values.tolist()
+        else:
+            rows[name] = values
+    return rows
+
+
+def load_synthetic_data(db: Session, start, candles, markets=None, **kwargs):
+    """
+    Generate synthetic data straight into ``ohlcv_data_15_min`` and
+    ``market_data_15_min`` with the bulk loader.
+
+    Each chunk is copied and committed on its own, so tens of millions of candles
+    load in constant memory. The rows are plain inserts: load into series that
+    hold no rows in the range yet. Indicators are not computed; run
+    recompute_indicators_parallel on each market afterwards if they are needed.
+
+    Args:
+        db: A database session object.
+        start (datetime): Start of the first candle, aligned to 15 minutes.
+        candles (int): Candles per market.
+        markets (list, optional): Market tuples. Defaults to [SYNTHETIC_MARKET].
+        **kwargs: Further generate_synthetic_data arguments.
+
+    Returns:
+        dict: "candles" written, "seconds" taken and "candles_per_sec".
+
+    Raises:
+        Any exception raised while writing a chunk; committed chunks are kept.
+    """
+    started = time.perf_counter()
+    written = 0
+    for market, ohlcv, snapshots in generate_synthetic_data(
+        start, candles, markets, **kwargs
+    ):
+        try:
+            bulk_insert(db, OHLCVData15Min, plain_columns(ohlcv))
+            bulk_insert(db, MarketData15Min, plain_columns(snapshots))
+            db.commit()
+        except Exception as e:
+            data_collection_logger.error(
+                f"Error loading synthetic data for {market}: {str(e)}"
+            )
+            db.rollback()
+            raise
+        written += len(ohlcv["timestamp"])
+        data_collection_logger.info(
+            f"Loaded {written} synthetic candles (up to {ohlcv['timestamp'][-1]})"
+        )
+
+    elapsed = time.perf_counter() - started
+    return {
+        "candles": written,
+        "seconds": elapsed,
+        "candles_per_sec": written / elapsed if elapsed else None,
+    }
+
+
+def write_synthetic_parquet(directory, start, candles, markets=None, **kwargs):
+    """
+    Generate synthetic data into Parquet files, one file per chunk and table.
+
+    Files are written to ``<directory>/<table>/<exchange>_<symbol>_<chunk>.parquet``
+    and can be read back with ``pandas.read_parquet(f"{directory}/<table>")``.
+    Requires pyarrow.
+
+    Args:
+        directory (str): Root directory of the files.
+        start (datetime): Start of the first candle, aligned to 15 minutes.
+        candles (int): Candles per market.
+        markets (list, optional): Market tuples. Defaults to [SYNTHETIC_MARKET].
+        **kwargs: Further generate_synthetic_data arguments.
+
+    Returns:
+        list: Paths of the files written.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "Writing Parquet requires pyarrow: pip install pyarrow"
+        ) from e
+
+    paths = []
+    chunks = {}
+    for market, ohlcv, snapshots in generate_synthetic_data(
+        start, candles, markets, **kwargs
+    ):
+        chunk = chunks.get(market, 0)
+        chunks[market] = chunk + 1
+        for model, columns in ((OHLCVData15Min, ohlcv), (MarketData15Min, snapshots)):
+            table_directory = os.path.join(directory, model.__tablename__)
+            os.makedirs(table_directory, exist_ok=True)
+            path = os.path.join(
+                table_directory,
+                f"{market.exchange}_{market.symbol}_{chunk:05d}.parquet",
+            )
+            pd.DataFrame(columns).to_parquet(path, index=False)
+            paths.append(path)
+        data_collection_logger.info(f"Wrote synthetic chunk {chunk} of {market}")
+    return paths
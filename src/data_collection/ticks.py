@@ -0,0 +1,352 @@
+import asyncio
+import json
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from src.data_collection.collector import OHLCV_COLUMNS
+from src.data_processing.streaming_indicators import update_streaming_indicators
+from src.models.bulk import upsert_rows
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.utils.config import config
+from ..utils.logger import data_collection_logger
+
+CANDLE_INTERVAL = timedelta(minutes=15)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+TRADES_CHANNEL = "live_trades_xrpusd"  # Bitstamp XRP/USD, the market CoinAPI reports
+DEFAULT_PARTIAL_INTERVAL = 1.0  # Seconds between partial-bar writes
+RECONNECT_DELAY = 1.0  # Seconds before the first reconnect; doubles per failure
+MAX_RECONNECT_DELAY = 60.0
+
+Trade = namedtuple("Trade", ["timestamp", "price", "amount"])
+
+
+class CandleBuilder:
+    """
+    Aggregates trades into OHLCV bars with constant work per trade.
+
+    Bars are stamped with the end of their interval, like CoinAPI's
+    ``time_period_end``, so a trade at 00:07 belongs to the bar stamped 00:15.
+    Only the open bar is kept: a trade for a later interval finishes it, and a
+    trade for an earlier or already finished interval is counted and dropped, so a
+    bar that has been written as finished is never overwritten.
+    """
+
+    def __init__(self, interval=CANDLE_INTERVAL):
+        self.interval = interval
+        self.bar = None
+        self.last_finished = None
+        self.late_trades = 0
+        self._open_time = None
+        self._close_time = None
+
+    def bar_end(self, timestamp):
+        """Return the end of the interval a timestamp falls in."""
+        return EPOCH + ((timestamp - EPOCH) // self.interval + 1) * self.interval
+
+    def add(self, trade):
+        """
+        Add a trade to the open bar.
+
+        Returns:
+            dict: The bar the trade finished, or None.
+        """
+        end = self.bar_end(trade.timestamp)
+        finished = None
+        latest = self.bar["timestamp"] if self.bar is not None else self.last_finished
+        if (latest is not None and end < latest) or end == self.last_finished:
+            self.late_trades += 1
+            data_collection_logger.warning(
+                f"Dropping late trade at {trade.timestamp}; bars up to {latest} "
+                f"are already open or finished"
+            )
+            return None
+        if self.bar is not None and end > self.bar["timestamp"]:
+            finished = self._finish()
+
+        if self.bar is None:
+            self.bar = {
+                "timestamp": end,
+                "open": trade.price,
+                "high": trade.price,
+                "low": trade.price,
+                "close": trade.price,
+                "volume": trade.amount,
+                "trades_count": 1,
+            }
+            self._open_time = self._close_time = trade.timestamp
+            return finished
+
+        bar = self.bar
+        bar["high"] = max(bar["high"], trade.price)
+        bar["low"] = min(bar["low"], trade.price)
+        bar["volume"] += trade.amount
+        bar["trades_count"] += 1
+        # Trades can arrive slightly out of order within the interval
+        if trade.timestamp < self._open_time:
+            bar["open"], self._open_time = trade.price, trade.timestamp
+        if trade.timestamp >= self._close_time:
+            bar["close"], self._close_time = trade.price, trade.timestamp
+        return finished
+
+    def advance(self, now):
+        """
+        Finish the open bar if ``now`` is past its end, even without a new trade.
+
+        Returns:
+            dict: The finished bar, or None.
+        """
+        if self.bar is not None and now >= self.bar["timestamp"]:
+            return self._finish()
+        return None
+
+    def _finish(self):
+        finished, self.bar = self.bar, None
+        self.last_finished = finished["timestamp"]
+        return finished
+
+    def partial(self):
+        """Return a copy of the open bar, or None if there isn't one."""
+        return dict(self.bar) if self.bar is not None else None
+
+
+def bars_to_columns(bars):
+    """
+    Convert bars into a columnar batch for upsert_rows.
+
+    Returns:
+        dict: Mapping of OHLCVData15Min column name to a list of values.
+    """
+    columns = {name: [] for name in OHLCV_COLUMNS}
+    for bar in bars:
+        for name in OHLCV_COLUMNS:
+            if name != "price_change":
+                columns[name].append(bar[name])
+        columns["price_change"].append(bar["close"] - bar["open"])
+    return columns
+
+
+def parse_bitstamp_trade(message):
+    """
+    Parse a Bitstamp websocket message.
+
+    Args:
+        message (dict): A decoded message from the trades channel.
+
+    Returns:
+        Trade: The trade, or None for subscription and control messages.
+    """
+    if message.get("event") != "trade":
+        return None
+    data = message["data"]
+    timestamp = EPOCH + timedelta(microseconds=int(data["microtimestamp"]))
+    return Trade(timestamp, float(data["price"]), float(data["amount"]))
+
+
+async def replay_trades(path):
+    """
+    Yield trades from a file of recorded Bitstamp messages, one JSON object per
+    line. Non-trade messages are skipped.
+    """
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                trade = parse_bitstamp_trade(json.loads(line))
+                if trade is not None:
+                    yield trade
+
+
+async def stream_trades(url=None, channel=TRADES_CHANNEL, max_reconnects=None):
+    """
+    Yield live trades from the Bitstamp websocket, reconnecting when the connection
+    drops.
+
+    Args:
+        url (str, optional): Websocket URL. Defaults to
+            ``api_endpoints.bitstamp_ws`` from the configuration.
+        channel (str, optional): Trades channel to subscribe to.
+        max_reconnects (int, optional): Give up after this many consecutive failed
+            connections. Retries forever by default.
+
+    Raises:
+        ConnectionError: When ``max_reconnects`` consecutive connections fail.
+    """
+    # Imported here so the rest of the collector works without the dependency
+    from websockets.asyncio.client import connect
+    from websockets.exceptions import WebSocketException
+
+    url = url or config["api_endpoints"]["bitstamp_ws"]
+    subscribe = json.dumps({"event": "bts:subscribe", "data": {"channel": channel}})
+    failures = 0
+    while True:
+        try:
+            async with connect(url) as websocket:
+                await websocket.send(subscribe)
+                data_collection_logger.info(f"Subscribed to {channel} at {url}")
+                async for raw in websocket:
+                    failures = 0
+                    trade = parse_bitstamp_trade(json.loads(raw))
+                    if trade is not None:
+                        yield trade
+            error = "closed by server"
+        except (OSError, WebSocketException) as e:
+            error = str(e)
+        failures += 1
+        if max_reconnects is not None and failures > max_reconnects:
+            raise ConnectionError(f"Trade stream {url} failed: {error}")
+        delay = min(RECONNECT_DELAY * 2 ** (failures - 1), MAX_RECONNECT_DELAY)
+        data_collection_logger.warning(
+            f"Trade stream {url} disconnected ({error}); reconnecting in {delay:.0f}s"
+        )
+        await asyncio.sleep(delay)
+
+
+def store_bars(db: Session, bars):
+    """
+    Upsert bars into ohlcv_data_15_min with their indicators and commit.
+
+    A partial bar is written the same way; the finished bar overwrites it later.
+
+    Raises:
+        Any exceptions raised by the database operations.
+    """
+    try:
+        columns = bars_to_columns(bars)
+        upsert_rows(db, OHLCVData15Min, columns)
+        update_streaming_indicators(db, columns["timestamp"], columns["close"])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        data_collection_logger.error(f"Error storing tick bars: {str(e)}")
+        raise
+
+
+async def ingest_trades(
+    db: Session,
+    trades,
+    builder: CandleBuilder = None,
+    partial_interval=None,
+    clock=None,
+):
+    """
+    Build OHLCV bars from a trade stream and write them as they form.
+
+    Finished bars are written as soon as a later trade arrives or the clock passes
+    their end. The open bar is written as a partial bar at most every
+    ``partial_interval`` seconds, so the table is never more than that behind the
+    market. The open bar is written once more when the stream ends.
+
+    Args:
+        db: A database session object.
+        trades: Async iterable of Trade, e.g. stream_trades() or replay_trades().
+        builder (CandleBuilder, optional): Bar builder. Defaults to 15-minute bars.
+        partial_interval (float, optional): Seconds between partial-bar writes.
+            Defaults to ``ticks.partial_interval_seconds`` from the configuration.
+        clock (callable, optional): Returns the current UTC datetime, used to
+            finish bars when no trade arrives. Without a clock, as when replaying
+            recorded trades, a bar is only finished by a later trade.
+
+    Returns:
+        dict: Counts of "trades", "bars", "partial_writes" and "late_trades".
+
+    Raises:
+        Any exceptions raised by the trade stream or the database operations.
+    """
+    builder = builder or CandleBuilder()
+    if partial_interval is None:
+        partial_interval = (config.get("ticks") or {}).get(
+            "partial_interval_seconds", DEFAULT_PARTIAL_INTERVAL
+        )
+    stats = {"trades": 0, "bars": 0, "partial_writes": 0}
+
+    # A producer task lets the consumer wake up at bar boundaries without
+    # cancelling the trade iterator
+    queue = asyncio.Queue()
+
+    async def produce():
+        try:
+            async for trade in trades:
+                await queue.put(trade)
+        finally:
+            await queue.put(None)
+
+    producer = asyncio.create_task(produce())
+    last_partial = time.monotonic()
+    dirty = False
+    try:
+        while True:
+            timeout = partial_interval
+            if clock is not None and builder.bar is not None:
+                until_end = (builder.bar["timestamp"] - clock()).total_seconds()
+                timeout = max(0.0, min(timeout, until_end))
+            try:
+                trade = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                trade = False
+
+            if trade is None:
+                # Re-raises a failure of the trade stream
+                await producer
+                break
+            if trade:
+                stats["trades"] += 1
+                finished = builder.add(trade)
+                dirty = True
+            elif clock is not None:
+                finished = builder.advance(clock())
+            else:
+                # Without a clock only a later trade finishes the bar
+                finished = None
+            if finished is not None:
+                store_bars(db, [finished])
+                stats["bars"] += 1
+                dirty = builder.bar is not None
+
+            if dirty and time.monotonic() - last_partial >= partial_interval:
+                store_bars(db, [builder.partial()])
+                stats["partial_writes"] += 1
+                last_partial = time.monotonic()
+                dirty = False
+    finally:
+        producer.cancel()
+
+    if builder.bar is not None:
+        store_bars(db, [builder.partial()])
+        stats["partial_writes"] += 1
+    stats["late_trades"] = builder.late_trades
+    data_collection_logger.info(
+        f"Ingested {stats['trades']} trades into {stats['bars']} bars "
+        f"({stats['partial_writes']} partial writes, "
+        f"{stats['late_trades']} late trades dropped)"
+    )
+    return stats
+
+
+def run_tick_ingestion(db: Session, trades=None):
+    """
+    Ingest live trades until the process is stopped.
+
+    Args:
+        db: A database session object.
+        trades (optional): Async iterable of Trade. Defaults to stream_trades().
+    """
+    return asyncio.run(
+        ingest_trades(
+            db,
+            trades or stream_trades(),
+            clock=lambda: datetime.now(timezone.utc),
+        )
+    )
+
+
+if __name__ == "__main__":
+    from src.models.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        run_tick_ingestion(db)
+    finally:
+        db.close()
+        data_collection_logger.info("Database connection closed.")
@@ -0,0 +1,533 @@
+import asyncio
+import itertools
+import json
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.models.bulk import upsert_rows
+from src.models.xrpl_ledger_metrics import XRPLLedgerMetrics
+from src.utils.config import config
+from ..utils.logger import data_collection_logger
+
+RIPPLE_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+DROPS_PER_XRP = 1_000_000
+RECONNECT_DELAY = 1.0  # Seconds before the first reconnect; doubles per failure
+MAX_RECONNECT_DELAY = 60.0
+
+# Defaults used when config.yml has no xrpl section
+DEFAULT_WINDOW_MINUTES = 15
+DEFAULT_LARGE_TRANSFER_XRP = 1_000_000
+DEFAULT_BATCH_SIZE = 20  # Ledgers per write, about a minute of activity
+DEFAULT_MAX_RESUME_LEDGERS = 1000  # About an hour of ledgers
+DEFAULT_MAX_BUFFERED_MESSAGES = 10000  # Stream messages held while resuming
+
+METRIC_COLUMNS = [column.name for column in XRPLLedgerMetrics.__table__.columns]
+
+
+def xrpl_settings():
+    """Return the ``xrpl`` section of the configuration, or an empty dict."""
+    return config.get("xrpl") or {}
+
+
+def ripple_time(seconds):
+    """Convert seconds since the Ripple epoch (2000-01-01) to a UTC datetime."""
+    return RIPPLE_EPOCH + timedelta(seconds=seconds)
+
+
+def delivered_xrp(transaction, meta):
+    """
+    Return the XRP a transaction delivered, or None if it isn't a successful XRP
+    payment.
+
+    Uses the ``delivered_amount`` from the metadata, so partial payments count
+    what actually arrived rather than the requested ``Amount``. Issued-currency
+    amounts are objects instead of drop strings and are ignored.
+    """
+    if transaction.get("TransactionType") != "Payment":
+        return None
+    if (meta or {}).get("TransactionResult") != "tesSUCCESS":
+        return None
+    amount = meta.get("delivered_amount", transaction.get("Amount"))
+    if not isinstance(amount, str) or not amount.isdigit():
+        return None
+    return int(amount) / DROPS_PER_XRP
+
+
+class LedgerSummary:
+    """
+    Accumulates the activity of one ledger as its transactions arrive.
+
+    Only running totals and the transfers above the alert threshold are kept,
+    not the transactions themselves.
+    """
+
+    def __init__(self, ledger_index, large_transfer_xrp):
+        self.ledger_index = ledger_index
+        self.large_transfer_xrp = large_transfer_xrp
+        self.timestamp = None
+        self.expected_txns = None
+        self.txn_count = 0
+        self.payment_count = 0
+        self.payment_volume_xrp = 0.0
+        self.max_payment_xrp = 0.0
+        self.large_transfers = []
+
+    def add_transaction(self, transaction, meta):
+        self.txn_count += 1
+        amount = delivered_xrp(transaction, meta)
+        if amount is None:
+            return
+        self.payment_count += 1
+        self.payment_volume_xrp += amount
+        self.max_payment_xrp = max(self.max_payment_xrp, amount)
+        if amount >= self.large_transfer_xrp:
+            self.large_transfers.append(
+                {
+                    "ledger_index": self.ledger_index,
+                    "hash": transaction.get("hash"),
+                    "account": transaction.get("Account"),
+                    "destination": transaction.get("Destination"),
+                    "amount_xrp": amount,
+                }
+            )
+
+    def close(self, close_time, txn_count):
+        """Record the ledger header from the ledger stream."""
+        self.timestamp = ripple_time(close_time)
+        self.expected_txns = txn_count
+
+    @property
+    def complete(self):
+        return self.timestamp is not None and self.txn_count >= self.expected_txns
+
+    def to_row(self):
+        return {
+            "timestamp": self.timestamp,
+            "ledger_index": self.ledger_index,
+            "txn_count": max(self.txn_count, self.expected_txns or 0),
+            "payment_count": self.payment_count,
+            "payment_volume_xrp": self.payment_volume_xrp,
+            "max_payment_xrp": self.max_payment_xrp,
+            "large_transfer_count": len(self.large_transfers),
+        }
+
+
+def summarize_ledger(ledger, large_transfer_xrp):
+    """
+    Summarize a ledger returned by the ``ledger`` command with expanded
+    transactions, as used when resuming.
+
+    Handles both API v1 (``metaData`` on the transaction) and v2 (``tx_json`` and
+    ``meta``) formats.
+    """
+    summary = LedgerSummary(int(ledger["ledger_index"]), large_transfer_xrp)
+    transactions = ledger.get("transactions") or []
+    for entry in transactions:
+        transaction = entry.get("tx_json", entry)
+        if "hash" not in transaction and "hash" in entry:
+            transaction = {**transaction, "hash": entry["hash"]}
+        summary.add_transaction(transaction, entry.get("meta") or entry.get("metaData"))
+    summary.close(int(ledger["close_time"]), len(transactions))
+    return summary
+
+
+class LedgerAssembler:
+    """
+    Joins the ``ledger`` and ``transactions`` streams into complete ledgers.
+
+    A validated ledger's ``ledgerClosed`` message and its transactions arrive
+    separately and in either order. A ledger is complete once its header has
+    arrived and as many transactions as it declares have been seen; the header of
+    a later ledger also completes it, in case a transaction was missed. Ledgers are
+    released in index order and only the few in flight are held in memory.
+    """
+
+    def __init__(self, after, large_transfer_xrp):
+        self.after = after
+        self.large_transfer_xrp = large_transfer_xrp
+        self.pending = {}
+
+    def _summary(self, ledger_index):
+        if ledger_index not in self.pending:
+            self.pending[ledger_index] = LedgerSummary(
+                ledger_index, self.large_transfer_xrp
+            )
+        return self.pending[ledger_index]
+
+    def add(self, message):
+        """
+        Add a stream message.
+
+        Returns:
+            list: LedgerSummary objects completed by the message, in index order.
+        """
+        kind = message.get("type")
+        ledger_index = message.get("ledger_index")
+        if kind not in ("ledgerClosed", "transaction") or ledger_index is None:
+            return []
+        if self.after is not None and ledger_index <= self.after:
+            return []
+
+        if kind == "transaction":
+            if not message.get("validated", True):
+                return []
+            # API v2 streams carry the transaction as tx_json, with the hash beside it
+            transaction = message.get("transaction") or message.get("tx_json") or {}
+            if "hash" not in transaction and "hash" in message:
+                transaction = {**transaction, "hash": message["hash"]}
+            self._summary(ledger_index).add_transaction(
+                transaction, message.get("meta")
+            )
+        else:
+            self._summary(ledger_index).close(
+                message["ledger_time"], message["txn_count"]
+            )
+        return self._release(ledger_index if kind == "ledgerClosed" else None)
+
+    def _release(self, closed_index):
+        released = []
+        for ledger_index in sorted(self.pending):
+            summary = self.pending[ledger_index]
+            superseded = closed_index is not None and ledger_index < closed_index
+            if summary.timestamp is None:
+                if not superseded:
+                    break
+                data_collection_logger.warning(
+                    f"Dropping ledger {ledger_index}: no ledgerClosed message"
+                )
+            elif summary.complete or superseded:
+                if not summary.complete:
+                    data_collection_logger.warning(
+                        f"Ledger {ledger_index} closed with {summary.txn_count} of "
+                        f"{summary.expected_txns} transactions streamed"
+                    )
+                released.append(summary)
+            else:
+                break
+            del self.pending[ledger_index]
+            self.after = ledger_index
+        return released
+
+
+class MetricsWindow:
+    """
+    Rolling totals over the ledgers that closed within a trailing time window.
+
+    Each ledger adds one small tuple, evicted once it falls out of the window, so
+    memory is bounded by the window length over the ledger close interval (about
+    260 entries for 15 minutes).
+    """
+
+    FIELDS = (
+        "txn_count",
+        "payment_count",
+        "payment_volume_xrp",
+        "large_transfer_count",
+    )
+
+    def __init__(self, window=None):
+        self.window = window or timedelta(
+            minutes=xrpl_settings().get("window_minutes", DEFAULT_WINDOW_MINUTES)
+        )
+        self.entries = deque()
+        self.totals = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, row):
+        """Add a ledger row and return it with its ``window_*`` totals."""
+        self.entries.append((row["timestamp"], [row[name] for name in self.FIELDS]))
+        for name in self.FIELDS:
+            self.totals[name] += row[name]
+        cutoff = row["timestamp"] - self.window
+        while self.entries[0][0] <= cutoff:
+            _, values = self.entries.popleft()
+            for name, value in zip(self.FIELDS, values):
+                self.totals[name] -= value
+        if len(self.entries) == 1:
+            # Drop accumulated float error whenever the window holds one ledger
+            self.totals["payment_volume_xrp"] = row["payment_volume_xrp"]
+
+        windowed = dict(row)
+        windowed["window_ledgers"] = len(self.entries)
+        for name in self.FIELDS:
+            windowed[f"window_{name}"] = self.totals[name]
+        return windowed
+
+
+class _Connection:
+    """
+    Sends commands on an XRPL websocket and matches their responses, buffering the
+    stream messages that arrive in between.
+
+    At most ``max_buffered`` messages are held. On overflow the buffer is dropped
+    and ``overflowed`` is set, so the caller can fetch the ledgers those messages
+    belonged to with the ``ledger`` command instead.
+    """
+
+    def __init__(self, websocket, max_buffered=DEFAULT_MAX_BUFFERED_MESSAGES):
+        self.websocket = websocket
+        self.buffered = deque()
+        self.max_buffered = max_buffered
+        self.overflowed = False
+        self.ids = itertools.count(1)
+
+    async def request(self, command):
+        request_id = next(self.ids)
+        await self.websocket.send(json.dumps({**command, "id": request_id}))
+        while True:
+            message = json.loads(await self.websocket.recv())
+            if message.get("type") == "response" and message.get("id") == request_id:
+                if message.get("status") != "success":
+                    raise LookupError(
+                        f"{command['command']} failed: "
+                        f"{message.get('error_message') or message.get('error')}"
+                    )
+                return message["result"]
+            if len(self.buffered) >= self.max_buffered:
+                data_collection_logger.warning(
+                    f"Dropping {len(self.buffered)} buffered XRPL stream messages"
+                )
+                self.buffered.clear()
+                self.overflowed = True
+            self.buffered.append(message)
+
+    async def messages(self):
+        while self.buffered:
+            yield self.buffered.popleft()
+        async for raw in self.websocket:
+            yield json.loads(raw)
+
+
+async def stream_ledgers(
+    url=None,
+    resume_from=None,
+    large_transfer_xrp=None,
+    max_resume_ledgers=None,
+    max_reconnects=None,
+    max_buffered=None,
+):
+    """
+    Yield a LedgerSummary for every validated ledger, in index order, reconnecting
+    when the connection drops.
+
+    After (re)connecting and subscribing to the ``ledger`` and ``transactions``
+    streams, ledgers between ``resume_from`` and the server's latest validated
+    ledger are fetched with the ``ledger`` command before the live stream continues,
+    so a restart or dropped connection leaves no gap. Live messages arriving
+    meanwhile are buffered; if the buffer overflows it is dropped and the resume is
+    repeated from the last processed ledger up to the newly validated one.
+
+    Args:
+        url (str, optional): Websocket URL. Defaults to ``api_endpoints.xrpl`` from
+            the configuration.
+        resume_from (int, optional): Last ledger index already processed. Without
+            it the stream starts at the next ledger to close.
+        large_transfer_xrp (float, optional): XRP payments at or above this size
+            are reported as large transfers.
+        max_resume_ledgers (int, optional): Fetch at most this many missed ledgers;
+            older ones are skipped with a warning.
+        max_reconnects (int, optional): Give up after this many consecutive failed
+            connections. Retries forever by default.
+        max_buffered (int, optional): Live messages buffered while resuming.
+            Defaults to ``xrpl.max_buffered_messages`` (10000).
+
+    Raises:
+        ConnectionError: When ``max_reconnects`` consecutive connections fail.
+    """
+    # Imported here so the rest of the collector works without the dependency
+    from websockets.asyncio.client import connect
+    from websockets.exceptions import WebSocketException
+
+    settings = xrpl_settings()
+    url = url or config["api_endpoints"]["xrpl"]
+    if large_transfer_xrp is None:
+        large_transfer_xrp = settings.get(
+            "large_transfer_xrp", DEFAULT_LARGE_TRANSFER_XRP
+        )
+    if max_resume_ledgers is None:
+        max_resume_ledgers = settings.get(
+            "max_resume_ledgers", DEFAULT_MAX_RESUME_LEDGERS
+        )
+    if max_buffered is None:
+        max_buffered = settings.get(
+            "max_buffered_messages", DEFAULT_MAX_BUFFERED_MESSAGES
+        )
+
+    last_index = resume_from
+    failures = 0
+    while True:
+        try:
+            async with connect(url, max_size=None) as websocket:
+                connection = _Connection(websocket, max_buffered)
+                subscribed = await connection.request(
+                    {"command": "subscribe", "streams": ["ledger", "transactions"]}
+                )
+                latest = subscribed["ledger_index"]
+                failures = 0
+                data_collection_logger.info(
+                    f"Subscribed to XRPL ledgers at {url} (validated ledger {latest})"
+                )
+
+                while last_index is not None and last_index < latest:
+                    first = last_index + 1
+                    if latest - last_index > max_resume_ledgers:
+                        first = latest - max_resume_ledgers + 1
+                        data_collection_logger.warning(
+                            f"Skipping ledgers {last_index + 1} to {first - 1}; "
+                            f"resuming at most {max_resume_ledgers} ledgers"
+                        )
+                    for ledger_index in range(first, latest + 1):
+                        try:
+                            result = await connection.request(
+                                {
+                                    "command": "ledger",
+                                    "ledger_index": ledger_index,
+                                    "transactions": True,
+                                    "expand": True,
+                                }
+                            )
+                        except LookupError as e:
+                            data_collection_logger.warning(
+                                f"Skipping ledger {ledger_index}: {str(e)}"
+                            )
+                            continue
+                        last_index = ledger_index
+                        yield summarize_ledger(result["ledger"], large_transfer_xrp)
+                    data_collection_logger.info(
+                        f"Resumed XRPL ledgers {first} to {latest}"
+                    )
+                    if not connection.overflowed:
+                        break
+                    # Live messages were dropped; fetch the ledgers they belonged to
+                    connection.overflowed = False
+                    validated = await connection.request(
+                        {"command": "ledger", "ledger_index": "validated"}
+                    )
+                    latest = int(validated["ledger_index"])
+                if last_index is None or last_index < latest:
+                    last_index = latest
+
+                assembler = LedgerAssembler(last_index, large_transfer_xrp)
+                async for message in connection.messages():
+                    for summary in assembler.add(message):
+                        last_index = summary.ledger_index
+                        yield summary
+            error = "closed by server"
+        except (OSError, WebSocketException) as e:
+            error = str(e)
+        failures += 1
+        if max_reconnects is not None and failures > max_reconnects:
+            raise ConnectionError(f"XRPL stream {url} failed: {error}")
+        delay = min(RECONNECT_DELAY * 2 ** (failures - 1), MAX_RECONNECT_DELAY)
+        data_collection_logger.warning(
+            f"XRPL stream {url} disconnected after ledger {last_index} ({error}); "
+            f"reconnecting in {delay:.0f}s"
+        )
+        await asyncio.sleep(delay)
+
+
+def last_stored_ledger(db: Session):
+    """Return the newest ledger index in xrpl_ledger_metrics, or None."""
+    return db.query(func.max(XRPLLedgerMetrics.ledger_index)).scalar()
+
+
+def store_ledger_metrics(db: Session, rows):
+    """
+    Upsert a batch of ledger rows into xrpl_ledger_metrics and commit.
+
+    Raises:
+        Any exceptions raised by the database operations.
+    """
+    try:
+        upsert_rows(
+            db,
+            XRPLLedgerMetrics,
+            {name: [row[name] for row in rows] for name in METRIC_COLUMNS},
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        data_collection_logger.error(f"Error storing XRPL ledger metrics: {str(e)}")
+        raise
+
+
+def log_large_transfer(transfer):
+    data_collection_logger.warning(
+        f"Large XRP transfer: {transfer['amount_xrp']:,.0f} XRP from "
+        f"{transfer['account']} to {transfer['destination']} in ledger "
+        f"{transfer['ledger_index']} ({transfer['hash']})"
+    )
+
+
+async def ingest_ledgers(
+    db: Session, ledgers, window=None, batch_size=None, on_large_transfer=None
+):
+    """
+    Compute rolling metrics for a ledger stream and write them in batches.
+
+    Args:
+        db: A database session object.
+        ledgers: Async iterable of LedgerSummary, e.g. stream_ledgers().
+        window (timedelta, optional): Rolling window length. Defaults to
+            ``xrpl.window_minutes`` from the configuration.
+        batch_size (int, optional): Ledgers per write. Defaults to
+            ``xrpl.batch_size`` from the configuration.
+        on_large_transfer (callable, optional): Called with each large transfer.
+            Defaults to logging a warning.
+
+    Returns:
+        dict: Counts of "ledgers", "batches" and "large_transfers".
+
+    Raises:
+        Any exceptions raised by the ledger stream or the database operations.
+    """
+    batch_size = batch_size or xrpl_settings().get("batch_size", DEFAULT_BATCH_SIZE)
+    on_large_transfer = on_large_transfer or log_large_transfer
+    metrics = MetricsWindow(window)
+    stats = {"ledgers": 0, "batches": 0, "large_transfers": 0}
+    rows = []
+    try:
+        async for summary in ledgers:
+            for transfer in summary.large_transfers:
+                on_large_transfer(transfer)
+            stats["large_transfers"] += len(summary.large_transfers)
+            rows.append(metrics.add(summary.to_row()))
+            stats["ledgers"] += 1
+            if len(rows) >= batch_size:
+                batch, rows = rows, []
+                store_ledger_metrics(db, batch)
+                stats["batches"] += 1
+    finally:
+        # Keep what was processed when the stream stops or fails
+        if rows:
+            store_ledger_metrics(db, rows)
+            stats["batches"] += 1
+
+    data_collection_logger.info(
+        f"Ingested {stats['ledgers']} XRPL ledgers in {stats['batches']} batches "
+        f"({stats['large_transfers']} large transfers)"
+    )
+    return stats
+
+
+def run_xrpl_ingestion(db: Session):
+    """
+    Stream XRPL ledger metrics until the process is stopped, resuming after the
+    newest stored ledger.
+    """
+    return asyncio.run(
+        ingest_ledgers(db, stream_ledgers(resume_from=last_stored_ledger(db)))
+    )
+
+
+if __name__ == "__main__":
+    from src.models.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        run_xrpl_ingestion(db)
+    finally:
+        db.close()
+        data_collection_logger.info("Database connection closed.")
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.models.market_data_15_min import MarketData15Min
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.series import has_series, resolve_series
+from src.utils.logger import data_processing_logger
+
+BUCKET_INTERVAL = timedelta(minutes=15)
+CANDLES_PER_WINDOW = 100  # One CoinAPI credit buys 100 candles
+
+# Rows are floored onto the 15-minute grid (CoinGecko snapshots are not aligned),
+# two sentinels are added just outside the range, and every pair of neighbouring
+# buckets more than one step apart bounds a gap. This is a single ordered pass over
+# the timestamp index, so it stays fast over years of history and returns one row
+# per gap rather than one per missing bucket.
+GAP_QUERY = """
+WITH buckets AS (
+    SELECT DISTINCT
+        to_timestamp(floor(extract(epoch FROM timestamp) / :step) * :step) AS bucket
+    FROM {table}
+    WHERE timestamp >= :start AND timestamp < :end + make_interval(secs => :step)
+        {series}
+), bounded AS (
+    SELECT bucket FROM buckets
+    UNION ALL SELECT CAST(:start AS timestamptz) - make_interval(secs => :step)
+    UNION ALL SELECT CAST(:end AS timestamptz) + make_interval(secs => :step)
+), edges AS (
+    SELECT bucket, LEAD(bucket) OVER (ORDER BY bucket) AS next_bucket
+    FROM bounded
+)
+SELECT bucket + make_interval(secs => :step) AS first_missing,
+       next_bucket - make_interval(secs => :step) AS last_missing
+FROM edges
+WHERE next_bucket - bucket > make_interval(secs => :step)
+ORDER BY first_missing
+"""
+
+
+def find_gaps(
+    db: Session,
+    model,
+    start: datetime,
+    end: datetime,
+    interval: timedelta = BUCKET_INTERVAL,
+    exchange: str = None,
+    symbol: str = None,
+):
+    """
+    Find every missing bucket of one series of a table within a time range.
+
+    Args:
+        db: A database session object.
+        model: The model whose table is checked, e.g. OHLCVData15Min.
+        start (datetime): First expected bucket (inclusive, aligned to the grid).
+        end (datetime): Last expected bucket (inclusive, aligned to the grid).
+        interval (timedelta, optional): Bucket size. Defaults to 15 minutes.
+        exchange (str, optional): Exchange of the series. Defaults to the table's
+            default exchange.
+        symbol (str, optional): Symbol of the series. Defaults to the table's
+            default symbol.
+
+    Returns:
+        list: (first_missing, last_missing) tuples of inclusive bucket timestamps,
+        in chronological order.
+    """
+    params = {"start": start, "end": end, "step": interval.total_seconds()}
+    series = ""
+    if has_series(model.__table__):
+        series = "AND exchange = :exchange AND symbol = :symbol"
+        params["exchange"], params["symbol"] = resolve_series(
+            model.__table__, exchange, symbol
+        )
+    rows = db.execute(
+        text(GAP_QUERY.format(table=model.__tablename__, series=series)), params
+    ).all()
+    gaps = [(first, last) for first, last in rows]
+    data_processing_logger.info(
+        f"Found {len(gaps)} gaps ({count_missing_buckets(gaps, interval)} missing "
+        f"buckets) in {model.__tablename__} between {start} and {end}"
+    )
+    return gaps
+
+
+def find_missing_ranges(db: Session, start: datetime, end: datetime, models=None):
+    """
+    Run the gap index over several tables.
+
+    Args:
+        db: A database session object.
+        start (datetime): First expected bucket (inclusive).
+        end (datetime): Last expected bucket (inclusive).
+        models (list, optional): Models to check. Defaults to OHLCVData15Min and
+            MarketData15Min.
+
+    Returns:
+        dict: Table name mapped to its list of gaps.
+    """
+    models = models or [OHLCVData15Min, MarketData15Min]
+    return {model.__tablename__: find_gaps(db, model, start, end) for model in models}
+
+
+def count_missing_buckets(gaps, interval: timedelta = BUCKET_INTERVAL):
+    """Return the total number of missing buckets across a list of gaps."""
+    return sum(int((last - first) / interval) + 1 for first, last in gaps)
+
+
+def gaps_to_windows(
+    gaps,
+    candles_per_window=CANDLES_PER_WINDOW,
+    interval: timedelta = BUCKET_INTERVAL,
+):
+    """
+    Merge gaps into the fewest fetch windows that cover every missing bucket.
+
+    Neighbouring gaps share a window whenever they fit inside ``candles_per_window``
+    buckets, since a window costs the same credit however many of its candles were
+    missing. Long gaps are split into full windows.
+
+    Buckets are candle end times, so each returned window starts one interval
+    before its first missing bucket and ends at its last one, matching the
+    period-start ``time_start``/``time_end`` semantics of the CoinAPI history
+    endpoint.
+
+    Args:
+        gaps (list): (first_missing, last_missing) tuples from find_gaps.
+        candles_per_window (int, optional): Maximum buckets per window.
+        interval (timedelta, optional): Bucket size. Defaults to 15 minutes.
+
+    Returns:
+        list: (window_start, window_end) tuples ready for run_backfill.
+    """
+    span = interval * candles_per_window
+    covered = []
+    current = None
+    for first, last in sorted(gaps):
+        while first <= last:
+            if current is not None and first - current[0] < span:
+                current[1] = min(last, current[0] + span - interval)
+            else:
+                if current is not None:
+                    covered.append(current)
+                current = [first, min(last, first + span - interval)]
+            first = current[1] + interval
+    if current is not None:
+        covered.append(current)
+    return [(first - interval, last) for first, last in covered]
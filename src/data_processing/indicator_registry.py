@@ -0,0 +1,184 @@
+from src.utils.logger import data_processing_logger
+
+
+class IndicatorNode:
+    """
+    One series in the indicator graph.
+
+    Attributes:
+        name (str): The series name, e.g. "ema_12" or an output column name.
+        function (callable): Called as ``function(*inputs, **params)`` and returning
+            one array.
+        inputs (tuple): Names of the input series: other nodes or raw data columns
+            such as "close".
+        params (dict): Keyword arguments passed to the function.
+    """
+
+    def __init__(self, name, function, inputs, params):
+        self.name = name
+        self.function = function
+        self.inputs = tuple(inputs)
+        self.params = dict(params)
+
+    def __repr__(self):
+        return f"<IndicatorNode(name={self.name}, inputs={self.inputs})>"
+
+
+class IndicatorCache:
+    """
+    Memoizes computed series by ``(function, params, inputs, data range)``.
+
+    Two nodes that apply the same function with the same parameters to the same
+    inputs share one entry, whatever they are called, so registering an alias or a
+    new indicator over an existing intermediate costs nothing extra.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        """Return the cached series for ``key``, computing it on the first request."""
+        if key in self._values:
+            self.hits += 1
+            return self._values[key]
+        self.misses += 1
+        value = self._values[key] = compute()
+        return value
+
+    def __len__(self):
+        return len(self._values)
+
+    def clear(self):
+        self._values.clear()
+
+
+class IndicatorRegistry:
+    """
+    Declares indicators with their inputs and parameters and computes them as a
+    dependency graph, each intermediate series once per run.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+
+    def register(self, name, function, inputs=("close",), **params):
+        """
+        Declare a series.
+
+        Args:
+            name (str): Name of the new series.
+            function (callable): Called as ``function(*inputs, **params)``.
+            inputs (tuple, optional): Input series names. Defaults to ("close",).
+            **params: Parameters passed to the function.
+
+        Returns:
+            IndicatorNode: The registered node.
+
+        Raises:
+            ValueError: If the name is already registered.
+        """
+        if name in self._nodes:
+            raise ValueError(f"Indicator already registered: {name}")
+        node = self._nodes[name] = IndicatorNode(name, function, inputs, params)
+        return node
+
+    def __contains__(self, name):
+        return name in self._nodes
+
+    def __getitem__(self, name):
+        return self._nodes[name]
+
+    @property
+    def names(self):
+        return list(self._nodes)
+
+    def resolve(self, names):
+        """
+        Return the nodes needed for ``names`` in dependency order.
+
+        Raw data columns (inputs that aren't registered) are not included.
+
+        Raises:
+            KeyError: If a requested name is not registered.
+            ValueError: If the dependencies contain a cycle.
+        """
+        order, done, visiting = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Indicator dependency cycle through {name}")
+            visiting.add(name)
+            for input_name in self._nodes[name].inputs:
+                if input_name in self._nodes:
+                    visit(input_name)
+            visiting.discard(name)
+            done.add(name)
+            order.append(self._nodes[name])
+
+        for name in names:
+            if name not in self._nodes:
+                raise KeyError(f"Unknown indicator: {name}")
+            visit(name)
+        return order
+
+    def _key(self, name, data_range, keys):
+        if name not in self._nodes:
+            return ("data", name, data_range)
+        node = self._nodes[name]
+        return (
+            node.function,
+            tuple(sorted(node.params.items())),
+            tuple(keys[input_name] for input_name in node.inputs),
+            data_range,
+        )
+
+    def compute(self, names, data, data_range=None, cache=None):
+        """
+        Compute a set of series from raw data columns.
+
+        Args:
+            names (iterable): Series to return.
+            data (dict): Raw input arrays, e.g. {"close": close}.
+            data_range (hashable, optional): Identifies the rows in ``data``, e.g.
+                (first_timestamp, last_timestamp). Required with a shared cache.
+            cache (IndicatorCache, optional): Cache to reuse across runs over the
+                same data range. A fresh cache is used by default.
+
+        Returns:
+            dict: The requested series, in the order requested.
+
+        Raises:
+            KeyError: If a requested series or a raw input is missing.
+            ValueError: If a shared cache is given without a data range.
+        """
+        names = list(names)
+        if cache is None:
+            cache = IndicatorCache()
+        elif data_range is None:
+            raise ValueError("A shared IndicatorCache needs a data_range")
+
+        keys, values = {}, {}
+        for node in self.resolve(names):
+            for input_name in node.inputs:
+                if input_name not in keys:
+                    if input_name not in data:
+                        raise KeyError(f"Missing input data: {input_name}")
+                    keys[input_name] = self._key(input_name, data_range, keys)
+                    values[input_name] = data[input_name]
+            keys[node.name] = self._key(node.name, data_range, keys)
+            values[node.name] = cache.get(
+                keys[node.name],
+                lambda node=node: node.function(
+                    *(values[input_name] for input_name in node.inputs),
+                    **node.params,
+                ),
+            )
+        data_processing_logger.debug(
+            f"Resolved {len(names)} indicators: {cache.misses} series computed, "
+            f"{cache.hits} reused"
+        )
+        return {name: values[name] for name in names}
@@ -0,0 +1,408 @@
+import math
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from src.data_processing.indicator_registry import IndicatorRegistry
+from src.data_processing.reader import read_arrays
+from src.models.bulk import upsert_rows
+from src.models.series import resolve_series
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.technical_indicators_15_min import TechnicalIndicators15Min
+from src.utils.logger import data_processing_logger
+
+CANDLE_INTERVAL = timedelta(minutes=15)
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BOLLINGER_PERIOD = 20
+BOLLINGER_STD = 2
+SMA_PERIODS = (50, 200)
+
+# Largest power of 1 / decay allowed inside one scan block. Keeping it bounded keeps
+# the scaled cumulative sums well inside float64 range at full precision.
+SCAN_BLOCK_GROWTH = 1e8
+# Relative weight below which an older seed no longer affects a smoothed value
+CONVERGENCE_TOLERANCE = 1e-10
+
+INDICATOR_COLUMNS = (
+    "rsi_14",
+    "macd_line",
+    "macd_signal",
+    "macd_histogram",
+    "bb_upper",
+    "bb_middle",
+    "bb_lower",
+    "ema_12",
+    "ema_26",
+    "sma_50",
+    "sma_200",
+)
+
+
+def decay_scan(values, decay, initial=0.0):
+    """
+    Solve the recurrence ``y[t] = decay * y[t-1] + values[t]`` without a per-row loop.
+
+    The series is cut into blocks short enough that ``decay ** -block`` stays below
+    SCAN_BLOCK_GROWTH. Within every block the recurrence is a cumulative sum of
+    power-scaled values, computed for all blocks at once; only the carry from one
+    block to the next is stepped, once per block.
+
+    Args:
+        values (np.ndarray): The input terms.
+        decay (float): The recurrence coefficient, between 0 and 1.
+        initial (float, optional): The value of y before the first term.
+
+    Returns:
+        np.ndarray: y, the same length as values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return np.empty(0, dtype=np.float64)
+
+    block = int(min(n, max(1, math.log(SCAN_BLOCK_GROWTH) // -math.log(decay))))
+    blocks = -(-n // block)
+    terms = np.zeros(blocks * block, dtype=np.float64)
+    terms[:n] = values
+    terms = terms.reshape(blocks, block)
+
+    powers = np.arange(block)
+    partial = np.cumsum(terms * decay**-powers, axis=1) * decay**powers
+
+    block_decay = decay**block
+    carries = np.empty(blocks, dtype=np.float64)
+    carry = initial
+    for index, block_end in enumerate(partial[:, -1]):
+        carries[index] = carry
+        carry = block_decay * carry + block_end
+
+    return (partial + np.outer(carries, decay ** (powers + 1))).ravel()[:n]
+
+
+def sma(values, period):
+    """
+    Simple moving average. The first ``period - 1`` values are NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if len(values) < period:
+        return result
+    sums = np.cumsum(values)
+    result[period - 1] = sums[period - 1]
+    result[period:] = sums[period:] - sums[:-period]
+    result[period - 1 :] /= period
+    return result
+
+
+def smoothed_average(values, period, alpha):
+    """
+    Exponentially smoothed average seeded with the simple average of the first
+    ``period`` values. The first ``period - 1`` values are NaN.
+
+    Args:
+        values (np.ndarray): Input series.
+        period (int): Seed length.
+        alpha (float): Smoothing factor (2 / (period + 1) for an EMA, 1 / period
+            for Wilder's smoothing).
+
+    Returns:
+        np.ndarray: The smoothed series.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if len(values) < period:
+        return result
+    seed = values[:period].mean()
+    result[period - 1] = seed
+    result[period:] = decay_scan(alpha * values[period:], 1 - alpha, seed)
+    return result
+
+
+def ema(values, period):
+    """
+    Exponential moving average with an SMA seed. The first ``period - 1`` values
+    are NaN.
+    """
+    return smoothed_average(values, period, 2 / (period + 1))
+
+
+def rsi(close, period=RSI_PERIOD):
+    """
+    Relative Strength Index using Wilder's smoothing. The first ``period`` values
+    are NaN. An interval with no losses has an RSI of 100.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    result = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return result
+    changes = np.diff(close)
+    average_gain = smoothed_average(np.clip(changes, 0, None), period, 1 / period)
+    average_loss = smoothed_average(np.clip(-changes, 0, None), period, 1 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strength = average_gain / average_loss
+        result[1:] = np.where(average_loss == 0, 100.0, 100 - 100 / (1 + strength))
+    result[:period] = np.nan
+    return result
+
+
+def macd(close, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    """
+    Moving Average Convergence Divergence.
+
+    Returns:
+        tuple: (line, signal, histogram). The signal is an EMA of the line seeded
+        once ``signal`` line values exist.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    line = difference(ema(close, fast), ema(close, slow))
+    signal_line = trailing_ema(line, signal)
+    return line, signal_line, difference(line, signal_line)
+
+
+def difference(minuend, subtrahend):
+    """Element-wise ``minuend - subtrahend``."""
+    return minuend - subtrahend
+
+
+def trailing_ema(values, period):
+    """
+    EMA of a series that starts with NaN, seeded once ``period`` values exist.
+    Used for the MACD signal line.
+    """
+    result = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid):
+        result[valid[0] :] = ema(values[valid[0] :], period)
+    return result
+
+
+def bollinger_bands(close, period=BOLLINGER_PERIOD, num_std=BOLLINGER_STD):
+    """
+    Bollinger Bands around an SMA, using the population standard deviation.
+
+    Returns:
+        tuple: (upper, middle, lower).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    middle = sma(close, period)
+    deviation = rolling_std(close, middle, period)
+    return (
+        offset_band(middle, deviation, num_std),
+        middle,
+        offset_band(middle, deviation, -num_std),
+    )
+
+
+def rolling_std(values, means, period):
+    """
+    Population standard deviation over a trailing window, given the window means.
+    The first ``period - 1`` values are NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    deviation = np.full(len(values), np.nan)
+    if len(values) >= period:
+        # Summing squared deviations from each window's own mean, one pass per
+        # window offset, avoids the cancellation of a running sum of squares
+        count = len(values) - period + 1
+        window_means = means[period - 1 :]
+        squares = np.zeros(count)
+        for offset in range(period):
+            squares += (values[offset : offset + count] - window_means) ** 2
+        deviation[period - 1 :] = np.sqrt(squares / period)
+    return deviation
+
+
+def offset_band(middle, deviation, scale):
+    """Return ``middle + scale * deviation``."""
+    return middle + scale * deviation
+
+
+# Every stored indicator column and the intermediate series it depends on. Series
+# are memoized by function, parameters and inputs, so a new indicator built on an
+# existing intermediate (another EMA-12 consumer, an SMA-20 alias of bb_middle)
+# reuses it instead of recomputing it.
+INDICATORS = IndicatorRegistry()
+INDICATORS.register("rsi_14", rsi, period=RSI_PERIOD)
+INDICATORS.register("ema_12", ema, period=MACD_FAST)
+INDICATORS.register("ema_26", ema, period=MACD_SLOW)
+INDICATORS.register("macd_line", difference, inputs=("ema_12", "ema_26"))
+INDICATORS.register(
+    "macd_signal", trailing_ema, inputs=("macd_line",), period=MACD_SIGNAL
+)
+INDICATORS.register("macd_histogram", difference, inputs=("macd_line", "macd_signal"))
+INDICATORS.register("bb_middle", sma, period=BOLLINGER_PERIOD)
+INDICATORS.register(
+    "bb_std", rolling_std, inputs=("close", "bb_middle"), period=BOLLINGER_PERIOD
+)
+INDICATORS.register(
+    "bb_upper", offset_band, inputs=("bb_middle", "bb_std"), scale=BOLLINGER_STD
+)
+INDICATORS.register(
+    "bb_lower", offset_band, inputs=("bb_middle", "bb_std"), scale=-BOLLINGER_STD
+)
+INDICATORS.register("sma_50", sma, period=SMA_PERIODS[0])
+INDICATORS.register("sma_200", sma, period=SMA_PERIODS[1])
+
+
+def compute_indicators(close, columns=INDICATOR_COLUMNS, registry=INDICATORS):
+    """
+    Compute TechnicalIndicators15Min columns over a whole close series.
+
+    The columns are resolved through the indicator registry, so intermediates
+    shared between columns (the EMAs behind MACD, the SMA behind the Bollinger
+    bands) are computed once.
+
+    Args:
+        close (np.ndarray): Close prices in chronological order.
+        columns (tuple, optional): Columns to compute. Defaults to every column.
+        registry (IndicatorRegistry, optional): Registry declaring the columns.
+
+    Returns:
+        dict: One float64 array per indicator column, NaN until each indicator has
+        enough history.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    return registry.compute(columns, {"close": close})
+
+
+def _convergence_periods(alpha, tolerance):
+    return math.ceil(math.log(tolerance) / math.log(1 - alpha))
+
+
+def warmup_periods(tolerance=CONVERGENCE_TOLERANCE):
+    """
+    Return how many earlier candles a recomputation needs to match full history.
+
+    Simple averages need their window. Smoothed averages also need enough extra
+    candles for the effect of their seed to decay below ``tolerance``.
+    """
+    ema_slow = MACD_SLOW + _convergence_periods(2 / (MACD_SLOW + 1), tolerance)
+    return max(
+        SMA_PERIODS[1],
+        RSI_PERIOD + 1 + _convergence_periods(1 / RSI_PERIOD, tolerance),
+        ema_slow + MACD_SIGNAL + _convergence_periods(2 / (MACD_SIGNAL + 1), tolerance),
+    )
+
+
+def _nullable(values):
+    return np.where(np.isnan(values), None, values)
+
+
+def store_indicators(db: Session, timestamps, indicators, exchange=None, symbol=None):
+    """
+    Upsert computed indicators, skipping leading rows where every value is NaN.
+
+    Args:
+        db: A database session object.
+        timestamps (np.ndarray): datetime64 (UTC) candle timestamps.
+        indicators (dict): Output of compute_indicators.
+        exchange (str, optional): Exchange of the series. Defaults to the default
+            series.
+        symbol (str, optional): Symbol of the series. Defaults to the default
+            series.
+
+    Returns:
+        int: The number of rows written.
+    """
+    valid = np.zeros(len(timestamps), dtype=bool)
+    for values in indicators.values():
+        valid |= ~np.isnan(values)
+    if not valid.any():
+        return 0
+
+    exchange, symbol = resolve_series(
+        TechnicalIndicators15Min.__table__, exchange, symbol
+    )
+    row_count = int(valid.sum())
+    columns = {
+        "exchange": [exchange] * row_count,
+        "symbol": [symbol] * row_count,
+        "timestamp": pd.DatetimeIndex(timestamps[valid])
+        .tz_localize("UTC")
+        .to_pydatetime(),
+    }
+    for name, values in indicators.items():
+        columns[name] = _nullable(values[valid])
+    return upsert_rows(db, TechnicalIndicators15Min, columns)
+
+
+def recompute_indicators(
+    db: Session,
+    start: datetime = None,
+    end: datetime = None,
+    exchange: str = None,
+    symbol: str = None,
+):
+    """
+    Recompute technical indicators from one series of stored OHLCV candles and
+    upsert them.
+
+    When ``start`` is given, candles from ``warmup_periods()`` earlier are loaded so
+    the values written from ``start`` onwards match a full-history computation.
+
+    Args:
+        db: A database session object.
+        start (datetime, optional): First candle to write indicators for.
+        end (datetime, optional): End of the range (exclusive).
+        exchange (str, optional): Exchange of the series. Defaults to the default
+            series.
+        symbol (str, optional): Symbol of the series. Defaults to the default
+            series.
+
+    Returns:
+        dict: Statistics with keys "candles", "rows", "compute_seconds" and
+        "candles_per_sec".
+
+    Raises:
+        Any exceptions raised by the database operations.
+    """
+    try:
+        load_start = None
+        if start is not None:
+            load_start = start - CANDLE_INTERVAL * warmup_periods()
+        arrays = read_arrays(
+            db,
+            OHLCVData15Min,
+            load_start,
+            end,
+            columns=["close"],
+            exchange=exchange,
+            symbol=symbol,
+        )
+
+        started = time.perf_counter()
+        indicators = compute_indicators(arrays["close"])
+        compute_seconds = time.perf_counter() - started
+
+        timestamps = arrays["timestamp"]
+        if start is not None:
+            first = start.astimezone(timezone.utc).replace(tzinfo=None)
+            keep = timestamps >= np.datetime64(first, "us")
+            timestamps = timestamps[keep]
+            indicators = {name: values[keep] for name, values in indicators.items()}
+
+        rows = store_indicators(db, timestamps, indicators, exchange, symbol)
+        db.commit()
+    except Exception as e:
+        data_processing_logger.error(f"Error recomputing indicators: {str(e)}")
+        db.rollback()
+        raise
+
+    candles = len(arrays["close"])
+    stats = {
+        "candles": candles,
+        "rows": rows,
+        "compute_seconds": compute_seconds,
+        "candles_per_sec": candles / compute_seconds if compute_seconds > 0 else 0.0,
+    }
+    data_processing_logger.info(
+        f"Computed indicators for {candles} candles in {compute_seconds * 1000:.1f}ms "
+        f"({stats['candles_per_sec']:.0f} candles/sec), wrote {rows} rows"
+    )
+    return stats
@@ -0,0 +1,206 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from src.data_processing.indicators import (
+    INDICATOR_COLUMNS,
+    compute_indicators,
+    store_indicators,
+    warmup_periods,
+)
+from src.data_processing.reader import read_arrays
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.utils.logger import data_processing_logger
+
+CHUNKS_PER_WORKER = (
+    4  # Several chunks per worker, so a slow chunk doesn't idle the rest
+)
+MIN_CHUNK_SIZE = 10000  # About 23x warmup_periods(), so the warmup overhead stays small
+MIN_PARALLEL_CANDLES = 50000  # Below this, process start-up costs more than it saves
+
+
+def default_chunk_size(count, workers):
+    """
+    Return the chunk size that splits ``count`` candles into about
+    ``CHUNKS_PER_WORKER`` chunks per worker, but no fewer than ``MIN_CHUNK_SIZE``
+    candles per chunk.
+    """
+    return max(MIN_CHUNK_SIZE, math.ceil(count / (workers * CHUNKS_PER_WORKER)))
+
+
+def chunk_bounds(count, chunk_size, warmup):
+    """
+    Split ``count`` candles into chunks, each loading ``warmup`` extra candles
+    before the rows it writes.
+
+    Returns:
+        list: (load_start, write_start, end) index tuples covering every candle once.
+    """
+    return [
+        (
+            max(0, write_start - warmup),
+            write_start,
+            min(write_start + chunk_size, count),
+        )
+        for write_start in range(0, count, chunk_size)
+    ]
+
+
+def _compute_chunk(input_name, output_name, count, bounds):
+    """
+    Worker: compute one chunk from the shared close array into the shared output.
+
+    Each chunk writes a disjoint slice of the output block, so the results are
+    stitched in place without any locking or pickling of arrays.
+    """
+    load_start, write_start, end = bounds
+    input_memory = shared_memory.SharedMemory(name=input_name)
+    output_memory = shared_memory.SharedMemory(name=output_name)
+    try:
+        close = np.ndarray((count,), dtype=np.float64, buffer=input_memory.buf)
+        output = np.ndarray(
+            (len(INDICATOR_COLUMNS), count), dtype=np.float64, buffer=output_memory.buf
+        )
+        started = time.perf_counter()
+        indicators = compute_indicators(close[load_start:end])
+        offset = write_start - load_start
+        for row, name in enumerate(INDICATOR_COLUMNS):
+            output[row, write_start:end] = indicators[name][offset:]
+        del close, output
+        return time.perf_counter() - started
+    finally:
+        input_memory.close()
+        output_memory.close()
+
+
+def compute_indicators_parallel(close, workers=None, chunk_size=None):
+    """
+    Compute every indicator column over a close series, in chunks across processes.
+
+    Each chunk starts ``warmup_periods()`` candles early, so SMA windows are
+    complete and smoothed averages have converged by its first written row, and the
+    stitched result matches compute_indicators to within the convergence tolerance.
+    The closes and the results are exchanged through shared memory.
+
+    Args:
+        close (np.ndarray): Close prices in chronological order.
+        workers (int, optional): Worker processes. Defaults to the CPU count.
+        chunk_size (int, optional): Candles written per chunk. Defaults to
+            default_chunk_size(), so every worker gets several chunks.
+
+    Returns:
+        dict: One float64 array per indicator column, as compute_indicators returns.
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    count = len(close)
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or default_chunk_size(count, workers)
+    bounds = chunk_bounds(count, chunk_size, warmup_periods())
+    if workers == 1 or len(bounds) == 1:
+        return compute_indicators(close)
+
+    input_memory = shared_memory.SharedMemory(create=True, size=max(close.nbytes, 1))
+    output_memory = shared_memory.SharedMemory(
+        create=True, size=max(close.nbytes * len(INDICATOR_COLUMNS), 1)
+    )
+    try:
+        np.ndarray(close.shape, dtype=np.float64, buffer=input_memory.buf)[:] = close
+        with ProcessPoolExecutor(max_workers=min(workers, len(bounds))) as executor:
+            futures = [
+                executor.submit(
+                    _compute_chunk,
+                    input_memory.name,
+                    output_memory.name,
+                    count,
+                    chunk,
+                )
+                for chunk in bounds
+            ]
+            seconds = [future.result() for future in futures]
+        output = np.ndarray(
+            (len(INDICATOR_COLUMNS), count), dtype=np.float64, buffer=output_memory.buf
+        ).copy()
+    finally:
+        input_memory.close()
+        input_memory.unlink()
+        output_memory.close()
+        output_memory.unlink()
+
+    data_processing_logger.info(
+        f"Computed {len(bounds)} chunks on {min(workers, len(bounds))} workers "
+        f"(slowest chunk {max(seconds) * 1000:.1f}ms)"
+    )
+    return {name: output[row] for row, name in enumerate(INDICATOR_COLUMNS)}
+
+
+def recompute_indicators_parallel(
+    db: Session,
+    workers=None,
+    chunk_size=None,
+    exchange=None,
+    symbol=None,
+):
+    """
+    Rebuild technical_indicators_15_min over the full candle history of a series.
+
+    Loads every close with read_arrays, computes the indicators with
+    compute_indicators_parallel (or in-process for short histories) and upserts
+    them in one commit.
+
+    Args:
+        db: A database session object.
+        workers (int, optional): Worker processes. Defaults to the CPU count.
+        chunk_size (int, optional): Candles written per chunk. Defaults to
+            default_chunk_size().
+        exchange (str, optional): Exchange of the series. Defaults to the default
+            series.
+        symbol (str, optional): Symbol of the series. Defaults to the default
+            series.
+
+    Returns:
+        dict: Statistics with keys "candles", "rows", "workers", "compute_seconds"
+        and "candles_per_sec".
+
+    Raises:
+        Any exceptions raised by the database operations.
+    """
+    workers = workers or os.cpu_count() or 1
+    try:
+        arrays = read_arrays(
+            db, OHLCVData15Min, columns=["close"], exchange=exchange, symbol=symbol
+        )
+        close = arrays["close"]
+        if len(close) < MIN_PARALLEL_CANDLES:
+            workers = 1
+
+        started = time.perf_counter()
+        indicators = compute_indicators_parallel(close, workers, chunk_size)
+        compute_seconds = time.perf_counter() - started
+
+        rows = store_indicators(db, arrays["timestamp"], indicators, exchange, symbol)
+        db.commit()
+    except Exception as e:
+        data_processing_logger.error(f"Error recomputing indicators: {str(e)}")
+        db.rollback()
+        raise
+
+    stats = {
+        "candles": len(close),
+        "rows": rows,
+        "workers": workers,
+        "compute_seconds": compute_seconds,
+        "candles_per_sec": (
+            len(close) / compute_seconds if compute_seconds > 0 else 0.0
+        ),
+    }
+    data_processing_logger.info(
+        f"Recomputed indicators for {len(close)} candles on {workers} workers in "
+        f"{compute_seconds * 1000:.1f}ms ({stats['candles_per_sec']:.0f} "
+        f"candles/sec), wrote {rows} rows"
+    )
+    return stats
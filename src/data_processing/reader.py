@@ -0,0 +1,234 @@
+import io
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.orm import Session
+
+from src.models.market_data_15_min import MarketData15Min
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.series import SERIES_COLUMNS, series_filter
+from src.models.technical_indicators_15_min import TechnicalIndicators15Min
+from src.utils.logger import data_processing_logger
+
+DEFAULT_CHUNK_SIZE = 50000  # Rows fetched per round trip from the server-side cursor
+COPY_BINARY_HEADER_SIZE = 19  # Signature, flags and header extension length
+COPY_BINARY_TRAILER_SIZE = 2  # Field count of -1
+MARKET_DATA_TOLERANCE = timedelta(minutes=15)
+
+
+def value_columns(model):
+    """
+    Return the names of a model's data columns (everything but id, timestamp and
+    the series columns).
+    """
+    return [
+        column.name
+        for column in model.__table__.columns
+        if column.name not in ("id", "timestamp", *SERIES_COLUMNS)
+    ]
+
+
+def _copy_select(connection, statement, column_count):
+    """
+    Stream a SELECT through binary COPY TO STDOUT and view it as a float64 block.
+
+    Every selected value is a non-NULL float8, so each binary tuple has the same
+    layout (a field count, then a length and an 8-byte value per field) and the
+    whole payload can be read with one structured-dtype view instead of parsing.
+    """
+    compiled = statement.compile(dialect=connection.dialect)
+    cursor = connection.connection.cursor()
+    try:
+        query = cursor.mogrify(str(compiled), compiled.params).decode()
+        buffer = io.BytesIO()
+        cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT binary)", buffer)
+    finally:
+        cursor.close()
+
+    payload = buffer.getbuffer()[COPY_BINARY_HEADER_SIZE:-COPY_BINARY_TRAILER_SIZE]
+    record = np.dtype(
+        [("fields", ">i2")]
+        + [
+            (f"f{index}", [("size", ">i4"), ("value", ">f8")])
+            for index in range(column_count)
+        ]
+    )
+    records = np.frombuffer(payload, dtype=record)
+    data = np.empty((len(records), column_count), dtype=np.float64)
+    for index in range(column_count):
+        data[:, index] = records[f"f{index}"]["value"]
+    return data
+
+
+def _stream_select(connection, statement, chunk_size):
+    """Fetch a SELECT from a server-side cursor, one float64 block per partition."""
+    result = connection.execute(
+        statement,
+        execution_options={"stream_results": True, "yield_per": chunk_size},
+    )
+    blocks = [
+        np.array([tuple(row) for row in rows], dtype=np.float64)
+        for rows in result.partitions()
+    ]
+    return np.concatenate(blocks) if blocks else None
+
+
+def read_arrays(
+    db: Session,
+    model,
+    start: datetime = None,
+    end: datetime = None,
+    columns=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    exchange=None,
+    symbol=None,
+):
+    """
+    Load a time range of one series of a table into contiguous NumPy arrays.
+
+    Rows are selected through Core, so no ORM objects are built and no validators
+    run. Every column is cast to float8 by the database, with NULLs returned as NaN,
+    and timestamps are extracted as epoch seconds, so no Python objects are built
+    per value. On PostgreSQL the query is streamed with binary ``COPY ... TO
+    STDOUT`` and viewed directly as a float64 block; other dialects stream from a
+    server-side cursor in ``chunk_size`` partitions.
+
+    Args:
+        db: A database session object.
+        model: The model to read, e.g. OHLCVData15Min.
+        start (datetime, optional): Start of the range (inclusive).
+        end (datetime, optional): End of the range (exclusive).
+        columns (list, optional): Columns to load. Defaults to every data column.
+        chunk_size (int, optional): Rows fetched per round trip.
+        exchange (str, optional): Exchange of the series. Defaults to the table's
+            default exchange.
+        symbol (str, optional): Symbol of the series. Defaults to the table's
+            default symbol.
+
+    Returns:
+        dict: "timestamp" as a datetime64[us] (UTC) array plus one float64 array per
+        column, in chronological order. NULLs are returned as NaN.
+    """
+    started = time.perf_counter()
+    table = model.__table__
+    columns = list(columns or value_columns(model))
+    statement = select(
+        cast(func.extract("epoch", table.c.timestamp), Float),
+        *(func.coalesce(cast(table.c[name], Float), float("nan")) for name in columns),
+    ).order_by(table.c.timestamp)
+    for clause in series_filter(table, exchange, symbol):
+        statement = statement.where(clause)
+    if start is not None:
+        statement = statement.where(table.c.timestamp >= start)
+    if end is not None:
+        statement = statement.where(table.c.timestamp < end)
+
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        data = _copy_select(connection, statement, len(columns) + 1)
+    else:
+        data = _stream_select(connection, statement, chunk_size)
+    if data is None:
+        data = np.empty((0, len(columns) + 1), dtype=np.float64)
+
+    arrays = {
+        "timestamp": np.round(data[:, 0] * 1e6).astype(np.int64).view("datetime64[us]")
+    }
+    for index, name in enumerate(columns, start=1):
+        arrays[name] = np.ascontiguousarray(data[:, index])
+
+    data_processing_logger.info(
+        f"Loaded {len(data)} rows x {len(columns)} columns from {table.name} "
+        f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+    )
+    return arrays
+
+
+def read_frame(
+    db: Session,
+    model,
+    start: datetime = None,
+    end: datetime = None,
+    columns=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    exchange=None,
+    symbol=None,
+):
+    """
+    Load a time range of a table into a DataFrame indexed by UTC timestamp.
+
+    Takes the same arguments as read_arrays.
+
+    Returns:
+        pd.DataFrame: One float64 column per requested column.
+    """
+    arrays = read_arrays(db, model, start, end, columns, chunk_size, exchange, symbol)
+    index = pd.DatetimeIndex(arrays.pop("timestamp"), name="timestamp").tz_localize(
+        "UTC"
+    )
+    return pd.DataFrame(arrays, index=index)
+
+
+def read_joined_frame(
+    db: Session,
+    start: datetime = None,
+    end: datetime = None,
+    ohlcv_columns=None,
+    market_columns=None,
+    indicator_columns=None,
+    exchange=None,
+    symbol=None,
+):
+    """
+    Load OHLCV candles with their market data and technical indicators in one frame.
+
+    Candles define the rows. Indicators are joined on the exact timestamp. Market
+    data snapshots are stamped with the provider's update time rather than the
+    15-minute grid, so each candle takes the latest snapshot at or before its
+    timestamp, if one is less than 15 minutes old. Market data is aggregated across
+    exchanges, so it is matched on the symbol alone.
+
+    Args:
+        db: A database session object.
+        start (datetime, optional): Start of the range (inclusive).
+        end (datetime, optional): End of the range (exclusive).
+        ohlcv_columns (list, optional): OHLCV columns. Defaults to all.
+        market_columns (list, optional): Market data columns. Defaults to all; pass
+            an empty list to leave the table out.
+        indicator_columns (list, optional): Indicator columns. Defaults to all; pass
+            an empty list to leave the table out.
+        exchange (str, optional): Exchange of the candles. Defaults to the default
+            series.
+        symbol (str, optional): Symbol of the candles. Defaults to the default
+            series.
+
+    Returns:
+        pd.DataFrame: Indexed by candle timestamp (UTC).
+    """
+    series = {"exchange": exchange, "symbol": symbol}
+    frame = read_frame(db, OHLCVData15Min, start, end, ohlcv_columns, **series)
+
+    if indicator_columns is None or indicator_columns:
+        indicators = read_frame(
+            db, TechnicalIndicators15Min, start, end, indicator_columns, **series
+        )
+        frame = frame.join(indicators, how="left")
+
+    if market_columns is None or market_columns:
+        market_start = start - MARKET_DATA_TOLERANCE if start is not None else None
+        market = read_frame(
+            db, MarketData15Min, market_start, end, market_columns, symbol=symbol
+        )
+        frame = pd.merge_asof(
+            frame,
+            market,
+            left_index=True,
+            right_index=True,
+            direction="backward",
+            tolerance=pd.Timedelta(MARKET_DATA_TOLERANCE),
+            allow_exact_matches=True,
+        )
+    return frame
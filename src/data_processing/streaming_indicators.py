@@ -0,0 +1,430 @@
+import math
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from src.data_processing.indicators import (
+    BOLLINGER_PERIOD,
+    BOLLINGER_STD,
+    INDICATOR_COLUMNS,
+    MACD_FAST,
+    MACD_SIGNAL,
+    MACD_SLOW,
+    RSI_PERIOD,
+    SMA_PERIODS,
+    ema,
+    smoothed_average,
+)
+from src.data_processing.reader import read_arrays
+from src.models.bulk import upsert_rows
+from src.models.indicator_state import IndicatorState
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.series import default_series, resolve_series
+from src.models.technical_indicators_15_min import TechnicalIndicators15Min
+from src.utils.logger import data_processing_logger
+
+STATE_NAME = OHLCVData15Min.__tablename__
+STATE_VERSION = 1
+SUM_PERIODS = (BOLLINGER_PERIOD,) + SMA_PERIODS
+WINDOW = max(SUM_PERIODS)  # Ring buffer length, enough for SMA-200
+
+
+def _seeded_step(value, seed_sum, index, period, alpha, x):
+    """
+    Advance a smoothed average seeded with the SMA of its first ``period`` inputs.
+
+    Returns:
+        tuple: (value, seed_sum) after consuming input number ``index`` (0-based).
+    """
+    if index < period - 1:
+        return None, seed_sum + x
+    if index == period - 1:
+        return (seed_sum + x) / period, seed_sum + x
+    return alpha * x + (1 - alpha) * value, seed_sum
+
+
+class StreamingIndicators:
+    """
+    Constant-time indicator state for a live candle series.
+
+    The state covers every input the batch engine in ``indicators.py`` would need
+    for the next candle: the EMA and Wilder averages (with their SMA seeds), the MACD
+    signal, a ring buffer of the last 200 closes and running sums for the 20, 50 and
+    200 period windows. The Bollinger deviation is summed over the last 20 closes
+    in the ring on every candle, like the batch ``rolling_std``, since a running
+    sum of squares loses its precision to cancellation when the bands are narrow
+    next to the price.
+
+    The newest candle is kept apart as the revisable head, because the latest
+    15-minute candle may be collected again before it closes. A repeated timestamp
+    replaces the head; a later one folds the head into the state first.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.last_close = None
+        self.ring = [0.0] * WINDOW
+        self.sums = {period: 0.0 for period in SUM_PERIODS}
+        self.ema = {MACD_FAST: None, MACD_SLOW: None}
+        self.ema_seed = {MACD_FAST: 0.0, MACD_SLOW: 0.0}
+        self.signal = None
+        self.signal_seed = 0.0
+        self.average_gain = None
+        self.average_loss = None
+        self.gain_seed = 0.0
+        self.loss_seed = 0.0
+        self.head_timestamp = None
+        self.head_close = None
+
+    @classmethod
+    def from_history(cls, close):
+        """
+        Build the state for a close series with the vectorized batch functions.
+
+        Args:
+            close (np.ndarray): Every close so far, in chronological order.
+
+        Returns:
+            StreamingIndicators: State positioned after the last close.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        state = cls()
+        n = len(close)
+        state.count = n
+        if n == 0:
+            return state
+        state.last_close = float(close[-1])
+
+        recent = close[-WINDOW:]
+        for offset, value in enumerate(recent):
+            state.ring[(n - len(recent) + offset) % WINDOW] = float(value)
+        for period in SUM_PERIODS:
+            state.sums[period] = float(close[-period:].sum())
+
+        for period in (MACD_FAST, MACD_SLOW):
+            if n >= period:
+                state.ema[period] = float(ema(close, period)[-1])
+            else:
+                state.ema_seed[period] = float(close.sum())
+
+        if n >= MACD_SLOW:
+            line = (ema(close, MACD_FAST) - ema(close, MACD_SLOW))[MACD_SLOW - 1 :]
+            if len(line) >= MACD_SIGNAL:
+                state.signal = float(ema(line, MACD_SIGNAL)[-1])
+            else:
+                state.signal_seed = float(line.sum())
+
+        changes = np.diff(close)
+        gains = np.clip(changes, 0, None)
+        losses = np.clip(-changes, 0, None)
+        if len(changes) >= RSI_PERIOD:
+            alpha = 1 / RSI_PERIOD
+            state.average_gain = float(smoothed_average(gains, RSI_PERIOD, alpha)[-1])
+            state.average_loss = float(smoothed_average(losses, RSI_PERIOD, alpha)[-1])
+        else:
+            state.gain_seed = float(gains.sum())
+            state.loss_seed = float(losses.sum())
+        return state
+
+    def _close_ago(self, periods):
+        """Return the close ``periods`` candles before the next one."""
+        return self.ring[(self.count - periods) % WINDOW]
+
+    def _advance(self, x, commit):
+        """
+        Compute the indicators for a next close ``x`` and optionally keep the state.
+        """
+        n = self.count
+        sums = {}
+        for period in SUM_PERIODS:
+            sums[period] = self.sums[period] + x
+            if n >= period:
+                sums[period] -= self._close_ago(period)
+
+        emas, ema_seeds = {}, {}
+        for period in (MACD_FAST, MACD_SLOW):
+            emas[period], ema_seeds[period] = _seeded_step(
+                self.ema[period], self.ema_seed[period], n, period, 2 / (period + 1), x
+            )
+
+        line = signal = None
+        signal_seed = self.signal_seed
+        if n >= MACD_SLOW - 1:
+            line = emas[MACD_FAST] - emas[MACD_SLOW]
+            signal, signal_seed = _seeded_step(
+                self.signal,
+                self.signal_seed,
+                n - (MACD_SLOW - 1),
+                MACD_SIGNAL,
+                2 / (MACD_SIGNAL + 1),
+                line,
+            )
+
+        average_gain, average_loss = self.average_gain, self.average_loss
+        gain_seed, loss_seed = self.gain_seed, self.loss_seed
+        if n >= 1:
+            change = x - self.last_close
+            average_gain, gain_seed = _seeded_step(
+                self.average_gain,
+                self.gain_seed,
+                n - 1,
+                RSI_PERIOD,
+                1 / RSI_PERIOD,
+                max(change, 0.0),
+            )
+            average_loss, loss_seed = _seeded_step(
+                self.average_loss,
+                self.loss_seed,
+                n - 1,
+                RSI_PERIOD,
+                1 / RSI_PERIOD,
+                max(-change, 0.0),
+            )
+
+        outputs = dict.fromkeys(INDICATOR_COLUMNS)
+        if average_loss is not None:
+            outputs["rsi_14"] = (
+                100.0
+                if average_loss == 0
+                else 100 - 100 / (1 + average_gain / average_loss)
+            )
+        outputs["macd_line"] = line
+        if signal is not None:
+            outputs["macd_signal"] = signal
+            outputs["macd_histogram"] = line - signal
+        if n >= BOLLINGER_PERIOD - 1:
+            middle = sums[BOLLINGER_PERIOD] / BOLLINGER_PERIOD
+            squares = (x - middle) ** 2
+            for periods in range(1, BOLLINGER_PERIOD):
+                squares += (self._close_ago(periods) - middle) ** 2
+            deviation = BOLLINGER_STD * math.sqrt(squares / BOLLINGER_PERIOD)
+            outputs["bb_upper"] = middle + deviation
+            outputs["bb_middle"] = middle
+            outputs["bb_lower"] = middle - deviation
+        outputs["ema_12"] = emas[MACD_FAST]
+        outputs["ema_26"] = emas[MACD_SLOW]
+        for period in SMA_PERIODS:
+            if n >= period - 1:
+                outputs[f"sma_{period}"] = sums[period] / period
+
+        if commit:
+            self.ring[n % WINDOW] = x
+            self.count = n + 1
+            self.last_close = x
+            self.sums = sums
+            self.ema, self.ema_seed = emas, ema_seeds
+            self.signal, self.signal_seed = signal, signal_seed
+            self.average_gain, self.average_loss = average_gain, average_loss
+            self.gain_seed, self.loss_seed = gain_seed, loss_seed
+            if self.count % WINDOW == 0:
+                self._resync_sums()
+        return outputs
+
+    def _resync_sums(self):
+        # Recompute the running sums exactly once per ring rotation (amortized O(1))
+        # so floating-point drift from repeated add/subtract can't accumulate
+        recent = [self._close_ago(periods) for periods in range(WINDOW, 0, -1)]
+        for period in SUM_PERIODS:
+            self.sums[period] = math.fsum(recent[-period:])
+
+    def push(self, close):
+        """Fold a final close into the state and return its indicators."""
+        return self._advance(float(close), commit=True)
+
+    def peek(self, close):
+        """Return the indicators a close would have, without changing the state."""
+        return self._advance(float(close), commit=False)
+
+    def update(self, timestamp, close):
+        """
+        Apply a collected candle and return its indicators.
+
+        Args:
+            timestamp (datetime): The candle's timestamp.
+            close (float): The candle's close.
+
+        Returns:
+            dict: Indicator values (None until defined), or None if the candle is
+            older than the head and was ignored.
+        """
+        if self.head_timestamp is not None:
+            if timestamp < self.head_timestamp:
+                data_processing_logger.warning(
+                    f"Ignoring out-of-order candle {timestamp} (head is "
+                    f"{self.head_timestamp}); run a batch recompute to include it"
+                )
+                return None
+            if timestamp > self.head_timestamp:
+                self.push(self.head_close)
+        self.head_timestamp = timestamp
+        self.head_close = float(close)
+        return self.peek(self.head_close)
+
+    def to_dict(self):
+        """Return a JSON-serializable snapshot of the state."""
+        return {
+            "version": STATE_VERSION,
+            "count": self.count,
+            "last_close": self.last_close,
+            "ring": self.ring,
+            "sums": {str(period): value for period, value in self.sums.items()},
+            "ema": {str(period): value for period, value in self.ema.items()},
+            "ema_seed": {str(period): value for period, value in self.ema_seed.items()},
+            "signal": self.signal,
+            "signal_seed": self.signal_seed,
+            "average_gain": self.average_gain,
+            "average_loss": self.average_loss,
+            "gain_seed": self.gain_seed,
+            "loss_seed": self.loss_seed,
+            "head_timestamp": (
+                self.head_timestamp.isoformat() if self.head_timestamp else None
+            ),
+            "head_close": self.head_close,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Restore a state saved with to_dict.
+
+        Raises:
+            ValueError: If the snapshot was written by an incompatible version.
+        """
+        if data.get("version") != STATE_VERSION:
+            raise ValueError(
+                f"Unsupported indicator state version: {data.get('version')}"
+            )
+        state = cls()
+        state.count = data["count"]
+        state.last_close = data["last_close"]
+        state.ring = list(data["ring"])
+        state.sums = {int(period): value for period, value in data["sums"].items()}
+        state.ema = {int(period): value for period, value in data["ema"].items()}
+        state.ema_seed = {
+            int(period): value for period, value in data["ema_seed"].items()
+        }
+        state.signal = data["signal"]
+        state.signal_seed = data["signal_seed"]
+        state.average_gain = data["average_gain"]
+        state.average_loss = data["average_loss"]
+        state.gain_seed = data["gain_seed"]
+        state.loss_seed = data["loss_seed"]
+        if data["head_timestamp"] is not None:
+            state.head_timestamp = datetime.fromisoformat(data["head_timestamp"])
+        state.head_close = data["head_close"]
+        return state
+
+
+def state_name(exchange=None, symbol=None):
+    """
+    Return the indicator_state name of a series' streaming state.
+
+    The default series keeps the plain table name it has always been stored under.
+    """
+    series = resolve_series(OHLCVData15Min.__table__, exchange, symbol)
+    if series == default_series(OHLCVData15Min.__table__):
+        return STATE_NAME
+    return f"{STATE_NAME}:{series[0]}:{series[1]}"
+
+
+def load_streaming_state(db: Session, before=None, exchange=None, symbol=None):
+    """
+    Load the persisted streaming state of a series, bootstrapping it from history
+    if missing.
+
+    Args:
+        db: A database session object.
+        before (datetime, optional): When bootstrapping, only candles before this
+            timestamp are used. The last of them becomes the head.
+        exchange (str, optional): Exchange of the series. Defaults to the default
+            series.
+        symbol (str, optional): Symbol of the series. Defaults to the default
+            series.
+
+    Returns:
+        tuple: (IndicatorState record, StreamingIndicators).
+    """
+    name = state_name(exchange, symbol)
+    record = (
+        db.query(IndicatorState)
+        .filter(IndicatorState.name == name)
+        .with_for_update()
+        .one_or_none()
+    )
+    if record is not None:
+        return record, StreamingIndicators.from_dict(record.state)
+
+    arrays = read_arrays(
+        db,
+        OHLCVData15Min,
+        end=before,
+        columns=["close"],
+        exchange=exchange,
+        symbol=symbol,
+    )
+    close = arrays["close"]
+    state = StreamingIndicators.from_history(close[:-1])
+    if len(close):
+        state.head_timestamp = (
+            arrays["timestamp"][-1].item().replace(tzinfo=timezone.utc)
+        )
+        state.head_close = float(close[-1])
+    data_processing_logger.info(
+        f"Bootstrapped streaming indicator state {name} from {len(close)} candles"
+    )
+    record = IndicatorState(name=name, state=state.to_dict())
+    db.add(record)
+    return record, state
+
+
+def update_streaming_indicators(
+    db: Session, timestamps, closes, exchange=None, symbol=None
+):
+    """
+    Update the streaming indicators of a series with newly collected candles and
+    upsert them.
+
+    Runs inside the caller's transaction (nothing is committed), so the state and
+    the indicator rows land together with the candles themselves.
+
+    Args:
+        db: A database session object.
+        timestamps (list): Candle timestamps (timezone-aware).
+        closes (list): Candle closes.
+        exchange (str, optional): Exchange of the candles. Defaults to the default
+            series.
+        symbol (str, optional): Symbol of the candles. Defaults to the default
+            series.
+
+    Returns:
+        int: The number of indicator rows written.
+    """
+    candles = sorted(zip(timestamps, closes))
+    if not candles:
+        return 0
+
+    exchange, symbol = resolve_series(
+        TechnicalIndicators15Min.__table__, exchange, symbol
+    )
+    record, state = load_streaming_state(db, candles[0][0], exchange, symbol)
+    rows = {"exchange": [], "symbol": [], "timestamp": []}
+    for timestamp, close in candles:
+        outputs = state.update(timestamp, close)
+        if outputs is None or all(value is None for value in outputs.values()):
+            continue
+        rows["exchange"].append(exchange)
+        rows["symbol"].append(symbol)
+        rows["timestamp"].append(timestamp)
+        for name, value in outputs.items():
+            rows.setdefault(name, []).append(value)
+
+    record.state = state.to_dict()
+    record.last_timestamp = state.head_timestamp
+    written = (
+        upsert_rows(db, TechnicalIndicators15Min, rows) if rows["timestamp"] else 0
+    )
+    data_processing_logger.info(
+        f"Streamed indicators for {len(candles)} candles, wrote {written} rows"
+    )
+    return written
@@ -2,16 +2,31 @@ from src.utils.logger import models_logger
 
 
 def get_models():
+    from .api_credit_ledger import APICreditLedger
+    from .api_rate_bucket import APIRateBucket
+    from .backfill_journal import BackfillJournal
     from .base import Base
+    from .indicator_state import IndicatorState
     from .market_data_15_min import MarketData15Min
     from .ohlcv_data_15_min import OHLCVData15Min
+    from .rollups import OHLCVData1D, OHLCVData1H, OHLCVData1W, OHLCVData4H
     from .technical_indicators_15_min import TechnicalIndicators15Min
+    from .xrpl_ledger_metrics import XRPLLedgerMetrics
 
     return {
+        "APICreditLedger": APICreditLedger,
+        "APIRateBucket": APIRateBucket,
+        "BackfillJournal": BackfillJournal,
         "Base": Base,
+        "IndicatorState": IndicatorState,
         "MarketData15Min": MarketData15Min,
         "OHLCVData15Min": OHLCVData15Min,
+        "OHLCVData1H": OHLCVData1H,
+        "OHLCVData4H": OHLCVData4H,
+        "OHLCVData1D": OHLCVData1D,
+        "OHLCVData1W": OHLCVData1W,
         "TechnicalIndicators15Min": TechnicalIndicators15Min,
+        "XRPLLedgerMetrics": XRPLLedgerMetrics,
     }
 
 
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Date, DateTime, Integer, String, func
+
+from src.models.base import Base
+
+
+class APICreditLedger(Base):
+    __tablename__ = "api_credit_ledger"
+
+    provider = Column(String(32), primary_key=True)
+    day = Column(Date, primary_key=True)
+    credits_used = Column(Integer, nullable=False, server_default="0")
+    credit_limit = Column(Integer, nullable=True)
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+    def __repr__(self):
+        return (
+            f"<APICreditLedger(provider={self.provider}, day={self.day}, "
+            f"credits_used={self.credits_used}, credit_limit={self.credit_limit})>"
+        )
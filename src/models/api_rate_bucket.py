@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, Float, String, func
+
+from src.models.base import Base
+
+
+class APIRateBucket(Base):
+    __tablename__ = "api_rate_buckets"
+
+    provider = Column(String(32), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    def __repr__(self):
+        return f"<APIRateBucket(provider={self.provider}, tokens={self.tokens})>"
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint, func
+
+from src.models.base import Base
+
+
+class BackfillJournal(Base):
+    __tablename__ = "backfill_journal"
+    __table_args__ = (
+        UniqueConstraint(
+            "job_id", "window_start", name="uq_backfill_journal_job_window"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String(64), nullable=False, index=True)
+    window_start = Column(DateTime(timezone=True), nullable=False)
+    window_end = Column(DateTime(timezone=True), nullable=False)
+    status = Column(String(16), nullable=False, server_default="pending")
+    rows = Column(Integer, nullable=False, server_default="0")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    error = Column(String, nullable=True)
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+    def __repr__(self):
+        return (
+            f"<BackfillJournal(job_id={self.job_id}, window_start={self.window_start}, "
+            f"status={self.status})>"
+        )
@@ -4,6 +4,7 @@ from sqlalchemy.schema import MetaData
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql.ddl import CreateTable
 
+from src.models.timescale import provision_hypertables
 from src.utils.config import config
 from src.utils.logger import models_logger
 
@@ -18,16 +19,16 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
-# This is to support TimescaleDB hypertables
+# Hypertables are created as plain tables and converted by provision_hypertables
 @compiles(CreateTable, "postgresql")
 def compile_create_table(element, compiler, **kw):
     table = element.element
     if table.info.get("is_hypertable", False):
         models_logger.info(
-            f"Creating hypertable for table {table.name} with interval {table.info['hypertable_interval']}"
+            f"Creating table {table.name} (hypertable with interval {table.info['hypertable_interval']})"
         )
-        return f"{compiler.visit_create_table(element)} WITH (hypertable_interval = '{table.info['hypertable_interval']}')"
-    models_logger.info(f"Creating regular table {table.name}")
+    else:
+        models_logger.info(f"Creating regular table {table.name}")
     return compiler.visit_create_table(element)
 
 
@@ -50,12 +51,16 @@ def init_db():
         Base.metadata.create_all(bind=engine)
         models_logger.info("All tables created successfully")
 
-        # Create TimescaleDB extension
-        with engine.connect() as conn:
-            conn.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
-            models_logger.info(
-                "TimescaleDB extension created (if it didn't already exist)"
-            )
+        # Create the TimescaleDB extension and convert the hypertables
+        if provision_hypertables(engine, Base.metadata):
+            models_logger.info("TimescaleDB hypertables provisioned")
+
+        # Imported here because the rollups import the models, which import this module
+        from src.models.rollups import provision_rollups, refresh_rollups
+
+        if not provision_rollups(engine):
+            with SessionLocal() as db:
+                refresh_rollups(db)
 
     except Exception as e:
         models_logger.error(f"Error during database initialization: {str(e)}")
@@ -0,0 +1,276 @@
+import csv
+import io
+import time
+
+from psycopg2.extras import execute_values
+from sqlalchemy import insert, UniqueConstraint
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from src.utils.logger import models_logger
+
+BULK_METHODS = ("copy", "values")
+EXECUTE_VALUES_PAGE_SIZE = 1000
+UPSERT_CHUNK_SIZE = 1000
+DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def columns_to_rows(columns):
+    """
+    Transpose a columnar batch into a list of row dictionaries.
+
+    Args:
+        columns (dict): Mapping of column name to an equally sized sequence of values.
+
+    Returns:
+        list: One dictionary per row, keyed by column name.
+    """
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def batch_length(columns):
+    """
+    Return the number of rows in a columnar batch.
+
+    Raises:
+        ValueError: If the columns are not all the same length.
+    """
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Columnar batch has mismatched column lengths: {lengths}")
+    return lengths.pop() if lengths else 0
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _copy_rows(cursor, table_name, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in zip(*columns.values()):
+        writer.writerow([_csv_value(value) for value in row])
+    buffer.seek(0)
+
+    column_list = ", ".join(f'"{name}"' for name in columns)
+    cursor.copy_expert(
+        f"COPY {table_name} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer
+    )
+
+
+def _execute_values_rows(cursor, table_name, columns):
+    column_list = ", ".join(f'"{name}"' for name in columns)
+    execute_values(
+        cursor,
+        f"INSERT INTO {table_name} ({column_list}) VALUES %s",
+        list(zip(*columns.values())),
+        page_size=EXECUTE_VALUES_PAGE_SIZE,
+    )
+
+
+def bulk_insert(db: Session, model, columns, method="copy"):
+    """
+    Insert a columnar batch into a model's table without hydrating ORM objects.
+
+    On PostgreSQL the rows are streamed with ``COPY`` (or ``execute_values`` when
+    ``method="values"``) through the session's own connection, so they take part in
+    the current transaction and are persisted by the caller's ``db.commit()``. Other
+    dialects fall back to a single executemany ``INSERT``. ORM validators and
+    ``after_insert`` listeners are intentionally bypassed.
+
+    Args:
+        db: A database session object whose transaction the rows are written in.
+        model: The declarative model class whose table receives the rows.
+        columns (dict): Mapping of column name to an equally sized sequence of values.
+        method (str, optional): Either "copy" or "values". Defaults to "copy".
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ValueError: If the method is unknown or the columns are mismatched.
+    """
+    if method not in BULK_METHODS:
+        raise ValueError(f"Unknown bulk insert method: {method}")
+
+    row_count = batch_length(columns)
+    if row_count == 0:
+        return 0
+
+    table = model.__table__
+    started = time.perf_counter()
+    connection = db.connection()
+
+    if connection.dialect.name == "postgresql":
+        with connection.connection.cursor() as cursor:
+            if method == "copy":
+                _copy_rows(cursor, table.name, columns)
+            else:
+                _execute_values_rows(cursor, table.name, columns)
+    else:
+        connection.execute(insert(table), columns_to_rows(columns))
+
+    elapsed = time.perf_counter() - started
+    models_logger.info(
+        f"Bulk inserted {row_count} rows into {table.name} via {method} in "
+        f"{elapsed:.3f}s ({row_count / elapsed if elapsed else float('inf'):.0f} rows/sec)"
+    )
+    return row_count
+
+
+def conflict_columns_for(model):
+    """
+    Return the natural key columns used to detect duplicates for a model.
+
+    The first unique constraint declared on the table is used, falling back to the
+    ``timestamp`` column for tables that don't declare one.
+    """
+    for constraint in model.__table__.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            return tuple(column.name for column in constraint.columns)
+    return ("timestamp",)
+
+
+def _fill_key_defaults(table, columns, conflict_columns):
+    # Key columns left out of the batch take their server default, so rows written
+    # without an exchange and symbol land in (and conflict with) the default series.
+    missing = [name for name in conflict_columns if name not in columns]
+    if not missing:
+        return columns
+    row_count = batch_length(columns)
+    filled = dict(columns)
+    for name in missing:
+        default = table.c[name].server_default
+        if default is None or not isinstance(default.arg, str):
+            raise ValueError(f"Batch for {table.name} is missing key column {name}")
+        filled[name] = [default.arg] * row_count
+    return filled
+
+
+def _dedupe_last(columns, conflict_columns):
+    # ON CONFLICT cannot touch the same row twice in one statement, so keep the
+    # last occurrence of each key within the batch.
+    keys = list(zip(*(columns[name] for name in conflict_columns)))
+    last_index = {key: index for index, key in enumerate(keys)}
+    if len(last_index) == len(keys):
+        return columns
+    keep = sorted(last_index.values())
+    return {name: [values[i] for i in keep] for name, values in columns.items()}
+
+
+def _copy_upsert(cursor, table_name, columns, conflict_columns, update_columns):
+    stage_name = f"_stage_{table_name}"
+    column_list = ", ".join(f'"{name}"' for name in columns)
+    conflict_list = ", ".join(f'"{name}"' for name in conflict_columns)
+    if update_columns:
+        action = "DO UPDATE SET " + ", ".join(
+            f'"{name}" = EXCLUDED."{name}"' for name in update_columns
+        )
+    else:
+        action = "DO NOTHING"
+
+    cursor.execute(f"DROP TABLE IF EXISTS {stage_name}")
+    cursor.execute(
+        f"CREATE TEMP TABLE {stage_name} AS "
+        f"SELECT {column_list} FROM {table_name} WITH NO DATA"
+    )
+    cursor.execute(f"ALTER TABLE {stage_name} ADD COLUMN _batch_seq BIGSERIAL")
+    _copy_rows(cursor, stage_name, columns)
+    cursor.execute(
+        f"INSERT INTO {table_name} ({column_list}) "
+        f"SELECT DISTINCT ON ({conflict_list}) {column_list} FROM {stage_name} "
+        f"ORDER BY {conflict_list}, _batch_seq DESC "
+        f"ON CONFLICT ({conflict_list}) {action}"
+    )
+    cursor.execute(f"DROP TABLE {stage_name}")
+
+
+def upsert_rows(
+    db: Session,
+    model,
+    columns,
+    method="copy",
+    conflict_columns=None,
+    update_columns=None,
+):
+    """
+    Insert a columnar batch, overwriting rows that already exist for the same key.
+
+    This is the idempotent write path: re-running a backfill or re-collecting a
+    candle replaces the stored row instead of adding a duplicate. On PostgreSQL the
+    ``copy`` method streams the batch into a temporary staging table and merges it
+    with a single ``INSERT ... SELECT ... ON CONFLICT DO UPDATE``; the ``values``
+    method (and SQLite) issue multi-row ``INSERT ... ON CONFLICT`` statements in
+    chunks of ``UPSERT_CHUNK_SIZE``. If a key appears more than once in the batch
+    the last occurrence wins. Key columns missing from the batch are filled with
+    their server default.
+
+    Args:
+        db: A database session object whose transaction the rows are written in.
+        model: The declarative model class whose table receives the rows.
+        columns (dict): Mapping of column name to an equally sized sequence of values.
+        method (str, optional): Either "copy" or "values". Defaults to "copy".
+        conflict_columns (tuple, optional): Key columns. Defaults to the model's
+            unique constraint.
+        update_columns (list, optional): Columns overwritten on conflict. Defaults to
+            every column in the batch that isn't part of the key.
+
+    Returns:
+        int: The number of rows in the batch after de-duplication.
+
+    Raises:
+        ValueError: If the method or dialect is unsupported, the columns are
+            mismatched or a key column without a default is missing.
+    """
+    if method not in BULK_METHODS:
+        raise ValueError(f"Unknown bulk upsert method: {method}")
+    if batch_length(columns) == 0:
+        return 0
+
+    table = model.__table__
+    conflict_columns = tuple(conflict_columns or conflict_columns_for(model))
+    columns = _fill_key_defaults(table, columns, conflict_columns)
+    if update_columns is None:
+        update_columns = [
+            name for name in columns if name not in conflict_columns and name != "id"
+        ]
+    columns = _dedupe_last(columns, conflict_columns)
+    row_count = batch_length(columns)
+
+    started = time.perf_counter()
+    connection = db.connection()
+    dialect = connection.dialect.name
+
+    if dialect == "postgresql" and method == "copy":
+        with connection.connection.cursor() as cursor:
+            _copy_upsert(cursor, table.name, columns, conflict_columns, update_columns)
+    else:
+        if dialect not in DIALECT_INSERTS:
+            raise ValueError(f"Upserts are not supported on dialect {dialect}")
+        rows = columns_to_rows(columns)
+        for offset in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            statement = DIALECT_INSERTS[dialect](table).values(
+                rows[offset : offset + UPSERT_CHUNK_SIZE]
+            )
+            if update_columns:
+                statement = statement.on_conflict_do_update(
+                    index_elements=list(conflict_columns),
+                    set_={name: statement.excluded[name] for name in update_columns},
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(
+                    index_elements=list(conflict_columns)
+                )
+            connection.execute(statement)
+
+    elapsed = time.perf_counter() - started
+    models_logger.info(
+        f"Upserted {row_count} rows into {table.name} via {method} in "
+        f"{elapsed:.3f}s ({row_count / elapsed if elapsed else float('inf'):.0f} rows/sec)"
+    )
+    return row_count
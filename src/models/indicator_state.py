@@ -0,0 +1,24 @@
+from sqlalchemy import JSON, Column, DateTime, Integer, String, UniqueConstraint, func
+
+from src.models.base import Base
+
+
+class IndicatorState(Base):
+    __tablename__ = "indicator_state"
+    __table_args__ = (UniqueConstraint("name", name="uq_indicator_state_name"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(64), nullable=False)
+    last_timestamp = Column(DateTime(timezone=True), nullable=True)
+    state = Column(JSON, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+    def __repr__(self):
+        return (
+            f"<IndicatorState(name={self.name}, last_timestamp={self.last_timestamp})>"
+        )
@@ -1,16 +1,31 @@
-from sqlalchemy import Column, Integer, Float, DateTime
+from sqlalchemy import Column, Integer, Float, DateTime, UniqueConstraint
 from sqlalchemy.orm import validates
 from sqlalchemy import event
 
+from src.constants import COINGECKO_EXCHANGE
 from src.models.base import Base
+from src.models.series import SERIES_COLUMNS, exchange_column, symbol_column
+from src.models.timescale import hypertable_info
 from src.utils.logger import models_logger  # Import directly from utils
 
 
 class MarketData15Min(Base):
     __tablename__ = "market_data_15_min"
+    __table_args__ = (
+        UniqueConstraint(
+            "exchange", "symbol", "timestamp", name="uq_market_data_15_min_series"
+        ),
+        {
+            "info": hypertable_info(
+                compress_segmentby=SERIES_COLUMNS, partition_column="symbol"
+            )
+        },
+    )
 
     timestamp = Column(DateTime(timezone=True), primary_key=True)
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    exchange = exchange_column(COINGECKO_EXCHANGE)
+    symbol = symbol_column()
     price_usd = Column(Float, nullable=False)
     market_cap = Column(Float, nullable=False)
     total_volume = Column(Float, nullable=False)
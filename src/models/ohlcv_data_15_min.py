@@ -1,16 +1,30 @@
-from sqlalchemy import Column, Integer, Float, DateTime, CheckConstraint
+from sqlalchemy import Column, Integer, Float, DateTime, UniqueConstraint
 from sqlalchemy.orm import validates
 from sqlalchemy import event
 
 from src.models.base import Base
+from src.models.series import SERIES_COLUMNS, exchange_column, symbol_column
+from src.models.timescale import hypertable_info
 from src.utils.logger import models_logger
 
 
 class OHLCVData15Min(Base):
     __tablename__ = "ohlcv_data_15_min"
+    __table_args__ = (
+        UniqueConstraint(
+            "exchange", "symbol", "timestamp", name="uq_ohlcv_data_15_min_series"
+        ),
+        {
+            "info": hypertable_info(
+                compress_segmentby=SERIES_COLUMNS, partition_column="symbol"
+            )
+        },
+    )
 
     timestamp = Column(DateTime(timezone=True), primary_key=True, index=True)
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    exchange = exchange_column()
+    symbol = symbol_column()
     open = Column(Float, nullable=False)
     high = Column(Float, nullable=False)
     low = Column(Float, nullable=False)
@@ -20,7 +34,7 @@ class OHLCVData15Min(Base):
     price_change = Column(Float, nullable=False)
 
     def __repr__(self):
-        return f"<OHLCV15Data(id={self.id}, timestamp={self.timestamp}, close={self.close}, trades={self.trades_count})>"
+        return f"<OHLCV15Data(id={self.id}, {self.exchange} {self.symbol}, timestamp={self.timestamp}, close={self.close}, trades={self.trades_count})>"
 
     @validates("open", "high", "low", "close", "volume")
     def validate_fields(self, key, value):
@@ -0,0 +1,447 @@
+from sqlalchemy import Column, DateTime, Float, Integer, String, text
+from sqlalchemy.orm import Session, declarative_base
+
+from src.constants import DEFAULT_EXCHANGE, DEFAULT_SYMBOL
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.utils.logger import models_logger
+
+# 15-minute candles are stamped with the end of their period, so a bucket of candle
+# timestamps is offset by one candle: the hour 00:00-01:00 holds the candles
+# stamped 00:15 to 01:00.
+CANDLE_OFFSET = "15 minutes"
+# TimescaleDB's default time_bucket origin (a Monday), shifted by the candle offset
+BUCKET_ORIGIN = "2000-01-03 00:15:00+00"
+
+# Rollups are views over materialized aggregates created by provision_rollups, not
+# tables, so they live on their own metadata and Base.metadata.create_all skips them
+RollupBase = declarative_base()
+
+
+class OHLCVRollupMixin:
+    """
+    Columns shared by every OHLCV rollup view.
+
+    Rows are aggregated per series (exchange and symbol). ``timestamp`` is the end of the rollup period, matching the convention of
+    ohlcv_data_15_min; the latest period may still be incomplete (see
+    ``candle_count``).
+    """
+
+    # The defaults are the series readers get when they don't ask for one
+    exchange = Column(String(32), primary_key=True, server_default=DEFAULT_EXCHANGE)
+    symbol = Column(String(32), primary_key=True, server_default=DEFAULT_SYMBOL)
+    timestamp = Column(DateTime(timezone=True), primary_key=True)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(Float, nullable=False)
+    trades_count = Column(Integer, nullable=False)
+    price_change = Column(Float, nullable=False)
+    candle_count = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<{type(self).__name__}(exchange={self.exchange}, symbol={self.symbol}, "
+            f"timestamp={self.timestamp}, close={self.close}, "
+            f"candles={self.candle_count})>"
+        )
+
+
+class OHLCVData1H(OHLCVRollupMixin, RollupBase):
+    __tablename__ = "ohlcv_data_1h"
+    interval = "1 hour"
+    start_offset = "1 day"
+    schedule_interval = "15 minutes"
+
+
+class OHLCVData4H(OHLCVRollupMixin, RollupBase):
+    __tablename__ = "ohlcv_data_4h"
+    interval = "4 hours"
+    start_offset = "2 days"
+    schedule_interval = "15 minutes"
+
+
+class OHLCVData1D(OHLCVRollupMixin, RollupBase):
+    __tablename__ = "ohlcv_data_1d"
+    interval = "1 day"
+    start_offset = "7 days"
+    schedule_interval = "1 hour"
+
+
+class OHLCVData1W(OHLCVRollupMixin, RollupBase):
+    __tablename__ = "ohlcv_data_1w"
+    interval = "1 week"
+    start_offset = "4 weeks"
+    schedule_interval = "1 hour"
+
+
+ROLLUPS = (OHLCVData1H, OHLCVData4H, OHLCVData1D, OHLCVData1W)
+
+# Rollups are grouped by series as well as by bucket
+SERIES_GROUP = "exchange, symbol"
+
+# Aggregates for TimescaleDB continuous aggregates (first/last are hyperfunctions)
+CONTINUOUS_AGGREGATE_COLUMNS = """
+    first(open, "timestamp") AS open,
+    max(high) AS high,
+    min(low) AS low,
+    last(close, "timestamp") AS close,
+    sum(volume) AS volume,
+    sum(trades_count) AS trades_count,
+    count(*) AS candle_count
+"""
+# The same aggregates in plain PostgreSQL
+TABLE_COLUMNS = """
+    (array_agg(open ORDER BY "timestamp"))[1] AS open,
+    max(high) AS high,
+    min(low) AS low,
+    (array_agg(close ORDER BY "timestamp" DESC))[1] AS close,
+    sum(volume) AS volume,
+    sum(trades_count) AS trades_count,
+    count(*) AS candle_count
+"""
+
+
+def aggregate_name(rollup):
+    """Return the name of the relation that materializes a rollup."""
+    return f"{rollup.__tablename__}_agg"
+
+
+def _source():
+    return OHLCVData15Min.__tablename__
+
+
+def _timescaledb_installed(conn):
+    return (
+        conn.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+        ).scalar()
+        is not None
+    )
+
+
+def is_continuous_aggregate(conn, rollup):
+    """Return True if the rollup is materialized by a TimescaleDB continuous aggregate."""
+    if not _timescaledb_installed(conn):
+        return False
+    return (
+        conn.execute(
+            text(
+                "SELECT 1 FROM timescaledb_information.continuous_aggregates "
+                "WHERE view_name = :name"
+            ),
+            {"name": aggregate_name(rollup)},
+        ).scalar()
+        is not None
+    )
+
+
+def _create_view(conn, rollup):
+    # Expose the period end as the timestamp, like the 15-minute source table
+    conn.execute(
+        text(
+            f"CREATE OR REPLACE VIEW {rollup.__tablename__} AS "
+            f"SELECT {SERIES_GROUP}, "
+            f"bucket - INTERVAL '{CANDLE_OFFSET}' + INTERVAL '{rollup.interval}' "
+            'AS "timestamp", open, high, low, close, volume, trades_count, '
+            "close - open AS price_change, candle_count "
+            f"FROM {aggregate_name(rollup)}"
+        )
+    )
+
+
+def _create_continuous_aggregate(engine, rollup):
+    name = aggregate_name(rollup)
+    # Continuous aggregates can't be created or refreshed inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(
+            text(
+                f"CREATE MATERIALIZED VIEW IF NOT EXISTS {name} "
+                "WITH (timescaledb.continuous, timescaledb.materialized_only = false) "
+                f"AS SELECT {SERIES_GROUP}, "
+                f"time_bucket(INTERVAL '{rollup.interval}', \"timestamp\", "
+                f"\"offset\" => INTERVAL '{CANDLE_OFFSET}') AS bucket, "
+                f"{CONTINUOUS_AGGREGATE_COLUMNS} FROM {_source()} "
+                f"GROUP BY {SERIES_GROUP}, bucket "
+                "WITH NO DATA"
+            )
+        )
+        conn.execute(
+            text(
+                f"SELECT add_continuous_aggregate_policy('{name}', "
+                f"start_offset => INTERVAL '{rollup.start_offset}', "
+                "end_offset => NULL, "
+                f"schedule_interval => INTERVAL '{rollup.schedule_interval}', "
+                "if_not_exists => TRUE)"
+            )
+        )
+        # The policy only covers recent buckets; materialize the existing history once
+        conn.execute(text(f"CALL refresh_continuous_aggregate('{name}', NULL, NULL)"))
+        _create_view(conn, rollup)
+    models_logger.info(
+        f"{rollup.__tablename__} is a continuous aggregate refreshed every "
+        f"{rollup.schedule_interval}"
+    )
+
+
+def _create_table(engine, rollup):
+    name = aggregate_name(rollup)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} ("
+                "exchange VARCHAR(32) NOT NULL, "
+                "symbol VARCHAR(32) NOT NULL, "
+                "bucket TIMESTAMPTZ NOT NULL, "
+                "open DOUBLE PRECISION NOT NULL, "
+                "high DOUBLE PRECISION NOT NULL, "
+                "low DOUBLE PRECISION NOT NULL, "
+                "close DOUBLE PRECISION NOT NULL, "
+                "volume DOUBLE PRECISION NOT NULL, "
+                "trades_count BIGINT NOT NULL, "
+                "candle_count INTEGER NOT NULL, "
+                "PRIMARY KEY (exchange, symbol, bucket))"
+            )
+        )
+        _create_view(conn, rollup)
+    models_logger.info(
+        f"{rollup.__tablename__} is a materialized table refreshed by refresh_rollups"
+    )
+
+
+def _has_series_columns(conn, rollup):
+    return (
+        conn.execute(
+            text(
+                "SELECT 1 FROM pg_attribute WHERE attrelid = to_regclass(:name) "
+                "AND attname = 'symbol' AND NOT attisdropped"
+            ),
+            {"name": aggregate_name(rollup)},
+        ).scalar()
+        is not None
+    )
+
+
+def provision_rollups(engine, rollups=ROLLUPS):
+    """
+    Create the OHLCV rollup views and the aggregates that materialize them.
+
+    With TimescaleDB each rollup is a continuous aggregate with a refresh policy.
+    Without it the rollup is a plain table that refresh_rollups keeps up to date.
+    Both are exposed through a view with the same columns, so readers don't depend
+    on which one is in place. Existing rollups are kept, except those created before
+    rollups were grouped by series, which are dropped and rebuilt.
+
+    Args:
+        engine: The SQLAlchemy engine to provision.
+        rollups (tuple, optional): Rollup models to create. Defaults to all.
+
+    Returns:
+        bool: True if the rollups are continuous aggregates.
+
+    Raises:
+        Any exceptions raised while creating the rollups.
+    """
+    with engine.connect() as conn:
+        use_timescaledb = _timescaledb_installed(conn)
+
+    for rollup in rollups:
+        try:
+            with engine.connect() as conn:
+                exists = conn.execute(
+                    text("SELECT to_regclass(:name)"), {"name": aggregate_name(rollup)}
+                ).scalar()
+                stale = exists is not None and not _has_series_columns(conn, rollup)
+            if stale:
+                models_logger.info(
+                    f"Rebuilding {rollup.__tablename__} to group it by series"
+                )
+                with engine.begin() as conn:
+                    drop_rollups(conn, (rollup,))
+                exists = None
+            if use_timescaledb and exists is None:
+                _create_continuous_aggregate(engine, rollup)
+            elif use_timescaledb:
+                with engine.begin() as conn:
+                    _create_view(conn, rollup)
+            else:
+                _create_table(engine, rollup)
+        except Exception as e:
+            models_logger.error(
+                f"Error provisioning rollup {rollup.__tablename__}: {str(e)}"
+            )
+            raise
+    if not use_timescaledb:
+        models_logger.warning(
+            "TimescaleDB is not available; rollups are refreshed by refresh_rollups"
+        )
+    return use_timescaledb
+
+
+def _date_bin(rollup, expression):
+    """Plain PostgreSQL equivalent of the continuous aggregate's time_bucket."""
+    return (
+        f"date_bin(INTERVAL '{rollup.interval}', {expression}, "
+        f"TIMESTAMPTZ '{BUCKET_ORIGIN}')"
+    )
+
+
+def _refresh_table(db: Session, rollup, start, end, series=None):
+    """
+    Recompute every bucket overlapping [start, end) from the 15-minute candles.
+
+    Whole buckets are deleted and re-inserted, so a bucket whose candles changed or
+    disappeared is rebuilt exactly. With ``series`` (an (exchange, symbol) tuple)
+    only that series is recomputed. Returns the number of buckets written.
+    """
+    name = aggregate_name(rollup)
+    lower = _date_bin(rollup, "CAST(:start AS timestamptz)")
+    upper = (
+        f"{_date_bin(rollup, 'CAST(:end AS timestamptz)')} "
+        f"+ INTERVAL '{rollup.interval}'"
+    )
+    window = (
+        "(CAST(:start AS timestamptz) IS NULL OR {column} >= {lower}) AND "
+        "(CAST(:end AS timestamptz) IS NULL OR {column} < {upper})"
+    )
+    params = {"start": start, "end": end}
+    if series is not None:
+        window += " AND exchange = :exchange AND symbol = :symbol"
+        params["exchange"], params["symbol"] = series
+    db.execute(
+        text(
+            f"DELETE FROM {name} WHERE "
+            + window.format(column="bucket", lower=lower, upper=upper)
+        ),
+        params,
+    )
+    result = db.execute(
+        text(
+            f"INSERT INTO {name} "
+            f"SELECT {SERIES_GROUP}, {_date_bin(rollup, 'timestamp')} AS bucket, "
+            f"{TABLE_COLUMNS} FROM {_source()} WHERE "
+            + window.format(column="timestamp", lower=lower, upper=upper)
+            + " GROUP BY 1, 2, 3"
+        ),
+        params,
+    )
+    return result.rowcount
+
+
+def _refresh_table_incremental(db: Session, rollup, end):
+    """
+    Recompute each series from its latest materialized bucket onwards.
+
+    Series with recent candles but no buckets yet are materialized from the start
+    of their history; an empty rollup is rebuilt entirely.
+    """
+    name = aggregate_name(rollup)
+    latest = {
+        (exchange, symbol): bucket
+        for exchange, symbol, bucket in db.execute(
+            text(f"SELECT exchange, symbol, max(bucket) FROM {name} GROUP BY 1, 2")
+        ).all()
+    }
+    if not latest:
+        return _refresh_table(db, rollup, None, end)
+
+    new_series = [
+        tuple(series)
+        for series in db.execute(
+            text(
+                f"SELECT DISTINCT exchange, symbol FROM {_source()} "
+                "WHERE timestamp >= :since"
+            ),
+            {"since": min(latest.values())},
+        ).all()
+        if tuple(series) not in latest
+    ]
+    written = 0
+    for series, bucket in latest.items():
+        written += _refresh_table(db, rollup, bucket, end, series)
+    for series in new_series:
+        written += _refresh_table(db, rollup, None, end, series)
+    return written
+
+
+def refresh_rollups(db: Session, start=None, end=None, rollups=ROLLUPS):
+    """
+    Bring the rollups up to date with ohlcv_data_15_min.
+
+    Table rollups are refreshed incrementally: without ``start`` each series is
+    recomputed from its latest materialized bucket onwards (the whole history if the
+    table is empty or the series is new). Pass a range after rewriting older candles,
+    e.g. after a gap repair or backfilling a new series; a range covers every series.
+    Continuous aggregates are refreshed by their policies and are only refreshed
+    here when a range is given.
+
+    Args:
+        db: A database session object.
+        start (datetime, optional): Start of the range of candles that changed.
+        end (datetime, optional): End of the range of candles that changed.
+        rollups (tuple, optional): Rollup models to refresh. Defaults to all.
+
+    Returns:
+        dict: Buckets written per rollup name (None for continuous aggregates).
+
+    Raises:
+        Any exceptions raised by the database operations.
+    """
+    written = {}
+    try:
+        for rollup in rollups:
+            if is_continuous_aggregate(db.connection(), rollup):
+                written[rollup.__tablename__] = None
+                if start is not None or end is not None:
+                    _refresh_continuous_aggregate(db, rollup, start, end)
+                continue
+            if start is None:
+                written[rollup.__tablename__] = _refresh_table_incremental(
+                    db, rollup, end
+                )
+            else:
+                written[rollup.__tablename__] = _refresh_table(db, rollup, start, end)
+        db.commit()
+    except Exception as e:
+        models_logger.error(f"Error refreshing rollups: {str(e)}")
+        db.rollback()
+        raise
+
+    models_logger.info(f"Refreshed rollups: {written}")
+    return written
+
+
+def _refresh_continuous_aggregate(db: Session, rollup, start, end):
+    # Only buckets wholly inside the window are refreshed, so widen it to bucket
+    # boundaries. refresh_continuous_aggregate can't run inside a transaction.
+    bucket = (
+        f"time_bucket(INTERVAL '{rollup.interval}', CAST(:{{}} AS timestamptz), "
+        f"\"offset\" => INTERVAL '{CANDLE_OFFSET}')"
+    )
+    with db.get_bind().connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as conn:
+        conn.execute(
+            text(
+                f"CALL refresh_continuous_aggregate('{aggregate_name(rollup)}', "
+                f"{bucket.format('start')}, "
+                f"{bucket.format('end')} + INTERVAL '{rollup.interval}')"
+            ),
+            {"start": start, "end": end},
+        )
+
+
+def drop_rollups(conn, rollups=ROLLUPS):
+    """
+    Drop the rollup views and their aggregates, e.g. before recreating the tables.
+
+    Args:
+        conn: A connection inside a transaction.
+        rollups (tuple, optional): Rollup models to drop. Defaults to all.
+    """
+    for rollup in rollups:
+        continuous = is_continuous_aggregate(conn, rollup)
+        conn.execute(text(f"DROP VIEW IF EXISTS {rollup.__tablename__}"))
+        kind = "MATERIALIZED VIEW" if continuous else "TABLE"
+        conn.execute(text(f"DROP {kind} IF EXISTS {aggregate_name(rollup)} CASCADE"))
+        models_logger.info(f"Dropped rollup {rollup.__tablename__}")
@@ -0,0 +1,58 @@
+from sqlalchemy import Column, String
+
+from src.constants import DEFAULT_EXCHANGE, DEFAULT_SYMBOL
+
+# Columns identifying the market a row belongs to
+SERIES_COLUMNS = ("exchange", "symbol")
+
+
+def exchange_column(default=DEFAULT_EXCHANGE):
+    """Return the ``exchange`` column, defaulting to the given exchange."""
+    return Column(String(32), nullable=False, server_default=default)
+
+
+def symbol_column(default=DEFAULT_SYMBOL):
+    """
+    Return the ``symbol`` column, defaulting to the given symbol.
+
+    The column is part of the primary key: hypertables are partitioned by symbol,
+    and TimescaleDB requires every unique index to include the partition columns.
+    """
+    return Column(String(32), primary_key=True, nullable=False, server_default=default)
+
+
+def has_series(table):
+    """Return True if a table is keyed by exchange and symbol."""
+    return all(name in table.c for name in SERIES_COLUMNS)
+
+
+def default_series(table):
+    """
+    Return the (exchange, symbol) a table's rows get when none is given.
+
+    Returns:
+        tuple: The server defaults of the series columns.
+    """
+    return tuple(table.c[name].server_default.arg for name in SERIES_COLUMNS)
+
+
+def resolve_series(table, exchange=None, symbol=None):
+    """Fill in a missing exchange or symbol with the table's default."""
+    default_exchange, default_symbol = default_series(table)
+    return exchange or default_exchange, symbol or default_symbol
+
+
+def series_filter(table, exchange=None, symbol=None):
+    """
+    Return the WHERE clauses selecting one series of a table.
+
+    Missing values fall back to the table's defaults. Tables without series columns
+    get no clauses.
+
+    Returns:
+        list: SQLAlchemy expressions to pass to ``where``.
+    """
+    if not has_series(table):
+        return []
+    exchange, symbol = resolve_series(table, exchange, symbol)
+    return [table.c.exchange == exchange, table.c.symbol == symbol]
@@ -1,16 +1,33 @@
-from sqlalchemy import Column, Integer, Float, DateTime
+from sqlalchemy import Column, Integer, Float, DateTime, UniqueConstraint
 from sqlalchemy.orm import validates
 from sqlalchemy import event
 
 from src.models.base import Base
+from src.models.series import SERIES_COLUMNS, exchange_column, symbol_column
+from src.models.timescale import hypertable_info
 from src.utils.logger import models_logger
 
 
 class TechnicalIndicators15Min(Base):
     __tablename__ = "technical_indicators_15_min"
+    __table_args__ = (
+        UniqueConstraint(
+            "exchange",
+            "symbol",
+            "timestamp",
+            name="uq_technical_indicators_15_min_series",
+        ),
+        {
+            "info": hypertable_info(
+                compress_segmentby=SERIES_COLUMNS, partition_column="symbol"
+            )
+        },
+    )
 
     timestamp = Column(DateTime(timezone=True), primary_key=True)
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    exchange = exchange_column()
+    symbol = symbol_column()
     rsi_14 = Column(Float)
     macd_line = Column(Float)
     macd_signal = Column(Float)
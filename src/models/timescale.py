@@ -0,0 +1,229 @@
+from sqlalchemy import text
+
+from src.utils.config import config
+from src.utils.logger import models_logger
+
+# Defaults used when config.yml has no timescale section. Compression starts after
+# the backfill lookback (90 days), so gap repairs only ever write to uncompressed
+# chunks.
+DEFAULT_CHUNK_INTERVAL = "30 days"
+DEFAULT_COMPRESS_AFTER = "90 days"
+DEFAULT_SYMBOL_PARTITIONS = 4
+
+
+def hypertable_info(
+    time_column="timestamp",
+    chunk_interval=None,
+    compress_segmentby=None,
+    compress_orderby=None,
+    compress_after=None,
+    retention_period=None,
+    partition_column=None,
+    number_partitions=None,
+):
+    """
+    Build the ``Table.info`` metadata that marks a model as a TimescaleDB hypertable.
+
+    Settings left as None fall back to the ``timescale`` section of the
+    configuration. Use it as the last element of a model's ``__table_args__``::
+
+        __table_args__ = (..., {"info": hypertable_info()})
+
+    Args:
+        time_column (str, optional): Partitioning column. Defaults to "timestamp".
+        chunk_interval (str, optional): Chunk time interval, e.g. "30 days".
+        compress_segmentby (list, optional): Columns to segment compressed data by.
+        compress_orderby (str, optional): Order within compressed segments.
+            Defaults to "<time_column> DESC".
+        compress_after (str, optional): Age after which chunks are compressed, or
+            False to disable compression.
+        retention_period (str, optional): Age after which chunks are dropped.
+            Retention is off unless set here or in the configuration.
+        partition_column (str, optional): Column to hash-partition chunks by, in
+            addition to time, e.g. "symbol".
+        number_partitions (int, optional): Hash partitions for ``partition_column``.
+            Defaults to ``timescale.symbol_partitions`` from the configuration.
+
+    Returns:
+        dict: The table info dictionary.
+    """
+    settings = config.get("timescale") or {}
+    if compress_after is None:
+        compress_after = settings.get("compress_after", DEFAULT_COMPRESS_AFTER)
+    return {
+        "is_hypertable": True,
+        "time_column": time_column,
+        "hypertable_interval": chunk_interval
+        or settings.get("chunk_interval", DEFAULT_CHUNK_INTERVAL),
+        "compress_segmentby": list(compress_segmentby or []),
+        "compress_orderby": compress_orderby or f"{time_column} DESC",
+        "compress_after": compress_after,
+        "retention_period": retention_period or settings.get("retention_period"),
+        "partition_column": partition_column,
+        "number_partitions": number_partitions
+        or settings.get("symbol_partitions", DEFAULT_SYMBOL_PARTITIONS),
+    }
+
+
+def hypertables(metadata):
+    """Return the tables of a MetaData collection declared as hypertables."""
+    return [
+        table
+        for table in metadata.sorted_tables
+        if table.info.get("is_hypertable", False)
+    ]
+
+
+def timescaledb_available(conn):
+    """Return True if the TimescaleDB extension can be installed on the server."""
+    return (
+        conn.execute(
+            text("SELECT 1 FROM pg_available_extensions WHERE name = 'timescaledb'")
+        ).scalar()
+        is not None
+    )
+
+
+def provision_hypertable(conn, table):
+    """
+    Convert a table to a hypertable and apply its compression and retention policies.
+
+    Every statement is idempotent, so this is safe to run against tables that are
+    already hypertables; the chunk interval is re-applied so config changes take
+    effect for new chunks. Existing rows are migrated into chunks.
+
+    Args:
+        conn: A connection inside a transaction.
+        table (Table): A table whose info was built with hypertable_info.
+    """
+    info = table.info
+    params = {"table": table.name, "interval": info["hypertable_interval"]}
+    conn.execute(
+        text(
+            "SELECT create_hypertable(CAST(:table AS regclass), :time_column, "
+            "chunk_time_interval => CAST(:interval AS interval), "
+            "if_not_exists => TRUE, migrate_data => TRUE)"
+        ),
+        {**params, "time_column": info["time_column"]},
+    )
+    conn.execute(
+        text(
+            "SELECT set_chunk_time_interval(CAST(:table AS regclass), "
+            "CAST(:interval AS interval))"
+        ),
+        params,
+    )
+    models_logger.info(
+        f"{table.name} is a hypertable with {info['hypertable_interval']} chunks"
+    )
+
+    if info.get("partition_column"):
+        _add_space_dimension(conn, table)
+
+    if info["compress_after"]:
+        options = [
+            "timescaledb.compress",
+            f"timescaledb.compress_orderby = '{info['compress_orderby']}'",
+            "timescaledb.compress_segmentby = "
+            f"'{', '.join(info['compress_segmentby'])}'",
+        ]
+        conn.execute(text(f"ALTER TABLE {table.name} SET ({', '.join(options)})"))
+        conn.execute(
+            text(
+                "SELECT add_compression_policy(CAST(:table AS regclass), "
+                "CAST(:after AS interval), if_not_exists => TRUE)"
+            ),
+            {"table": table.name, "after": info["compress_after"]},
+        )
+        models_logger.info(
+            f"Compressing {table.name} chunks older than {info['compress_after']}"
+        )
+
+    if info["retention_period"]:
+        conn.execute(
+            text(
+                "SELECT add_retention_policy(CAST(:table AS regclass), "
+                "CAST(:period AS interval), if_not_exists => TRUE)"
+            ),
+            {"table": table.name, "period": info["retention_period"]},
+        )
+        models_logger.info(
+            f"Dropping {table.name} chunks older than {info['retention_period']}"
+        )
+
+
+def _add_space_dimension(conn, table):
+    """
+    Hash-partition a hypertable by its partition column as well as by time.
+
+    TimescaleDB only adds a dimension to an empty hypertable, so a table that
+    already holds rows keeps its time-only chunks; compression still segments it
+    by the column.
+    """
+    column = table.info["partition_column"]
+    exists = conn.execute(
+        text(
+            "SELECT 1 FROM timescaledb_information.dimensions "
+            "WHERE hypertable_name = :table AND column_name = :column"
+        ),
+        {"table": table.name, "column": column},
+    ).scalar()
+    if exists is not None:
+        return
+    if conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {table.name})")).scalar():
+        models_logger.warning(
+            f"{table.name} already holds rows, so it can't be partitioned by {column}"
+        )
+        return
+    conn.execute(
+        text(
+            "SELECT add_dimension(CAST(:table AS regclass), :column, "
+            "number_partitions => :partitions, if_not_exists => TRUE)"
+        ),
+        {
+            "table": table.name,
+            "column": column,
+            "partitions": table.info["number_partitions"],
+        },
+    )
+    models_logger.info(
+        f"{table.name} is partitioned by {column} into "
+        f"{table.info['number_partitions']} partitions"
+    )
+
+
+def provision_hypertables(engine, metadata):
+    """
+    Set up every hypertable declared in the model metadata.
+
+    When the TimescaleDB extension is not installed on the server the tables are
+    left as plain PostgreSQL tables and a warning is logged.
+
+    Args:
+        engine: The SQLAlchemy engine to provision.
+        metadata (MetaData): Metadata holding the model tables.
+
+    Returns:
+        bool: True if the hypertables were provisioned.
+
+    Raises:
+        Any exceptions raised by the TimescaleDB functions.
+    """
+    tables = hypertables(metadata)
+    with engine.begin() as conn:
+        if not timescaledb_available(conn):
+            models_logger.warning(
+                "TimescaleDB is not available; "
+                f"{', '.join(table.name for table in tables)} stay regular tables"
+            )
+            return False
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb"))
+
+    for table in tables:
+        try:
+            with engine.begin() as conn:
+                provision_hypertable(conn, table)
+        except Exception as e:
+            models_logger.error(f"Error provisioning hypertable {table.name}: {str(e)}")
+            raise
+    return True
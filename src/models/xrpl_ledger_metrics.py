@@ -0,0 +1,38 @@
+from sqlalchemy import BigInteger, Column, DateTime, Float, Integer, UniqueConstraint
+
+from src.models.base import Base
+from src.models.timescale import hypertable_info
+
+
+class XRPLLedgerMetrics(Base):
+    """
+    On-chain activity per validated XRP Ledger, with rolling totals over the
+    trailing window that ends at the ledger.
+    """
+
+    __tablename__ = "xrpl_ledger_metrics"
+    __table_args__ = (
+        UniqueConstraint(
+            "ledger_index", "timestamp", name="uq_xrpl_ledger_metrics_ledger"
+        ),
+        {"info": hypertable_info(chunk_interval="7 days")},
+    )
+
+    timestamp = Column(DateTime(timezone=True), primary_key=True)
+    ledger_index = Column(BigInteger, primary_key=True, index=True)
+    txn_count = Column(Integer, nullable=False)
+    payment_count = Column(Integer, nullable=False)
+    payment_volume_xrp = Column(Float, nullable=False)
+    max_payment_xrp = Column(Float, nullable=False)
+    large_transfer_count = Column(Integer, nullable=False)
+    window_ledgers = Column(Integer, nullable=False)
+    window_txn_count = Column(Integer, nullable=False)
+    window_payment_count = Column(Integer, nullable=False)
+    window_payment_volume_xrp = Column(Float, nullable=False)
+    window_large_transfer_count = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<XRPLLedgerMetrics(ledger_index={self.ledger_index}, "
+            f"timestamp={self.timestamp}, txn_count={self.txn_count})>"
+        )
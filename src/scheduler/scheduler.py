@@ -0,0 +1,403 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, tuple_
+
+from src.data_collection.backfill import repair_gaps
+from src.data_collection.async_collector import run_async_data_collection
+from src.data_collection.market_backfill import repair_market_gaps
+from src.data_collection.symbols import configured_markets
+from src.models.base import SessionLocal
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.utils.config import config
+from ..utils.logger import scheduler_logger
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+DEFAULT_SETTLE_SECONDS = 30  # Wait after a boundary for the provider to publish it
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_CATCH_UP_HOURS = 24
+MAX_SLEEP = 60.0  # Longest single sleep, so wall-clock steps are noticed
+
+
+def floor_to_interval(moment, interval):
+    """Return the start of the interval a moment falls in, on the epoch grid."""
+    return EPOCH + ((moment - EPOCH) // interval) * interval
+
+
+def due_tick(now, interval, settle=timedelta(0)):
+    """
+    Return the latest boundary whose fire time (boundary plus ``settle``) has
+    passed.
+    """
+    return floor_to_interval(now - settle, interval)
+
+
+class Job:
+    """
+    A job fired on every tick.
+
+    Args:
+        name (str): Name used in the logs.
+        run (callable): Called as ``run(tick)`` with the boundary being fired.
+        catch_up (callable, optional): Called as ``catch_up(first, last)`` with the
+            first and last missed boundaries (inclusive). Without it missed ticks are
+            logged and left to a manual backfill.
+        last_tick (callable, optional): Returns the last boundary already stored,
+            e.g. from the database, so ticks missed while the process was down are
+            caught up on start.
+    """
+
+    def __init__(self, name, run, catch_up=None, last_tick=None):
+        self.name = name
+        self.run = run
+        self.catch_up = catch_up
+        self.last_tick = last_tick
+        self.last_fired = None
+
+
+class Scheduler:
+    """
+    Fires jobs at wall-clock interval boundaries, without drift.
+
+    Each tick is scheduled from the boundary itself (the next 15-minute mark plus a
+    settle delay) rather than from the end of the previous sleep, so time spent
+    running jobs never pushes later ticks back. Sleeps are measured on the
+    monotonic clock, which NTP adjustments can't stretch, in slices of at most a
+    minute, after which the wall clock is checked again.
+
+    When the process wakes up more than an interval late, after a suspend, a stall
+    or a restart, the boundaries it slept through are handed to each job's
+    ``catch_up`` instead of being skipped, and the live tick fires as usual.
+
+    Jobs run on a bounded thread pool, so a slow database write of one tick can't
+    delay the fetch of the next.
+    """
+
+    def __init__(
+        self,
+        interval=timedelta(minutes=15),
+        settle=timedelta(seconds=DEFAULT_SETTLE_SECONDS),
+        max_workers=DEFAULT_MAX_WORKERS,
+        max_catch_up=timedelta(hours=DEFAULT_MAX_CATCH_UP_HOURS),
+        clock=None,
+        monotonic=time.monotonic,
+        sleep=None,
+    ):
+        """
+        Args:
+            interval (timedelta, optional): Tick interval. Defaults to 15 minutes.
+            settle (timedelta, optional): Delay after each boundary before firing.
+            max_workers (int, optional): Threads running jobs and catch-ups.
+            max_catch_up (timedelta, optional): Oldest missed ticks caught up;
+                anything older is logged and left to a manual backfill.
+            clock (callable, optional): Returns the current UTC datetime.
+            monotonic (callable, optional): Monotonic seconds, for sleeps.
+            sleep (callable, optional): Sleeps for the given seconds and returns
+                True if the scheduler was stopped meanwhile.
+        """
+        self.interval = interval
+        self.settle = settle
+        self.max_workers = max_workers
+        self.max_catch_up = max_catch_up
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self.monotonic = monotonic
+        self.jobs = []
+        self.stats = {
+            "ticks": 0,
+            "missed_ticks": 0,
+            "catch_ups": 0,
+            "failures": 0,
+            "max_lateness_seconds": 0.0,
+        }
+        self._stopped = threading.Event()
+        self._sleep = sleep or self._stopped.wait
+        self._executor = None
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings=None, **kwargs):
+        """Build a scheduler from the ``scheduler`` section of the configuration."""
+        settings = settings if settings is not None else config.get("scheduler") or {}
+        interval = (config.get("data_collection") or {}).get("interval_minutes", 15)
+        return cls(
+            interval=timedelta(minutes=interval),
+            settle=timedelta(
+                seconds=settings.get("settle_seconds", DEFAULT_SETTLE_SECONDS)
+            ),
+            max_workers=settings.get("max_workers", DEFAULT_MAX_WORKERS),
+            max_catch_up=timedelta(
+                hours=settings.get("max_catch_up_hours", DEFAULT_MAX_CATCH_UP_HOURS)
+            ),
+            **kwargs,
+        )
+
+    def add_job(self, name, run, catch_up=None, last_tick=None):
+        """
+        Register a job; see Job for the arguments.
+
+        Returns:
+            Job: The registered job.
+        """
+        job = Job(name, run, catch_up, last_tick)
+        self.jobs.append(job)
+        return job
+
+    def stop(self):
+        """Stop the run loop after the current sleep; running jobs finish."""
+        self._stopped.set()
+
+    def wait_until(self, moment):
+        """
+        Sleep until the wall clock reaches ``moment``.
+
+        Returns:
+            bool: True once the moment is reached, False if stopped first.
+        """
+        while not self._stopped.is_set():
+            remaining = (moment - self.clock()).total_seconds()
+            if remaining <= 0:
+                return True
+            deadline = self.monotonic() + min(remaining, MAX_SLEEP)
+            # Sleeps may return early; only the monotonic deadline ends a slice
+            while (left := deadline - self.monotonic()) > 0:
+                if self._sleep(left):
+                    return False
+        return False
+
+    def run(self, ticks=None):
+        """
+        Fire the jobs on every boundary until stopped.
+
+        Args:
+            ticks (int, optional): Return after this many ticks. Runs until stop()
+                by default.
+
+        Returns:
+            dict: The scheduler statistics.
+        """
+        self._stopped.clear()
+        scheduler_logger.info(
+            f"Scheduler started: {len(self.jobs)} jobs every {self.interval} "
+            f"+ {self.settle.total_seconds():.0f}s, {self.max_workers} workers"
+        )
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="scheduler"
+        ) as executor:
+            self._executor = executor
+            try:
+                self._recover()
+                fired = 0
+                while ticks is None or fired < ticks:
+                    tick = due_tick(self.clock(), self.interval, self.settle)
+                    if not self.wait_until(tick + self.interval + self.settle):
+                        break
+                    self.fire()
+                    fired += 1
+            finally:
+                self._executor = None
+        scheduler_logger.info(f"Scheduler stopped: {self.stats}")
+        return self.stats
+
+    def fire(self):
+        """
+        Submit every job for the boundary that is due now, and catch-ups for any
+        boundaries missed since each job last fired.
+
+        Returns:
+            datetime: The boundary fired.
+        """
+        now = self.clock()
+        tick = due_tick(now, self.interval, self.settle)
+        lateness = (now - tick - self.settle).total_seconds()
+        self.stats["ticks"] += 1
+        self.stats["max_lateness_seconds"] = max(
+            self.stats["max_lateness_seconds"], lateness
+        )
+        scheduler_logger.info(f"Tick {tick} fired {lateness:.3f}s after its time")
+        for job in self.jobs:
+            if job.last_fired is not None:
+                if tick <= job.last_fired:
+                    # The wall clock was stepped back; this tick has already run
+                    scheduler_logger.warning(f"{job.name}: tick {tick} already fired")
+                    continue
+                self._catch_up(
+                    job, job.last_fired + self.interval, tick - self.interval
+                )
+            job.last_fired = tick
+            self._submit(job.name, job.run, tick)
+        return tick
+
+    def wait(self):
+        """Wait for every submitted job and catch-up to finish."""
+        while True:
+            with self._lock:
+                futures = list(self._futures)
+            if not futures:
+                return
+            for future in futures:
+                future.exception()
+
+    def _recover(self):
+        # Ticks missed while the process was down, as far as the jobs' data shows
+        tick = due_tick(self.clock(), self.interval, self.settle)
+        for job in self.jobs:
+            if job.last_tick is None or job.last_fired is not None:
+                continue
+            try:
+                last = job.last_tick()
+            except Exception as e:
+                db.rollback()
+                scheduler_logger.error(f"Error reading last tick of {job.name}: {e}")
+                continue
+            if last is not None:
+                # The due tick is caught up here too, since the run loop only
+                # fires the next one
+                self._catch_up(
+                    job, floor_to_interval(last, self.interval) + self.interval, tick
+                )
+                job.last_fired = tick
+
+    def _catch_up(self, job, first, last):
+        if first > last:
+            return
+        missed = (last - first) // self.interval + 1
+        self.stats["missed_ticks"] += missed
+        oldest = last - self.max_catch_up + self.interval
+        if first < oldest:
+            scheduler_logger.warning(
+                f"{job.name}: ticks from {first} to {oldest - self.interval} are "
+                f"older than the catch-up limit; run a backfill for them"
+            )
+            first = oldest
+        if job.catch_up is None:
+            scheduler_logger.warning(
+                f"{job.name}: missed {missed} ticks from {first} to {last} and has "
+                f"no catch-up"
+            )
+            return
+        scheduler_logger.warning(
+            f"{job.name}: missed {missed} ticks, catching up {first} to {last}"
+        )
+        self.stats["catch_ups"] += 1
+        self._submit(f"{job.name} catch-up", job.catch_up, first, last)
+
+    def _submit(self, name, fn, *args):
+        if self._executor is None:
+            raise RuntimeError("The scheduler is not running")
+        future = self._executor.submit(fn, *args)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(lambda done: self._finished(name, done))
+
+    def _finished(self, name, future):
+        with self._lock:
+            self._futures.discard(future)
+        error = future.exception()
+        if error is not None:
+            self.stats["failures"] += 1
+            scheduler_logger.error(f"{name} failed: {error}")
+
+
+def latest_ohlcv_tick(markets=None):
+    """
+    Return the oldest of the configured markets' latest stored candles, so the
+    catch-up covers the market that is furthest behind.
+
+    Markets without any candles yet are left to a manual backfill.
+
+    Args:
+        markets (list, optional): Market tuples. Defaults to the configured markets.
+
+    Returns:
+        datetime: The oldest latest candle, or None if no market has candles.
+    """
+    markets = markets or configured_markets()
+    with SessionLocal() as db:
+        latest = (
+            db.query(func.max(OHLCVData15Min.timestamp))
+            .filter(tuple_(OHLCVData15Min.exchange, OHLCVData15Min.symbol).in_(markets))
+            .group_by(OHLCVData15Min.exchange, OHLCVData15Min.symbol)
+            .all()
+        )
+    return min((timestamp for (timestamp,) in latest), default=None)
+
+
+def collect_tick(tick):
+    """
+    Collect the latest market and OHLCV data for every configured market, in a
+    session of its own so overlapping ticks never share one.
+
+    The markets are fetched concurrently, at most ``data_collection.max_concurrency``
+    at a time, and stored in one transaction.
+
+    Raises:
+        RuntimeError: If any source could not be fetched; the others are still
+            stored. Any other exception raised by the collection is passed on, so
+            the scheduler counts it.
+    """
+    with SessionLocal() as db:
+        timings = run_async_data_collection(db)
+    if timings["failed"]:
+        raise RuntimeError(f"Could not fetch {', '.join(timings['failed'])}")
+
+
+def catch_up_collection(first, last, markets=None):
+    """
+    Backfill the OHLCV and market data gaps of every configured market between two
+    missed ticks.
+
+    A failing market doesn't stop the others; the first error is raised once every
+    market has been tried.
+
+    Args:
+        first (datetime): First missed tick (inclusive).
+        last (datetime): Last missed tick (inclusive).
+        markets (list, optional): Market tuples. Defaults to the configured markets.
+    """
+    markets = markets or configured_markets()
+    error = None
+    # Market data is stored per symbol, so markets sharing one repair it once
+    repaired_symbols = set()
+    with SessionLocal() as db:
+        for market in markets:
+            try:
+                repair_gaps(db, first, last, market=market)
+                if market.symbol not in repaired_symbols:
+                    repair_market_gaps(db, first, last, market=market)
+                    repaired_symbols.add(market.symbol)
+            except Exception as e:
+                db.rollback()
+                scheduler_logger.error(
+                    f"Error catching up {market.exchange} {market.symbol}: {e}"
+                )
+                error = error or e
+    if error is not None:
+        raise error
+
+
+def run_scheduler(scheduler=None):
+    """
+    Run the data collection on every 15-minute tick until the process is stopped.
+
+    Args:
+        scheduler (Scheduler, optional): Defaults to Scheduler.from_config().
+    """
+    scheduler = scheduler or Scheduler.from_config()
+    scheduler.add_job(
+        "collection",
+        collect_tick,
+        catch_up=catch_up_collection,
+        last_tick=latest_ohlcv_tick,
+    )
+    try:
+        return scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.stop()
+        scheduler_logger.info("Scheduler interrupted")
+
+
+if __name__ == "__main__":
+    run_scheduler()
@@ -44,6 +44,21 @@ def load_config():
             config["data_collection"].get("interval_minutes", 15) * 60
         )
 
+        # Let dev and CI runs switch the response cache offline without editing YAML
+        if os.getenv("HTTP_CACHE_OFFLINE"):
+            config.setdefault("http_cache", {})["offline"] = os.getenv(
+                "HTTP_CACHE_OFFLINE"
+            ).lower() in ("1", "true", "yes")
+
+        # Point the REST clients elsewhere, e.g. at the local fake provider. The
+        # overrides are kept so the production quotas can be left alone
+        config["api_endpoint_overrides"] = {}
+        for provider in ("coinapi", "coingecko"):
+            base_url = os.getenv(f"{provider.upper()}_BASE_URL")
+            if base_url:
+                config["api_endpoints"][provider] = base_url
+                config["api_endpoint_overrides"][provider] = base_url
+
         # Parse DATABASE_URL
         db_url = os.getenv("DATABASE_URL")
         if db_url:
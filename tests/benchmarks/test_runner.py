@@ -0,0 +1,107 @@
+import unittest
+
+from sqlalchemy import func, select
+
+from benchmarks.__main__ import compare, parse_args
+from benchmarks.ingest import synthetic_candles
+from benchmarks.runner import (
+    BENCHMARK_MARKET,
+    measure,
+    measure_latency,
+    rollback_session,
+    throughput,
+)
+from src.models.base import engine
+from src.models.bulk import bulk_insert
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+
+
+def benchmark_rows(db):
+    return db.execute(
+        select(func.count()).where(
+            OHLCVData15Min.exchange == BENCHMARK_MARKET.exchange,
+            OHLCVData15Min.symbol == BENCHMARK_MARKET.symbol,
+        )
+    ).scalar()
+
+
+class TestRunner(unittest.TestCase):
+    """
+    A test suite for the benchmark runner helpers and command line.
+    """
+
+    def test_measure(self):
+        """Test that measure times every run, passes setup values and traces memory."""
+        calls = []
+        stats = measure(
+            lambda size: calls.append(size) or bytearray(size),
+            repeats=2,
+            setup=lambda: 1_000_000,
+        )
+        self.assertEqual(calls, [1_000_000] * 3)
+        self.assertEqual(stats["runs"], 2)
+        self.assertLessEqual(stats["best_seconds"], stats["median_seconds"])
+        self.assertGreaterEqual(stats["peak_memory_bytes"], 1_000_000)
+        self.assertEqual(len(stats["result"]), 1_000_000)
+
+        entry = throughput(500, stats, unit="candles", model="gbm")
+        self.assertEqual(entry["candles"], 500)
+        self.assertEqual(entry["model"], "gbm")
+        self.assertAlmostEqual(entry["candles_per_sec"], 500 / stats["best_seconds"])
+
+    def test_measure_latency(self):
+        """Test that measure_latency reports ordered percentiles."""
+        stats = measure_latency(lambda: sum(range(1000)), repeats=10, markets=2)
+        self.assertEqual(stats["runs"], 10)
+        self.assertEqual(stats["markets"], 2)
+        self.assertLessEqual(stats["p50_ms"], stats["p95_ms"])
+        self.assertLessEqual(stats["p95_ms"], stats["max_ms"])
+        self.assertIn("peak_memory_bytes", stats)
+
+    def test_rollback_session_discards_commits(self):
+        """Test that rows committed in a rollback session are gone afterwards."""
+        with rollback_session(engine) as db:
+            before = benchmark_rows(db)
+            bulk_insert(db, OHLCVData15Min, synthetic_candles(10))
+            db.commit()
+            self.assertEqual(benchmark_rows(db), before + 10)
+
+        with rollback_session(engine) as db:
+            self.assertEqual(benchmark_rows(db), before)
+
+    def test_compare(self):
+        """Test that changes are flagged by direction and size."""
+        baseline = {
+            "results": {
+                "ingest": {"bulk_copy": {"rows_per_sec": 1000.0, "rows": 10}},
+                "queries": {"orm_1d": {"p95_ms": 10.0, "p50_ms": 5.0}},
+            }
+        }
+        results = {
+            "results": {
+                "ingest": {"bulk_copy": {"rows_per_sec": 1500.0, "rows": 10}},
+                "queries": {"orm_1d": {"p95_ms": 20.0, "p50_ms": 5.1}},
+                "indicators": {"streaming": {"candles_per_sec": 10.0}},
+            }
+        }
+        lines = compare(results, baseline)
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("ingest.bulk_copy.rows_per_sec"))
+        self.assertTrue(lines[0].endswith("better"))
+        self.assertTrue(lines[1].endswith("worse"))
+        self.assertTrue(lines[2].endswith("(+2.0%)"))
+
+    def test_parse_args(self):
+        """Test suite selection and quick and overridden sizes."""
+        args = parse_args(["--quick", "--bulk-rows", "7"])
+        self.assertEqual(args.suites, ["ingest", "indicators", "queries", "collector"])
+        self.assertEqual(args.bulk_rows, 7)
+        self.assertEqual(args.orm_rows, 2_000)
+        self.assertEqual(parse_args(["queries"]).query_candles, 350_000)
+
+        with self.assertRaises(SystemExit):
+            parse_args(["nonexistent"])
+
+
+if __name__ == "__main__":
+    unittest.main()
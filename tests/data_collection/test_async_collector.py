@@ -0,0 +1,237 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+from src.data_collection.async_collector import (
+    AsyncCoinAPIClient,
+    AsyncCoinGeckoClient,
+    CollectionSource,
+    collect_tick,
+    default_sources,
+    run_async_data_collection,
+)
+from src.data_collection.symbols import DEFAULT_MARKET, Market
+
+
+def slow_fetch(payload, delay):
+    async def fetch():
+        await asyncio.to_thread(time.sleep, delay)
+        return payload
+
+    return fetch
+
+
+class TestAsyncCollector(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a mock database object for use in all test methods.
+        """
+        self.mock_db = MagicMock()
+
+    def test_collect_tick_fetches_concurrently(self):
+        """
+        Three sources that each take 0.2s should finish in roughly 0.2s, and all
+        payloads should be written in a single commit.
+        """
+        stored = []
+        sources = [
+            CollectionSource(
+                f"source_{i}",
+                slow_fetch(i, 0.2),
+                lambda db, payload: stored.append(payload),
+            )
+            for i in range(3)
+        ]
+
+        timings = asyncio.run(collect_tick(self.mock_db, sources))
+
+        self.assertEqual(stored, [0, 1, 2])
+        self.assertLess(timings["total"], 0.5)
+        self.assertEqual(set(timings["fetch"]), {"source_0", "source_1", "source_2"})
+        self.mock_db.commit.assert_called_once()
+
+    def test_collect_tick_skips_failed_sources(self):
+        async def failing_fetch():
+            raise RuntimeError("provider down")
+
+        stored = []
+        sources = [
+            CollectionSource("broken", failing_fetch, MagicMock()),
+            CollectionSource(
+                "working", slow_fetch("ok", 0), lambda db, p: stored.append(p)
+            ),
+        ]
+
+        timings = asyncio.run(collect_tick(self.mock_db, sources))
+
+        self.assertEqual(stored, ["ok"])
+        self.assertEqual(timings["failed"], ["broken"])
+        sources[0].store.assert_not_called()
+        self.mock_db.commit.assert_called_once()
+
+    def test_collect_tick_rolls_back_on_store_error(self):
+        def failing_store(db, payload):
+            raise ValueError("bad row")
+
+        sources = [CollectionSource("source", slow_fetch(1, 0), failing_store)]
+
+        with self.assertRaises(ValueError):
+            asyncio.run(collect_tick(self.mock_db, sources))
+
+        self.mock_db.rollback.assert_called_once()
+        self.mock_db.commit.assert_not_called()
+
+    def test_collect_tick_bounds_concurrency(self):
+        """
+        Six 0.1s sources with at most two in flight should take three rounds.
+        """
+        in_flight, peak = 0, 0
+
+        def tracked_fetch(payload):
+            async def fetch():
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.1)
+                in_flight -= 1
+                return payload
+
+            return fetch
+
+        sources = [
+            CollectionSource(f"source_{i}", tracked_fetch(i), MagicMock())
+            for i in range(6)
+        ]
+
+        timings = asyncio.run(collect_tick(self.mock_db, sources, max_concurrency=2))
+
+        self.assertEqual(peak, 2)
+        self.assertGreaterEqual(timings["total"], 0.3)
+        self.assertEqual(timings["failed"], [])
+
+    def test_default_sources_fan_out_over_markets(self):
+        """
+        Each market gets its own OHLCV source, while market data is fetched with one
+        multi-id request per quote currency.
+        """
+        coingecko, coinapi = MagicMock(), MagicMock()
+        markets = [
+            DEFAULT_MARKET,
+            Market("KRAKEN", "XRP_USD"),
+            Market("KRAKEN", "XRP_EUR"),
+        ]
+
+        budget = MagicMock()
+        budget.try_reserve.return_value = True
+
+        sources = default_sources(
+            AsyncCoinGeckoClient(coingecko),
+            AsyncCoinAPIClient(coinapi),
+            markets,
+            budget,
+        )
+        for source in sources:
+            asyncio.run(source.fetch())
+
+        self.assertEqual(
+            [source.name for source in sources],
+            [
+                "coingecko_markets_usd",
+                "coingecko_markets_eur",
+                "coinapi_ohlcv_bitstamp_xrp_usd",
+                "coinapi_ohlcv_kraken_xrp_usd",
+                "coinapi_ohlcv_kraken_xrp_eur",
+            ],
+        )
+        self.assertEqual(coingecko.get_changed_markets.call_count, 2)
+        self.assertEqual(budget.try_reserve.call_count, 3)
+        self.assertEqual(
+            [c.args for c in coinapi.get_ohlcv_data.call_args_list],
+            [
+                ("BITSTAMP_SPOT_XRP_USD",),
+                ("KRAKEN_SPOT_XRP_USD",),
+                ("KRAKEN_SPOT_XRP_EUR",),
+            ],
+        )
+
+    @patch("src.data_collection.async_collector.refresh_rollups")
+    @patch("src.data_collection.async_collector.update_streaming_indicators")
+    @patch("src.data_collection.async_collector.upsert_rows")
+    def test_run_async_data_collection(
+        self, mock_upsert_rows, mock_update_indicators, mock_refresh_rollups
+    ):
+        """
+        The default sources should fetch from both providers, upsert both tables,
+        update the indicators for the new candles and refresh the rollups.
+        """
+        coingecko = MagicMock()
+        coingecko.get_changed_markets.return_value = [
+            {
+                "id": "ripple",
+                "last_updated": "2023-07-01T12:00:00Z",
+                "current_price": 1.0,
+                "market_cap": 1000000,
+                "total_volume": 500000,
+                "circulating_supply": 50000,
+                "total_supply": 100000,
+                "max_supply": 100000000,
+            }
+        ]
+        coinapi = MagicMock()
+        coinapi.get_ohlcv_data.return_value = [
+            {
+                "time_period_end": "2023-07-01T12:00:00Z",
+                "price_open": 1.0,
+                "price_high": 1.1,
+                "price_low": 0.9,
+                "price_close": 1.05,
+                "volume_traded": 1000,
+                "trades_count": 8,
+            }
+        ]
+
+        budget = MagicMock()
+        budget.try_reserve.return_value = True
+
+        timings = run_async_data_collection(
+            self.mock_db,
+            AsyncCoinGeckoClient(coingecko),
+            AsyncCoinAPIClient(coinapi),
+            budget,
+        )
+
+        self.assertEqual(timings["failed"], [])
+        self.assertEqual(mock_upsert_rows.call_count, 2)
+        mock_update_indicators.assert_called_once()
+        mock_refresh_rollups.assert_called_once_with(self.mock_db)
+        self.mock_db.commit.assert_called_once()
+
+    @patch("src.data_collection.async_collector.refresh_rollups")
+    @patch("src.data_collection.async_collector.upsert_rows")
+    def test_run_async_data_collection_raises_store_errors(
+        self, mock_upsert_rows, mock_refresh_rollups
+    ):
+        """
+        A failed store should be rolled back and re-raised, so a scheduled tick is
+        counted as failed.
+        """
+        mock_upsert_rows.side_effect = RuntimeError("database down")
+        coinapi = MagicMock()
+        coinapi.get_ohlcv_data.return_value = []
+        budget = MagicMock()
+        budget.try_reserve.return_value = True
+
+        with self.assertRaisesRegex(RuntimeError, "database down"):
+            run_async_data_collection(
+                self.mock_db,
+                AsyncCoinGeckoClient(MagicMock()),
+                AsyncCoinAPIClient(coinapi),
+                budget,
+            )
+        self.mock_db.rollback.assert_called_once()
+        mock_refresh_rollups.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,404 @@
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, MagicMock
+
+from sqlalchemy import delete
+from sqlalchemy.orm import sessionmaker
+
+from src.data_collection.backfill import (
+    CreditBudget,
+    credits_for_windows,
+    incomplete_windows,
+    job_id_for_range,
+    plan_windows,
+    repair_gaps,
+    resume_backfill,
+    run_backfill,
+)
+from src.data_collection.coinapi_client import CoinAPIClient
+from src.data_collection.rate_limits import CreditLedger, CreditsExhaustedError
+from src.data_collection.response_cache import ResponseCache
+from src.data_collection.symbols import Market
+from src.models.api_credit_ledger import APICreditLedger
+from src.models.backfill_journal import BackfillJournal
+from src.models.base import engine
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+
+
+def make_candles(window_start, window_end):
+    candles = []
+    timestamp = window_start
+    while timestamp < window_end:
+        timestamp += timedelta(minutes=15)
+        candles.append(
+            {
+                "time_period_end": timestamp.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "price_open": 1.0,
+                "price_high": 1.1,
+                "price_low": 0.9,
+                "price_close": 1.05,
+                "volume_traded": 1000,
+                "trades_count": 8,
+            }
+        )
+    return candles
+
+
+def serve_window(start, end, limit, symbol_id=None, reserve=None):
+    # Reserves like CoinAPIClient does for a request that misses the cache
+    if reserve is not None and not reserve():
+        raise CreditsExhaustedError("CoinAPI credit budget exhausted")
+    return make_candles(start, end)
+
+
+class TestBackfill(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a mock database and a mock CoinAPI client serving any window.
+        """
+        self.mock_db = MagicMock()
+        self.client = MagicMock()
+        self.client.get_historical_ohlcv_data.side_effect = serve_window
+        self.start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+    def test_plan_windows_sized_to_credits(self):
+        windows = plan_windows(self.start, self.start + timedelta(days=3))
+
+        self.assertEqual(len(windows), 3)  # 288 candles -> 100 + 100 + 88
+        self.assertEqual(windows[0], (self.start, self.start + timedelta(hours=25)))
+        self.assertEqual(windows[-1][1], self.start + timedelta(days=3))
+        for (_, previous_end), (next_start, _) in zip(windows, windows[1:]):
+            self.assertEqual(previous_end, next_start)
+        self.assertEqual(credits_for_windows(windows), 3)
+
+    def test_credit_budget_is_thread_safe(self):
+        budget = CreditBudget(1000)
+        granted = []
+
+        def worker():
+            for _ in range(500):
+                granted.append(budget.try_reserve())
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(granted), 1000)
+        self.assertEqual(budget.remaining, 0)
+
+    @patch("src.data_collection.backfill.upsert_rows")
+    def test_run_backfill_writes_every_window(self, mock_upsert_rows):
+        mock_upsert_rows.side_effect = lambda db, model, columns: len(
+            columns["timestamp"]
+        )
+        budget = CreditBudget(10)
+
+        stats = run_backfill(
+            self.mock_db,
+            self.start,
+            self.start + timedelta(days=3),
+            coinapi_client=self.client,
+            budget=budget,
+            max_workers=3,
+        )
+
+        self.assertEqual(stats["rows"], 288)
+        self.assertEqual(stats["windows"], 3)
+        self.assertEqual(stats["credits_used"], 3)
+        self.assertEqual(budget.remaining, 7)
+        self.assertEqual(self.mock_db.commit.call_count, 3)  # one per window
+
+    @patch("src.data_collection.backfill.upsert_rows")
+    def test_run_backfill_stops_at_budget(self, mock_upsert_rows):
+        mock_upsert_rows.return_value = 100
+        budget = CreditBudget(2)
+
+        stats = run_backfill(
+            self.mock_db,
+            self.start,
+            self.start + timedelta(days=5),
+            coinapi_client=self.client,
+            budget=budget,
+            max_workers=4,
+        )
+
+        self.assertEqual(stats["windows"], 2)
+        self.assertEqual(stats["skipped_windows"], 3)
+        self.assertEqual(stats["credits_used"], 2)
+        self.assertEqual(budget.remaining, 0)
+
+    @patch("src.data_collection.backfill.upsert_rows")
+    @patch("src.data_collection.http_transport.requests.Session.get")
+    def test_cached_replay_leaves_the_ledger_unchanged(
+        self, mock_get, mock_upsert_rows
+    ):
+        def get(url, params, headers, timeout):
+            response = MagicMock()
+            response.json.return_value = make_candles(
+                datetime.fromisoformat(params["time_start"]),
+                datetime.fromisoformat(params["time_end"]),
+            )
+            return response
+
+        mock_get.side_effect = get
+        mock_upsert_rows.return_value = 100
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        client = CoinAPIClient(
+            cache=ResponseCache(cache_dir.name), rate_limiter=MagicMock()
+        )
+        provider = f"test_{uuid.uuid4().hex[:8]}"
+        ledger = CreditLedger(provider, 10)
+        self.addCleanup(self.delete_ledger, provider)
+        end = self.start + timedelta(days=3)
+
+        first = run_backfill(
+            self.mock_db, self.start, end, coinapi_client=client, budget=ledger
+        )
+        replay = run_backfill(
+            self.mock_db, self.start, end, coinapi_client=client, budget=ledger
+        )
+
+        self.assertEqual(first["credits_used"], 3)
+        self.assertEqual(replay["credits_used"], 0)
+        self.assertEqual(replay["windows"], 3)
+        self.assertEqual(ledger.used, 3)
+        self.assertEqual(mock_get.call_count, 3)
+
+        # Offline, the replay is served with the budget spent
+        client.cache.offline = True
+        self.assertTrue(ledger.try_reserve(ledger.remaining))
+        offline = run_backfill(
+            self.mock_db, self.start, end, coinapi_client=client, budget=ledger
+        )
+        self.assertEqual(offline["windows"], 3)
+        self.assertEqual(offline["skipped_windows"], 0)
+        self.assertEqual(ledger.used, 10)
+
+    @staticmethod
+    def delete_ledger(provider):
+        with engine.begin() as connection:
+            connection.execute(
+                delete(APICreditLedger).where(APICreditLedger.provider == provider)
+            )
+
+    @patch("src.data_collection.backfill.upsert_rows")
+    def test_run_backfill_fetches_concurrently(self, mock_upsert_rows):
+        def slow_fetch(start, end, **kwargs):
+            time.sleep(0.2)
+            return serve_window(start, end, **kwargs)
+
+        self.client.get_historical_ohlcv_data.side_effect = slow_fetch
+        mock_upsert_rows.return_value = 96
+
+        started = time.perf_counter()
+        run_backfill(
+            self.mock_db,
+            self.start,
+            self.start + timedelta(days=4),
+            coinapi_client=self.client,
+            budget=CreditBudget(None),
+            max_workers=4,
+        )
+
+        self.assertLess(time.perf_counter() - started, 0.6)
+
+    @patch("src.data_collection.backfill.upsert_rows")
+    def test_run_backfill_raises_fetch_errors(self, mock_upsert_rows):
+        self.client.get_historical_ohlcv_data.side_effect = RuntimeError("API down")
+
+        with self.assertRaises(RuntimeError):
+            run_backfill(
+                self.mock_db,
+                self.start,
+                self.start + timedelta(days=1),
+                coinapi_client=self.client,
+                budget=CreditBudget(None),
+            )
+        mock_upsert_rows.assert_not_called()
+
+
+class TestBackfillJournal(unittest.TestCase):
+    """
+    Journal tests run against the real database, because windows are committed.
+    """
+
+    start = datetime(2019, 3, 1, tzinfo=timezone.utc)
+    end = start + timedelta(days=5)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.Session = sessionmaker(bind=engine)
+
+    def setUp(self):
+        self.session = self.Session()
+        self.job_id = job_id_for_range(self.start, self.end)
+        self.fetched = []
+        self.symbol_ids = set()
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.query(BackfillJournal).filter(
+            BackfillJournal.window_start.between(self.start, self.end)
+        ).delete()
+        self.session.query(OHLCVData15Min).filter(
+            OHLCVData15Min.timestamp.between(self.start, self.end)
+        ).delete()
+        self.session.commit()
+        self.session.close()
+
+    def make_client(self, fail_on=None):
+        client = MagicMock()
+
+        def fetch(start, end, **kwargs):
+            if start == fail_on:
+                raise RuntimeError("connection reset")
+            self.fetched.append(start)
+            self.symbol_ids.add(kwargs.get("symbol_id"))
+            return serve_window(start, end, **kwargs)
+
+        client.get_historical_ohlcv_data.side_effect = fetch
+        return client
+
+    def test_resume_refetches_only_incomplete_windows(self):
+        windows = plan_windows(self.start, self.end)
+        failing_window = windows[2]
+
+        with self.assertRaises(RuntimeError):
+            run_backfill(
+                self.session,
+                self.start,
+                self.end,
+                coinapi_client=self.make_client(fail_on=failing_window[0]),
+                budget=CreditBudget(None),
+                max_workers=1,
+                job_id=self.job_id,
+            )
+
+        self.assertEqual(self.fetched, [windows[0][0], windows[1][0]])
+        self.assertEqual(incomplete_windows(self.session, self.job_id), windows[2:])
+        failed = (
+            self.session.query(BackfillJournal)
+            .filter_by(job_id=self.job_id, window_start=failing_window[0])
+            .one()
+        )
+        self.assertEqual(failed.status, "failed")
+        self.assertIn("connection reset", failed.error)
+
+        self.fetched.clear()
+        stats = resume_backfill(
+            self.session,
+            self.job_id,
+            coinapi_client=self.make_client(),
+            budget=CreditBudget(None),
+            max_workers=2,
+        )
+
+        self.assertEqual(sorted(self.fetched), [start for start, _ in windows[2:]])
+        self.assertEqual(stats["windows"], 3)
+        self.assertEqual(incomplete_windows(self.session, self.job_id), [])
+        stored = (
+            self.session.query(OHLCVData15Min)
+            .filter(OHLCVData15Min.timestamp > self.start)
+            .filter(OHLCVData15Min.timestamp <= self.end)
+            .count()
+        )
+        self.assertEqual(stored, 5 * 96)
+
+    def test_rerun_skips_committed_windows(self):
+        run_backfill(
+            self.session,
+            self.start,
+            self.end,
+            coinapi_client=self.make_client(),
+            budget=CreditBudget(None),
+            job_id=self.job_id,
+        )
+        self.fetched.clear()
+
+        stats = run_backfill(
+            self.session,
+            self.start,
+            self.end,
+            coinapi_client=self.make_client(),
+            budget=CreditBudget(None),
+            job_id=self.job_id,
+        )
+
+        self.assertEqual(self.fetched, [])
+        self.assertEqual(stats["credits_used"], 0)
+
+    def test_repair_gaps_fetches_only_missing_intervals(self):
+        run_backfill(
+            self.session,
+            self.start,
+            self.end,
+            coinapi_client=self.make_client(),
+            budget=CreditBudget(None),
+        )
+        hole_start = self.start + timedelta(days=2)
+        self.session.query(OHLCVData15Min).filter(
+            OHLCVData15Min.timestamp.between(
+                hole_start, hole_start + timedelta(hours=1)
+            )
+        ).delete()
+        self.session.commit()
+        first_candle = self.start + timedelta(minutes=15)
+        self.fetched.clear()
+
+        stats = repair_gaps(
+            self.session,
+            first_candle,
+            self.end,
+            coinapi_client=self.make_client(),
+            budget=CreditBudget(None),
+        )
+
+        self.assertEqual(self.fetched, [hole_start - timedelta(minutes=15)])
+        self.assertEqual(stats["rows"], 5)
+        self.assertEqual(stats["credits_used"], 1)
+        self.assertIsNone(
+            repair_gaps(self.session, first_candle, self.end, budget=CreditBudget(None))
+        )
+
+    def test_repair_gaps_of_another_market(self):
+        run_backfill(
+            self.session,
+            self.start,
+            self.end,
+            coinapi_client=self.make_client(),
+            budget=CreditBudget(None),
+        )
+        kraken = Market("KRAKEN", "XRP_EUR")
+        self.fetched.clear()
+        self.symbol_ids.clear()
+
+        stats = repair_gaps(
+            self.session,
+            self.start + timedelta(minutes=15),
+            self.end,
+            market=kraken,
+            coinapi_client=self.make_client(),
+            budget=CreditBudget(None),
+        )
+
+        # The default market's candles don't hide the other market's gaps
+        self.assertEqual(stats["rows"], 5 * 96)
+        self.assertEqual(self.symbol_ids, {"KRAKEN_SPOT_XRP_EUR"})
+        stored = (
+            self.session.query(OHLCVData15Min)
+            .filter_by(exchange="KRAKEN", symbol="XRP_EUR")
+            .filter(OHLCVData15Min.timestamp.between(self.start, self.end))
+            .count()
+        )
+        self.assertEqual(stored, 5 * 96)
+
+
+if __name__ == "__main__":
+    unittest.main()
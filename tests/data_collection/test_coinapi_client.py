@@ -1,6 +1,8 @@
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from src.data_collection.response_cache import CacheMissError, ResponseCache
 from src.data_collection.coinapi_client import CoinAPIClient
 from src.utils.config import config
 
@@ -11,20 +13,25 @@ class TestCoinAPIClient(unittest.TestCase):
         Set up a CoinAPIClient instance for use in all test methods.
         This method is run before each test.
         """
-        self.client = CoinAPIClient()
+        # Each test gets an empty cache, so no response leaks between tests
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.client = CoinAPIClient(
+            cache=ResponseCache(self.cache_dir.name), rate_limiter=MagicMock()
+        )
 
-    @patch("src.data_collection.coinapi_client.requests.get")
+    @patch("src.data_collection.http_transport.requests.Session.get")
     def test_get_ohlcv_data(self, mock_get):
         """
         Test the get_ohlcv_data method of CoinAPIClient.
 
-        This test mocks the requests.get function to return a predefined OHLCV data response.
+        This test mocks the pooled session's get method to return a predefined OHLCV data response.
         It then calls the get_ohlcv_data method and verifies that:
         1. The returned data has the expected structure and values.
         2. The API was called with the correct URL, parameters, and headers.
 
         Args:
-            mock_get: A mocked requests.get function.
+            mock_get: A mocked requests.Session.get method.
         """
         mock_response = MagicMock()
         mock_response.json.return_value = [
@@ -59,18 +66,18 @@ class TestCoinAPIClient(unittest.TestCase):
         self.assertEqual(call_args[1]["params"]["period_id"], "15MIN")
         self.assertEqual(call_args[1]["params"]["limit"], 1)
 
-    @patch("src.data_collection.coinapi_client.requests.get")
+    @patch("src.data_collection.http_transport.requests.Session.get")
     def test_get_historical_ohlcv_data(self, mock_get):
         """
         Test the get_historical_ohlcv_data method of CoinAPIClient.
 
-        This test mocks the requests.get function to return a predefined historical OHLCV data response.
+        This test mocks the pooled session's get method to return a predefined historical OHLCV data response.
         It then calls the get_historical_ohlcv_data method with specific start and end times, and verifies that:
         1. The returned data matches the mocked response.
         2. The API was called with the correct URL, parameters (including time range), and headers.
 
         Args:
-            mock_get: A mocked requests.get function.
+            mock_get: A mocked requests.Session.get method.
         """
         # Mock the response
         mock_response = MagicMock()
@@ -104,20 +111,46 @@ class TestCoinAPIClient(unittest.TestCase):
             "Accept": "application/json",
         }
         mock_get.assert_called_once_with(
-            expected_url, params=expected_params, headers=expected_headers
+            expected_url,
+            params=expected_params,
+            headers=expected_headers,
+            timeout=self.client.transport.timeout,
         )
 
-    @patch("src.data_collection.coinapi_client.requests.get")
+    @patch("src.data_collection.http_transport.requests.Session.get")
+    def test_get_historical_ohlcv_data_caches_closed_windows(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.json.return_value = [{"test": "historical_data"}]
+        mock_get.return_value = mock_response
+        start_time = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        end_time = datetime(2023, 1, 2, tzinfo=timezone.utc)
+
+        self.client.get_historical_ohlcv_data(start_time, end_time)
+        result = self.client.get_historical_ohlcv_data(start_time, end_time)
+
+        self.assertEqual(result, [{"test": "historical_data"}])
+        mock_get.assert_called_once()
+
+        # Offline, cached windows are still served and anything else is refused
+        self.client.cache.offline = True
+        self.assertEqual(
+            self.client.get_historical_ohlcv_data(start_time, end_time), result
+        )
+        with self.assertRaises(CacheMissError):
+            self.client.get_historical_ohlcv_data(end_time, end_time + timedelta(1))
+        mock_get.assert_called_once()
+
+    @patch("src.data_collection.http_transport.requests.Session.get")
     def test_get_ohlcv_data_error(self, mock_get):
         """
         Test the error handling of the get_ohlcv_data method.
 
-        This test mocks the requests.get function to raise an exception.
+        This test mocks the pooled session's get method to raise an exception.
         It then calls the get_ohlcv_data method and verifies that:
         1. The method raises an exception when the API call fails.
 
         Args:
-            mock_get: A mocked requests.get function set to raise an exception.
+            mock_get: A mocked requests.Session.get method set to raise an exception.
         """
         # Mock the response to raise an exception
         mock_get.side_effect = Exception("API Error")
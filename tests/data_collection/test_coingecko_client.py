@@ -1,14 +1,22 @@
+import tempfile
 import unittest
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, MagicMock
-from src.data_collection.coingecko_client import CoinGeckoClient
+from src.data_collection.response_cache import ResponseCache
+from src.data_collection.coingecko_client import CoinGeckoClient, FetchCache
 from src.utils.config import config
 
 
 class TestCoinGeckoClient(unittest.TestCase):
     def setUp(self):
-        self.client = CoinGeckoClient()
+        # Each test gets an empty cache, so no response leaks between tests
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.client = CoinGeckoClient(
+            cache=ResponseCache(self.cache_dir.name), rate_limiter=MagicMock()
+        )
 
-    @patch("src.data_collection.coingecko_client.requests.get")
+    @patch("src.data_collection.http_transport.requests.Session.get")
     def test_get_market_data(self, mock_get):
         # Mock the response
         mock_response = MagicMock()
@@ -34,10 +42,13 @@ class TestCoinGeckoClient(unittest.TestCase):
         }
         expected_headers = {"X-Cg-Pro-Api-Key": config["api_keys"]["coingecko"]}
         mock_get.assert_called_once_with(
-            expected_url, params=expected_params, headers=expected_headers
+            expected_url,
+            params=expected_params,
+            headers=expected_headers,
+            timeout=self.client.transport.timeout,
         )
 
-    @patch("src.data_collection.coingecko_client.requests.get")
+    @patch("src.data_collection.http_transport.requests.Session.get")
     def test_get_historical_market_data(self, mock_get):
         # Mock the response
         mock_response = MagicMock()
@@ -58,10 +69,96 @@ class TestCoinGeckoClient(unittest.TestCase):
         expected_params = {"vs_currency": "usd", "days": 2, "interval": "30m"}
         expected_headers = {"X-Cg-Pro-Api-Key": config["api_keys"]["coingecko"]}
         mock_get.assert_called_once_with(
-            expected_url, params=expected_params, headers=expected_headers
+            expected_url,
+            params=expected_params,
+            headers=expected_headers,
+            timeout=self.client.transport.timeout,
+        )
+
+    @patch("src.data_collection.http_transport.requests.Session.get")
+    def test_get_historical_market_data_range(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"prices": []}
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+        start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+        self.client.get_historical_market_data(
+            start_time=start, end_time=start + timedelta(days=30)
+        )
+
+        mock_get.assert_called_once_with(
+            f"{config['api_endpoints']['coingecko']}/coins/ripple/market_chart/range",
+            params={"vs_currency": "usd", "from": 1672531200, "to": 1675123200},
+            headers={"X-Cg-Pro-Api-Key": config["api_keys"]["coingecko"]},
+            timeout=self.client.transport.timeout,
+        )
+
+    @patch("src.data_collection.http_transport.requests.Session.get")
+    def test_get_markets_requests_all_ids_at_once(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.json.return_value = [{"id": "ripple"}, {"id": "stellar"}]
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+
+        result = self.client.get_markets(["ripple", "stellar"], "eur")
+
+        self.assertEqual(len(result), 2)
+        mock_get.assert_called_once_with(
+            f"{config['api_endpoints']['coingecko']}/coins/markets",
+            params={"vs_currency": "eur", "ids": "ripple,stellar"},
+            headers={"X-Cg-Pro-Api-Key": config["api_keys"]["coingecko"]},
+            timeout=self.client.transport.timeout,
         )
 
-    @patch("src.data_collection.coingecko_client.requests.get")
+    @patch("src.data_collection.http_transport.requests.Session.get")
+    def test_get_changed_markets_polls_conditionally(self, mock_get):
+        client = CoinGeckoClient(fetch_cache=FetchCache(), rate_limiter=MagicMock())
+        fresh = MagicMock(status_code=200, headers={"ETag": 'W/"abc"'})
+        fresh.json.return_value = [
+            {"id": "ripple", "last_updated": "2023-07-01T12:00:00Z"},
+            {"id": "stellar", "last_updated": "2023-07-01T12:00:00Z"},
+        ]
+        not_modified = MagicMock(status_code=304, headers={})
+        mock_get.side_effect = [fresh, not_modified]
+
+        first = client.get_changed_markets(["ripple", "stellar"])
+        second = client.get_changed_markets(["ripple", "stellar"])
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(second, [])
+        not_modified.json.assert_not_called()
+        self.assertEqual(
+            mock_get.call_args_list[1].kwargs["headers"]["If-None-Match"], 'W/"abc"'
+        )
+        stats = client.fetch_cache.stats()
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertEqual(stats["skip_rate"], 0.5)
+
+    @patch("src.data_collection.http_transport.requests.Session.get")
+    def test_get_changed_markets_skips_same_last_updated(self, mock_get):
+        client = CoinGeckoClient(fetch_cache=FetchCache(), rate_limiter=MagicMock())
+        response = MagicMock(status_code=200, headers={})
+        response.json.side_effect = [
+            [{"id": "ripple", "last_updated": "2023-07-01T12:00:00Z"}],
+            [{"id": "ripple", "last_updated": "2023-07-01T12:00:00Z"}],
+            [{"id": "ripple", "last_updated": "2023-07-01T12:30:00Z"}],
+        ]
+        mock_get.return_value = response
+
+        results = [client.get_changed_markets(["ripple"]) for _ in range(3)]
+
+        self.assertEqual([len(result) for result in results], [1, 0, 1])
+        self.assertNotIn("If-None-Match", mock_get.call_args.kwargs["headers"])
+        self.assertEqual(client.fetch_cache.stats()["skipped"], 1)
+
+        client.fetch_cache.forget("usd", results[2])
+        response.json.side_effect = [
+            [{"id": "ripple", "last_updated": "2023-07-01T12:30:00Z"}]
+        ]
+        self.assertEqual(len(client.get_changed_markets(["ripple"])), 1)
+
+    @patch("src.data_collection.http_transport.requests.Session.get")
     def test_get_market_data_error(self, mock_get):
         # Mock the response to raise an exception
         mock_get.side_effect = Exception("API Error")
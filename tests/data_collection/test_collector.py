@@ -5,8 +5,12 @@ from src.data_collection.collector import (
     collect_and_store_market_data,
     collect_and_store_ohlcv_data,
     collect_historical_data,
+    parse_markets,
+    parse_ohlcv_candles,
     run_data_collection,
 )
+from src.data_collection.symbols import DEFAULT_MARKET, Market
+from src.models.ohlcv_data_15_min import OHLCVData15Min
 
 
 class TestCollector(unittest.TestCase):
@@ -17,40 +21,109 @@ class TestCollector(unittest.TestCase):
         """
 
         self.mock_db = MagicMock()
+        self.budget = MagicMock()
+        self.budget.try_reserve.return_value = True
 
+    @patch("src.data_collection.collector.upsert_rows")
     @patch("src.data_collection.collector.CoinGeckoClient")
-    def test_collect_and_store_market_data(self, mock_coingecko):
+    def test_collect_and_store_market_data(self, mock_coingecko, mock_upsert_rows):
         mock_coingecko_instance = mock_coingecko.return_value
-        mock_coingecko_instance.get_market_data.return_value = {
-            "last_updated": "2023-07-01T12:00:00Z",
-            "market_data": {
-                "current_price": {"usd": 1.0},
-                "market_cap": {"usd": 1000000},
-                "total_volume": {"usd": 500000},
-                "circulating_supply": 50000,
-                "total_supply": 100000,
-                "max_supply": 100000000,
-            },
-        }
+        mock_coingecko_instance.get_changed_markets.side_effect = lambda ids, quote: [
+            self._coingecko_market(price=1.0 if quote == "usd" else 0.9)
+        ]
+        markets = [
+            DEFAULT_MARKET,
+            Market("KRAKEN", "XRP_USD"),
+            Market("KRAKEN", "XRP_EUR"),
+        ]
 
         # Call the function with the mocked client
-        collect_and_store_market_data(self.mock_db, mock_coingecko_instance)
+        collect_and_store_market_data(self.mock_db, mock_coingecko_instance, markets)
 
-        # Assert that the database session methods were called
-        self.mock_db.add.assert_called_once()
+        # One multi-id request per quote currency, upserted and committed together
+        self.assertEqual(
+            [
+                c.args
+                for c in mock_coingecko_instance.get_changed_markets.call_args_list
+            ],
+            [(["ripple"], "usd"), (["ripple"], "eur")],
+        )
+        self.assertEqual(mock_upsert_rows.call_count, 2)
+        usd, eur = (c.args[2] for c in mock_upsert_rows.call_args_list)
+        self.assertEqual(
+            usd["timestamp"], [datetime(2023, 7, 1, 12, tzinfo=timezone.utc)]
+        )
+        self.assertEqual(usd["price_usd"], [1.0])
+        self.assertEqual(eur["symbol"], ["XRP_EUR"])
+        self.assertEqual(eur["exchange"], ["COINGECKO"])
         self.mock_db.commit.assert_called_once()
 
+    @patch("src.data_collection.collector.upsert_rows")
+    def test_collect_and_store_market_data_skips_unchanged(self, mock_upsert_rows):
+        client = MagicMock()
+        client.get_changed_markets.return_value = []
+
+        collect_and_store_market_data(self.mock_db, client, [DEFAULT_MARKET])
+
+        mock_upsert_rows.assert_not_called()
+        client.fetch_cache.stats.assert_called_once()
+
+    @patch("src.data_collection.collector.upsert_rows")
+    def test_collect_and_store_market_data_forgets_failed_snapshots(
+        self, mock_upsert_rows
+    ):
+        client = MagicMock()
+        client.get_changed_markets.return_value = [self._coingecko_market()]
+        mock_upsert_rows.side_effect = RuntimeError("disk full")
+
+        with self.assertRaises(RuntimeError):
+            collect_and_store_market_data(self.mock_db, client, [DEFAULT_MARKET])
+
+        # The snapshot must not count as seen, or the next poll would skip it
+        client.fetch_cache.forget.assert_called_once_with(
+            "usd", [self._coingecko_market()]
+        )
+        self.mock_db.rollback.assert_called_once()
+
+    @staticmethod
+    def _coingecko_market(price=1.0):
+        return {
+            "id": "ripple",
+            "last_updated": "2023-07-01T12:00:00.000Z",
+            "current_price": price,
+            "market_cap": 1000000,
+            "total_volume": 500000,
+            "circulating_supply": 50000,
+            "total_supply": 100000,
+            "max_supply": 100000000,
+        }
+
+    def test_parse_markets(self):
+        columns = parse_markets([self._coingecko_market()], "USD")
+
+        self.assertEqual(columns["exchange"], ["COINGECKO"])
+        self.assertEqual(columns["symbol"], ["XRP_USD"])
+        self.assertEqual(columns["market_cap"], [1000000])
+        self.assertEqual(columns["max_supply"], [100000000])
+
+    @patch("src.data_collection.collector.update_streaming_indicators")
+    @patch("src.data_collection.collector.upsert_rows")
     @patch("src.data_collection.collector.CoinAPIClient")
-    def test_collect_and_store_ohlcv_data(self, mock_coinapi):
+    def test_collect_and_store_ohlcv_data(
+        self, mock_coinapi, mock_upsert_rows, mock_update_indicators
+    ):
         """
         Test the collect_and_store_ohlcv_data function.
 
         This test mocks the CoinAPIClient to return predefined OHLCV data,
         calls the collect_and_store_ohlcv_data function, and verifies that
-        the mock database's add and commit methods were called as expected.
+        the candle was written through the bulk writer, its indicators were
+        updated in the same transaction, and it was committed once.
 
         Args:
             mock_coinapi: A mocked CoinAPIClient object.
+            mock_upsert_rows: A mocked upsert_rows function.
+            mock_update_indicators: A mocked update_streaming_indicators function.
         """
         # Mock the CoinAPIClient
         mock_coinapi_instance = mock_coinapi.return_value
@@ -67,28 +140,39 @@ class TestCollector(unittest.TestCase):
         ]
 
         # Call the function
-        collect_and_store_ohlcv_data(self.mock_db)
+        collect_and_store_ohlcv_data(
+            self.mock_db, market=Market("KRAKEN", "XRP_EUR"), budget=self.budget
+        )
 
-        # Assert that the database session methods were called
-        self.mock_db.add.assert_called_once()
+        # Assert that the batch was bulk written and committed
+        mock_coinapi_instance.get_ohlcv_data.assert_called_once_with(
+            "KRAKEN_SPOT_XRP_EUR"
+        )
+        mock_upsert_rows.assert_called_once()
+        db, model, columns = mock_upsert_rows.call_args[0]
+        self.assertIs(model, OHLCVData15Min)
+        self.assertEqual(columns["close"], [1.05])
+        self.assertEqual(columns["exchange"], ["KRAKEN"])
+        self.assertEqual(columns["symbol"], ["XRP_EUR"])
+        mock_update_indicators.assert_called_once_with(
+            self.mock_db, columns["timestamp"], [1.05], "KRAKEN", "XRP_EUR"
+        )
+        self.mock_db.add.assert_not_called()
         self.mock_db.commit.assert_called_once()
 
-    @patch("src.data_collection.collector.CoinAPIClient")
-    def test_collect_historical_data(self, mock_coinapi):
-        """
-        Test the collect_historical_data function.
+    @patch("src.data_collection.collector.upsert_rows")
+    def test_collect_and_store_ohlcv_data_skips_without_credits(self, mock_upsert_rows):
+        client = MagicMock()
+        self.budget.try_reserve.return_value = False
 
-        This test mocks the CoinAPIClient to return historical OHLCV data,
-        calls the collect_historical_data function with specific start and end dates,
-        and verifies that the mock database's add method was called the expected
-        number of times and that commit was called once.
+        collect_and_store_ohlcv_data(self.mock_db, client, budget=self.budget)
 
-        Args:
-            mock_coinapi: A mocked CoinAPIClient object.
-        """
-        # Mock the CoinAPIClient
-        mock_coinapi_instance = mock_coinapi.return_value
-        mock_data = [
+        client.get_ohlcv_data.assert_not_called()
+        mock_upsert_rows.assert_not_called()
+
+    @staticmethod
+    def _historical_candles():
+        return [
             {
                 "time_period_end": f"2023-01-01T{hour:02d}:{minute:02d}:00Z",
                 "price_open": 1.0,
@@ -101,39 +185,156 @@ class TestCollector(unittest.TestCase):
             for hour in range(24)
             for minute in range(0, 60, 15)
         ]
-        mock_coinapi_instance.get_historical_ohlcv_data.return_value = mock_data[
-            :96
-        ]  # Return only 96 data points
+
+    @patch("src.data_collection.collector.CoinAPIClient")
+    def test_collect_historical_data(self, mock_coinapi):
+        """
+        Test the collect_historical_data function with the ORM ingest path.
+
+        This test mocks the CoinAPIClient to return historical OHLCV data,
+        calls the collect_historical_data function with specific start and end dates,
+        and verifies that the mock database's add method was called the expected
+        number of times and that commit was called once.
+
+        Args:
+            mock_coinapi: A mocked CoinAPIClient object.
+        """
+        # Mock the CoinAPIClient
+        mock_coinapi_instance = mock_coinapi.return_value
+        mock_coinapi_instance.get_historical_ohlcv_data.return_value = (
+            self._historical_candles()[:96]
+        )  # Return only 96 data points
 
         # Call the function
         start_date = datetime(2023, 1, 1, tzinfo=timezone.utc)
         end_date = datetime(2023, 1, 2, tzinfo=timezone.utc)
-        collect_historical_data(self.mock_db, start_date, end_date)
+        collect_historical_data(self.mock_db, start_date, end_date, bulk=False)
 
         # Assert that the database session methods were called
         self.assertEqual(self.mock_db.add.call_count, 96)  # Expect 96 calls
         self.mock_db.commit.assert_called_once()
 
+    @patch("src.data_collection.collector.upsert_rows")
+    @patch("src.data_collection.collector.CoinAPIClient")
+    def test_collect_historical_data_bulk(self, mock_coinapi, mock_upsert_rows):
+        """
+        Test that collect_historical_data writes each page as one columnar batch.
+
+        Args:
+            mock_coinapi: A mocked CoinAPIClient object.
+            mock_upsert_rows: A mocked upsert_rows function.
+        """
+        mock_coinapi_instance = mock_coinapi.return_value
+        mock_coinapi_instance.get_historical_ohlcv_data.return_value = (
+            self._historical_candles()
+        )
+        mock_upsert_rows.return_value = 96
+
+        start_date = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        end_date = datetime(2023, 1, 2, tzinfo=timezone.utc)
+        stats = collect_historical_data(self.mock_db, start_date, end_date)
+
+        mock_upsert_rows.assert_called_once()
+        columns = mock_upsert_rows.call_args[0][2]
+        self.assertEqual(len(columns["timestamp"]), 96)
+        self.mock_db.add.assert_not_called()
+        self.mock_db.commit.assert_called_once()
+        self.assertEqual(stats["rows"], 96)
+        self.assertEqual(stats["pages"], 1)
+        self.assertGreater(stats["rows_per_sec"], 0)
+
+    def test_parse_ohlcv_candles(self):
+        """
+        Test that parse_ohlcv_candles produces aligned columns with UTC timestamps.
+        """
+        columns = parse_ohlcv_candles(
+            [
+                {
+                    "time_period_end": "2023-01-01T00:15:00.0000000Z",
+                    "price_open": 1.0,
+                    "price_high": 1.2,
+                    "price_low": 0.9,
+                    "price_close": 1.1,
+                    "volume_traded": 500.0,
+                    "trades_count": 3,
+                }
+            ]
+        )
+
+        self.assertEqual(
+            columns["timestamp"], [datetime(2023, 1, 1, 0, 15, tzinfo=timezone.utc)]
+        )
+        self.assertAlmostEqual(columns["price_change"][0], 0.1)
+        self.assertEqual(columns["trades_count"], [3])
+        self.assertEqual(columns["exchange"], ["BITSTAMP"])
+        self.assertEqual(columns["symbol"], ["XRP_USD"])
+
+    @patch("src.data_collection.collector.CreditLedger")
+    @patch("src.data_collection.collector.configured_markets")
+    @patch("src.data_collection.collector.refresh_rollups")
     @patch("src.data_collection.collector.collect_and_store_market_data")
     @patch("src.data_collection.collector.collect_and_store_ohlcv_data")
-    def test_run_data_collection(self, mock_collect_ohlcv, mock_collect_market):
+    def test_run_data_collection(
+        self,
+        mock_collect_ohlcv,
+        mock_collect_market,
+        mock_refresh_rollups,
+        mock_configured_markets,
+        mock_credit_ledger,
+    ):
         """
         Test the run_data_collection function.
 
         This test mocks both collect_and_store_market_data and collect_and_store_ohlcv_data functions,
         calls the run_data_collection function, and verifies that both mocked functions
-        were called once with the mock database and None for the client parameter.
+        were called with the mock database and None for the client parameter, OHLCV
+        once per configured market, and that the rollups were refreshed afterwards.
 
         Args:
             mock_collect_ohlcv: A mocked collect_and_store_ohlcv_data function.
             mock_collect_market: A mocked collect_and_store_market_data function.
+            mock_refresh_rollups: A mocked refresh_rollups function.
+            mock_configured_markets: A mocked configured_markets function.
+            mock_credit_ledger: A mocked CreditLedger class.
         """
+        markets = [DEFAULT_MARKET, Market("KRAKEN", "XRP_EUR")]
+        mock_configured_markets.return_value = markets
+
         # Call the function
         run_data_collection(self.mock_db)
 
         # Assert that both collection functions were called with the correct arguments
-        mock_collect_market.assert_called_once_with(self.mock_db, None)
-        mock_collect_ohlcv.assert_called_once_with(self.mock_db, None)
+        mock_collect_market.assert_called_once_with(self.mock_db, None, markets)
+        self.assertEqual(
+            [c.args for c in mock_collect_ohlcv.call_args_list],
+            [(self.mock_db, None, market) for market in markets],
+        )
+        # Every market reserves its credit on the same shared ledger
+        budget = mock_credit_ledger.from_config.return_value
+        for c in mock_collect_ohlcv.call_args_list:
+            self.assertIs(c.kwargs["budget"], budget)
+        mock_refresh_rollups.assert_called_once_with(self.mock_db)
+
+    @patch("src.data_collection.collector.CreditLedger")
+    @patch("src.data_collection.collector.refresh_rollups")
+    @patch("src.data_collection.collector.collect_and_store_market_data")
+    @patch("src.data_collection.collector.collect_and_store_ohlcv_data")
+    def test_run_data_collection_raises_errors(
+        self,
+        mock_collect_ohlcv,
+        mock_collect_market,
+        mock_refresh_rollups,
+        mock_credit_ledger,
+    ):
+        """
+        Test that run_data_collection logs and re-raises a failed collection, so
+        the scheduler can count it.
+        """
+        mock_collect_market.side_effect = RuntimeError("CoinGecko down")
+
+        with self.assertRaises(RuntimeError):
+            run_data_collection(self.mock_db)
+        mock_refresh_rollups.assert_not_called()
 
 
 if __name__ == "__main__":
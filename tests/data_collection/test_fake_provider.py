@@ -0,0 +1,197 @@
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import requests
+
+from src.data_collection.coinapi_client import CoinAPIClient
+from src.data_collection.coingecko_client import CoinGeckoClient, FetchCache
+from src.data_collection.collector import parse_market_data, parse_ohlcv_candles
+from src.data_collection.fake_provider import (
+    FakeProviderServer,
+    RecordedDataset,
+    SyntheticDataset,
+)
+from src.data_collection.http_transport import HTTPTransport
+from src.data_collection.response_cache import ResponseCache
+
+NOW = datetime(2024, 6, 1, 12, 7, tzinfo=timezone.utc)
+
+
+class TestFakeProviderServer(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.transport_sleep = MagicMock()
+        self.transport = HTTPTransport(max_retries=2, sleep=self.transport_sleep)
+
+    def start(self, **kwargs):
+        kwargs.setdefault("clock", NOW.timestamp)
+        server = FakeProviderServer(**kwargs).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def coinapi(self, server):
+        return CoinAPIClient(
+            transport=self.transport,
+            cache=ResponseCache(self.cache_dir.name),
+            rate_limiter=MagicMock(),
+            base_url=server.coinapi_url,
+        )
+
+    def coingecko(self, server):
+        return CoinGeckoClient(
+            transport=self.transport,
+            fetch_cache=FetchCache(),
+            cache=ResponseCache(self.cache_dir.name),
+            rate_limiter=MagicMock(),
+            base_url=server.coingecko_url,
+        )
+
+    def test_serves_ohlcv_history_up_to_now(self):
+        client = self.coinapi(self.start())
+
+        candles = client.get_historical_ohlcv_data(
+            datetime(2024, 6, 1, 6, tzinfo=timezone.utc),
+            datetime(2024, 6, 2, tzinfo=timezone.utc),
+        )
+
+        # 06:00 to the last closed candle ending 12:00
+        self.assertEqual(len(candles), 24)
+        columns = parse_ohlcv_candles(candles)
+        self.assertEqual(
+            columns["timestamp"][-1], datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+        )
+        for candle in candles:
+            self.assertGreaterEqual(
+                candle["price_high"], max(candle["price_open"], candle["price_close"])
+            )
+            self.assertLessEqual(
+                candle["price_low"], min(candle["price_open"], candle["price_close"])
+            )
+        # Consecutive candles join up
+        self.assertEqual(candles[0]["price_close"], candles[1]["price_open"])
+
+    def test_history_is_deterministic_and_limited(self):
+        client = self.coinapi(self.start())
+        start = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        end = datetime(2024, 5, 30, tzinfo=timezone.utc)
+
+        page = client.get_historical_ohlcv_data(start, end, limit=10)
+        overlapping = SyntheticDataset(clock=NOW.timestamp).ohlcv_history(
+            "BITSTAMP_SPOT_XRP_USD", 900, start.timestamp() + 900, None, 3
+        )
+
+        self.assertEqual(len(page), 10)
+        self.assertEqual(page[1:4], overlapping)
+
+    def test_serves_latest_candle(self):
+        client = self.coinapi(self.start())
+
+        (candle,) = client.get_ohlcv_data("KRAKEN_SPOT_XRP_EUR")
+
+        self.assertEqual(candle["time_period_end"], "2024-06-01T12:00:00.0000000Z")
+
+    def test_serves_coin_market_data(self):
+        server = self.start()
+        client = self.coingecko(server)
+
+        columns = parse_market_data(client.get_market_data())
+
+        self.assertEqual(
+            columns["timestamp"], [datetime(2024, 6, 1, 12, 7, tzinfo=timezone.utc)]
+        )
+        self.assertGreater(columns["price_usd"][0], 0)
+        self.assertEqual(server.counts, {200: 1})
+
+    def test_markets_answer_conditional_requests(self):
+        server = self.start()
+        client = self.coingecko(server)
+
+        first = client.get_changed_markets(["ripple", "bitcoin"], "eur")
+        second = client.get_changed_markets(["ripple", "bitcoin"], "eur")
+
+        self.assertEqual([market["id"] for market in first], ["ripple", "bitcoin"])
+        self.assertEqual(second, [])
+        self.assertEqual(server.counts, {200: 1, 304: 1})
+
+    def test_serves_market_chart_range(self):
+        client = self.coingecko(self.start())
+
+        chart = client.get_historical_market_data(
+            start_time=datetime(2024, 5, 1, tzinfo=timezone.utc),
+            end_time=datetime(2024, 5, 8, tzinfo=timezone.utc),
+        )
+
+        # Hourly points, both ends included
+        self.assertEqual(len(chart["prices"]), 7 * 24 + 1)
+        self.assertEqual(chart["prices"][1][0] - chart["prices"][0][0], 3_600_000)
+
+    def test_injected_rate_limits_honour_retry_after(self):
+        server = self.start(rate_limit_rate=1.0, retry_after=2)
+        client = self.coinapi(server)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            client.get_ohlcv_data()
+
+        self.assertEqual(server.counts, {429: 3})
+        self.transport_sleep.assert_called_with(2.0)
+
+    def test_injected_errors_are_retried(self):
+        server = self.start(error_rate=0.5, seed=3)
+        transport = HTTPTransport(max_retries=10, sleep=MagicMock())
+        client = CoinAPIClient(
+            transport=transport,
+            cache=ResponseCache(self.cache_dir.name),
+            rate_limiter=MagicMock(),
+            base_url=server.coinapi_url,
+        )
+
+        for _ in range(5):
+            self.assertEqual(len(client.get_ohlcv_data()), 1)
+
+        self.assertEqual(server.counts[200], 5)
+        self.assertGreater(sum(server.counts.values()), 5)
+
+    def test_latency_is_added_per_request(self):
+        sleep = MagicMock()
+        server = self.start(latency=0.25, sleep=sleep)
+
+        self.coinapi(server).get_ohlcv_data()
+
+        sleep.assert_called_once_with(0.25)
+
+    def test_replays_recorded_responses(self):
+        recorded_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(recorded_dir.cleanup)
+        params = {
+            "period_id": "15MIN",
+            "time_start": "2020-01-01T00:00:00+00:00",
+            "time_end": "2020-01-01T00:30:00+00:00",
+            "limit": 100,
+        }
+        ResponseCache(recorded_dir.name).put(
+            "https://rest.coinapi.io/v1/ohlcv/BITSTAMP_SPOT_XRP_USD/history",
+            params,
+            [{"recorded": True}],
+        )
+        server = self.start(recorded=RecordedDataset(recorded_dir.name))
+
+        page = self.coinapi(server).get_historical_ohlcv_data(
+            datetime(2020, 1, 1, tzinfo=timezone.utc),
+            datetime(2020, 1, 1, 0, 30, tzinfo=timezone.utc),
+        )
+
+        self.assertEqual(page, [{"recorded": True}])
+
+    def test_unknown_endpoints_are_404(self):
+        server = self.start()
+
+        response = requests.get(f"{server.coingecko_url}/ping", timeout=5)
+
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
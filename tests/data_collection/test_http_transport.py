@@ -0,0 +1,229 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from src.data_collection.http_transport import (
+    CircuitBreaker,
+    CircuitOpenError,
+    HTTPTransport,
+    LatencyHistogram,
+    parse_retry_after,
+)
+
+
+def make_response(status_code, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class TestHTTPTransport(unittest.TestCase):
+    def setUp(self):
+        """
+        Build a transport around a mocked session with sleeping disabled.
+        """
+        self.session = MagicMock()
+        self.sleeps = []
+        self.transport = HTTPTransport(
+            max_retries=3,
+            backoff_base=0.5,
+            backoff_max=10.0,
+            failure_threshold=3,
+            reset_timeout=60.0,
+            session=self.session,
+            sleep=self.sleeps.append,
+        )
+
+    def test_get_passes_timeout(self):
+        self.session.get.return_value = make_response(200)
+
+        response = self.transport.get("https://api.example.com/x", params={"a": 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.session.get.assert_called_once_with(
+            "https://api.example.com/x",
+            params={"a": 1},
+            headers=None,
+            timeout=self.transport.timeout,
+        )
+        self.assertEqual(self.sleeps, [])
+
+    def test_retries_server_errors_with_backoff(self):
+        self.session.get.side_effect = [
+            make_response(503),
+            make_response(502),
+            make_response(200),
+        ]
+
+        response = self.transport.get("https://api.example.com/x")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.session.get.call_count, 3)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertLessEqual(self.sleeps[0], 0.5)
+        self.assertLessEqual(self.sleeps[1], 1.0)
+
+    def test_honours_retry_after(self):
+        self.session.get.side_effect = [
+            make_response(429, {"Retry-After": "7"}),
+            make_response(200),
+        ]
+
+        self.transport.get("https://api.example.com/x")
+
+        self.assertEqual(self.sleeps, [7.0])
+
+    def test_retry_after_is_capped(self):
+        self.session.get.side_effect = [
+            make_response(429, {"Retry-After": "3600"}),
+            make_response(200),
+        ]
+
+        self.transport.get("https://api.example.com/x")
+
+        self.assertEqual(self.sleeps, [10.0])
+
+    def test_returns_last_response_when_retries_exhausted(self):
+        self.transport.failure_threshold = 10
+        self.session.get.return_value = make_response(500)
+
+        response = self.transport.get("https://api.example.com/x")
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.session.get.call_count, 4)
+
+    def test_does_not_retry_client_errors(self):
+        self.session.get.return_value = make_response(404)
+
+        response = self.transport.get("https://api.example.com/x")
+
+        self.assertEqual(response.status_code, 404)
+        self.session.get.assert_called_once()
+
+    def test_raises_connection_error_after_retries(self):
+        self.transport.failure_threshold = 10
+        self.session.get.side_effect = requests.exceptions.ConnectionError("boom")
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.transport.get("https://down.example.com/x")
+
+        self.assertEqual(self.session.get.call_count, 4)
+
+    def test_circuit_opens_per_host(self):
+        self.session.get.side_effect = requests.exceptions.Timeout("slow")
+        with self.assertRaises(CircuitOpenError):
+            self.transport.get("https://down.example.com/x")
+        self.assertEqual(self.session.get.call_count, 3)  # opened after 3 failures
+
+        self.session.get.reset_mock()
+        with self.assertRaises(CircuitOpenError):
+            self.transport.get("https://down.example.com/y")
+        self.session.get.assert_not_called()
+
+        self.session.get.side_effect = None
+        self.session.get.return_value = make_response(200)
+        self.assertEqual(
+            self.transport.get("https://up.example.com/x").status_code, 200
+        )
+        self.assertEqual(
+            self.transport.circuit_states(),
+            {"down.example.com": "open", "up.example.com": "closed"},
+        )
+
+    def test_latency_histograms_per_host(self):
+        self.session.get.return_value = make_response(200)
+
+        self.transport.get("https://api.example.com/x")
+        self.transport.get("https://api.example.com/y")
+
+        histograms = self.transport.latency_histograms()
+        self.assertEqual(histograms["api.example.com"]["count"], 2)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_half_open_after_reset_timeout(self):
+        now = [0.0]
+        breaker = CircuitBreaker(
+            failure_threshold=2, reset_timeout=30, clock=lambda: now[0]
+        )
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow_request())
+
+        now[0] = 31.0
+        self.assertEqual(breaker.state, "half_open")
+        self.assertTrue(breaker.allow_request())
+
+        # A failed trial re-opens immediately
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+        now[0] = 62.0
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_half_open_admits_a_single_trial(self):
+        now = [0.0]
+        breaker = CircuitBreaker(
+            failure_threshold=1, reset_timeout=30, clock=lambda: now[0]
+        )
+        breaker.record_failure()
+        now[0] = 31.0
+
+        admitted = []
+        barrier = threading.Barrier(8)
+
+        def caller():
+            barrier.wait()
+            admitted.append(breaker.allow_request())
+
+        threads = [threading.Thread(target=caller) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(admitted), [False] * 7 + [True])
+        self.assertFalse(breaker.allow_request())
+
+        # A trial without a verdict, e.g. a 429, lets the next one through
+        breaker.release()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertTrue(breaker.allow_request())
+        self.assertTrue(breaker.allow_request())
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_quantiles(self):
+        histogram = LatencyHistogram(buckets=(10, 100, 1000))
+        for seconds in (0.005, 0.005, 0.05, 0.5, 5.0):
+            histogram.observe(seconds)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 5)
+        self.assertEqual(
+            snapshot["buckets"],
+            {"le_10ms": 2, "le_100ms": 1, "le_1000ms": 1, "overflow": 1},
+        )
+        self.assertEqual(snapshot["p50_ms"], 100.0)
+        self.assertEqual(snapshot["p95_ms"], 5000.0)
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_seconds_and_dates(self):
+        self.assertEqual(parse_retry_after("12"), 12.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from src.data_collection.market_backfill import (
+    align_asof,
+    bucket_grid,
+    parse_market_chart,
+    repair_market_gaps,
+    run_market_backfill,
+)
+from src.models.base import engine
+from src.models.market_data_15_min import MarketData15Min
+
+
+def to_ms(timestamp):
+    return int(timestamp.timestamp() * 1000)
+
+
+def make_chart(start, end, step=timedelta(hours=1), jitter=timedelta(seconds=37)):
+    """Build a market_chart response with points slightly after each step."""
+    prices, market_caps, total_volumes = [], [], []
+    timestamp = start
+    while timestamp <= end:
+        price = 0.5 + (timestamp - start) / timedelta(days=1)
+        point = to_ms(timestamp + jitter)
+        prices.append([point, price])
+        market_caps.append([point, price * 50_000_000_000])
+        total_volumes.append([point, 1_000_000.0])
+        timestamp += step
+    return {
+        "prices": prices,
+        "market_caps": market_caps,
+        "total_volumes": total_volumes,
+    }
+
+
+class TestMarketChartAlignment(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+    def test_bucket_grid_is_period_ends(self):
+        grid = bucket_grid(self.start, self.start + timedelta(hours=1))
+
+        self.assertEqual(len(grid), 4)
+        self.assertEqual(
+            grid[0], np.datetime64(self.start.replace(tzinfo=None), "ms") + 15 * 60000
+        )
+        self.assertEqual(grid[-1], np.datetime64("2023-01-01T01:00", "ms"))
+
+    def test_align_asof_takes_latest_point_at_or_before_bucket(self):
+        grid = bucket_grid(self.start, self.start + timedelta(hours=2))
+        times = [to_ms(self.start), to_ms(self.start + timedelta(minutes=45))]
+
+        aligned = align_asof(times, [1.0, 2.0], grid)
+
+        np.testing.assert_array_equal(aligned[:4], [1.0, 1.0, 2.0, 2.0])
+
+    def test_align_asof_leaves_stale_buckets_empty(self):
+        grid = bucket_grid(self.start, self.start + timedelta(hours=4))
+        times = [to_ms(self.start), to_ms(self.start + timedelta(hours=1))]
+
+        aligned = align_asof(times, [1.0, 2.0], grid)
+
+        # Hourly points are good for an hour; nothing is carried past that
+        self.assertTrue(np.all(aligned[:7] > 0))
+        self.assertTrue(np.all(np.isnan(aligned[8:])))
+
+    def test_parse_market_chart_derives_supply(self):
+        end = self.start + timedelta(hours=2)
+        chart = make_chart(self.start - timedelta(hours=1), end)
+
+        columns = parse_market_chart(
+            chart, self.start, end, {"total_supply": 1e11, "max_supply": 1e11}
+        )
+
+        self.assertEqual(len(columns["timestamp"]), 8)
+        self.assertEqual(columns["timestamp"][-1], end)
+        self.assertEqual(set(columns["exchange"]), {"COINGECKO"})
+        self.assertEqual(set(columns["symbol"]), {"XRP_USD"})
+        for supply in columns["circulating_supply"]:
+            self.assertAlmostEqual(supply, 50_000_000_000)
+        self.assertEqual(set(columns["total_supply"]), {1e11})
+
+    def test_parse_market_chart_skips_incomplete_buckets(self):
+        end = self.start + timedelta(hours=2)
+        chart = make_chart(self.start - timedelta(hours=1), end)
+        chart["total_volumes"] = chart["total_volumes"][:2]
+
+        columns = parse_market_chart(chart, self.start, end)
+
+        # The last volume point is just after 00:00 and covers only the next hour
+        self.assertEqual(len(columns["timestamp"]), 4)
+        self.assertEqual(columns["total_supply"], columns["circulating_supply"])
+
+
+class TestMarketBackfillStorage(unittest.TestCase):
+    """
+    Storage tests run against the real database, because pages are committed.
+    """
+
+    start = datetime(2018, 6, 1, tzinfo=timezone.utc)
+    end = start + timedelta(days=3)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.Session = sessionmaker(bind=engine)
+
+    def setUp(self):
+        self.session = self.Session()
+        self.client = MagicMock()
+        self.client.get_markets.return_value = [
+            {"id": "ripple", "total_supply": 1e11, "max_supply": 1e11}
+        ]
+        self.client.get_historical_market_data.side_effect = (
+            lambda start_time, end_time, **kwargs: make_chart(start_time, end_time)
+        )
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.query(MarketData15Min).filter(
+            MarketData15Min.timestamp.between(self.start, self.end)
+        ).delete()
+        self.session.commit()
+        self.session.close()
+
+    def stored(self):
+        return (
+            self.session.query(MarketData15Min)
+            .filter(MarketData15Min.timestamp > self.start)
+            .filter(MarketData15Min.timestamp <= self.end)
+            .count()
+        )
+
+    def test_backfill_stores_one_page_per_request(self):
+        stats = run_market_backfill(
+            self.session,
+            self.start,
+            self.end,
+            coingecko_client=self.client,
+            buckets_per_page=96,
+        )
+
+        self.assertEqual(stats["pages"], 3)
+        self.assertEqual(stats["rows"], 3 * 96)
+        self.assertEqual(stats["empty_buckets"], 0)
+        self.assertEqual(self.stored(), 3 * 96)
+        first_call = self.client.get_historical_market_data.call_args_list[0]
+        self.assertEqual(
+            first_call.kwargs["start_time"], self.start - timedelta(hours=1)
+        )
+
+        # Re-running overwrites rather than duplicates
+        run_market_backfill(
+            self.session,
+            self.start,
+            self.end,
+            coingecko_client=self.client,
+            buckets_per_page=96,
+        )
+        self.assertEqual(self.stored(), 3 * 96)
+
+    def test_repair_market_gaps_fetches_only_missing_pages(self):
+        run_market_backfill(
+            self.session, self.start, self.end, coingecko_client=self.client
+        )
+        hole_start = self.start + timedelta(days=1)
+        self.session.query(MarketData15Min).filter(
+            MarketData15Min.timestamp.between(
+                hole_start, hole_start + timedelta(hours=2)
+            )
+        ).delete()
+        self.session.commit()
+        self.client.get_historical_market_data.reset_mock()
+        first_bucket = self.start + timedelta(minutes=15)
+
+        stats = repair_market_gaps(
+            self.session, first_bucket, self.end, coingecko_client=self.client
+        )
+
+        self.assertEqual(self.client.get_historical_market_data.call_count, 1)
+        self.assertEqual(stats["rows"], 9)
+        self.assertEqual(self.stored(), 3 * 96)
+        self.assertIsNone(
+            repair_market_gaps(
+                self.session, first_bucket, self.end, coingecko_client=self.client
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import threading
+import time
+import unittest
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from sqlalchemy import delete
+
+from src.data_collection.coinapi_client import CoinAPIClient
+from src.data_collection.rate_limits import (
+    COINAPI,
+    CreditLedger,
+    TokenBucket,
+    quota_enabled,
+)
+from src.models.api_credit_ledger import APICreditLedger
+from src.models.api_rate_bucket import APIRateBucket
+from src.models.base import engine
+
+
+class TestCreditLedger(unittest.TestCase):
+    """
+    Ledger tests run against the real database, because reservations commit.
+    """
+
+    def setUp(self):
+        self.provider = f"test_{uuid.uuid4().hex[:8]}"
+        self.now = datetime(2001, 1, 1, 6, tzinfo=timezone.utc)
+
+    def tearDown(self):
+        with engine.begin() as connection:
+            connection.execute(
+                delete(APICreditLedger).where(APICreditLedger.provider == self.provider)
+            )
+
+    def make_ledger(self, limit):
+        return CreditLedger(self.provider, limit, clock=lambda: self.now)
+
+    def test_reservations_never_overrun_the_limit(self):
+        # Two ledgers stand in for the collector and a backfill in other processes
+        ledgers = [self.make_ledger(10), self.make_ledger(10)]
+        granted = []
+
+        def reserve(ledger):
+            for _ in range(10):
+                if ledger.try_reserve(1):
+                    granted.append(1)
+
+        threads = [
+            threading.Thread(target=reserve, args=(ledgers[i % 2],)) for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(granted), 10)
+        self.assertEqual(ledgers[0].used, 10)
+        self.assertEqual(ledgers[1].remaining, 0)
+        self.assertFalse(ledgers[0].try_reserve(1))
+
+    def test_budget_resets_daily(self):
+        ledger = self.make_ledger(3)
+        self.assertTrue(ledger.try_reserve(3))
+        self.assertFalse(ledger.try_reserve(1))
+
+        self.now = datetime(2001, 1, 2, tzinfo=timezone.utc)
+        self.assertEqual(ledger.remaining, 3)
+        self.assertTrue(ledger.try_reserve(1))
+
+    def test_forecast_exhaustion(self):
+        ledger = self.make_ledger(100)
+        ledger.try_reserve(50)
+
+        forecast = ledger.forecast()
+
+        # 50 credits in 6 hours leaves 6 more hours at the same rate
+        self.assertAlmostEqual(forecast["credits_per_hour"], 50 / 6)
+        self.assertEqual(forecast["remaining"], 50)
+        self.assertEqual(
+            forecast["exhausted_at"], datetime(2001, 1, 1, 12, tzinfo=timezone.utc)
+        )
+
+        ledger.limit = 1000
+        self.assertIsNone(ledger.forecast()["exhausted_at"])
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.provider = f"test_{uuid.uuid4().hex[:8]}"
+
+    def tearDown(self):
+        with engine.begin() as connection:
+            connection.execute(
+                delete(APIRateBucket).where(APIRateBucket.provider == self.provider)
+            )
+
+    def test_allows_burst_then_waits_for_refill(self):
+        bucket = TokenBucket(self.provider, rate=1, capacity=2)
+
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertEqual(bucket.try_acquire(), 0)
+        delay = bucket.try_acquire()
+
+        self.assertGreater(delay, 0.9)
+        self.assertLessEqual(delay, 1.0)
+
+    def test_acquire_sleeps_until_a_token_is_due(self):
+        bucket = TokenBucket(self.provider, rate=20, capacity=1)
+        other_process = TokenBucket(self.provider, rate=20, capacity=1)
+
+        started = time.perf_counter()
+        bucket.acquire()
+        waited = other_process.acquire()
+
+        self.assertGreater(waited, 0)
+        self.assertGreaterEqual(time.perf_counter() - started, 0.04)
+
+    def test_unconfigured_provider_is_unlimited(self):
+        self.assertIsNone(TokenBucket.from_config(self.provider, {}))
+        bucket = TokenBucket.from_config(
+            self.provider, {"requests_per_minute": 30, "burst": 5}
+        )
+        self.assertEqual(bucket.rate, 0.5)
+        self.assertEqual(bucket.capacity, 5)
+
+
+class TestQuotaSwitches(unittest.TestCase):
+    """
+    Base URL overrides and ``rate_limits.enabled`` keep test traffic off the
+    production quotas.
+    """
+
+    def patch_config(self, overrides=None, enabled=True):
+        rate_limits = {
+            "enabled": enabled,
+            COINAPI: {"requests_per_minute": 60, "burst": 5},
+        }
+        patcher = patch.dict(
+            "src.data_collection.rate_limits.config",
+            {
+                "rate_limits": rate_limits,
+                "api_endpoint_overrides": overrides or {},
+            },
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_production_quotas_apply_by_default(self):
+        self.patch_config()
+
+        self.assertTrue(quota_enabled(COINAPI))
+        self.assertIsNotNone(TokenBucket.from_config(COINAPI))
+        ledger = CreditLedger.from_config(COINAPI)
+        self.assertEqual(ledger.provider, COINAPI)
+        self.assertIsNotNone(ledger.limit)
+
+    def test_base_url_override_skips_the_production_quotas(self):
+        self.patch_config({COINAPI: "http://127.0.0.1:8765/coinapi/v1"})
+
+        self.assertFalse(quota_enabled(COINAPI))
+        self.assertTrue(quota_enabled("coingecko"))
+        self.assertIsNone(TokenBucket.from_config(COINAPI))
+        ledger = CreditLedger.from_config(COINAPI)
+        self.assertEqual(ledger.provider, "coinapi@127.0.0.1:8765")
+        self.assertIsNone(ledger.limit)
+
+    def test_quotas_can_be_switched_off(self):
+        self.patch_config(enabled=False)
+
+        self.assertIsNone(TokenBucket.from_config(COINAPI))
+        ledger = CreditLedger.from_config(COINAPI)
+        self.assertEqual(ledger.provider, COINAPI)
+        self.assertIsNone(ledger.limit)
+
+    @patch("src.data_collection.coinapi_client.get_rate_limiter")
+    def test_client_pointed_elsewhere_is_not_rate_limited(self, mock_get_limiter):
+        client = CoinAPIClient(base_url="http://127.0.0.1:8765/coinapi/v1")
+        self.assertIsNone(client.rate_limiter)
+        mock_get_limiter.assert_not_called()
+
+        self.assertIs(CoinAPIClient().rate_limiter, mock_get_limiter.return_value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+from src.data_collection.response_cache import CacheMissError, ResponseCache
+
+ENDPOINT = "https://rest.coinapi.io/v1/ohlcv/BITSTAMP_SPOT_XRP_USD/history"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.clock = FakeClock()
+        self.cache = ResponseCache(self.directory.name, clock=self.clock)
+
+    def test_key_ignores_param_order(self):
+        self.assertEqual(
+            ResponseCache.key(ENDPOINT, {"a": 1, "b": 2}),
+            ResponseCache.key(ENDPOINT, {"b": 2, "a": 1}),
+        )
+        self.assertNotEqual(
+            ResponseCache.key(ENDPOINT, {"a": 1}), ResponseCache.key(ENDPOINT, {"a": 2})
+        )
+
+    def test_open_entries_expire(self):
+        self.cache.put(ENDPOINT, {"page": 1}, [1, 2, 3], ttl=60)
+        self.cache.put(ENDPOINT, {"page": 0}, [0], ttl=None)
+
+        self.clock.now += 59
+        self.assertEqual(self.cache.get(ENDPOINT, {"page": 1}), [1, 2, 3])
+        self.clock.now += 1
+        self.assertIsNone(self.cache.get(ENDPOINT, {"page": 1}))
+
+        self.clock.now += 365 * 86400
+        self.assertEqual(self.cache.get(ENDPOINT, {"page": 0}), [0])
+        self.assertEqual(self.cache.stats()["hits"], 2)
+
+    def test_evicts_least_recently_used(self):
+        for page in range(3):
+            self.clock.now += 1
+            self.cache.put(ENDPOINT, {"page": page}, ["x" * 100])
+        entry_size = self.cache.stats()["bytes"] // 3
+        self.cache.max_bytes = entry_size * 3
+
+        # Reading page 0 makes page 1 the least recently used
+        self.clock.now += 1
+        self.cache.get(ENDPOINT, {"page": 0})
+        self.clock.now += 1
+        self.cache.put(ENDPOINT, {"page": 3}, ["x" * 100])
+
+        self.assertIsNone(self.cache.get(ENDPOINT, {"page": 1}))
+        for page in (0, 2, 3):
+            self.assertIsNotNone(self.cache.get(ENDPOINT, {"page": page}))
+        self.assertLessEqual(self.cache.stats()["bytes"], self.cache.max_bytes)
+
+    def test_fetch_requests_only_on_miss(self):
+        calls = []
+
+        def request():
+            calls.append(1)
+            return {"prices": []}
+
+        self.cache.fetch(ENDPOINT, {}, request)
+        self.assertEqual(self.cache.fetch(ENDPOINT, {}, request), {"prices": []})
+        self.assertEqual(len(calls), 1)
+
+    def test_offline_serves_only_from_cache(self):
+        self.cache.put(ENDPOINT, {"page": 0}, [0])
+        offline = ResponseCache(self.directory.name, offline=True)
+
+        self.assertEqual(offline.fetch(ENDPOINT, {"page": 0}, None), [0])
+        with self.assertRaises(CacheMissError):
+            offline.fetch(ENDPOINT, {"page": 1}, self.fail)
+
+    def test_disabled_in_config(self):
+        self.assertIsNone(ResponseCache.from_config({"enabled": False}))
+        cache = ResponseCache.from_config(
+            {"directory": self.directory.name, "max_megabytes": 1}
+        )
+        self.assertEqual(cache.max_bytes, 1024 * 1024)
+        self.assertFalse(os.listdir(self.directory.name))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import patch
+
+from src.data_collection.symbols import (
+    DEFAULT_MARKET,
+    Market,
+    configured_markets,
+    markets_by_quote,
+)
+
+
+class TestSymbols(unittest.TestCase):
+    def test_market_properties(self):
+        market = Market("KRAKEN", "XRP_EUR")
+
+        self.assertEqual(market.base, "XRP")
+        self.assertEqual(market.quote, "EUR")
+        self.assertEqual(market.coinapi_symbol_id, "KRAKEN_SPOT_XRP_EUR")
+        self.assertEqual(market.coingecko_id, "ripple")
+
+    def test_configured_markets(self):
+        markets = configured_markets(
+            [
+                {"exchange": "bitstamp", "symbol": "xrp_usd"},
+                {"exchange": "KRAKEN", "symbol": "XRP_EUR"},
+                {"exchange": "BITSTAMP", "symbol": "XRP_USD"},
+            ]
+        )
+
+        self.assertEqual(markets, [DEFAULT_MARKET, Market("KRAKEN", "XRP_EUR")])
+
+    @patch("src.data_collection.symbols.config", {"data_collection": {}})
+    def test_default_market_when_none_configured(self):
+        self.assertEqual(configured_markets(), [DEFAULT_MARKET])
+
+    def test_rejects_unknown_symbols(self):
+        with self.assertRaises(ValueError):
+            configured_markets([{"exchange": "KRAKEN", "symbol": "XRPEUR"}])
+        with self.assertRaises(ValueError):
+            configured_markets([{"exchange": "KRAKEN", "symbol": "DOGE_EUR"}])
+
+    def test_markets_by_quote(self):
+        markets = [
+            DEFAULT_MARKET,
+            Market("KRAKEN", "XRP_USD"),
+            Market("KRAKEN", "XRP_EUR"),
+        ]
+
+        self.assertEqual(
+            markets_by_quote(markets), {"USD": ["ripple"], "EUR": ["ripple"]}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import sessionmaker
+
+from src.data_collection.symbols import Market
+from src.data_collection.synthetic import (
+    SyntheticSeries,
+    generate_synthetic_data,
+    load_synthetic_data,
+)
+from src.models.base import engine
+from src.models.market_data_15_min import MarketData15Min
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+
+START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+
+class TestSyntheticSeries(unittest.TestCase):
+    def test_candles_respect_ohlc_invariants(self):
+        for model in ("gbm", "regime"):
+            with self.subTest(model=model):
+                ohlcv, _ = SyntheticSeries(START, model=model).next_chunk(50_000)
+
+                self.assertTrue(
+                    np.all(ohlcv["high"] >= np.maximum(ohlcv["open"], ohlcv["close"]))
+                )
+                self.assertTrue(
+                    np.all(ohlcv["low"] <= np.minimum(ohlcv["open"], ohlcv["close"]))
+                )
+                self.assertTrue(np.all(ohlcv["low"] > 0))
+                self.assertTrue(np.all(ohlcv["trades_count"] >= 1))
+                np.testing.assert_allclose(
+                    ohlcv["price_change"], ohlcv["close"] - ohlcv["open"]
+                )
+
+    def test_chunks_form_one_continuous_series(self):
+        series = SyntheticSeries(START, model="regime", seed=7)
+        first, _ = series.next_chunk(1000)
+        second, _ = series.next_chunk(1000)
+
+        self.assertEqual(first["close"][-1], second["open"][0])
+        self.assertEqual(first["timestamp"][0], START + timedelta(minutes=15))
+        self.assertEqual(
+            second["timestamp"][0] - first["timestamp"][-1], timedelta(minutes=15)
+        )
+
+    def test_volume_follows_the_size_of_the_move(self):
+        ohlcv, _ = SyntheticSeries(START).next_chunk(100_000)
+
+        moves = np.abs(np.log(ohlcv["close"] / ohlcv["open"]))
+        self.assertGreater(np.corrcoef(moves, ohlcv["volume"])[0, 1], 0.5)
+        self.assertGreater(
+            np.corrcoef(ohlcv["volume"], ohlcv["trades_count"])[0, 1], 0.9
+        )
+
+    def test_snapshots_match_the_candles(self):
+        series = SyntheticSeries(START)
+        ohlcv, snapshots = series.next_chunk(200)
+        _, later = series.next_chunk(200)
+
+        np.testing.assert_allclose(snapshots["price_usd"], ohlcv["close"])
+        np.testing.assert_allclose(
+            snapshots["market_cap"], ohlcv["close"] * snapshots["circulating_supply"]
+        )
+        self.assertTrue(np.all(np.diff(snapshots["circulating_supply"]) > 0))
+        # The rolling 24h volume spans chunk boundaries
+        quote_volume = ohlcv["volume"] * (ohlcv["open"] + ohlcv["close"]) / 2
+        self.assertAlmostEqual(snapshots["total_volume"][95], quote_volume[:96].sum())
+        self.assertGreater(later["total_volume"][0], 0)
+
+    def test_rejects_unknown_models_and_unaligned_starts(self):
+        with self.assertRaises(ValueError):
+            SyntheticSeries(START, model="heston")
+        with self.assertRaises(ValueError):
+            SyntheticSeries(START + timedelta(minutes=5))
+
+    def test_generation_is_deterministic_per_market(self):
+        markets = [Market("SYNTHETIC", "XRP_USD"), Market("SYNTHETIC", "XRP_EUR")]
+
+        def closes():
+            return {
+                market: ohlcv["close"]
+                for market, ohlcv, _ in generate_synthetic_data(
+                    START, 500, markets, chunk_size=500, seed=3
+                )
+            }
+
+        first, second = closes(), closes()
+        for market in markets:
+            np.testing.assert_array_equal(first[market], second[market])
+        self.assertFalse(np.array_equal(first[markets[0]], first[markets[1]]))
+
+
+class TestLoadSyntheticData(unittest.TestCase):
+    def setUp(self):
+        self.session = sessionmaker(bind=engine)()
+        self.market = Market(f"SYN_{uuid.uuid4().hex[:8]}", "XRP_USD")
+
+    def tearDown(self):
+        for model in (OHLCVData15Min, MarketData15Min):
+            self.session.execute(
+                delete(model).where(model.exchange == self.market.exchange)
+            )
+        self.session.commit()
+        self.session.close()
+
+    def test_loads_chunks_with_the_bulk_loader(self):
+        stats = load_synthetic_data(
+            self.session, START, 250, [self.market], chunk_size=100
+        )
+
+        self.assertEqual(stats["candles"], 250)
+        for model in (OHLCVData15Min, MarketData15Min):
+            count, last = self.session.execute(
+                select(func.count(), func.max(model.timestamp)).where(
+                    model.exchange == self.market.exchange
+                )
+            ).one()
+            self.assertEqual(count, 250)
+            self.assertEqual(last, START + 250 * timedelta(minutes=15))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from websockets.asyncio.server import serve
+
+from src.data_collection.ticks import (
+    CandleBuilder,
+    Trade,
+    bars_to_columns,
+    ingest_trades,
+    parse_bitstamp_trade,
+    replay_trades,
+    stream_trades,
+)
+
+START = datetime(2024, 10, 1, tzinfo=timezone.utc)
+
+
+def trade_at(seconds, price, amount=1.0):
+    return Trade(START + timedelta(seconds=seconds), price, amount)
+
+
+def bitstamp_message(trade):
+    microseconds = (trade.timestamp - datetime(1970, 1, 1, tzinfo=timezone.utc)) // (
+        timedelta(microseconds=1)
+    )
+    return {
+        "event": "trade",
+        "channel": "live_trades_xrpusd",
+        "data": {
+            "microtimestamp": str(microseconds),
+            "price": trade.price,
+            "amount": trade.amount,
+        },
+    }
+
+
+async def collect(trades, count=None):
+    collected = []
+    async for trade in trades:
+        collected.append(trade)
+        if len(collected) == count:
+            break
+    return collected
+
+
+class TestCandleBuilder(unittest.TestCase):
+    def test_bar_is_stamped_with_interval_end(self):
+        builder = CandleBuilder()
+
+        builder.add(trade_at(7 * 60, 0.5))
+
+        self.assertEqual(builder.partial()["timestamp"], START + timedelta(minutes=15))
+
+    def test_aggregates_trades_and_emits_at_boundary(self):
+        builder = CandleBuilder()
+        for seconds, price in [(10, 0.50), (20, 0.53), (30, 0.48), (40, 0.51)]:
+            self.assertIsNone(builder.add(trade_at(seconds, price, 2.0)))
+
+        finished = builder.add(trade_at(15 * 60, 0.52))
+
+        self.assertEqual(
+            finished,
+            {
+                "timestamp": START + timedelta(minutes=15),
+                "open": 0.50,
+                "high": 0.53,
+                "low": 0.48,
+                "close": 0.51,
+                "volume": 8.0,
+                "trades_count": 4,
+            },
+        )
+        self.assertEqual(builder.partial()["open"], 0.52)
+
+    def test_out_of_order_trades_within_bar(self):
+        builder = CandleBuilder()
+        builder.add(trade_at(20, 0.50))
+        builder.add(trade_at(10, 0.49))
+        builder.add(trade_at(30, 0.51))
+        builder.add(trade_at(25, 0.52))
+
+        bar = builder.partial()
+
+        self.assertEqual((bar["open"], bar["close"], bar["high"]), (0.49, 0.51, 0.52))
+
+    def test_late_trade_for_finished_bar_is_dropped(self):
+        builder = CandleBuilder()
+        builder.add(trade_at(10, 0.50))
+        builder.add(trade_at(16 * 60, 0.51))
+
+        self.assertIsNone(builder.add(trade_at(20, 0.70)))
+
+        self.assertEqual(builder.late_trades, 1)
+        self.assertEqual(builder.partial()["trades_count"], 1)
+
+    def test_trade_for_bar_finished_by_clock_is_dropped(self):
+        builder = CandleBuilder()
+        builder.add(trade_at(10, 0.50))
+        builder.advance(START + timedelta(minutes=15))
+
+        self.assertIsNone(builder.add(trade_at(14 * 60, 0.60)))
+
+        self.assertEqual(builder.late_trades, 1)
+        self.assertIsNone(builder.partial())
+
+    def test_advance_finishes_bar_without_trades(self):
+        builder = CandleBuilder()
+        builder.add(trade_at(10, 0.50))
+
+        self.assertIsNone(builder.advance(START + timedelta(minutes=14)))
+        finished = builder.advance(START + timedelta(minutes=15))
+
+        self.assertEqual(finished["close"], 0.50)
+        self.assertIsNone(builder.partial())
+
+    def test_bars_to_columns(self):
+        columns = bars_to_columns(
+            [
+                {
+                    "timestamp": START,
+                    "open": 0.5,
+                    "high": 0.6,
+                    "low": 0.4,
+                    "close": 0.55,
+                    "volume": 3.0,
+                    "trades_count": 2,
+                }
+            ]
+        )
+
+        self.assertEqual(columns["timestamp"], [START])
+        self.assertAlmostEqual(columns["price_change"][0], 0.05)
+
+
+class TestTradeSources(unittest.TestCase):
+    def test_parse_bitstamp_trade(self):
+        trade = trade_at(1.5, 0.5123, 250.0)
+
+        self.assertEqual(parse_bitstamp_trade(bitstamp_message(trade)), trade)
+        self.assertIsNone(
+            parse_bitstamp_trade({"event": "bts:subscription_succeeded", "data": {}})
+        )
+
+    def test_replay_trades(self):
+        trades = [trade_at(1, 0.50), trade_at(2, 0.51)]
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as file:
+            file.write(json.dumps({"event": "bts:subscription_succeeded"}) + "\n")
+            for trade in trades:
+                file.write(json.dumps(bitstamp_message(trade)) + "\n")
+        self.addCleanup(os.remove, file.name)
+
+        self.assertEqual(asyncio.run(collect(replay_trades(file.name))), trades)
+
+    @patch("src.data_collection.ticks.RECONNECT_DELAY", 0)
+    def test_stream_subscribes_and_reconnects(self):
+        """
+        A local server drops the first connection after two trades; the stream
+        reconnects, subscribes again and carries on.
+        """
+        trades = [trade_at(i, 0.50 + i / 100) for i in range(4)]
+        subscriptions = []
+
+        async def handler(websocket):
+            subscriptions.append(json.loads(await websocket.recv()))
+            await websocket.send(json.dumps({"event": "bts:subscription_succeeded"}))
+            batch = trades[:2] if len(subscriptions) == 1 else trades[2:]
+            for trade in batch:
+                await websocket.send(json.dumps(bitstamp_message(trade)))
+            if len(subscriptions) > 1:
+                await asyncio.sleep(1)
+
+        async def run():
+            async with serve(handler, "localhost", 0) as server:
+                port = server.sockets[0].getsockname()[1]
+                stream = stream_trades(f"ws://localhost:{port}")
+                try:
+                    return await collect(stream, count=4)
+                finally:
+                    await stream.aclose()
+
+        received = asyncio.run(run())
+
+        self.assertEqual(received, trades)
+        self.assertEqual(len(subscriptions), 2)
+        self.assertEqual(
+            subscriptions[0],
+            {"event": "bts:subscribe", "data": {"channel": "live_trades_xrpusd"}},
+        )
+
+    @patch("src.data_collection.ticks.RECONNECT_DELAY", 0)
+    def test_stream_gives_up_after_max_reconnects(self):
+        with self.assertRaises(ConnectionError):
+            asyncio.run(collect(stream_trades("ws://localhost:1", max_reconnects=1)))
+
+
+class TestIngestTrades(unittest.TestCase):
+    def setUp(self):
+        self.mock_db = MagicMock()
+
+    async def trades(self, *trades):
+        for trade in trades:
+            yield trade
+
+    @patch("src.data_collection.ticks.update_streaming_indicators")
+    @patch("src.data_collection.ticks.upsert_rows")
+    def test_writes_finished_and_partial_bars(
+        self, mock_upsert_rows, mock_update_indicators
+    ):
+        trades = self.trades(
+            trade_at(10, 0.50), trade_at(20, 0.52), trade_at(15 * 60 + 5, 0.53)
+        )
+
+        stats = asyncio.run(
+            ingest_trades(
+                self.mock_db, trades, partial_interval=60, clock=lambda: START
+            )
+        )
+
+        self.assertEqual(
+            stats, {"trades": 3, "bars": 1, "partial_writes": 1, "late_trades": 0}
+        )
+        finished, partial = [call.args[2] for call in mock_upsert_rows.call_args_list]
+        self.assertEqual(finished["close"], [0.52])
+        self.assertEqual(finished["timestamp"], [START + timedelta(minutes=15)])
+        self.assertEqual(partial["timestamp"], [START + timedelta(minutes=30)])
+        mock_update_indicators.assert_called_with(
+            self.mock_db, [START + timedelta(minutes=30)], [0.53]
+        )
+        self.assertEqual(self.mock_db.commit.call_count, 2)
+
+    @patch("src.data_collection.ticks.update_streaming_indicators")
+    @patch("src.data_collection.ticks.upsert_rows")
+    def test_partial_bar_written_while_stream_is_quiet(
+        self, mock_upsert_rows, mock_update_indicators
+    ):
+        async def quiet_stream():
+            yield trade_at(10, 0.50)
+            await asyncio.sleep(0.2)
+
+        stats = asyncio.run(
+            ingest_trades(
+                self.mock_db, quiet_stream(), partial_interval=0.05, clock=lambda: START
+            )
+        )
+
+        self.assertEqual(stats["bars"], 0)
+        self.assertGreaterEqual(stats["partial_writes"], 2)
+
+    @patch("src.data_collection.ticks.update_streaming_indicators")
+    @patch("src.data_collection.ticks.upsert_rows")
+    def test_quiet_stream_without_clock(self, mock_upsert_rows, mock_update_indicators):
+        async def slow_replay():
+            yield trade_at(10, 0.50)
+            await asyncio.sleep(0.3)
+            yield trade_at(15 * 60 + 5, 0.53)
+
+        stats = asyncio.run(
+            ingest_trades(self.mock_db, slow_replay(), partial_interval=0.1)
+        )
+
+        # The idle timeouts write partial bars; only the later trade finishes one
+        self.assertEqual(stats["trades"], 2)
+        self.assertEqual(stats["bars"], 1)
+        self.assertGreaterEqual(stats["partial_writes"], 2)
+
+    @patch("src.data_collection.ticks.update_streaming_indicators")
+    @patch("src.data_collection.ticks.upsert_rows")
+    def test_bar_finished_by_clock(self, mock_upsert_rows, mock_update_indicators):
+        async def stream():
+            yield trade_at(10, 0.50)
+            await asyncio.sleep(0.1)
+
+        stats = asyncio.run(
+            ingest_trades(
+                self.mock_db,
+                stream(),
+                partial_interval=60,
+                clock=lambda: START + timedelta(minutes=15),
+            )
+        )
+
+        self.assertEqual(stats["bars"], 1)
+        self.assertEqual(stats["partial_writes"], 0)
+
+    @patch("src.data_collection.ticks.upsert_rows")
+    def test_store_failure_rolls_back(self, mock_upsert_rows):
+        mock_upsert_rows.side_effect = Exception("Database error")
+
+        with self.assertRaises(Exception):
+            asyncio.run(ingest_trades(self.mock_db, self.trades(trade_at(10, 0.5))))
+
+        self.mock_db.rollback.assert_called_once()
+
+    def test_stream_failure_is_raised(self):
+        async def broken_stream():
+            yield trade_at(10, 0.50)
+            raise ConnectionError("stream down")
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(
+                ingest_trades(self.mock_db, broken_stream(), partial_interval=60)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
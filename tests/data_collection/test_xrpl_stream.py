@@ -0,0 +1,474 @@
+import asyncio
+import json
+import unittest
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.orm import Session
+from websockets.asyncio.server import serve
+
+from src.data_collection.xrpl_stream import (
+    LedgerAssembler,
+    _Connection,
+    MetricsWindow,
+    delivered_xrp,
+    ingest_ledgers,
+    last_stored_ledger,
+    ripple_time,
+    store_ledger_metrics,
+    stream_ledgers,
+    summarize_ledger,
+)
+from src.models.base import engine
+from src.models.xrpl_ledger_metrics import XRPLLedgerMetrics
+
+FIRST_LEDGER = 90_000_000
+FIRST_CLOSE_TIME = 780_000_000  # Ripple epoch seconds, September 2024
+
+
+def payment(amount, result="tesSUCCESS", delivered=None, hash=None):
+    transaction = {
+        "TransactionType": "Payment",
+        "Account": "rSender",
+        "Destination": "rReceiver",
+        "Amount": amount,
+        "hash": hash or f"TX{amount}",
+    }
+    meta = {"TransactionResult": result}
+    if delivered is not None:
+        meta["delivered_amount"] = delivered
+    elif result == "tesSUCCESS":
+        meta["delivered_amount"] = amount
+    return transaction, meta
+
+
+def record_ledgers(count):
+    """
+    Build a recording of ``count`` consecutive ledgers closing four seconds
+    apart. Each has an XRP payment of 10 XRP, an issued-currency payment, an offer
+    and a failed payment; every fifth ledger also has a 2M XRP transfer.
+    """
+    ledgers = []
+    for n in range(count):
+        transactions = [
+            payment("10000000", hash=f"PAY{n}"),
+            payment({"currency": "USD", "issuer": "rIssuer", "value": "5"}),
+            ({"TransactionType": "OfferCreate"}, {"TransactionResult": "tesSUCCESS"}),
+            payment("99000000", result="tecUNFUNDED_PAYMENT"),
+        ]
+        if n % 5 == 0:
+            transactions.append(payment("2000000000000", hash=f"WHALE{n}"))
+        ledgers.append(
+            {
+                "ledger_index": FIRST_LEDGER + n,
+                "close_time": FIRST_CLOSE_TIME + 4 * n,
+                "transactions": transactions,
+            }
+        )
+    return ledgers
+
+
+class ReplayXRPLServer:
+    """
+    Local stand-in for an XRPL node that replays recorded ledgers.
+
+    Ledgers up to ``validated`` are history, served by the ``ledger`` command; the
+    rest are published live, ``speed`` times faster than they closed. The server
+    drops each connection after ``drop_after`` live ledgers and lets ``skip``
+    ledgers close while the client is away.
+    """
+
+    def __init__(self, ledgers, validated, speed=1000, drop_after=None, skip=0):
+        self.ledgers = {ledger["ledger_index"]: ledger for ledger in ledgers}
+        self.last = ledgers[-1]["ledger_index"]
+        self.validated = validated
+        self.speed = speed
+        self.drop_after = drop_after
+        self.skip = skip
+        self.connections = 0
+        self.ledger_requests = []
+
+    async def handler(self, websocket):
+        self.connections += 1
+        if self.connections > 1:
+            self.validated = min(self.validated + self.skip, self.last)
+        publisher = None
+        async for raw in websocket:
+            request = json.loads(raw)
+            if request["command"] == "subscribe":
+                result = {"ledger_index": self.validated}
+                publisher = asyncio.create_task(self.publish(websocket))
+            elif request["ledger_index"] == "validated":
+                self.ledger_requests.append("validated")
+                result = {"ledger_index": self.validated}
+            else:
+                self.ledger_requests.append(request["ledger_index"])
+                result = {"ledger": self.ledger_result(request["ledger_index"])}
+            await websocket.send(
+                json.dumps(
+                    {
+                        "id": request["id"],
+                        "type": "response",
+                        "status": "success",
+                        "result": result,
+                    }
+                )
+            )
+        if publisher is not None:
+            publisher.cancel()
+
+    def ledger_result(self, ledger_index):
+        ledger = self.ledgers[ledger_index]
+        return {
+            "ledger_index": str(ledger_index),
+            "close_time": ledger["close_time"],
+            "transactions": [
+                {**transaction, "metaData": meta}
+                for transaction, meta in ledger["transactions"]
+            ],
+        }
+
+    async def publish(self, websocket):
+        published = 0
+        while self.validated < self.last:
+            if self.drop_after is not None and published == self.drop_after:
+                await websocket.close()
+                return
+            ledger = self.ledgers[self.validated + 1]
+            previous = self.ledgers.get(self.validated)
+            if previous is not None:
+                await asyncio.sleep(
+                    (ledger["close_time"] - previous["close_time"]) / self.speed
+                )
+            # rippled publishes the ledger header before its transactions
+            await websocket.send(
+                json.dumps(
+                    {
+                        "type": "ledgerClosed",
+                        "ledger_index": ledger["ledger_index"],
+                        "ledger_time": ledger["close_time"],
+                        "txn_count": len(ledger["transactions"]),
+                    }
+                )
+            )
+            for transaction, meta in ledger["transactions"]:
+                await websocket.send(
+                    json.dumps(
+                        {
+                            "type": "transaction",
+                            "validated": True,
+                            "ledger_index": ledger["ledger_index"],
+                            "transaction": transaction,
+                            "meta": meta,
+                        }
+                    )
+                )
+            self.validated += 1
+            published += 1
+
+
+async def replay(server, count, **kwargs):
+    """Collect ``count`` ledger summaries from the stand-in server."""
+    async with serve(server.handler, "localhost", 0) as websocket_server:
+        port = websocket_server.sockets[0].getsockname()[1]
+        ledgers = stream_ledgers(
+            f"ws://localhost:{port}", large_transfer_xrp=1_000_000, **kwargs
+        )
+        collected = []
+        try:
+            async for summary in ledgers:
+                collected.append(summary)
+                if len(collected) == count:
+                    break
+        finally:
+            await ledgers.aclose()
+        return collected
+
+
+class TestLedgerMetrics(unittest.TestCase):
+    def test_delivered_xrp(self):
+        self.assertEqual(delivered_xrp(*payment("2500000")), 2.5)
+        # Partial payments count what was delivered
+        self.assertEqual(delivered_xrp(*payment("9000000", delivered="1000000")), 1.0)
+        self.assertIsNone(delivered_xrp(*payment({"currency": "USD", "value": "1"})))
+        self.assertIsNone(delivered_xrp(*payment("1000000", result="tecPATH_DRY")))
+        self.assertIsNone(
+            delivered_xrp(
+                {"TransactionType": "OfferCreate"}, {"TransactionResult": "tesSUCCESS"}
+            )
+        )
+
+    def test_summarize_ledger(self):
+        ledger = record_ledgers(1)[0]
+        server = ReplayXRPLServer([ledger], validated=FIRST_LEDGER)
+
+        summary = summarize_ledger(server.ledger_result(FIRST_LEDGER), 1_000_000)
+
+        self.assertEqual(
+            summary.to_row(),
+            {
+                "timestamp": ripple_time(FIRST_CLOSE_TIME),
+                "ledger_index": FIRST_LEDGER,
+                "txn_count": 5,
+                "payment_count": 2,
+                "payment_volume_xrp": 2_000_010.0,
+                "max_payment_xrp": 2_000_000.0,
+                "large_transfer_count": 1,
+            },
+        )
+        self.assertEqual(summary.large_transfers[0]["hash"], "WHALE0")
+
+    def test_assembler_waits_for_every_transaction(self):
+        assembler = LedgerAssembler(FIRST_LEDGER - 1, 1_000_000)
+        header = {
+            "type": "ledgerClosed",
+            "ledger_index": FIRST_LEDGER,
+            "ledger_time": FIRST_CLOSE_TIME,
+            "txn_count": 2,
+        }
+        transaction, meta = payment("1000000")
+        message = {
+            "type": "transaction",
+            "ledger_index": FIRST_LEDGER,
+            "transaction": transaction,
+            "meta": meta,
+        }
+
+        self.assertEqual(assembler.add(message), [])
+        self.assertEqual(assembler.add(header), [])
+        (summary,) = assembler.add(message)
+
+        self.assertEqual(summary.payment_count, 2)
+        self.assertEqual(assembler.pending, {})
+        # Messages for released ledgers are ignored
+        self.assertEqual(assembler.add(message), [])
+
+    def test_assembler_releases_incomplete_ledger_on_next_header(self):
+        assembler = LedgerAssembler(None, 1_000_000)
+        for n in range(2):
+            assembler.add(
+                {
+                    "type": "ledgerClosed",
+                    "ledger_index": FIRST_LEDGER + n,
+                    "ledger_time": FIRST_CLOSE_TIME + 4 * n,
+                    "txn_count": 3,
+                }
+            )
+
+        self.assertEqual(list(assembler.pending), [FIRST_LEDGER + 1])
+        self.assertEqual(assembler.after, FIRST_LEDGER)
+
+    def test_metrics_window_evicts_old_ledgers(self):
+        window = MetricsWindow(timedelta(seconds=10))
+        rows = [
+            {
+                "timestamp": ripple_time(FIRST_CLOSE_TIME + 4 * n),
+                "txn_count": 10,
+                "payment_count": 2,
+                "payment_volume_xrp": 1.5,
+                "large_transfer_count": n % 2,
+            }
+            for n in range(5)
+        ]
+
+        windowed = [window.add(row) for row in rows]
+
+        self.assertEqual([row["window_ledgers"] for row in windowed], [1, 2, 3, 3, 3])
+        self.assertEqual(windowed[-1]["window_txn_count"], 30)
+        self.assertEqual(windowed[-1]["window_payment_volume_xrp"], 4.5)
+        self.assertEqual(windowed[-1]["window_large_transfer_count"], 1)
+        self.assertEqual(len(window.entries), 3)
+
+
+class TestStreamLedgers(unittest.TestCase):
+    def test_live_stream_starts_after_validated_ledger(self):
+        server = ReplayXRPLServer(record_ledgers(10), validated=FIRST_LEDGER + 2)
+
+        summaries = asyncio.run(replay(server, 7))
+
+        self.assertEqual(
+            [summary.ledger_index for summary in summaries],
+            list(range(FIRST_LEDGER + 3, FIRST_LEDGER + 10)),
+        )
+        self.assertEqual(server.ledger_requests, [])
+        self.assertEqual(summaries[2].large_transfers[0]["hash"], "WHALE5")
+        self.assertEqual(summaries[0].txn_count, 4)
+
+    @patch("src.data_collection.xrpl_stream.RECONNECT_DELAY", 0)
+    def test_resumes_without_gaps_after_reconnect(self):
+        """
+        The stream resumes from a stored ledger, loses the connection twice while
+        ledgers keep closing, and still yields every ledger exactly once.
+        """
+        server = ReplayXRPLServer(
+            record_ledgers(30), validated=FIRST_LEDGER + 5, drop_after=6, skip=3
+        )
+
+        summaries = asyncio.run(replay(server, 28, resume_from=FIRST_LEDGER + 1))
+
+        self.assertEqual(
+            [summary.ledger_index for summary in summaries],
+            list(range(FIRST_LEDGER + 2, FIRST_LEDGER + 30)),
+        )
+        self.assertEqual(server.connections, 3)
+        self.assertEqual(
+            server.ledger_requests,
+            [FIRST_LEDGER + n for n in [2, 3, 4, 5, 12, 13, 14, 21, 22, 23]],
+        )
+
+    def test_resume_is_bounded(self):
+        server = ReplayXRPLServer(record_ledgers(10), validated=FIRST_LEDGER + 9)
+
+        summaries = asyncio.run(
+            replay(server, 3, resume_from=FIRST_LEDGER, max_resume_ledgers=3)
+        )
+
+        self.assertEqual(
+            [summary.ledger_index for summary in summaries],
+            [FIRST_LEDGER + 7, FIRST_LEDGER + 8, FIRST_LEDGER + 9],
+        )
+
+    def test_buffer_overflow_resumes_from_the_last_ledger(self):
+        """
+        Live ledgers closing much faster than the resume fetches overflow the
+        buffer; the dropped ledgers are fetched instead and none is lost.
+        """
+        server = ReplayXRPLServer(
+            record_ledgers(30), validated=FIRST_LEDGER + 5, speed=1_000_000
+        )
+
+        summaries = asyncio.run(
+            replay(server, 29, resume_from=FIRST_LEDGER, max_buffered=5)
+        )
+
+        self.assertEqual(
+            [summary.ledger_index for summary in summaries],
+            list(range(FIRST_LEDGER + 1, FIRST_LEDGER + 30)),
+        )
+        self.assertIn("validated", server.ledger_requests)
+
+    def test_connection_buffer_is_bounded(self):
+        class FakeWebsocket:
+            def __init__(self, messages):
+                self.messages = [json.dumps(message) for message in messages]
+
+            async def send(self, raw):
+                pass
+
+            async def recv(self):
+                return self.messages.pop(0)
+
+        stream = [{"type": "transaction", "ledger_index": n} for n in range(7)]
+        response = {"type": "response", "id": 1, "status": "success", "result": {}}
+        connection = _Connection(FakeWebsocket(stream + [response]), max_buffered=3)
+
+        asyncio.run(connection.request({"command": "ledger"}))
+
+        self.assertTrue(connection.overflowed)
+        self.assertEqual(
+            [message["ledger_index"] for message in connection.buffered], [6]
+        )
+
+    @patch("src.data_collection.xrpl_stream.RECONNECT_DELAY", 0)
+    def test_gives_up_after_max_reconnects(self):
+        async def first_ledger():
+            async for summary in stream_ledgers("ws://localhost:1", max_reconnects=1):
+                return summary
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(first_ledger())
+
+
+class TestIngestLedgers(unittest.TestCase):
+    @patch("src.data_collection.xrpl_stream.store_ledger_metrics")
+    def test_batches_rows_and_reports_large_transfers(self, mock_store):
+        ledgers = record_ledgers(12)
+        server = ReplayXRPLServer(ledgers, validated=FIRST_LEDGER)
+        summaries = [
+            summarize_ledger(server.ledger_result(ledger["ledger_index"]), 1_000_000)
+            for ledger in ledgers
+        ]
+
+        async def stream():
+            for summary in summaries:
+                yield summary
+
+        alerts = []
+        stats = asyncio.run(
+            ingest_ledgers(
+                MagicMock(), stream(), batch_size=5, on_large_transfer=alerts.append
+            )
+        )
+
+        self.assertEqual(stats, {"ledgers": 12, "batches": 3, "large_transfers": 3})
+        self.assertEqual(
+            [len(call.args[1]) for call in mock_store.call_args_list], [5, 5, 2]
+        )
+        self.assertEqual(
+            [alert["hash"] for alert in alerts], ["WHALE0", "WHALE5", "WHALE10"]
+        )
+        last_row = mock_store.call_args_list[-1].args[1][-1]
+        # Fifteen minutes holds every ledger of this recording
+        self.assertEqual(last_row["window_ledgers"], 12)
+        self.assertEqual(last_row["window_large_transfer_count"], 3)
+
+    @patch("src.data_collection.xrpl_stream.store_ledger_metrics")
+    def test_stores_processed_ledgers_when_stream_fails(self, mock_store):
+        ledger = record_ledgers(1)[0]
+        server = ReplayXRPLServer([ledger], validated=FIRST_LEDGER)
+
+        async def stream():
+            yield summarize_ledger(server.ledger_result(FIRST_LEDGER), 1_000_000)
+            raise ConnectionError("node down")
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(ingest_ledgers(MagicMock(), stream(), batch_size=5))
+
+        self.assertEqual(len(mock_store.call_args.args[1]), 1)
+
+
+class TestStoreLedgerMetrics(unittest.TestCase):
+    """
+    Storing commits, so the session runs inside an outer transaction whose commits
+    only release savepoints; everything is rolled back in tearDown.
+    """
+
+    def setUp(self):
+        self.connection = engine.connect()
+        self.transaction = self.connection.begin()
+        self.session = Session(
+            bind=self.connection, join_transaction_mode="create_savepoint"
+        )
+
+    def tearDown(self):
+        self.session.close()
+        self.transaction.rollback()
+        self.connection.close()
+
+    def test_store_is_idempotent_and_resumable(self):
+        window = MetricsWindow()
+        ledgers = record_ledgers(3)
+        server = ReplayXRPLServer(ledgers, validated=FIRST_LEDGER)
+        rows = [
+            window.add(
+                summarize_ledger(
+                    server.ledger_result(ledger["ledger_index"]), 1_000_000
+                ).to_row()
+            )
+            for ledger in ledgers
+        ]
+
+        store_ledger_metrics(self.session, rows)
+        store_ledger_metrics(self.session, rows[1:])
+
+        self.assertEqual(last_stored_ledger(self.session), FIRST_LEDGER + 2)
+        self.assertEqual(
+            self.session.query(XRPLLedgerMetrics)
+            .filter(XRPLLedgerMetrics.ledger_index >= FIRST_LEDGER)
+            .count(),
+            3,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
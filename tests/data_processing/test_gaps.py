@@ -0,0 +1,178 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import sessionmaker
+
+from src.data_processing.gaps import (
+    count_missing_buckets,
+    find_gaps,
+    find_missing_ranges,
+    gaps_to_windows,
+)
+from src.models.base import engine
+from src.models.bulk import upsert_rows
+from src.models.market_data_15_min import MarketData15Min
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+
+INTERVAL = timedelta(minutes=15)
+
+
+def ohlcv_columns(timestamps):
+    n = len(timestamps)
+    return {
+        "timestamp": timestamps,
+        "open": [1.0] * n,
+        "high": [1.1] * n,
+        "low": [0.9] * n,
+        "close": [1.05] * n,
+        "volume": [1000.0] * n,
+        "trades_count": [8] * n,
+        "price_change": [0.0] * n,
+    }
+
+
+class TestFindGaps(unittest.TestCase):
+    """
+    Gap queries run against the real database inside a rolled back transaction.
+    """
+
+    start = datetime(2018, 6, 1, tzinfo=timezone.utc)
+    end = start + INTERVAL * 199
+
+    @classmethod
+    def setUpClass(cls):
+        cls.Session = sessionmaker(bind=engine)
+
+    def setUp(self):
+        self.session = self.Session()
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.close()
+
+    def bucket(self, index):
+        return self.start + INTERVAL * index
+
+    def test_finds_interior_and_edge_gaps(self):
+        missing = {0, 1, 10, 11, 12, 13, 14, 50, 199}
+        upsert_rows(
+            self.session,
+            OHLCVData15Min,
+            ohlcv_columns([self.bucket(i) for i in range(200) if i not in missing]),
+        )
+
+        gaps = find_gaps(self.session, OHLCVData15Min, self.start, self.end)
+
+        self.assertEqual(
+            gaps,
+            [
+                (self.bucket(0), self.bucket(1)),
+                (self.bucket(10), self.bucket(14)),
+                (self.bucket(50), self.bucket(50)),
+                (self.bucket(199), self.bucket(199)),
+            ],
+        )
+        self.assertEqual(count_missing_buckets(gaps), len(missing))
+
+    def test_gaps_are_per_series(self):
+        upsert_rows(
+            self.session,
+            OHLCVData15Min,
+            ohlcv_columns([self.bucket(i) for i in range(200)]),
+        )
+
+        self.assertEqual(
+            find_gaps(self.session, OHLCVData15Min, self.start, self.end), []
+        )
+        self.assertEqual(
+            find_gaps(
+                self.session,
+                OHLCVData15Min,
+                self.start,
+                self.end,
+                exchange="KRAKEN",
+                symbol="XRP_EUR",
+            ),
+            [(self.start, self.end)],
+        )
+
+    def test_empty_range_is_one_gap(self):
+        gaps = find_gaps(self.session, OHLCVData15Min, self.start, self.end)
+
+        self.assertEqual(gaps, [(self.start, self.end)])
+
+    def test_unaligned_market_snapshots_are_bucketed(self):
+        snapshots = [
+            self.bucket(i) + timedelta(minutes=3, seconds=27)
+            for i in range(200)
+            if i != 20
+        ]
+        n = len(snapshots)
+        upsert_rows(
+            self.session,
+            MarketData15Min,
+            {
+                "timestamp": snapshots,
+                "price_usd": [1.0] * n,
+                "market_cap": [1e9] * n,
+                "total_volume": [1e6] * n,
+                "circulating_supply": [5e10] * n,
+                "total_supply": [1e11] * n,
+                "max_supply": [1e11] * n,
+            },
+        )
+
+        gaps = find_missing_ranges(
+            self.session, self.start, self.end, models=[MarketData15Min]
+        )
+
+        self.assertEqual(
+            gaps, {"market_data_15_min": [(self.bucket(20), self.bucket(20))]}
+        )
+
+
+class TestGapsToWindows(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+    def bucket(self, index):
+        return self.start + INTERVAL * index
+
+    def test_nearby_gaps_share_a_window(self):
+        gaps = [
+            (self.bucket(0), self.bucket(1)),
+            (self.bucket(40), self.bucket(40)),
+            (self.bucket(99), self.bucket(99)),
+            (self.bucket(100), self.bucket(105)),
+        ]
+
+        windows = gaps_to_windows(gaps)
+
+        self.assertEqual(
+            windows,
+            [
+                (self.bucket(-1), self.bucket(99)),
+                (self.bucket(99), self.bucket(105)),
+            ],
+        )
+
+    def test_long_gap_is_split_into_full_windows(self):
+        windows = gaps_to_windows([(self.bucket(0), self.bucket(249))])
+
+        self.assertEqual(
+            windows,
+            [
+                (self.bucket(-1), self.bucket(99)),
+                (self.bucket(99), self.bucket(199)),
+                (self.bucket(199), self.bucket(249)),
+            ],
+        )
+        for window_start, window_end in windows:
+            self.assertLessEqual((window_end - window_start) / INTERVAL, 100)
+
+    def test_no_gaps(self):
+        self.assertEqual(gaps_to_windows([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
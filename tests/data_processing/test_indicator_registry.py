@@ -0,0 +1,121 @@
+import unittest
+
+import numpy as np
+
+from src.data_processing.indicator_registry import IndicatorCache, IndicatorRegistry
+from src.data_processing.indicators import (
+    INDICATOR_COLUMNS,
+    INDICATORS,
+    compute_indicators,
+    ema,
+    macd,
+    sma,
+)
+
+
+class CountingFunction:
+    """Wraps an indicator function and counts its calls."""
+
+    def __init__(self, function):
+        self.function = function
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.function(*args, **kwargs)
+
+
+class TestIndicatorRegistry(unittest.TestCase):
+    def setUp(self):
+        self.close = 0.5 + np.cumsum(np.random.default_rng(3).normal(0, 0.01, 500))
+        self.ema = CountingFunction(ema)
+        self.sma = CountingFunction(sma)
+        self.registry = IndicatorRegistry()
+        self.registry.register("ema_12", self.ema, period=12)
+        self.registry.register("ema_26", self.ema, period=26)
+        self.registry.register("macd_line", np.subtract, inputs=("ema_12", "ema_26"))
+        self.registry.register("bb_middle", self.sma, period=20)
+
+    def test_shared_intermediates_are_computed_once(self):
+        result = self.registry.compute(
+            ["ema_12", "ema_26", "macd_line"], {"close": self.close}
+        )
+
+        self.assertEqual(self.ema.calls, 2)
+        np.testing.assert_allclose(result["macd_line"], macd(self.close)[0])
+
+    def test_new_indicator_reuses_existing_series(self):
+        # An alias of bb_middle and another consumer of ema_12 add no EMA/SMA work
+        self.registry.register("sma_20", self.sma, period=20)
+        self.registry.register("ema_gap", np.subtract, inputs=("close", "ema_12"))
+
+        self.registry.compute(
+            ["macd_line", "bb_middle", "sma_20", "ema_gap"], {"close": self.close}
+        )
+
+        self.assertEqual(self.ema.calls, 2)
+        self.assertEqual(self.sma.calls, 1)
+
+    def test_same_function_on_different_inputs_is_not_shared(self):
+        self.registry.register("ema_of_ema", self.ema, inputs=("ema_12",), period=12)
+
+        result = self.registry.compute(["ema_12", "ema_of_ema"], {"close": self.close})
+
+        self.assertEqual(self.ema.calls, 2)
+        self.assertFalse(np.allclose(result["ema_12"][30:], result["ema_of_ema"][30:]))
+
+    def test_shared_cache_is_keyed_by_data_range(self):
+        cache = IndicatorCache()
+        data = {"close": self.close}
+
+        self.registry.compute(["macd_line"], data, data_range=(0, 500), cache=cache)
+        self.registry.compute(["ema_12"], data, data_range=(0, 500), cache=cache)
+        self.assertEqual(self.ema.calls, 2)
+
+        self.registry.compute(
+            ["ema_12"], {"close": self.close[:400]}, data_range=(0, 400), cache=cache
+        )
+        self.assertEqual(self.ema.calls, 3)
+
+    def test_shared_cache_requires_data_range(self):
+        with self.assertRaises(ValueError):
+            self.registry.compute(
+                ["ema_12"], {"close": self.close}, cache=IndicatorCache()
+            )
+
+    def test_resolve_orders_dependencies(self):
+        order = [node.name for node in self.registry.resolve(["macd_line"])]
+        self.assertEqual(order, ["ema_12", "ema_26", "macd_line"])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            self.registry.register("ema_12", self.ema, period=12)
+        with self.assertRaises(KeyError):
+            self.registry.compute(["unknown"], {"close": self.close})
+        with self.assertRaises(KeyError):
+            self.registry.compute(["ema_12"], {"open": self.close})
+
+        self.registry.register("a", np.negative, inputs=("b",))
+        self.registry.register("b", np.negative, inputs=("a",))
+        with self.assertRaises(ValueError):
+            self.registry.resolve(["a"])
+
+
+class TestDefaultIndicators(unittest.TestCase):
+    def test_every_column_is_registered(self):
+        for column in INDICATOR_COLUMNS:
+            self.assertIn(column, INDICATORS)
+
+    def test_compute_subset(self):
+        close = 0.5 + np.cumsum(np.random.default_rng(5).normal(0, 0.01, 300))
+
+        subset = compute_indicators(close, columns=("bb_upper", "macd_histogram"))
+        full = compute_indicators(close)
+
+        self.assertEqual(list(subset), ["bb_upper", "macd_histogram"])
+        np.testing.assert_array_equal(subset["bb_upper"], full["bb_upper"])
+        np.testing.assert_array_equal(subset["macd_histogram"], full["macd_histogram"])
+
+
+if __name__ == "__main__":
+    unittest.main()
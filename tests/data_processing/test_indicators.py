@@ -0,0 +1,249 @@
+import math
+import statistics
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from src.data_processing.indicators import (
+    bollinger_bands,
+    compute_indicators,
+    decay_scan,
+    ema,
+    macd,
+    recompute_indicators,
+    rsi,
+    sma,
+    warmup_periods,
+)
+from src.models.base import engine
+from src.models.bulk import upsert_rows
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.technical_indicators_15_min import TechnicalIndicators15Min
+
+NAN = float("nan")
+
+
+# Straightforward per-row reference implementations
+def reference_sma(values, period):
+    return [
+        NAN if i < period - 1 else sum(values[i - period + 1 : i + 1]) / period
+        for i in range(len(values))
+    ]
+
+
+def reference_ema(values, period):
+    alpha = 2 / (period + 1)
+    result = [NAN] * len(values)
+    if len(values) < period:
+        return result
+    current = sum(values[:period]) / period
+    result[period - 1] = current
+    for i in range(period, len(values)):
+        current = alpha * values[i] + (1 - alpha) * current
+        result[i] = current
+    return result
+
+
+def reference_rsi(values, period=14):
+    result = [NAN] * len(values)
+    changes = [b - a for a, b in zip(values, values[1:])]
+    gain = sum(max(c, 0) for c in changes[:period]) / period
+    loss = sum(max(-c, 0) for c in changes[:period]) / period
+    for i in range(period, len(values)):
+        if i > period:
+            change = changes[i - 1]
+            gain = (gain * (period - 1) + max(change, 0)) / period
+            loss = (loss * (period - 1) + max(-change, 0)) / period
+        result[i] = 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+    return result
+
+
+def reference_macd(values, fast=12, slow=26, signal=9):
+    line = [
+        f - s for f, s in zip(reference_ema(values, fast), reference_ema(values, slow))
+    ]
+    signal_line = [NAN] * (slow - 1) + reference_ema(line[slow - 1 :], signal)
+    return line, signal_line, [l - s for l, s in zip(line, signal_line)]
+
+
+def reference_bollinger(values, period=20, num_std=2):
+    middle = reference_sma(values, period)
+    deviation = [
+        NAN if i < period - 1 else statistics.pstdev(values[i - period + 1 : i + 1])
+        for i in range(len(values))
+    ]
+    return (
+        [m + num_std * d for m, d in zip(middle, deviation)],
+        middle,
+        [m - num_std * d for m, d in zip(middle, deviation)],
+    )
+
+
+def random_walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return 0.5 * np.cumprod(1 + rng.normal(0, 0.004, n))
+
+
+class TestIndicatorMath(unittest.TestCase):
+    def setUp(self):
+        self.close = random_walk(1500)
+        self.values = self.close.tolist()
+
+    def assertSeriesEqual(self, actual, expected):
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-12)
+
+    def test_decay_scan_matches_recurrence(self):
+        values = np.random.default_rng(1).normal(size=2000)
+        for decay in (0.2, 0.8, 13 / 14, 0.999):
+            expected = []
+            current = 3.0
+            for value in values:
+                current = decay * current + value
+                expected.append(current)
+            self.assertSeriesEqual(decay_scan(values, decay, 3.0), expected)
+
+    def test_sma(self):
+        for period in (20, 50, 200):
+            self.assertSeriesEqual(
+                sma(self.close, period), reference_sma(self.values, period)
+            )
+
+    def test_ema(self):
+        for period in (9, 12, 26):
+            self.assertSeriesEqual(
+                ema(self.close, period), reference_ema(self.values, period)
+            )
+
+    def test_rsi(self):
+        result = rsi(self.close)
+        self.assertSeriesEqual(result, reference_rsi(self.values))
+        self.assertTrue(np.all((result[14:] >= 0) & (result[14:] <= 100)))
+
+    def test_rsi_without_losses_is_100(self):
+        result = rsi(np.arange(1.0, 40.0))
+        self.assertTrue(np.all(result[14:] == 100.0))
+
+    def test_macd(self):
+        for actual, expected in zip(macd(self.close), reference_macd(self.values)):
+            self.assertSeriesEqual(actual, expected)
+
+    def test_bollinger_bands(self):
+        for actual, expected in zip(
+            bollinger_bands(self.close), reference_bollinger(self.values)
+        ):
+            self.assertSeriesEqual(actual, expected)
+
+    def test_short_series_is_all_nan(self):
+        indicators = compute_indicators(self.close[:10])
+
+        for values in indicators.values():
+            self.assertEqual(len(values), 10)
+            self.assertTrue(np.isnan(values).all())
+
+    def test_compute_indicators_columns(self):
+        indicators = compute_indicators(self.close)
+        model_columns = {
+            column.name for column in TechnicalIndicators15Min.__table__.columns
+        }
+
+        self.assertEqual(
+            set(indicators), model_columns - {"id", "timestamp", "exchange", "symbol"}
+        )
+        self.assertSeriesEqual(indicators["ema_26"], reference_ema(self.values, 26))
+
+
+class TestRecomputeIndicators(unittest.TestCase):
+    """
+    Recomputation commits, so these tests clean up their own date range.
+    """
+
+    start = datetime(2016, 5, 1, tzinfo=timezone.utc)
+    count = 1200
+    end = start + timedelta(minutes=15) * count
+
+    @classmethod
+    def setUpClass(cls):
+        cls.Session = sessionmaker(bind=engine)
+
+    def setUp(self):
+        self.session = self.Session()
+        self.close = random_walk(self.count, seed=7)
+        timestamps = [self.start + timedelta(minutes=15) * i for i in range(self.count)]
+        upsert_rows(
+            self.session,
+            OHLCVData15Min,
+            {
+                "timestamp": timestamps,
+                "open": self.close,
+                "high": self.close * 1.01,
+                "low": self.close * 0.99,
+                "close": self.close,
+                "volume": [1000.0] * self.count,
+                "trades_count": [10] * self.count,
+                "price_change": [0.0] * self.count,
+            },
+        )
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.rollback()
+        for model in (TechnicalIndicators15Min, OHLCVData15Min):
+            self.session.query(model).filter(
+                model.timestamp.between(self.start, self.end)
+            ).delete()
+        self.session.commit()
+        self.session.close()
+
+    def stored(self, column):
+        return np.array(
+            [
+                value
+                for (value,) in self.session.query(column)
+                .filter(TechnicalIndicators15Min.timestamp >= self.start)
+                .filter(TechnicalIndicators15Min.timestamp < self.end)
+                .order_by(TechnicalIndicators15Min.timestamp)
+            ],
+            dtype=np.float64,
+        )
+
+    def test_recompute_full_history(self):
+        stats = recompute_indicators(self.session, self.start, self.end)
+
+        # Rows start once the first indicator (ema_12) has a value
+        self.assertEqual(stats["candles"], self.count)
+        self.assertEqual(stats["rows"], self.count - 11)
+        expected = compute_indicators(self.close)
+        np.testing.assert_allclose(
+            self.stored(TechnicalIndicators15Min.sma_200), expected["sma_200"][11:]
+        )
+        np.testing.assert_allclose(
+            self.stored(TechnicalIndicators15Min.rsi_14), expected["rsi_14"][11:]
+        )
+
+    def test_recompute_from_start_uses_warmup(self):
+        partial_start = self.start + timedelta(minutes=15) * (warmup_periods() + 100)
+
+        stats = recompute_indicators(self.session, partial_start, self.end)
+
+        expected = compute_indicators(self.close)
+        offset = warmup_periods() + 100
+        self.assertEqual(stats["rows"], self.count - offset)
+        for column in ("macd_signal", "rsi_14", "ema_26", "sma_200"):
+            np.testing.assert_allclose(
+                self.stored(getattr(TechnicalIndicators15Min, column)),
+                expected[column][offset:],
+                rtol=1e-8,
+            )
+
+    def test_warmup_covers_convergence(self):
+        self.assertGreaterEqual(warmup_periods(), 200)
+        self.assertGreater(
+            warmup_periods(),
+            math.log(1e-10) / math.log(13 / 14),  # Wilder smoothing
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
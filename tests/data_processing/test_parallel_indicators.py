@@ -0,0 +1,137 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from src.data_processing.indicators import compute_indicators
+from src.data_processing.indicators import warmup_periods
+from src.data_processing.parallel_indicators import (
+    MIN_CHUNK_SIZE,
+    chunk_bounds,
+    default_chunk_size,
+    compute_indicators_parallel,
+    recompute_indicators_parallel,
+)
+from src.data_processing.reader import read_arrays
+from src.models.base import engine
+from src.models.bulk import upsert_rows
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.technical_indicators_15_min import TechnicalIndicators15Min
+
+
+def random_walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return 0.5 * np.cumprod(1 + rng.normal(0, 0.004, n))
+
+
+class TestChunking(unittest.TestCase):
+    def test_chunk_bounds_cover_every_candle_once(self):
+        bounds = chunk_bounds(2500, 1000, 439)
+
+        self.assertEqual(bounds, [(0, 0, 1000), (561, 1000, 2000), (1561, 2000, 2500)])
+
+    def test_default_chunk_size_gives_every_worker_several_chunks(self):
+        # About seven years of 15-minute candles
+        count = 7 * 365 * 96
+        for workers in (2, 8, 16):
+            chunk_size = default_chunk_size(count, workers)
+            self.assertGreaterEqual(len(chunk_bounds(count, chunk_size, 439)), workers)
+
+        self.assertEqual(default_chunk_size(1_000_000, 8), 31250)
+        self.assertEqual(default_chunk_size(30_000, 8), MIN_CHUNK_SIZE)
+        self.assertGreater(MIN_CHUNK_SIZE, 10 * warmup_periods())
+
+    def test_parallel_matches_single_pass(self):
+        close = random_walk(5000, seed=2)
+
+        parallel = compute_indicators_parallel(close, workers=2, chunk_size=1200)
+
+        for name, expected in compute_indicators(close).items():
+            np.testing.assert_allclose(
+                parallel[name], expected, rtol=1e-9, atol=1e-12, err_msg=name
+            )
+
+    def test_single_worker_runs_in_process(self):
+        close = random_walk(3000, seed=4)
+
+        with patch(
+            "src.data_processing.parallel_indicators.ProcessPoolExecutor"
+        ) as mock_executor:
+            result = compute_indicators_parallel(close, workers=1, chunk_size=1000)
+
+        mock_executor.assert_not_called()
+        np.testing.assert_array_equal(
+            result["sma_200"], compute_indicators(close)["sma_200"]
+        )
+
+
+class TestRecomputeIndicatorsParallel(unittest.TestCase):
+    """
+    The recompute commits, so the session runs inside an outer transaction whose
+    commits only release savepoints; everything is rolled back in tearDown.
+    """
+
+    start = datetime(2016, 7, 1, tzinfo=timezone.utc)
+    count = 3000
+
+    def setUp(self):
+        self.connection = engine.connect()
+        self.transaction = self.connection.begin()
+        self.session = Session(
+            bind=self.connection, join_transaction_mode="create_savepoint"
+        )
+        close = random_walk(self.count, seed=9)
+        self.timestamps = [
+            self.start + timedelta(minutes=15) * i for i in range(self.count)
+        ]
+        upsert_rows(
+            self.session,
+            OHLCVData15Min,
+            {
+                "timestamp": self.timestamps,
+                "open": close,
+                "high": close * 1.01,
+                "low": close * 0.99,
+                "close": close,
+                "volume": [1000.0] * self.count,
+                "trades_count": [10] * self.count,
+                "price_change": [0.0] * self.count,
+            },
+        )
+
+    def tearDown(self):
+        self.session.close()
+        self.transaction.rollback()
+        self.connection.close()
+
+    @patch("src.data_processing.parallel_indicators.MIN_PARALLEL_CANDLES", 0)
+    def test_rebuilds_full_history(self):
+        stats = recompute_indicators_parallel(self.session, workers=2, chunk_size=1000)
+
+        history = read_arrays(self.session, OHLCVData15Min, columns=["close"])
+        expected = compute_indicators(history["close"])
+        self.assertEqual(stats["candles"], len(history["close"]))
+        self.assertEqual(stats["workers"], 2)
+
+        stored = np.array(
+            [
+                float(value)
+                for (value,) in self.session.query(TechnicalIndicators15Min.sma_200)
+                .filter(TechnicalIndicators15Min.timestamp >= self.timestamps[-100])
+                .filter(TechnicalIndicators15Min.timestamp <= self.timestamps[-1])
+                .order_by(TechnicalIndicators15Min.timestamp)
+            ]
+        )
+        last = np.searchsorted(
+            history["timestamp"],
+            np.datetime64(self.timestamps[-1].replace(tzinfo=None), "us"),
+        )
+        np.testing.assert_allclose(
+            stored, expected["sma_200"][last - 99 : last + 1], rtol=1e-8
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from src.data_processing.reader import (
+    _stream_select,
+    read_arrays,
+    read_frame,
+    read_joined_frame,
+)
+from src.models.base import engine
+from src.models.bulk import upsert_rows
+from src.models.market_data_15_min import MarketData15Min
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.technical_indicators_15_min import TechnicalIndicators15Min
+
+INTERVAL = timedelta(minutes=15)
+
+
+def ohlcv_columns(timestamps):
+    n = len(timestamps)
+    closes = [1.0 + i / 100 for i in range(n)]
+    return {
+        "timestamp": timestamps,
+        "open": closes,
+        "high": [close + 0.05 for close in closes],
+        "low": [close - 0.05 for close in closes],
+        "close": closes,
+        "volume": [1000.0] * n,
+        "trades_count": list(range(n)),
+        "price_change": [0.0] * n,
+    }
+
+
+class TestReader(unittest.TestCase):
+    """
+    Reader tests run against the real database inside a rolled back transaction.
+    """
+
+    start = datetime(2017, 2, 1, tzinfo=timezone.utc)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.Session = sessionmaker(bind=engine)
+
+    def setUp(self):
+        self.session = self.Session()
+        self.timestamps = [self.start + INTERVAL * i for i in range(20)]
+        upsert_rows(self.session, OHLCVData15Min, ohlcv_columns(self.timestamps))
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.close()
+
+    def test_read_arrays_projects_columns(self):
+        arrays = read_arrays(
+            self.session,
+            OHLCVData15Min,
+            self.start,
+            self.start + INTERVAL * 10,
+            columns=["close", "trades_count"],
+        )
+
+        self.assertEqual(list(arrays), ["timestamp", "close", "trades_count"])
+        self.assertEqual(arrays["close"].dtype, np.float64)
+        self.assertTrue(arrays["close"].flags["C_CONTIGUOUS"])
+        np.testing.assert_allclose(arrays["close"], [1.0 + i / 100 for i in range(10)])
+        np.testing.assert_array_equal(arrays["trades_count"], np.arange(10.0))
+        np.testing.assert_array_equal(
+            arrays["timestamp"],
+            np.array(
+                [ts.replace(tzinfo=None) for ts in self.timestamps[:10]],
+                dtype="datetime64[us]",
+            ),
+        )
+
+    def test_read_arrays_empty_range(self):
+        arrays = read_arrays(
+            self.session, OHLCVData15Min, self.start, self.start, columns=["close"]
+        )
+
+        self.assertEqual(len(arrays["timestamp"]), 0)
+        self.assertEqual(len(arrays["close"]), 0)
+
+    def test_read_frame_returns_nan_for_nulls(self):
+        upsert_rows(
+            self.session,
+            TechnicalIndicators15Min,
+            {"timestamp": self.timestamps[:2], "rsi_14": [55.0, None]},
+        )
+
+        frame = read_frame(
+            self.session,
+            TechnicalIndicators15Min,
+            self.start,
+            self.start + INTERVAL * 2,
+            columns=["rsi_14", "sma_200"],
+        )
+
+        self.assertEqual(str(frame.index.tz), "UTC")
+        self.assertEqual(frame["rsi_14"].iloc[0], 55.0)
+        self.assertTrue(np.isnan(frame["rsi_14"].iloc[1]))
+        self.assertTrue(frame["sma_200"].isna().all())
+
+    def test_read_joined_frame(self):
+        upsert_rows(
+            self.session,
+            TechnicalIndicators15Min,
+            {"timestamp": self.timestamps[:3], "rsi_14": [40.0, 50.0, 60.0]},
+        )
+        snapshot = self.timestamps[1] + timedelta(minutes=4)
+        upsert_rows(
+            self.session,
+            MarketData15Min,
+            {
+                "timestamp": [snapshot],
+                "price_usd": [1.02],
+                "market_cap": [1e9],
+                "total_volume": [1e6],
+                "circulating_supply": [5e10],
+                "total_supply": [1e11],
+                "max_supply": [1e11],
+            },
+        )
+
+        frame = read_joined_frame(
+            self.session,
+            self.start,
+            self.start + INTERVAL * 5,
+            ohlcv_columns=["close"],
+            market_columns=["price_usd"],
+            indicator_columns=["rsi_14"],
+        )
+
+        self.assertEqual(list(frame.columns), ["close", "rsi_14", "price_usd"])
+        self.assertEqual(len(frame), 5)
+        self.assertEqual(frame["rsi_14"].iloc[2], 60.0)
+        self.assertTrue(np.isnan(frame["rsi_14"].iloc[3]))
+        # The snapshot taken 4 minutes after candle 1 belongs to candle 2 only
+        self.assertTrue(np.isnan(frame["price_usd"].iloc[1]))
+        self.assertEqual(frame["price_usd"].iloc[2], 1.02)
+        self.assertTrue(np.isnan(frame["price_usd"].iloc[3]))
+
+    def test_read_arrays_filters_by_series(self):
+        kraken = ohlcv_columns(self.timestamps[:5])
+        kraken.update(exchange=["KRAKEN"] * 5, symbol=["XRP_EUR"] * 5, close=[0.5] * 5)
+        upsert_rows(self.session, OHLCVData15Min, kraken)
+
+        default = read_arrays(
+            self.session, OHLCVData15Min, self.start, columns=["close"]
+        )
+        other = read_arrays(
+            self.session,
+            OHLCVData15Min,
+            self.start,
+            columns=["close"],
+            exchange="KRAKEN",
+            symbol="XRP_EUR",
+        )
+
+        self.assertEqual(len(default["close"]), 20)
+        self.assertEqual(default["close"][0], 1.0)
+        np.testing.assert_array_equal(other["close"], [0.5] * 5)
+
+    def test_streamed_cursor_matches_copy(self):
+        """
+        Dialects without COPY fall back to a streamed cursor with the same output.
+        """
+        copied = read_arrays(self.session, OHLCVData15Min, self.start)
+        with patch("src.data_processing.reader._copy_select") as mock_copy_select:
+            mock_copy_select.side_effect = (
+                lambda connection, statement, column_count: _stream_select(
+                    connection, statement, chunk_size=7
+                )
+            )
+            streamed = read_arrays(self.session, OHLCVData15Min, self.start)
+
+        self.assertEqual(list(streamed), list(copied))
+        for name in copied:
+            np.testing.assert_array_equal(streamed[name], copied[name])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+import json
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from src.data_processing.indicators import INDICATOR_COLUMNS, compute_indicators
+from src.data_processing.reader import read_arrays
+from src.data_processing.streaming_indicators import (
+    STATE_NAME,
+    StreamingIndicators,
+    load_streaming_state,
+    state_name,
+    update_streaming_indicators,
+)
+from src.models.base import engine
+from src.models.bulk import upsert_rows
+from src.models.indicator_state import IndicatorState
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.technical_indicators_15_min import TechnicalIndicators15Min
+
+
+def random_walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return 0.5 * np.cumprod(1 + rng.normal(0, 0.004, n))
+
+
+class TestStreamingIndicators(unittest.TestCase):
+    def setUp(self):
+        self.close = random_walk(1200)
+        self.expected = compute_indicators(self.close)
+
+    def assertMatchesBatch(self, outputs, index):
+        for name in INDICATOR_COLUMNS:
+            expected = self.expected[name][index]
+            if np.isnan(expected):
+                self.assertIsNone(outputs[name], f"{name} at {index}")
+            else:
+                self.assertAlmostEqual(
+                    outputs[name], expected, delta=1e-9 * max(abs(expected), 1e-3)
+                )
+
+    def test_push_matches_batch(self):
+        state = StreamingIndicators()
+        for index, close in enumerate(self.close):
+            self.assertMatchesBatch(state.push(close), index)
+
+    def test_bollinger_bands_match_batch_over_a_long_series(self):
+        # A long, quiet walk at XRP's price scale: the band width is tiny next to
+        # the price, which is where a running sum of squares loses its precision
+        rng = np.random.default_rng(7)
+        close = 0.5 * np.cumprod(1 + rng.normal(0, 1e-5, 50_000))
+        expected = compute_indicators(close)
+        state = StreamingIndicators.from_history(close[:1000])
+
+        streamed = {"bb_upper": [], "bb_middle": [], "bb_lower": []}
+        for value in close[1000:]:
+            outputs = state.push(value)
+            for name in streamed:
+                streamed[name].append(outputs[name])
+
+        for name in ("bb_upper", "bb_lower"):
+            np.testing.assert_allclose(
+                np.array(streamed[name]) - np.array(streamed["bb_middle"]),
+                expected[name][1000:] - expected["bb_middle"][1000:],
+                rtol=1e-9,
+                atol=1e-15,
+                err_msg=name,
+            )
+        np.testing.assert_allclose(
+            streamed["bb_middle"], expected["bb_middle"][1000:], rtol=1e-10
+        )
+
+    def test_bootstrap_from_history(self):
+        for length in (0, 1, 13, 25, 40, 199, 200, 450):
+            with self.subTest(length=length):
+                state = StreamingIndicators.from_history(self.close[:length])
+                for index in range(length, length + 250):
+                    self.assertMatchesBatch(state.push(self.close[index]), index)
+
+    def test_snapshot_round_trip(self):
+        state = StreamingIndicators.from_history(self.close[:300])
+        restored = StreamingIndicators.from_dict(
+            json.loads(json.dumps(state.to_dict()))
+        )
+        for index in range(300, 700):
+            self.assertMatchesBatch(restored.push(self.close[index]), index)
+
+    def test_unknown_snapshot_version(self):
+        snapshot = StreamingIndicators().to_dict()
+        snapshot["version"] = 0
+        with self.assertRaises(ValueError):
+            StreamingIndicators.from_dict(snapshot)
+
+    def test_update_revises_head(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        state = StreamingIndicators.from_history(self.close[:500])
+        timestamp = start + timedelta(minutes=15) * 500
+
+        # A partial candle, then its final close, then the next candle
+        state.update(timestamp, self.close[500] * 1.02)
+        self.assertMatchesBatch(state.update(timestamp, self.close[500]), 500)
+        next_outputs = state.update(timestamp + timedelta(minutes=15), self.close[501])
+        self.assertMatchesBatch(next_outputs, 501)
+        self.assertEqual(state.count, 501)
+
+    def test_update_ignores_older_candles(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        state = StreamingIndicators()
+        state.update(start, 1.0)
+        self.assertIsNone(state.update(start - timedelta(minutes=15), 2.0))
+        self.assertEqual(state.head_close, 1.0)
+
+
+class TestUpdateStreamingIndicators(unittest.TestCase):
+    """
+    Nothing here is committed; every change is rolled back in tearDown.
+    """
+
+    start = datetime(2016, 6, 1, tzinfo=timezone.utc)
+    count = 600
+    split = 500
+
+    @classmethod
+    def setUpClass(cls):
+        cls.Session = sessionmaker(bind=engine)
+
+    def setUp(self):
+        self.session = self.Session()
+        # Start from a missing state even if the database has a live one
+        self.session.query(IndicatorState).filter(
+            IndicatorState.name == STATE_NAME
+        ).delete()
+        self.close = random_walk(self.count, seed=11)
+        self.timestamps = [
+            self.start + timedelta(minutes=15) * i for i in range(self.count)
+        ]
+        upsert_rows(
+            self.session,
+            OHLCVData15Min,
+            {
+                "timestamp": self.timestamps,
+                "open": self.close,
+                "high": self.close * 1.01,
+                "low": self.close * 0.99,
+                "close": self.close,
+                "volume": [1000.0] * self.count,
+                "trades_count": [10] * self.count,
+                "price_change": [0.0] * self.count,
+            },
+        )
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.close()
+
+    def test_state_name_per_series(self):
+        self.assertEqual(state_name(), STATE_NAME)
+        self.assertEqual(state_name("BITSTAMP", "XRP_USD"), STATE_NAME)
+        self.assertEqual(
+            state_name("KRAKEN", "XRP_EUR"), f"{STATE_NAME}:KRAKEN:XRP_EUR"
+        )
+
+    def test_bootstraps_persists_and_resumes(self):
+        written = update_streaming_indicators(
+            self.session,
+            self.timestamps[self.split :],
+            list(self.close[self.split :]),
+        )
+        self.assertEqual(written, self.count - self.split)
+
+        # Expected values cover whatever history precedes the test range
+        history = read_arrays(
+            self.session, OHLCVData15Min, end=self.timestamps[-1], columns=["close"]
+        )["close"]
+        expected = compute_indicators(np.append(history, self.close[-1]))
+        stored = (
+            self.session.query(TechnicalIndicators15Min)
+            .filter(TechnicalIndicators15Min.timestamp == self.timestamps[-1])
+            .one()
+        )
+        for name in ("rsi_14", "macd_signal", "bb_upper", "sma_200"):
+            self.assertAlmostEqual(
+                float(getattr(stored, name)), expected[name][-1], places=6
+            )
+
+        # A restart resumes from the saved row instead of replaying history
+        self.session.expire_all()
+        record, state = load_streaming_state(self.session)
+        self.assertEqual(record.last_timestamp, self.timestamps[-1])
+        self.assertEqual(state.head_timestamp, self.timestamps[-1])
+        self.assertEqual(state.count, len(history))
+
+
+if __name__ == "__main__":
+    unittest.main()
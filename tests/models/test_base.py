@@ -85,28 +85,29 @@ class TestBase(unittest.TestCase):
         mock_session.close.assert_called_once()
 
     @patch("src.models.base.Base.metadata.create_all")
-    @patch("src.models.base.engine.connect")
-    def test_init_db(self, mock_connect, mock_create_all):
+    @patch("src.models.base.provision_hypertables")
+    @patch("src.models.rollups.provision_rollups", return_value=True)
+    def test_init_db(
+        self, mock_provision_rollups, mock_provision_hypertables, mock_create_all
+    ):
         """
         Test the init_db function.
 
         This test verifies that:
         1. The function creates all tables in the database.
-        2. The TimescaleDB extension is created.
+        2. The hypertables declared in the model metadata are provisioned.
+        3. The OHLCV rollups are provisioned.
 
         Args:
-            mock_connect (MagicMock): Mock for engine.connect method.
+            mock_provision_rollups (MagicMock): Mock for provision_rollups.
+            mock_provision_hypertables (MagicMock): Mock for provision_hypertables.
             mock_create_all (MagicMock): Mock for Base.metadata.create_all method.
         """
-        mock_connection = MagicMock()
-        mock_connect.return_value.__enter__.return_value = mock_connection
-
         init_db()
 
         mock_create_all.assert_called_once_with(bind=engine)
-        mock_connection.execute.assert_called_once_with(
-            "CREATE EXTENSION IF NOT EXISTS timescaledb"
-        )
+        mock_provision_hypertables.assert_called_once_with(engine, Base.metadata)
+        mock_provision_rollups.assert_called_once_with(engine)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,200 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import engine
+from src.models.bulk import (
+    bulk_insert,
+    batch_length,
+    columns_to_rows,
+    conflict_columns_for,
+    upsert_rows,
+)
+from src.models.market_data_15_min import MarketData15Min
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.technical_indicators_15_min import TechnicalIndicators15Min
+
+
+def make_ohlcv_columns(count, start=datetime(2020, 1, 1, tzinfo=timezone.utc)):
+    timestamps = [start + timedelta(minutes=15 * i) for i in range(count)]
+    return {
+        "timestamp": timestamps,
+        "open": [1.0] * count,
+        "high": [1.2] * count,
+        "low": [0.8] * count,
+        "close": [1.1] * count,
+        "volume": [100.0] * count,
+        "trades_count": [5] * count,
+        "price_change": [0.1] * count,
+    }
+
+
+class TestBulk(unittest.TestCase):
+    """
+    A test suite for the bulk writer module.
+
+    Each test writes inside a transaction that is rolled back afterwards, so
+    nothing is left behind in the database.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up the test session factory."""
+        cls.Session = sessionmaker(bind=engine)
+
+    def setUp(self):
+        """Create a new session for each test."""
+        self.session = self.Session()
+
+    def tearDown(self):
+        """Roll back anything written during the test and close the session."""
+        self.session.rollback()
+        self.session.close()
+
+    def _count(self, start, end):
+        return (
+            self.session.query(OHLCVData15Min)
+            .filter(OHLCVData15Min.timestamp.between(start, end))
+            .count()
+        )
+
+    def test_bulk_insert_copy(self):
+        columns = make_ohlcv_columns(200)
+
+        written = bulk_insert(self.session, OHLCVData15Min, columns)
+
+        self.assertEqual(written, 200)
+        self.assertEqual(
+            self._count(columns["timestamp"][0], columns["timestamp"][-1]), 200
+        )
+
+    def test_bulk_insert_execute_values(self):
+        columns = make_ohlcv_columns(50)
+
+        written = bulk_insert(self.session, OHLCVData15Min, columns, method="values")
+
+        self.assertEqual(written, 50)
+        row = (
+            self.session.query(OHLCVData15Min)
+            .filter(OHLCVData15Min.timestamp == columns["timestamp"][0])
+            .one()
+        )
+        self.assertEqual(row.close, 1.1)
+        self.assertEqual(row.trades_count, 5)
+
+    def test_bulk_insert_empty_batch(self):
+        self.assertEqual(
+            bulk_insert(self.session, OHLCVData15Min, make_ohlcv_columns(0)), 0
+        )
+
+    def test_bulk_insert_rejects_unknown_method(self):
+        with self.assertRaises(ValueError):
+            bulk_insert(
+                self.session, OHLCVData15Min, make_ohlcv_columns(1), method="orm"
+            )
+
+    def test_upsert_overwrites_existing_rows(self):
+        for method in ("copy", "values"):
+            with self.subTest(method=method):
+                start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+                columns = make_ohlcv_columns(10, start)
+                upsert_rows(self.session, OHLCVData15Min, columns, method=method)
+
+                # Re-collect the last candle with a revised close
+                revised = make_ohlcv_columns(1, columns["timestamp"][-1])
+                revised["close"] = [2.5]
+                upsert_rows(self.session, OHLCVData15Min, revised, method=method)
+                upsert_rows(self.session, OHLCVData15Min, columns, method=method)
+                upsert_rows(self.session, OHLCVData15Min, revised, method=method)
+
+                self.assertEqual(self._count(start, columns["timestamp"][-1]), 10)
+                row = (
+                    self.session.query(OHLCVData15Min)
+                    .filter(OHLCVData15Min.timestamp == columns["timestamp"][-1])
+                    .one()
+                )
+                self.assertEqual(row.close, 2.5)
+                self.session.rollback()
+
+    def test_upsert_keeps_last_duplicate_in_batch(self):
+        timestamp = datetime(2021, 6, 1, tzinfo=timezone.utc)
+        columns = make_ohlcv_columns(2, timestamp)
+        columns["timestamp"] = [timestamp, timestamp]
+        columns["close"] = [1.0, 3.0]
+
+        written = upsert_rows(self.session, OHLCVData15Min, columns)
+
+        self.assertEqual(written, 1)
+        row = (
+            self.session.query(OHLCVData15Min)
+            .filter(OHLCVData15Min.timestamp == timestamp)
+            .one()
+        )
+        self.assertEqual(row.close, 3.0)
+
+    def test_upsert_keeps_series_apart(self):
+        timestamp = datetime(2021, 7, 1, tzinfo=timezone.utc)
+        for method in ("copy", "values"):
+            with self.subTest(method=method):
+                # Rows without a series land in the default one
+                upsert_rows(
+                    self.session,
+                    OHLCVData15Min,
+                    make_ohlcv_columns(1, timestamp),
+                    method=method,
+                )
+                kraken = make_ohlcv_columns(1, timestamp)
+                kraken.update(exchange=["KRAKEN"], symbol=["XRP_EUR"], close=[0.9])
+                upsert_rows(self.session, OHLCVData15Min, kraken, method=method)
+
+                rows = (
+                    self.session.query(OHLCVData15Min)
+                    .filter(OHLCVData15Min.timestamp == timestamp)
+                    .order_by(OHLCVData15Min.exchange)
+                    .all()
+                )
+                self.assertEqual(
+                    [(row.exchange, row.symbol, row.close) for row in rows],
+                    [("BITSTAMP", "XRP_USD", 1.1), ("KRAKEN", "XRP_EUR", 0.9)],
+                )
+                self.session.rollback()
+
+    def test_upsert_indicators_with_nulls(self):
+        timestamp = datetime(2021, 7, 1, tzinfo=timezone.utc)
+        upsert_rows(
+            self.session,
+            TechnicalIndicators15Min,
+            {"timestamp": [timestamp], "rsi_14": [None], "sma_50": [1.0]},
+        )
+        upsert_rows(
+            self.session,
+            TechnicalIndicators15Min,
+            {"timestamp": [timestamp], "rsi_14": [55.0], "sma_50": [1.5]},
+        )
+
+        row = (
+            self.session.query(TechnicalIndicators15Min)
+            .filter(TechnicalIndicators15Min.timestamp == timestamp)
+            .one()
+        )
+        self.assertEqual(row.rsi_14, 55.0)
+        self.assertEqual(row.sma_50, 1.5)
+
+    def test_conflict_columns_for(self):
+        for model in (OHLCVData15Min, MarketData15Min, TechnicalIndicators15Min):
+            self.assertEqual(
+                conflict_columns_for(model), ("exchange", "symbol", "timestamp")
+            )
+
+    def test_batch_helpers(self):
+        columns = {"a": [1, 2], "b": [3, 4]}
+        self.assertEqual(batch_length(columns), 2)
+        self.assertEqual(columns_to_rows(columns), [{"a": 1, "b": 3}, {"a": 2, "b": 4}])
+
+        with self.assertRaises(ValueError):
+            batch_length({"a": [1], "b": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from src.data_processing.reader import read_arrays
+from src.models.base import Base, engine
+from src.models.bulk import upsert_rows
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.rollups import (
+    OHLCVData1D,
+    OHLCVData1H,
+    OHLCVData1W,
+    _create_continuous_aggregate,
+    drop_rollups,
+    provision_rollups,
+    refresh_rollups,
+)
+
+CANDLE = timedelta(minutes=15)
+
+
+def executed_sql(mock_connection):
+    return [str(call.args[0]) for call in mock_connection.execute.call_args_list]
+
+
+class TestRollupDefinitions(unittest.TestCase):
+    def test_rollups_are_not_created_with_the_models(self):
+        self.assertNotIn("ohlcv_data_1h", Base.metadata.tables)
+
+    def test_continuous_aggregate_has_refresh_policy(self):
+        mock_connection = MagicMock()
+        mock_engine = MagicMock()
+        options = mock_engine.connect.return_value.execution_options.return_value
+        options.__enter__.return_value = mock_connection
+
+        _create_continuous_aggregate(mock_engine, OHLCVData1D)
+
+        statements = executed_sql(mock_connection)
+        self.assertIn("timescaledb.continuous", statements[0])
+        self.assertIn('first(open, "timestamp")', statements[0])
+        self.assertIn("\"offset\" => INTERVAL '15 minutes'", statements[0])
+        self.assertIn(
+            "add_continuous_aggregate_policy('ohlcv_data_1d_agg'", statements[1]
+        )
+        self.assertIn("refresh_continuous_aggregate", statements[2])
+        self.assertIn("CREATE OR REPLACE VIEW ohlcv_data_1d", statements[3])
+
+
+class TestTableRollups(unittest.TestCase):
+    """
+    Refreshes commit, so the session runs inside an outer transaction whose commits
+    only release savepoints; everything is rolled back in tearDown.
+    """
+
+    # A Monday, so the week bucket starts with the data
+    start = datetime(2030, 1, 7, tzinfo=timezone.utc)
+
+    @classmethod
+    def setUpClass(cls):
+        provision_rollups(engine)
+
+    def setUp(self):
+        self.connection = engine.connect()
+        self.transaction = self.connection.begin()
+        self.session = Session(
+            bind=self.connection, join_transaction_mode="create_savepoint"
+        )
+
+    def tearDown(self):
+        self.session.close()
+        self.transaction.rollback()
+        self.connection.close()
+
+    def store_candles(self, first, count, exchange="BITSTAMP", symbol="XRP_USD"):
+        """Store ``count`` candles from candle number ``first``, newest first."""
+        numbers = list(range(first + count - 1, first - 1, -1))
+        upsert_rows(
+            self.session,
+            OHLCVData15Min,
+            {
+                "exchange": [exchange] * count,
+                "symbol": [symbol] * count,
+                "timestamp": [self.start + CANDLE * (n + 1) for n in numbers],
+                "open": [100.0 + n for n in numbers],
+                "high": [101.0 + n for n in numbers],
+                "low": [99.0 + n for n in numbers],
+                "close": [100.5 + n for n in numbers],
+                "volume": [10.0] * count,
+                "trades_count": [2] * count,
+                "price_change": [0.5] * count,
+            },
+        )
+
+    def rollup(self, model, exchange="BITSTAMP", symbol="XRP_USD"):
+        return (
+            self.session.query(model)
+            .filter(
+                model.timestamp > self.start,
+                model.exchange == exchange,
+                model.symbol == symbol,
+            )
+            .order_by(model.timestamp)
+            .all()
+        )
+
+    def test_first_last_max_min_sum(self):
+        self.store_candles(0, 96 * 2)
+
+        refresh_rollups(self.session, self.start, self.start + timedelta(days=2))
+
+        hours = self.rollup(OHLCVData1H)
+        self.assertEqual(len(hours), 48)
+        first_hour = hours[0]
+        self.assertEqual(first_hour.timestamp, self.start + timedelta(hours=1))
+        self.assertEqual(first_hour.open, 100.0)
+        self.assertEqual(first_hour.close, 103.5)
+        self.assertEqual(first_hour.high, 104.0)
+        self.assertEqual(first_hour.low, 99.0)
+        self.assertEqual(first_hour.volume, 40.0)
+        self.assertEqual(first_hour.trades_count, 8)
+        self.assertEqual(first_hour.price_change, 3.5)
+        self.assertEqual(first_hour.candle_count, 4)
+
+        days = self.rollup(OHLCVData1D)
+        self.assertEqual(
+            [day.timestamp for day in days],
+            [
+                self.start + timedelta(days=1),
+                self.start + timedelta(days=2),
+            ],
+        )
+        self.assertEqual((days[1].open, days[1].close), (196.0, 291.5))
+
+        (week,) = self.rollup(OHLCVData1W)
+        self.assertEqual(week.timestamp, self.start + timedelta(weeks=1))
+        self.assertEqual(week.candle_count, 192)
+
+    def test_incremental_refresh_recomputes_latest_bucket_only(self):
+        self.store_candles(0, 96 + 2)
+        refresh_rollups(self.session)
+
+        # The partial second day gains candles; earlier days are left alone
+        self.store_candles(98, 10)
+        written = refresh_rollups(self.session)
+
+        self.assertEqual(written["ohlcv_data_1d"], 1)
+        self.assertEqual(written["ohlcv_data_1h"], 3)
+        days = self.rollup(OHLCVData1D)
+        self.assertEqual(days[-1].candle_count, 12)
+        self.assertEqual(days[-1].close, 100.5 + 107)
+
+    def test_range_refresh_rebuilds_changed_buckets(self):
+        self.store_candles(0, 96)
+        refresh_rollups(self.session)
+
+        self.session.query(OHLCVData15Min).filter(
+            OHLCVData15Min.timestamp > self.start + timedelta(hours=1)
+        ).delete()
+        refresh_rollups(self.session, self.start, self.start + timedelta(days=1))
+
+        self.assertEqual(len(self.rollup(OHLCVData1H)), 1)
+        (day,) = self.rollup(OHLCVData1D)
+        self.assertEqual(day.candle_count, 4)
+
+    def test_rollups_are_per_series(self):
+        self.store_candles(0, 96 + 2)
+        refresh_rollups(self.session)
+
+        # A new series is materialized from the start of its history, and each
+        # series is refreshed from its own latest bucket
+        self.store_candles(0, 96 + 8, "KRAKEN", "XRP_EUR")
+        self.store_candles(98, 4)
+        written = refresh_rollups(self.session)
+
+        self.assertEqual(written["ohlcv_data_1d"], 1 + 2)
+        default_days = self.rollup(OHLCVData1D)
+        kraken_days = self.rollup(OHLCVData1D, "KRAKEN", "XRP_EUR")
+        self.assertEqual([day.candle_count for day in default_days], [96, 6])
+        self.assertEqual([day.candle_count for day in kraken_days], [96, 8])
+        self.assertEqual(kraken_days[0].open, default_days[0].open)
+        arrays = read_arrays(
+            self.session,
+            OHLCVData1D,
+            self.start,
+            columns=["candle_count"],
+            exchange="KRAKEN",
+            symbol="XRP_EUR",
+        )
+        self.assertEqual(list(arrays["candle_count"]), [96.0, 8.0])
+
+    def test_drop_rollups(self):
+        drop_rollups(self.session.connection())
+
+        views = inspect(self.session.connection()).get_view_names()
+        self.assertNotIn("ohlcv_data_1h", views)
+
+
+if __name__ == "__main__":
+    unittest.main()
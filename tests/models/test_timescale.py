@@ -0,0 +1,131 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from src.models.base import Base
+from src.models.timescale import (
+    hypertable_info,
+    hypertables,
+    provision_hypertable,
+    provision_hypertables,
+)
+
+
+def executed_sql(mock_connection):
+    return [str(call.args[0]) for call in mock_connection.execute.call_args_list]
+
+
+class TestTimescale(unittest.TestCase):
+    def test_models_declare_hypertables(self):
+        names = {table.name for table in hypertables(Base.metadata)}
+
+        self.assertEqual(
+            names,
+            {
+                "market_data_15_min",
+                "ohlcv_data_15_min",
+                "technical_indicators_15_min",
+                "xrpl_ledger_metrics",
+            },
+        )
+
+    @patch(
+        "src.models.timescale.config",
+        {"timescale": {"chunk_interval": "7 days", "compress_after": "14 days"}},
+    )
+    def test_hypertable_info_uses_config_defaults(self):
+        info = hypertable_info(compress_segmentby=["symbol"])
+
+        self.assertEqual(info["hypertable_interval"], "7 days")
+        self.assertEqual(info["compress_after"], "14 days")
+        self.assertEqual(info["compress_orderby"], "timestamp DESC")
+        self.assertEqual(info["compress_segmentby"], ["symbol"])
+        self.assertIsNone(info["retention_period"])
+
+    def test_provision_hypertable_applies_policies(self):
+        table = MagicMock()
+        table.name = "ohlcv_data_15_min"
+        table.info = hypertable_info(
+            chunk_interval="30 days",
+            compress_after="90 days",
+            retention_period="5 years",
+        )
+        mock_connection = MagicMock()
+
+        provision_hypertable(mock_connection, table)
+
+        statements = executed_sql(mock_connection)
+        self.assertIn("create_hypertable", statements[0])
+        self.assertIn("set_chunk_time_interval", statements[1])
+        self.assertIn("timescaledb.compress_orderby = 'timestamp DESC'", statements[2])
+        self.assertIn("add_compression_policy", statements[3])
+        self.assertIn("add_retention_policy", statements[4])
+
+    def test_provision_hypertable_without_compression_or_retention(self):
+        table = MagicMock()
+        table.name = "ohlcv_data_15_min"
+        table.info = hypertable_info(compress_after=False)
+        mock_connection = MagicMock()
+
+        provision_hypertable(mock_connection, table)
+
+        self.assertEqual(mock_connection.execute.call_count, 2)
+
+    def test_provision_hypertable_partitions_by_symbol(self):
+        table = MagicMock()
+        table.name = "ohlcv_data_15_min"
+        table.info = hypertable_info(
+            compress_after=False, partition_column="symbol", number_partitions=8
+        )
+        mock_connection = MagicMock()
+        # No symbol dimension yet, and the table is empty
+        mock_connection.execute.return_value.scalar.side_effect = [None, False]
+
+        provision_hypertable(mock_connection, table)
+
+        statements = executed_sql(mock_connection)
+        self.assertIn("timescaledb_information.dimensions", statements[2])
+        self.assertIn("add_dimension", statements[4])
+        self.assertEqual(
+            mock_connection.execute.call_args_list[4].args[1]["partitions"], 8
+        )
+
+    def test_space_dimension_skipped_for_tables_with_rows(self):
+        table = MagicMock()
+        table.name = "ohlcv_data_15_min"
+        table.info = hypertable_info(compress_after=False, partition_column="symbol")
+        mock_connection = MagicMock()
+        mock_connection.execute.return_value.scalar.side_effect = [None, True]
+
+        with self.assertLogs("models", level="WARNING"):
+            provision_hypertable(mock_connection, table)
+
+        self.assertFalse(
+            any("add_dimension" in sql for sql in executed_sql(mock_connection))
+        )
+
+    def test_provision_skipped_without_timescaledb(self):
+        """
+        The local test database has no TimescaleDB, so tables stay regular.
+        """
+        mock_engine = MagicMock()
+        mock_connection = mock_engine.begin.return_value.__enter__.return_value
+        mock_connection.execute.return_value.scalar.return_value = None
+
+        self.assertFalse(provision_hypertables(mock_engine, Base.metadata))
+        self.assertEqual(mock_connection.execute.call_count, 1)
+
+    @patch("src.models.timescale.provision_hypertable")
+    def test_provision_converts_every_hypertable(self, mock_provision_hypertable):
+        mock_engine = MagicMock()
+        mock_connection = mock_engine.begin.return_value.__enter__.return_value
+        mock_connection.execute.return_value.scalar.return_value = 1
+
+        self.assertTrue(provision_hypertables(mock_engine, Base.metadata))
+        self.assertIn(
+            "CREATE EXTENSION IF NOT EXISTS timescaledb", executed_sql(mock_connection)
+        )
+        self.assertEqual(mock_provision_hypertable.call_count, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
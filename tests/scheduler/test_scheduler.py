@@ -0,0 +1,305 @@
+import contextlib
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from sqlalchemy.orm import Session
+
+from src.data_collection.collector import parse_ohlcv_candles
+from src.data_collection.symbols import Market
+from src.models.base import engine
+from src.models.bulk import upsert_rows
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.scheduler.scheduler import (
+    Scheduler,
+    catch_up_collection,
+    collect_tick,
+    due_tick,
+    floor_to_interval,
+    latest_ohlcv_tick,
+)
+from tests.data_collection.test_backfill import make_candles
+
+START = datetime(2024, 10, 1, 12, 7, 13, tzinfo=timezone.utc)
+INTERVAL = timedelta(minutes=15)
+SETTLE = timedelta(seconds=30)
+
+
+def at(hour, minute, second=0):
+    return datetime(2024, 10, 1, hour, minute, second, tzinfo=timezone.utc)
+
+
+class FakeTime:
+    """A wall clock and a monotonic clock that only move when slept on."""
+
+    def __init__(self, now=START, wake_early=False, oversleep=0.0):
+        self.now = now
+        self.monotonic_seconds = 0.0
+        self.wake_early = wake_early
+        self.oversleep = oversleep
+        self.longest_sleep = 0.0
+        self.on_sleep = None
+
+    def clock(self):
+        return self.now
+
+    def monotonic(self):
+        return self.monotonic_seconds
+
+    def advance(self, seconds, monotonic=True):
+        self.now += timedelta(seconds=seconds)
+        if monotonic:
+            self.monotonic_seconds += seconds
+
+    def sleep(self, seconds):
+        self.longest_sleep = max(self.longest_sleep, seconds)
+        if self.on_sleep is not None:
+            self.on_sleep(self)
+        # An early wake-up sleeps half as long as asked, down to a millisecond
+        if self.wake_early:
+            self.advance(max(seconds / 2, min(seconds, 0.001)))
+        else:
+            self.advance(seconds + self.oversleep)
+        return False
+
+
+class TestScheduler(unittest.TestCase):
+    """
+    A test suite for the scheduler, driven by a fake clock so no test sleeps.
+    """
+
+    def make_scheduler(self, fake, **kwargs):
+        kwargs.setdefault("max_workers", 2)
+        return Scheduler(
+            interval=INTERVAL,
+            settle=SETTLE,
+            clock=fake.clock,
+            monotonic=fake.monotonic,
+            sleep=fake.sleep,
+            **kwargs,
+        )
+
+    def test_ticks_are_aligned_to_the_grid(self):
+        """Test flooring and the due boundary with a settle delay."""
+        self.assertEqual(floor_to_interval(START, INTERVAL), at(12, 0))
+        self.assertEqual(due_tick(at(12, 15, 29), INTERVAL, SETTLE), at(12, 0))
+        self.assertEqual(due_tick(at(12, 15, 30), INTERVAL, SETTLE), at(12, 15))
+
+    def test_fires_at_boundaries_plus_settle_delay(self):
+        """Test that every tick fires exactly on its boundary plus the settle delay."""
+        fake = FakeTime(wake_early=True)
+        ticks = []
+        scheduler = self.make_scheduler(fake)
+        scheduler.add_job("record", ticks.append)
+
+        stats = scheduler.run(ticks=3)
+
+        self.assertEqual(ticks, [at(12, 15), at(12, 30), at(12, 45)])
+        self.assertEqual(fake.now.replace(microsecond=0), at(12, 45, 30))
+        self.assertEqual(stats["ticks"], 3)
+        self.assertAlmostEqual(stats["max_lateness_seconds"], 0.0, places=3)
+        self.assertEqual(stats["missed_ticks"], 0)
+
+    def test_late_wake_ups_do_not_accumulate(self):
+        """Test that oversleeping delays a tick without pushing later ticks back."""
+        fake = FakeTime(oversleep=2.0)
+        ticks = []
+        scheduler = self.make_scheduler(fake)
+        scheduler.add_job("record", ticks.append)
+
+        stats = scheduler.run(ticks=8)
+
+        self.assertEqual(ticks, [at(12, 15) + INTERVAL * i for i in range(8)])
+        self.assertGreater(stats["max_lateness_seconds"], 0)
+        self.assertLessEqual(stats["max_lateness_seconds"], 2.0)
+        # Sleeps are sliced so the wall clock is rechecked at least every minute
+        self.assertLessEqual(fake.longest_sleep, 60.0)
+
+    def test_missed_ticks_after_a_pause_are_caught_up(self):
+        """Test that ticks slept through during a suspend are handed to catch-up."""
+        fake = FakeTime()
+        ticks, catch_ups = [], []
+        scheduler = self.make_scheduler(fake)
+        scheduler.add_job(
+            "record",
+            ticks.append,
+            catch_up=lambda first, last: catch_ups.append((first, last)),
+        )
+
+        def suspend(fake):
+            # Two hours pass on the wall clock while the monotonic clock stands still
+            if fake.now >= at(12, 20) and not catch_ups and len(ticks) == 1:
+                fake.advance(2 * 3600, monotonic=False)
+
+        fake.on_sleep = suspend
+        stats = scheduler.run(ticks=2)
+        scheduler.wait()
+
+        self.assertEqual(ticks, [at(12, 15), at(14, 15)])
+        self.assertEqual(catch_ups, [(at(12, 30), at(14, 0))])
+        self.assertEqual(stats["missed_ticks"], 7)
+        self.assertEqual(stats["catch_ups"], 1)
+
+    def test_ticks_missed_while_down_are_caught_up_on_start(self):
+        """Test that a restart catches up from the last stored tick, once."""
+        fake = FakeTime()
+        ticks, catch_ups = [], []
+        scheduler = self.make_scheduler(fake)
+        scheduler.add_job(
+            "record",
+            ticks.append,
+            catch_up=lambda first, last: catch_ups.append((first, last)),
+            last_tick=lambda: at(10, 45),
+        )
+
+        scheduler.run(ticks=2)
+
+        self.assertEqual(catch_ups, [(at(11, 0), at(12, 0))])
+        self.assertEqual(ticks, [at(12, 15), at(12, 30)])
+
+    def test_catch_up_is_limited(self):
+        """Test that ticks older than the catch-up limit are left out."""
+        fake = FakeTime()
+        catch_ups = []
+        scheduler = self.make_scheduler(fake, max_catch_up=timedelta(hours=1))
+        scheduler.add_job(
+            "record",
+            lambda tick: None,
+            catch_up=lambda first, last: catch_ups.append((first, last)),
+            last_tick=lambda: at(2, 0),
+        )
+
+        stats = scheduler.run(ticks=1)
+
+        self.assertEqual(catch_ups, [(at(11, 15), at(12, 0))])
+        self.assertEqual(stats["missed_ticks"], 40)
+
+    def test_slow_job_does_not_delay_the_next_tick(self):
+        """Test that a tick fires while the previous tick's job is still running."""
+        fake = FakeTime()
+        second_tick_started = threading.Event()
+        overlapped = []
+
+        def job(tick):
+            if tick == at(12, 15):
+                # A slow write, still running when the next tick is due
+                overlapped.append(second_tick_started.wait(timeout=5))
+            else:
+                second_tick_started.set()
+
+        scheduler = self.make_scheduler(fake)
+        scheduler.add_job("slow", job)
+        scheduler.run(ticks=2)
+
+        self.assertEqual(overlapped, [True])
+
+    def test_failures_are_counted_and_do_not_stop_the_loop(self):
+        """Test that a failing job is logged and later ticks still fire."""
+        fake = FakeTime()
+        ticks = []
+
+        def job(tick):
+            ticks.append(tick)
+            raise RuntimeError("provider down")
+
+        scheduler = self.make_scheduler(fake, max_workers=1)
+        scheduler.add_job("failing", job)
+        stats = scheduler.run(ticks=2)
+
+        self.assertEqual(len(ticks), 2)
+        self.assertEqual(stats["failures"], 2)
+
+    def test_stop(self):
+        """Test that stop ends the run loop during a sleep."""
+        fake = FakeTime()
+        ticks = []
+        scheduler = self.make_scheduler(fake)
+        scheduler.add_job("record", ticks.append)
+
+        def stop_after_first_tick(fake):
+            if ticks:
+                scheduler.stop()
+
+        fake.on_sleep = stop_after_first_tick
+        scheduler.run()
+
+        self.assertEqual(ticks, [at(12, 15)])
+
+
+class TestCollectionJob(unittest.TestCase):
+    """
+    Tests of the collection job's functions, in a transaction rolled back afterwards.
+    """
+
+    markets = [Market("TESTA", "XRP_USD"), Market("TESTB", "XRP_USD")]
+
+    def setUp(self):
+        self.connection = engine.connect()
+        self.transaction = self.connection.begin()
+        self.session = Session(
+            bind=self.connection, join_transaction_mode="create_savepoint"
+        )
+        # The jobs close their session; the test's one must outlive them
+        patcher = patch(
+            "src.scheduler.scheduler.SessionLocal",
+            lambda: contextlib.nullcontext(self.session),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.session.close()
+        self.transaction.rollback()
+        self.connection.close()
+
+    def store(self, market, last):
+        candles = make_candles(last - timedelta(hours=1), last)
+        upsert_rows(self.session, OHLCVData15Min, parse_ohlcv_candles(candles, market))
+
+    def test_latest_tick_is_the_market_furthest_behind(self):
+        """Test that recovery starts from the oldest of the markets' latest candles."""
+        self.assertIsNone(latest_ohlcv_tick(self.markets))
+        self.store(self.markets[0], at(12, 0))
+        self.store(self.markets[1], at(10, 45))
+
+        self.assertEqual(latest_ohlcv_tick(self.markets), at(10, 45))
+        self.assertEqual(latest_ohlcv_tick(self.markets[:1]), at(12, 0))
+
+    @patch("src.scheduler.scheduler.repair_market_gaps")
+    @patch("src.scheduler.scheduler.repair_gaps")
+    def test_catch_up_repairs_every_market(self, mock_repair_gaps, mock_market_gaps):
+        """Test that a failing market is raised after the others are caught up."""
+        kraken = Market("KRAKEN", "XRP_EUR")
+        markets = self.markets + [kraken]
+        mock_repair_gaps.side_effect = [RuntimeError("provider down"), None, None]
+
+        with self.assertRaisesRegex(RuntimeError, "provider down"):
+            catch_up_collection(at(11, 0), at(12, 0), markets)
+
+        self.assertEqual(
+            [c.kwargs["market"] for c in mock_repair_gaps.call_args_list], markets
+        )
+        # Market data is stored per symbol, so XRP_USD is repaired once
+        self.assertEqual(
+            [c.kwargs["market"] for c in mock_market_gaps.call_args_list],
+            [self.markets[1], kraken],
+        )
+
+    @patch("src.scheduler.scheduler.run_async_data_collection")
+    def test_collection_failures_reach_the_scheduler(self, mock_run_collection):
+        """Test that a failed collection or source raises, so the scheduler counts it"""
+        mock_run_collection.return_value = {"failed": []}
+        collect_tick(at(12, 15))
+
+        mock_run_collection.return_value = {"failed": ["coinapi_ohlcv_kraken_xrp_eur"]}
+        with self.assertRaisesRegex(RuntimeError, "coinapi_ohlcv_kraken_xrp_eur"):
+            collect_tick(at(12, 15))
+
+        mock_run_collection.side_effect = RuntimeError("database down")
+        with self.assertRaisesRegex(RuntimeError, "database down"):
+            collect_tick(at(12, 15))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import functools
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.orm import Session
+
+from src.data_collection.backfill import (
+    CreditBudget,
+    job_id_for_range,
+    job_range,
+    plan_windows,
+    repair_gaps,
+    resume_backfill,
+    run_backfill,
+)
+from src.models.base import engine
+from src.models.ohlcv_data_15_min import OHLCVData15Min
+from src.models.rollups import OHLCVData1D, OHLCVData1H, provision_rollups
+from tests.data_collection.test_backfill import make_candles
+
+# Scripts import their siblings (path_setup) as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "scripts"))
+import backfill_historical_data  # noqa: E402
+
+
+class UnlimitedBudget(CreditBudget):
+    """A budget without a limit, so the tests don't spend the shared ledger."""
+
+    def forecast(self):
+        return {"exhausted_at": None}
+
+
+class TestBackfillScript(unittest.TestCase):
+    """
+    Runs the script's back-fill steps against the real database, inside an outer
+    transaction whose commits only release savepoints; everything is rolled back
+    in tearDown.
+    """
+
+    start = datetime(2031, 3, 3, tzinfo=timezone.utc)
+    end = start + timedelta(days=3)
+
+    @classmethod
+    def setUpClass(cls):
+        provision_rollups(engine)
+
+    def setUp(self):
+        self.connection = engine.connect()
+        self.transaction = self.connection.begin()
+        self.session = Session(
+            bind=self.connection, join_transaction_mode="create_savepoint"
+        )
+        self.client = MagicMock()
+        self.client.get_historical_ohlcv_data.side_effect = (
+            lambda start, end, **kwargs: make_candles(start, end)
+        )
+        self.patches = [
+            patch.object(
+                backfill_historical_data, "SessionLocal", return_value=self.session
+            ),
+            patch.object(
+                backfill_historical_data, "credit_budget", UnlimitedBudget(None)
+            ),
+            patch.object(
+                backfill_historical_data,
+                "repair_gaps",
+                functools.partial(repair_gaps, coinapi_client=self.client),
+            ),
+            patch.object(
+                backfill_historical_data,
+                "resume_backfill",
+                functools.partial(resume_backfill, coinapi_client=self.client),
+            ),
+        ]
+        for patcher in self.patches:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+        self.session.close()
+        self.transaction.rollback()
+        self.connection.close()
+
+    def rollup_count(self, model):
+        return (
+            self.session.query(model)
+            .filter(model.timestamp > self.start, model.timestamp <= self.end)
+            .count()
+        )
+
+    def test_repair_refreshes_rollups(self):
+        first_candle = self.start + timedelta(minutes=15)
+
+        stats = backfill_historical_data.repair(first_candle, self.end)
+
+        self.assertEqual(stats["rows"], 3 * 96)
+        self.assertEqual(self.rollup_count(OHLCVData1H), 3 * 24)
+        self.assertEqual(self.rollup_count(OHLCVData1D), 3)
+
+    def test_resume_refreshes_rollups_over_the_journaled_range(self):
+        job_id = job_id_for_range(self.start, self.end)
+        windows = plan_windows(self.start, self.end)
+        failing = MagicMock()
+        failing.get_historical_ohlcv_data.side_effect = RuntimeError("reset")
+        with self.assertRaises(RuntimeError):
+            run_backfill(
+                self.session,
+                coinapi_client=failing,
+                budget=CreditBudget(None),
+                windows=windows,
+                job_id=job_id,
+            )
+        self.assertEqual(job_range(self.session, job_id), (self.start, self.end))
+
+        stats = backfill_historical_data.resume(job_id)
+
+        self.assertEqual(stats["rows"], 3 * 96)
+        self.assertEqual(
+            self.session.query(OHLCVData15Min)
+            .filter(
+                OHLCVData15Min.timestamp > self.start,
+                OHLCVData15Min.timestamp <= self.end,
+            )
+            .count(),
+            3 * 96,
+        )
+        self.assertEqual(self.rollup_count(OHLCVData1D), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
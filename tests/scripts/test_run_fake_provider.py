@@ -0,0 +1,32 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Scripts import their siblings (path_setup) as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "scripts"))
+import run_fake_provider  # noqa: E402
+
+
+class TestRunFakeProvider(unittest.TestCase):
+    def test_options_override_the_configuration(self):
+        settings = {"port": 8765, "error_rate": 0.1, "retry_after_seconds": 7}
+        argv = ["run_fake_provider.py", "--port", "0", "--latency-ms", "5"]
+
+        with patch.dict(run_fake_provider.config, {"fake_provider": settings}):
+            with patch.object(sys, "argv", argv):
+                args = run_fake_provider.parse_args()
+            server = run_fake_provider.FakeProviderServer.from_config(
+                run_fake_provider.server_settings(args)
+            )
+
+        # Settings not given on the command line, like the Retry-After, still apply
+        self.assertEqual(server.retry_after, 7)
+        self.assertEqual(server.error_rate, 0.1)
+        self.assertEqual(server.latency, 0.005)
+        self.assertNotEqual(server._server.server_address[1], 8765)
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()